@@ -0,0 +1,168 @@
+# Copyright (c) 2025, WSO2 LLC. (https://www.wso2.com).
+#
+# WSO2 LLC. licenses this file to you under the Apache License,
+# Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""
+End-to-end export throughput of the instrumentation pipeline.
+
+A worker interpreter is started the way amp-instrument starts applications
+(_bootstrap on PYTHONPATH, real Traceloop SDK), with AMP_OTEL_ENDPOINT pointing
+at an in-process OTLPReceiver. The worker times thousands of synthetic calls
+plain and wrapped in a Traceloop task, then flushes. The driver reports
+spans/sec delivered to the receiver and the per-span overhead percentiles.
+
+Run directly for a report:
+
+    python benchmarks/load.py [calls]
+"""
+
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+BOOTSTRAP_DIR = (
+    Path(__file__).resolve().parent.parent
+    / "src"
+    / "amp_instrumentation"
+    / "_bootstrap"
+)
+
+
+WARMUP_CALLS = 200
+
+
+def _percentile(ordered: List[float], fraction: float) -> float:
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def _worker(calls: int) -> None:
+    """Run inside the instrumented interpreter; prints a JSON result line."""
+    import time
+
+    from opentelemetry import trace
+    from traceloop.sdk.decorators import task
+
+    import amp_instrumentation
+
+    def tool_call(value: int) -> int:
+        return value * 2
+
+    instrumented_tool_call = task(name="tool_call")(tool_call)
+
+    def timed(function: Any) -> List[float]:
+        samples = []
+        for i in range(calls):
+            started = time.perf_counter_ns()
+            function(i)
+            samples.append((time.perf_counter_ns() - started) / 1000)
+        return sorted(samples)
+
+    for i in range(WARMUP_CALLS):
+        tool_call(i)
+        instrumented_tool_call(i)
+    # Export the warm-up spans before timing
+    trace.get_tracer_provider().force_flush()  # type: ignore[attr-defined]
+
+    plain = timed(tool_call)
+    started = time.perf_counter()
+    instrumented = timed(instrumented_tool_call)
+    trace.get_tracer_provider().force_flush()  # type: ignore[attr-defined]
+    flushed = time.perf_counter()
+
+    print(
+        json.dumps(
+            {
+                "plain_p50_us": _percentile(plain, 0.50),
+                "plain_p99_us": _percentile(plain, 0.99),
+                "instrumented_p50_us": _percentile(instrumented, 0.50),
+                "instrumented_p99_us": _percentile(instrumented, 0.99),
+                "total_seconds": flushed - started,
+                "export": amp_instrumentation.stats()["export"],
+            }
+        )
+    )
+
+
+def run_load(calls: int = 5000, env: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+    """
+    Drive calls instrumented calls through the full pipeline into a local receiver.
+
+    Args:
+        calls: Number of timed instrumented calls (one span each).
+        env: Extra environment for the worker, e.g. AMP_EXPORT_* settings.
+
+    Returns:
+        Throughput, overhead percentiles and receiver statistics.
+    """
+    from amp_instrumentation.testing import OTLPReceiver
+
+    with OTLPReceiver() as receiver:
+        worker_env = {
+            key: value
+            for key, value in os.environ.items()
+            if not key.startswith(("AMP_", "PYTHON", "TRACELOOP_", "OTEL_"))
+        }
+        worker_env.update(
+            {
+                "PYTHONPATH": str(BOOTSTRAP_DIR),
+                "AMP_OTEL_ENDPOINT": receiver.endpoint,
+                "AMP_AGENT_API_KEY": "benchmark-key",
+            }
+        )
+        worker_env.update(env or {})
+        result = subprocess.run(
+            [sys.executable, __file__, "--worker", str(calls)],
+            env=worker_env,
+            capture_output=True,
+            text=True,
+        )
+        if result.returncode != 0:
+            raise RuntimeError(f"Load worker failed: {result.stderr}")
+        worker = json.loads(result.stdout.strip().splitlines()[-1])
+        received = receiver.stats()
+
+    timed_spans = received["spans"] - WARMUP_CALLS
+    return {
+        "calls": calls,
+        "spans_received": timed_spans,
+        "spans_dropped": worker["export"]["spans_dropped"],
+        "spans_per_sec": timed_spans / worker["total_seconds"],
+        "overhead_p50_us": worker["instrumented_p50_us"] - worker["plain_p50_us"],
+        "overhead_p99_us": worker["instrumented_p99_us"] - worker["plain_p99_us"],
+        "wire_bytes_per_span": received["wire_bytes"] / max(received["spans"], 1),
+        "batches": received["batches"],
+        "batch_latency_p99_ms": received["batch_latency_p99_ms"],
+        "export_latency_p99_ms": worker["export"]["export_latency_p99_ms"],
+    }
+
+
+def main() -> None:
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    for key, value in run_load(calls).items():
+        print(
+            f"{key:<24} {value:.1f}"
+            if isinstance(value, float)
+            else f"{key:<24} {value}"
+        )
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 2 and sys.argv[1] == "--worker":
+        _worker(int(sys.argv[2]))
+    else:
+        main()
@@ -0,0 +1,240 @@
+# Copyright (c) 2025, WSO2 LLC. (https://www.wso2.com).
+#
+# WSO2 LLC. licenses this file to you under the Apache License,
+# Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""
+Interpreter startup cost of amp-instrument.
+
+Each scenario starts a fresh interpreter running `python -c pass` with the
+environment amp-instrument would set up, and is compared to a plain
+interpreter. `-X importtime` output is parsed to attribute the cost to
+imported packages.
+
+Run directly for a report:
+
+    python benchmarks/startup.py
+"""
+
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional
+
+BOOTSTRAP_DIR = (
+    Path(__file__).resolve().parent.parent
+    / "src"
+    / "amp_instrumentation"
+    / "_bootstrap"
+)
+
+# Offline stand-in for the Traceloop SDK, mirroring the mock_traceloop test fixture
+_STUB_TRACELOOP = """
+from enum import Enum
+
+
+class Instruments(Enum):
+    ANTHROPIC = "anthropic"
+    LANGCHAIN = "langchain"
+    OPENAI = "openai"
+    REQUESTS = "requests"
+
+
+class Traceloop:
+    @staticmethod
+    def init(**kwargs):
+        pass
+"""
+
+SCENARIOS = ("baseline", "stub", "lazy", "real")
+
+
+@dataclass
+class ImportRecord:
+    """One line of `-X importtime` output."""
+
+    module: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+
+def write_stub_traceloop(directory: Path) -> Path:
+    """Write the stub traceloop package under directory and return directory."""
+    sdk = directory / "traceloop" / "sdk"
+    sdk.mkdir(parents=True, exist_ok=True)
+    (directory / "traceloop" / "__init__.py").write_text("")
+    (sdk / "__init__.py").write_text(_STUB_TRACELOOP)
+    return directory
+
+
+def scenario_env(
+    scenario: str,
+    stub_dir: Optional[Path] = None,
+    extra: Optional[Dict[str, str]] = None,
+) -> Dict[str, str]:
+    """
+    Build the child environment for a scenario.
+
+    baseline: plain interpreter.
+    stub:     _bootstrap on PYTHONPATH with the stub Traceloop SDK (offline,
+              measures amp-instrumentation and OpenTelemetry only).
+    lazy:     _bootstrap on PYTHONPATH with AMP_LAZY_INIT=1.
+    real:     _bootstrap on PYTHONPATH with the installed Traceloop SDK.
+    """
+    env = {
+        key: value
+        for key, value in os.environ.items()
+        if not key.startswith(("AMP_", "PYTHON", "TRACELOOP_", "OTEL_"))
+    }
+    if scenario == "baseline":
+        return env
+
+    env.update(
+        {
+            "AMP_OTEL_ENDPOINT": "http://127.0.0.1:4318",
+            "AMP_AGENT_API_KEY": "benchmark-key",
+            "PYTHONPATH": str(BOOTSTRAP_DIR),
+        }
+    )
+    if scenario == "stub":
+        if stub_dir is None:
+            raise ValueError("The stub scenario needs a stub_dir.")
+        env["PYTHONPATH"] = os.pathsep.join([str(BOOTSTRAP_DIR), str(stub_dir)])
+    elif scenario == "lazy":
+        env["AMP_LAZY_INIT"] = "1"
+    elif scenario != "real":
+        raise ValueError(f"Unknown scenario '{scenario}'.")
+    env.update(extra or {})
+    return env
+
+
+def _run(args: List[str], env: Dict[str, str]) -> subprocess.CompletedProcess:
+    result = subprocess.run(
+        [sys.executable, *args], env=env, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(
+            f"Interpreter exited with {result.returncode}: {result.stderr}"
+        )
+    return result
+
+
+def measure_startup(env: Dict[str, str], runs: int = 7) -> float:
+    """
+    Return the median wall time in milliseconds of `python -c pass`.
+
+    One untimed warm-up run fills the bytecode and OS file caches first.
+    """
+    _run(["-c", "pass"], env)
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        _run(["-c", "pass"], env)
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def measure_overhead(
+    env: Dict[str, str], baseline_env: Dict[str, str], runs: int = 15
+) -> float:
+    """
+    Return the median startup overhead in milliseconds of env over baseline_env.
+
+    Runs of the two environments alternate and are compared in pairs, so
+    that load on a shared runner slows both sides of each pair alike instead
+    of skewing whichever scenario happened to run during a spike.
+    """
+    _run(["-c", "pass"], baseline_env)
+    _run(["-c", "pass"], env)
+    differences = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        _run(["-c", "pass"], baseline_env)
+        baseline_ms = (time.perf_counter() - started) * 1000
+        started = time.perf_counter()
+        _run(["-c", "pass"], env)
+        differences.append((time.perf_counter() - started) * 1000 - baseline_ms)
+    return statistics.median(differences)
+
+
+def parse_importtime(output: str) -> List[ImportRecord]:
+    """Parse `-X importtime` stderr into import records."""
+    records = []
+    for line in output.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:") :].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue  # the column header line
+        name = fields[2].rstrip()
+        stripped = name.lstrip(" ")
+        records.append(
+            ImportRecord(
+                module=stripped,
+                self_us=int(fields[0]),
+                cumulative_us=int(fields[1]),
+                depth=(len(name) - len(stripped) - 1) // 2,
+            )
+        )
+    return records
+
+
+def import_profile(env: Dict[str, str]) -> List[ImportRecord]:
+    """Return the import records of `python -X importtime -c pass`."""
+    return parse_importtime(_run(["-X", "importtime", "-c", "pass"], env).stderr)
+
+
+def package_breakdown(records: List[ImportRecord]) -> Dict[str, int]:
+    """
+    Return self import time in microseconds per top-level package, largest first.
+
+    Self times are summed so that every microsecond is attributed to exactly one package.
+    """
+    totals: Dict[str, int] = {}
+    for record in records:
+        package = record.module.split(".")[0]
+        totals[package] = totals.get(package, 0) + record.self_us
+    return dict(sorted(totals.items(), key=lambda item: item[1], reverse=True))
+
+
+def imported_modules(records: List[ImportRecord]) -> List[str]:
+    return [record.module for record in records]
+
+
+def main() -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        stub_dir = write_stub_traceloop(Path(tmp))
+        baseline_ms = None
+        for scenario in SCENARIOS:
+            env = scenario_env(scenario, stub_dir)
+            startup_ms = measure_startup(env)
+            if baseline_ms is None:
+                baseline_ms = startup_ms
+            records = import_profile(env)
+            print(
+                f"{scenario:<9} {startup_ms:8.1f} ms  "
+                f"(+{startup_ms - baseline_ms:7.1f} ms, {len(records)} modules)"
+            )
+            for package, self_us in list(package_breakdown(records).items())[:10]:
+                print(f"    {package:<40} {self_us / 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
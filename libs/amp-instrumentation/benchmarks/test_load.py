@@ -0,0 +1,69 @@
+# Copyright (c) 2025, WSO2 LLC. (https://www.wso2.com).
+#
+# WSO2 LLC. licenses this file to you under the Apache License,
+# Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""
+Export throughput thresholds against the local OTLP receiver.
+
+Budgets can be overridden with AMP_BENCH_* environment variables on slow runners.
+"""
+
+import os
+
+import pytest
+
+from load import run_load
+
+pytest.importorskip("traceloop.sdk")
+
+CALLS = int(os.getenv("AMP_BENCH_LOAD_CALLS", 5000))
+
+
+def _budget(name: str, default: float) -> float:
+    return float(os.getenv(name, default))
+
+
+def _report(result):
+    print()
+    for key, value in result.items():
+        print(
+            f"    {key:<24} {value:.1f}"
+            if isinstance(value, float)
+            else f"    {key:<24} {value}"
+        )
+
+
+class TestExportLoad:
+    """End-to-end load through sitecustomize, Traceloop and the export pipeline."""
+
+    def test_default_pipeline_throughput(self):
+        result = run_load(CALLS)
+        _report(result)
+
+        # Every span is either delivered or counted as dropped
+        assert result["spans_received"] + result["spans_dropped"] == CALLS
+        assert result["spans_per_sec"] >= _budget("AMP_BENCH_MIN_SPANS_PER_SEC", 1000)
+        assert result["overhead_p99_us"] <= _budget(
+            "AMP_BENCH_MAX_P99_OVERHEAD_US", 10000
+        )
+
+    def test_small_queue_drops_are_counted(self):
+        result = run_load(
+            CALLS,
+            env={"AMP_EXPORT_MAX_QUEUE": "256", "AMP_EXPORT_BATCH_SIZE": "64"},
+        )
+        _report(result)
+
+        assert result["spans_received"] + result["spans_dropped"] == CALLS
@@ -0,0 +1,223 @@
+# Copyright (c) 2025, WSO2 LLC. (https://www.wso2.com).
+#
+# WSO2 LLC. licenses this file to you under the Apache License,
+# Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""
+Per-call overhead of the Traceloop wrappers on common agent calls.
+
+Each call is benchmarked three times with pytest-benchmark: uninstrumented,
+instrumented with content tracing off, and instrumented with content tracing
+on. Instrumentation is set up once with initialize_instrumentation() against an
+in-process OTLPReceiver, and the instrumentors are uninstrumented and
+re-instrumented between variants. Models and HTTP servers are faked so only
+client-side cost is measured:
+
+    pytest benchmarks/test_overhead.py --benchmark-group-by=group
+"""
+
+import itertools
+import json
+import os
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+pytest.importorskip("traceloop.sdk")
+
+VARIANTS = ["uninstrumented", "content_off", "content_on"]
+
+INSTRUMENTS = "openai,langchain,requests"
+
+CHAT_COMPLETION = {
+    "id": "chatcmpl-benchmark",
+    "object": "chat.completion",
+    "created": 1735689600,
+    "model": "gpt-4o-mini",
+    "choices": [
+        {
+            "index": 0,
+            "message": {
+                "role": "assistant",
+                "content": "The Grand Hotel in Colombo has rooms available.",
+            },
+            "finish_reason": "stop",
+        }
+    ],
+    "usage": {"prompt_tokens": 42, "completion_tokens": 11, "total_tokens": 53},
+}
+
+PROMPT = [
+    ("system", "You are a hotel booking assistant."),
+    ("human", "Find me a hotel in Colombo for two nights from 2025-03-01."),
+]
+
+
+def _active_instrumentors():
+    from opentelemetry.instrumentation.instrumentor import BaseInstrumentor
+
+    def subclasses(cls):
+        for subclass in cls.__subclasses__():
+            yield subclass
+            yield from subclasses(subclass)
+
+    # _instance avoids re-running __init__ and resetting Traceloop's options
+    return [
+        cls._instance
+        for cls in subclasses(BaseInstrumentor)
+        if cls._instance is not None and cls._instance.is_instrumented_by_opentelemetry
+    ]
+
+
+@pytest.fixture(scope="module")
+def instrumentors():
+    """Initialize the real Traceloop SDK once, exporting to a local receiver."""
+    from amp_instrumentation._bootstrap import initialization
+    from amp_instrumentation.testing import OTLPReceiver
+
+    saved = dict(os.environ)
+    with OTLPReceiver() as receiver:
+        os.environ.update(
+            {
+                "AMP_OTEL_ENDPOINT": receiver.endpoint,
+                "AMP_AGENT_API_KEY": "benchmark-key",
+                "AMP_INSTRUMENTS": INSTRUMENTS,
+            }
+        )
+        initialization.initialize_instrumentation()
+        active = _active_instrumentors()
+        yield active
+
+        from opentelemetry import trace
+
+        trace.get_tracer_provider().force_flush()  # type: ignore[attr-defined]
+    os.environ.clear()
+    os.environ.update(saved)
+
+
+@pytest.fixture(params=VARIANTS)
+def variant(request, instrumentors):
+    """Switch instrumentation and content tracing for one benchmark variant."""
+    if request.param == "uninstrumented":
+        for instrumentor in instrumentors:
+            if instrumentor.is_instrumented_by_opentelemetry:
+                instrumentor.uninstrument()
+    else:
+        for instrumentor in instrumentors:
+            if not instrumentor.is_instrumented_by_opentelemetry:
+                instrumentor.instrument()
+    # Traceloop reads this on every call
+    os.environ["TRACELOOP_TRACE_CONTENT"] = str(request.param == "content_on").lower()
+    return request.param
+
+
+@pytest.mark.benchmark(group="fake-chat-model")
+def test_fake_chat_model_invoke(benchmark, variant):
+    """LangChain callback overhead on a chat model that never leaves the process."""
+    fake_chat_models = pytest.importorskip(
+        "langchain_core.language_models.fake_chat_models"
+    )
+    from langchain_core.messages import AIMessage
+
+    model = fake_chat_models.GenericFakeChatModel(
+        messages=itertools.repeat(AIMessage(content="Rooms are available."))
+    )
+
+    result = benchmark(model.invoke, PROMPT)
+    assert result.content == "Rooms are available."
+
+
+@pytest.mark.benchmark(group="chat-openai")
+def test_chat_openai_invoke(benchmark, variant):
+    """ChatOpenAI.invoke with the OpenAI client on a fake HTTP transport."""
+    httpx = pytest.importorskip("httpx")
+    langchain_openai = pytest.importorskip("langchain_openai")
+
+    body = json.dumps(CHAT_COMPLETION).encode()
+    transport = httpx.MockTransport(
+        lambda request: httpx.Response(
+            200, content=body, headers={"Content-Type": "application/json"}
+        )
+    )
+    model = langchain_openai.ChatOpenAI(
+        model="gpt-4o-mini",
+        api_key="benchmark-key",
+        max_retries=0,
+        http_client=httpx.Client(transport=transport),
+    )
+
+    result = benchmark(model.invoke, PROMPT)
+    assert result.usage_metadata["total_tokens"] == 53
+
+
+@pytest.mark.benchmark(group="tool-node")
+def test_tool_node_step(benchmark, variant):
+    """A LangGraph ToolNode step executing a single tool call."""
+    prebuilt = pytest.importorskip("langgraph.prebuilt")
+    from langchain_core.messages import AIMessage
+    from langchain_core.tools import tool
+    from langgraph.graph import END, START, MessagesState, StateGraph
+
+    @tool
+    def search_hotels(city: str) -> str:
+        """Search hotels in a city."""
+        return f"Grand Hotel, {city}"
+
+    # ToolNode needs the runtime config of a graph, as in the sample agents
+    builder = StateGraph(MessagesState)
+    builder.add_node("tools", prebuilt.ToolNode([search_hotels]))
+    builder.add_edge(START, "tools")
+    builder.add_edge("tools", END)
+    graph = builder.compile()
+    state = {
+        "messages": [
+            AIMessage(
+                content="",
+                tool_calls=[
+                    {"name": "search_hotels", "args": {"city": "Colombo"}, "id": "1"}
+                ],
+            )
+        ]
+    }
+
+    result = benchmark(graph.invoke, state)
+    assert result["messages"][-1].content == "Grand Hotel, Colombo"
+
+
+@pytest.mark.benchmark(group="requests")
+def test_requests_get(benchmark, variant):
+    """requests.Session.get through a fake transport adapter."""
+    requests = pytest.importorskip("requests")
+    from requests.adapters import BaseAdapter
+
+    class FakeAdapter(BaseAdapter):
+        def send(self, request, **kwargs):
+            response = requests.Response()
+            response.status_code = 200
+            response.headers["Content-Type"] = "application/json"
+            response._content = b'{"hotels": []}'
+            response.url = request.url
+            response.request = request
+            return response
+
+        def close(self):
+            pass
+
+    session = requests.Session()
+    # Skip proxy and netrc lookups, which would dominate the measurement
+    session.trust_env = False
+    session.mount("http://hotels.test/", FakeAdapter())
+
+    response = benchmark(session.get, "http://hotels.test/search?city=Colombo")
+    assert response.status_code == 200
@@ -0,0 +1,90 @@
+# Copyright (c) 2025, WSO2 LLC. (https://www.wso2.com).
+#
+# WSO2 LLC. licenses this file to you under the Apache License,
+# Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""
+Throughput of PII redaction on traced content.
+
+Each payload is redacted as a fresh string, so the result cache is bypassed
+and the combined regex does all the work. Throughput is reported in MB/s as
+extra info and checked against AMP_BENCH_MIN_REDACT_MBPS:
+
+    pytest benchmarks/test_redaction.py --benchmark-group-by=group
+"""
+
+import itertools
+import json
+import os
+
+import pytest
+
+from amp_instrumentation.redaction import PIIRedactor
+
+pytest.importorskip("pytest_benchmark")
+
+# Prose without digits, as in system prompts
+PROMPT = "You are a hotel booking assistant. Help users find and book hotels. " * 50
+
+# Tool output with dates, prices and ids, but no personal data
+SEARCH_RESULT = json.dumps(
+    [
+        {
+            "hotel_id": f"h-{1000 + index}",
+            "name": "Grand Hotel Colombo",
+            "check_in": "2025-03-01",
+            "check_out": "2025-03-03",
+            "price_per_night": 120.5 + index,
+            "rooms_available": index % 7,
+        }
+        for index in range(20)
+    ]
+)
+
+# Booking payload with guest details, as sent to the hotel booking API
+BOOKING = json.dumps(
+    {
+        "hotel_id": "h-1042",
+        "guest": {
+            "name": "Jane Doe",
+            "email": "jane.doe@example.com",
+            "phone_number": "+94 77 123 4567",
+        },
+        "payment": {"card_number": "4111 1111 1111 1111"},
+        "check_in": "2025-03-01",
+        "nights": 2,
+        "notes": "Late arrival, around 23:30. " * 40,
+    }
+)
+
+PAYLOADS = {"prompt": PROMPT, "search-result": SEARCH_RESULT, "booking": BOOKING}
+
+
+@pytest.mark.benchmark(group="redaction")
+@pytest.mark.parametrize("payload", list(PAYLOADS))
+def test_redaction_throughput(benchmark, payload):
+    """Uncached redaction throughput per payload type."""
+    redactor = PIIRedactor()
+    text = PAYLOADS[payload]
+    # Distinct strings, so every round runs the regex
+    variants = itertools.cycle([f"{text} {index}" for index in range(1000)])
+
+    result = benchmark(lambda: redactor._redact(next(variants)))
+
+    mb_per_sec = len(text) / benchmark.stats.stats.median / 1e6
+    benchmark.extra_info["mb_per_sec"] = round(mb_per_sec, 1)
+    print(f"\n    {payload:<16} {mb_per_sec:.1f} MB/s")
+    if payload == "booking":
+        assert "jane.doe" not in result and "4111" not in result
+    assert mb_per_sec >= float(os.getenv("AMP_BENCH_MIN_REDACT_MBPS", 5))
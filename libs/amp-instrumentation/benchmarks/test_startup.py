@@ -0,0 +1,127 @@
+# Copyright (c) 2025, WSO2 LLC. (https://www.wso2.com).
+#
+# WSO2 LLC. licenses this file to you under the Apache License,
+# Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""
+Startup regression thresholds for amp-instrument.
+
+Time budgets are overheads over a plain interpreter on the same machine and
+can be overridden with AMP_BENCH_* environment variables on slow runners.
+The lazy budget is small enough to be within runner noise, so it is measured
+against interleaved baseline runs and grows with the baseline on slow runners.
+Module checks are deterministic and catch eager imports regardless of speed.
+"""
+
+import os
+
+import pytest
+
+from startup import (
+    import_profile,
+    imported_modules,
+    measure_overhead,
+    measure_startup,
+    package_breakdown,
+    scenario_env,
+    write_stub_traceloop,
+)
+
+
+def _budget(name: str, default: float) -> float:
+    return float(os.getenv(name, default))
+
+
+@pytest.fixture(scope="session")
+def stub_dir(tmp_path_factory):
+    return write_stub_traceloop(tmp_path_factory.mktemp("stub_traceloop"))
+
+
+@pytest.fixture(scope="session")
+def baseline_ms():
+    return measure_startup(scenario_env("baseline"))
+
+
+def _report(scenario, startup_ms, baseline_ms, records):
+    print(f"\n{scenario}: {startup_ms:.1f} ms (+{startup_ms - baseline_ms:.1f} ms)")
+    for package, self_us in list(package_breakdown(records).items())[:10]:
+        print(f"    {package:<40} {self_us / 1000:8.1f} ms")
+
+
+class TestLazyStartup:
+    """Lazy mode must cost almost nothing until a supported library is imported."""
+
+    def test_lazy_mode_overhead(self, baseline_ms):
+        env = scenario_env("lazy")
+        overhead_ms = measure_overhead(env, scenario_env("baseline"))
+        records = import_profile(env)
+        _report("lazy", baseline_ms + overhead_ms, baseline_ms, records)
+
+        budget_ms = max(
+            _budget("AMP_BENCH_MAX_LAZY_MS", 25),
+            baseline_ms * _budget("AMP_BENCH_MAX_LAZY_RATIO", 0.5),
+        )
+        assert overhead_ms <= budget_ms
+
+    def test_lazy_mode_imports_no_sdk(self):
+        modules = imported_modules(import_profile(scenario_env("lazy")))
+
+        eager = [
+            m for m in modules if m.split(".")[0] in ("opentelemetry", "traceloop")
+        ]
+        assert eager == []
+
+
+class TestEagerStartup:
+    """Eager initialization with the offline stub SDK."""
+
+    def test_stub_sdk_overhead(self, baseline_ms, stub_dir):
+        env = scenario_env("stub", stub_dir)
+        startup_ms = measure_startup(env)
+        records = import_profile(env)
+        _report("stub", startup_ms, baseline_ms, records)
+
+        assert startup_ms - baseline_ms <= _budget("AMP_BENCH_MAX_STUB_MS", 750)
+        assert len(records) <= _budget("AMP_BENCH_MAX_STUB_MODULES", 550)
+
+    def test_stub_sdk_initializes(self, stub_dir):
+        modules = imported_modules(import_profile(scenario_env("stub", stub_dir)))
+
+        assert "amp_instrumentation._bootstrap.pipeline" in modules
+        # The stub replaces the real SDK, so no instrumentor may be imported
+        assert not any(m.startswith("opentelemetry.instrumentation.") for m in modules)
+
+
+class TestRealStartup:
+    """Eager initialization with the installed Traceloop SDK (still offline)."""
+
+    @pytest.fixture(autouse=True)
+    def _require_traceloop(self):
+        pytest.importorskip("traceloop.sdk")
+
+    def test_real_sdk_overhead(self, baseline_ms):
+        env = scenario_env("real")
+        startup_ms = measure_startup(env, runs=3)
+        records = import_profile(env)
+        _report("real", startup_ms, baseline_ms, records)
+
+        assert startup_ms - baseline_ms <= _budget("AMP_BENCH_MAX_REAL_MS", 3000)
+
+    def test_instrument_allowlist_limits_imports(self):
+        env = scenario_env("real", extra={"AMP_INSTRUMENTS": "requests"})
+        modules = imported_modules(import_profile(env))
+
+        assert "opentelemetry.instrumentation.requests" in modules
+        assert "opentelemetry.instrumentation.langchain" not in modules
+        assert "opentelemetry.instrumentation.openai" not in modules
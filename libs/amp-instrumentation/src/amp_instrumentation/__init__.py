@@ -21,5 +21,32 @@ This package provides automatic tracing instrumentation for Python applications
 using the Traceloop SDK and OpenTelemetry.
 """
 
+from typing import Any, ContextManager, Optional
+
+from ._stats import stats
+
 __version__ = "0.1.0"
-__all__ = []
+__all__ = ["monitor_event_loop", "stats", "tracing"]
+
+
+def monitor_event_loop(loop: Optional[Any] = None) -> bool:
+    """
+    Monitor an asyncio event loop when AMP_LOOP_MONITOR is enabled.
+
+    See amp_instrumentation.loop_monitor.monitor_event_loop.
+    """
+    # Imported here so that asyncio is not loaded at interpreter start
+    from .loop_monitor import monitor_event_loop as _monitor_event_loop
+
+    return _monitor_event_loop(loop)
+
+
+def tracing(enabled: bool = True) -> ContextManager[None]:
+    """
+    Enable or suppress tracing for the code run inside a with block.
+
+    See amp_instrumentation.toggle.tracing.
+    """
+    from .toggle import tracing as _tracing
+
+    return _tracing(enabled)
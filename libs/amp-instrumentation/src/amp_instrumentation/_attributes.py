@@ -0,0 +1,85 @@
+# Copyright (c) 2025, WSO2 LLC. (https://www.wso2.com).
+#
+# WSO2 LLC. licenses this file to you under the Apache License,
+# Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""
+Attribute helpers for span processors.
+
+Span attributes become immutable when a span ends, but processors that run
+before export (truncation, span profiling, memory tracking, span collapsing)
+still need to rewrite or extend them. They replace the attribute mapping as a
+whole, and append events to the span's bounded event list directly.
+"""
+
+from typing import Any, Dict, List, Optional, cast
+
+from opentelemetry.attributes import BoundedAttributes
+from opentelemetry.sdk.trace import Event, ReadableSpan, Span
+
+_SPAN_KIND_ATTRIBUTE = "traceloop.span.kind"
+_LLM_ATTRIBUTES = ("llm.request.type", "gen_ai.system")
+
+
+def span_kind(span: ReadableSpan) -> Optional[str]:
+    """Return the Traceloop span kind, "llm" for model calls, or None."""
+    attributes = span.attributes or {}
+    kind = attributes.get(_SPAN_KIND_ATTRIBUTE)
+    if isinstance(kind, str):
+        return kind
+    if any(key in attributes for key in _LLM_ATTRIBUTES):
+        return "llm"
+    return None
+
+
+def rebuild_attributes(original: Any, values: Dict[str, Any]) -> BoundedAttributes:
+    """Create immutable attributes with the given values, keeping the drop count."""
+    rebuilt = BoundedAttributes(
+        maxlen=getattr(original, "maxlen", None), attributes=values, immutable=True
+    )
+    rebuilt.dropped = getattr(original, "dropped", 0)
+    return rebuilt
+
+
+def add_span_attributes(span: ReadableSpan, values: Dict[str, Any]) -> None:
+    """Add attributes to an ended span, replacing existing keys."""
+    original = span._attributes
+    attributes = dict(original or {})
+    attributes.update(values)
+    span._attributes = rebuild_attributes(original, attributes)
+
+
+def add_span_event(
+    span: Span, name: str, attributes: Dict[str, Any], timestamp: int
+) -> None:
+    """
+    Add an event to an ended span, within the span's event limits.
+
+    The span passed to on_start is needed for its limits; the ReadableSpan
+    passed to on_end shares its event list.
+    """
+    limits = span._limits
+    # A bounded list on the SDK span, although ReadableSpan types it as a Sequence
+    cast(List[Event], span._events).append(
+        Event(
+            name,
+            BoundedAttributes(
+                limits.max_event_attributes,
+                attributes,
+                max_value_len=limits.max_attribute_length,
+                immutable=True,
+            ),
+            timestamp,
+        )
+    )
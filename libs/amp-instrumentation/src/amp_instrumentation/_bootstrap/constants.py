@@ -25,6 +25,108 @@ AMP_AGENT_API_KEY = "AMP_AGENT_API_KEY"
 AMP_TRACE_CONTENT = "AMP_TRACE_CONTENT"
 AMP_DEBUG = "AMP_DEBUG"
 
+# Span Size Limits (UTF-8 bytes, 0 = unlimited)
+AMP_TRACE_MAX_ATTR_BYTES = "AMP_TRACE_MAX_ATTR_BYTES"
+AMP_TRACE_MAX_EVENT_BYTES = "AMP_TRACE_MAX_EVENT_BYTES"
+AMP_TRACE_MAX_SPAN_BYTES = "AMP_TRACE_MAX_SPAN_BYTES"
+
+# Instrumentation Selection (comma-separated Traceloop instrument names)
+AMP_INSTRUMENTS = "AMP_INSTRUMENTS"
+AMP_DISABLE_INSTRUMENTS = "AMP_DISABLE_INSTRUMENTS"
+
+# Startup Configuration
+AMP_LAZY_INIT = "AMP_LAZY_INIT"
+AMP_LAUNCH_MODE = "AMP_LAUNCH_MODE"
+
+# Profiling ("cpu", "import" or "alloc"; set by amp-instrument --profile)
+AMP_PROFILE = "AMP_PROFILE"
+AMP_PROFILE_DIR = "AMP_PROFILE_DIR"
+
+# Span Profiling (stack samples attached to the spans they ran under)
+AMP_SPAN_PROFILING = "AMP_SPAN_PROFILING"
+AMP_SPAN_PROFILING_HZ = "AMP_SPAN_PROFILING_HZ"
+
+# Per-span Memory Tracking ("tracemalloc" or "rss" source)
+AMP_TRACE_MEMORY = "AMP_TRACE_MEMORY"
+AMP_TRACE_MEMORY_SOURCE = "AMP_TRACE_MEMORY_SOURCE"
+AMP_TRACE_MEMORY_SPAN_KINDS = "AMP_TRACE_MEMORY_SPAN_KINDS"
+AMP_TRACE_MEMORY_SAMPLE_RATIO = "AMP_TRACE_MEMORY_SAMPLE_RATIO"
+
+# Event Loop Monitoring (asyncio lag, blocked episodes and thread pool usage)
+AMP_LOOP_MONITOR = "AMP_LOOP_MONITOR"
+AMP_LOOP_MONITOR_INTERVAL_MS = "AMP_LOOP_MONITOR_INTERVAL_MS"
+AMP_LOOP_BLOCK_THRESHOLD_MS = "AMP_LOOP_BLOCK_THRESHOLD_MS"
+
+# Stream Aggregation (per-chunk LLM events folded into latency statistics, on by default)
+AMP_STREAM_AGGREGATION = "AMP_STREAM_AGGREGATION"
+
+# PII Redaction (emails, phone and card numbers in span content)
+AMP_REDACT_PII = "AMP_REDACT_PII"
+AMP_REDACT_PII_TYPES = "AMP_REDACT_PII_TYPES"
+
+# Span Collapsing (name patterns or depth, 0 = off; "events" or "attributes" mode)
+AMP_COLLAPSE_SPANS = "AMP_COLLAPSE_SPANS"
+AMP_COLLAPSE_DEPTH = "AMP_COLLAPSE_DEPTH"
+AMP_COLLAPSE_MODE = "AMP_COLLAPSE_MODE"
+
+# Per-request Tracing Toggle (TracingToggleMiddleware)
+AMP_TRACE_FLAGGED_ONLY = "AMP_TRACE_FLAGGED_ONLY"
+AMP_TRACE_SESSION_IDS = "AMP_TRACE_SESSION_IDS"
+
+# Trace Context Propagation (traceparent on outbound requests, server spans in Starlette/FastAPI)
+AMP_TRACE_PROPAGATION = "AMP_TRACE_PROPAGATION"
+
+# Head Sampling
+AMP_TRACE_SAMPLE_RATIO = "AMP_TRACE_SAMPLE_RATIO"
+AMP_TRACE_SAMPLE_ALWAYS = "AMP_TRACE_SAMPLE_ALWAYS"
+
+# Tail Sampling
+AMP_TAIL_SAMPLING = "AMP_TAIL_SAMPLING"
+AMP_TAIL_SAMPLE_RATIO = "AMP_TAIL_SAMPLE_RATIO"
+AMP_TAIL_LATENCY_THRESHOLD_MS = "AMP_TAIL_LATENCY_THRESHOLD_MS"
+AMP_TAIL_TOKEN_THRESHOLD = "AMP_TAIL_TOKEN_THRESHOLD"
+AMP_TAIL_DECISION_WAIT_MS = "AMP_TAIL_DECISION_WAIT_MS"
+AMP_TAIL_MAX_BUFFERED_SPANS = "AMP_TAIL_MAX_BUFFERED_SPANS"
+
+# Batch Export Tuning
+AMP_EXPORT_MAX_QUEUE = "AMP_EXPORT_MAX_QUEUE"
+AMP_EXPORT_BATCH_SIZE = "AMP_EXPORT_BATCH_SIZE"
+AMP_EXPORT_INTERVAL_MS = "AMP_EXPORT_INTERVAL_MS"
+AMP_EXPORT_TIMEOUT_MS = "AMP_EXPORT_TIMEOUT_MS"
+
+# Export Back-pressure (circuit breaker, 0 failures = off; adaptive head sampling)
+AMP_EXPORT_CIRCUIT_FAILURES = "AMP_EXPORT_CIRCUIT_FAILURES"
+AMP_EXPORT_CIRCUIT_BACKOFF_MS = "AMP_EXPORT_CIRCUIT_BACKOFF_MS"
+AMP_EXPORT_CIRCUIT_MAX_BACKOFF_MS = "AMP_EXPORT_CIRCUIT_MAX_BACKOFF_MS"
+AMP_EXPORT_ADAPTIVE_SAMPLING = "AMP_EXPORT_ADAPTIVE_SAMPLING"
+AMP_EXPORT_HIGH_WATER = "AMP_EXPORT_HIGH_WATER"
+AMP_EXPORT_LOW_WATER = "AMP_EXPORT_LOW_WATER"
+
+# Export Protocol ("http/protobuf" or "grpc") and Compression ("gzip" or "none")
+AMP_EXPORT_PROTOCOL = "AMP_EXPORT_PROTOCOL"
+AMP_EXPORT_COMPRESSION = "AMP_EXPORT_COMPRESSION"
+
+# Disk Spooling (enabled by setting AMP_SPOOL_DIR)
+AMP_SPOOL_DIR = "AMP_SPOOL_DIR"
+AMP_SPOOL_MAX_BYTES = "AMP_SPOOL_MAX_BYTES"
+AMP_SPOOL_SEGMENT_BYTES = "AMP_SPOOL_SEGMENT_BYTES"
+
+# LLM Metrics (aggregated in-process, "delta" or "cumulative" temporality)
+AMP_METRICS = "AMP_METRICS"
+AMP_METRICS_INTERVAL_MS = "AMP_METRICS_INTERVAL_MS"
+AMP_METRICS_TEMPORALITY = "AMP_METRICS_TEMPORALITY"
+
+# Shutdown (time allowed to flush pending spans at exit or on SIGTERM)
+AMP_SHUTDOWN_TIMEOUT_MS = "AMP_SHUTDOWN_TIMEOUT_MS"
+
+# Standard OpenTelemetry export settings, used when the AMP equivalents are unset
+OTEL_BSP_MAX_QUEUE_SIZE = "OTEL_BSP_MAX_QUEUE_SIZE"
+OTEL_BSP_MAX_EXPORT_BATCH_SIZE = "OTEL_BSP_MAX_EXPORT_BATCH_SIZE"
+OTEL_BSP_SCHEDULE_DELAY = "OTEL_BSP_SCHEDULE_DELAY"
+OTEL_BSP_EXPORT_TIMEOUT = "OTEL_BSP_EXPORT_TIMEOUT"
+OTEL_EXPORTER_OTLP_PROTOCOL = "OTEL_EXPORTER_OTLP_PROTOCOL"
+OTEL_EXPORTER_OTLP_COMPRESSION = "OTEL_EXPORTER_OTLP_COMPRESSION"
+
 # Downstream environment variables that get set for Traceloop
 TRACELOOP_TRACE_CONTENT = "TRACELOOP_TRACE_CONTENT"
 TRACELOOP_METRICS_ENABLED = "TRACELOOP_METRICS_ENABLED"
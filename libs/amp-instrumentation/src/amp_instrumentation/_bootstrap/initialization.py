@@ -23,6 +23,7 @@ import os
 import logging
 import sys
 import threading
+from typing import Any, List, Optional, Set
 from . import constants as env_vars
 
 # Track initialization state with thread safety
@@ -30,6 +31,18 @@ _initialized = False
 _init_lock = threading.Lock()
 
 
+def _reset_init_lock_after_fork() -> None:
+    # A forked child keeps _initialized: the pipeline components re-initialize
+    # themselves after fork. Only the lock needs replacing, since another
+    # thread may have held it when the process forked.
+    global _init_lock
+    _init_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_init_lock_after_fork)
+
+
 def configure_logging() -> None:
     """
     Configure logging for the amp_instrumentation package based on AMP_DEBUG environment variable.
@@ -81,6 +94,123 @@ def _get_required_env_var(var_name: str) -> str:
     return value.strip()
 
 
+def _get_bool_env_var(var_name: str, default: bool = False) -> bool:
+    """
+    Read a boolean flag from the environment.
+
+    Accepts "1", "true", "yes" and "on" (case-insensitive) as enabled values.
+    """
+    value = os.getenv(var_name)
+    if value is None or not value.strip():
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def _get_list_env_var(var_name: str, lowercase: bool = False) -> Optional[List[str]]:
+    """
+    Read a comma-separated list of names from the environment.
+
+    Returns:
+        The list of names, or None if the variable is unset or empty.
+    """
+    value = os.getenv(var_name)
+    if value is None or not value.strip():
+        return None
+    items = [item.strip() for item in value.split(",") if item.strip()]
+    return [item.lower() for item in items] if lowercase else items
+
+
+def _check_bounds(
+    var_name: str,
+    number: float,
+    minimum: Optional[float],
+    maximum: Optional[float],
+) -> None:
+    """Raise ConfigurationError if a numeric setting is outside its bounds."""
+    if minimum is not None and number < minimum:
+        raise ConfigurationError(
+            f"Environment variable '{var_name}' must be at least {minimum}, got {number}."
+        )
+    if maximum is not None and number > maximum:
+        raise ConfigurationError(
+            f"Environment variable '{var_name}' must be at most {maximum}, got {number}."
+        )
+
+
+def _get_float_env_var(
+    var_name: str,
+    default: float,
+    minimum: Optional[float] = None,
+    maximum: Optional[float] = None,
+) -> float:
+    """
+    Read a float from the environment, validating optional bounds.
+
+    Raises:
+        ConfigurationError: If the value is not a number or is out of range.
+    """
+    value = os.getenv(var_name)
+    if value is None or not value.strip():
+        return default
+    try:
+        number = float(value.strip())
+    except ValueError:
+        raise ConfigurationError(
+            f"Environment variable '{var_name}' must be a number, got '{value}'."
+        ) from None
+    _check_bounds(var_name, number, minimum, maximum)
+    return number
+
+
+def _get_int_env_var(
+    var_name: str,
+    default: int,
+    minimum: Optional[int] = None,
+    maximum: Optional[int] = None,
+) -> int:
+    """
+    Read an integer from the environment, validating optional bounds.
+
+    Raises:
+        ConfigurationError: If the value is not an integer or is out of range.
+    """
+    value = os.getenv(var_name)
+    if value is None or not value.strip():
+        return default
+    try:
+        number = int(value.strip())
+    except ValueError:
+        raise ConfigurationError(
+            f"Environment variable '{var_name}' must be an integer, got '{value}'."
+        ) from None
+    _check_bounds(var_name, number, minimum, maximum)
+    return number
+
+
+def _resolve_instruments(
+    var_name: str, names: Optional[List[str]], instruments_enum: Any
+) -> Optional[Set[Any]]:
+    """
+    Map instrument names to Traceloop Instruments members.
+
+    Raises:
+        ConfigurationError: If a name is not a supported instrument.
+    """
+    if names is None:
+        return None
+
+    resolved = set()
+    for name in names:
+        try:
+            resolved.add(instruments_enum(name))
+        except ValueError:
+            supported = ", ".join(sorted({member.value for member in instruments_enum}))
+            raise ConfigurationError(
+                f"Unknown instrument '{name}' in '{var_name}'. Supported: {supported}."
+            ) from None
+    return resolved
+
+
 def initialize_instrumentation() -> None:
     """
     Initialize instrumentation from environment variables.
@@ -103,21 +233,109 @@ def initialize_instrumentation() -> None:
             # Get trace content setting (default: true)
             trace_content = os.getenv(env_vars.AMP_TRACE_CONTENT, "true")
 
+            # Get head sampling settings (default: keep every trace)
+            sample_ratio = _get_float_env_var(
+                env_vars.AMP_TRACE_SAMPLE_RATIO, 1.0, minimum=0.0, maximum=1.0
+            )
+            always_sample = _get_list_env_var(env_vars.AMP_TRACE_SAMPLE_ALWAYS) or []
+
+            # Time allowed for flushing pending spans at exit (default: 5s)
+            shutdown_timeout_ms = _get_int_env_var(
+                env_vars.AMP_SHUTDOWN_TIMEOUT_MS, 5000, minimum=0
+            )
+
             # Set Traceloop environment variables
             os.environ[env_vars.TRACELOOP_TRACE_CONTENT] = trace_content
             os.environ[env_vars.TRACELOOP_METRICS_ENABLED] = "false"
             os.environ[env_vars.OTEL_EXPORTER_OTLP_INSECURE] = "true"
 
             # Import and initialize Traceloop
-            from traceloop.sdk import Traceloop
+            from traceloop.sdk import Instruments, Traceloop
+
+            # Restrict which instrumentors get loaded (default: all)
+            instruments = _resolve_instruments(
+                env_vars.AMP_INSTRUMENTS,
+                _get_list_env_var(env_vars.AMP_INSTRUMENTS, lowercase=True),
+                Instruments,
+            )
+            block_instruments = _resolve_instruments(
+                env_vars.AMP_DISABLE_INSTRUMENTS,
+                _get_list_env_var(env_vars.AMP_DISABLE_INSTRUMENTS, lowercase=True),
+                Instruments,
+            )
+
+            # Lower head sampling while the export pipeline is backed up
+            back_pressure = None
+            if _get_bool_env_var(env_vars.AMP_EXPORT_ADAPTIVE_SAMPLING):
+                from amp_instrumentation.sampling import BackPressureThrottle
+
+                high_water = _get_float_env_var(
+                    env_vars.AMP_EXPORT_HIGH_WATER, 0.75, minimum=0.0, maximum=1.0
+                )
+                low_water = _get_float_env_var(
+                    env_vars.AMP_EXPORT_LOW_WATER, 0.25, minimum=0.0, maximum=1.0
+                )
+                if low_water >= high_water:
+                    raise ConfigurationError(
+                        f"'{env_vars.AMP_EXPORT_LOW_WATER}' ({low_water}) must be "
+                        f"below '{env_vars.AMP_EXPORT_HIGH_WATER}' ({high_water})."
+                    )
+                back_pressure = BackPressureThrottle(high_water, low_water)
+
+            sampler = None
+            if sample_ratio < 1.0 or back_pressure is not None:
+                from amp_instrumentation.sampling import build_sampler
+
+                # Metrics count sampled-out spans too, so they must be recorded
+                sampler = build_sampler(
+                    sample_ratio,
+                    always_sample,
+                    record_unsampled=_get_bool_env_var(env_vars.AMP_METRICS),
+                    throttle=back_pressure,
+                )
+                logger.debug(f"Using head sampler: {sampler.get_description()}")
+
+            # Build the span export pipeline
+            from .pipeline import build_span_processor
+
+            headers = {"x-amp-api-key": api_key}
+            processor = build_span_processor(otel_endpoint, headers, back_pressure)
 
             # Initialize Traceloop with configuration
             Traceloop.init(
                 telemetry_enabled=False,
                 api_endpoint=otel_endpoint,
-                headers={"x-amp-api-key": api_key},
+                headers=headers,
+                processor=processor,
+                instruments=instruments,
+                block_instruments=block_instruments,
+                sampler=sampler,
             )
 
+            # Continue callers' traces in Starlette and FastAPI services
+            if _get_bool_env_var(env_vars.AMP_TRACE_PROPAGATION, default=True):
+                from amp_instrumentation.propagation import instrument_starlette
+
+                instrument_starlette()
+            else:
+                from opentelemetry.propagate import set_global_textmap
+                from opentelemetry.propagators.composite import CompositePropagator
+
+                # Outbound requests then carry no trace context headers
+                set_global_textmap(CompositePropagator([]))
+
+            # Registered after Traceloop so that it runs before its exit handlers
+            from amp_instrumentation.shutdown import install_shutdown_hook
+
+            install_shutdown_hook(processor, shutdown_timeout_ms)
+
+            if os.getenv(env_vars.AMP_PROFILE):
+                from opentelemetry import trace
+
+                from amp_instrumentation.profiling import attach_trace_recorder
+
+                attach_trace_recorder(trace.get_tracer_provider())
+
             _initialized = True
             logger.info("Instrumentation initialized successfully.")
 
@@ -0,0 +1,247 @@
+# Copyright (c) 2025, WSO2 LLC. (https://www.wso2.com).
+#
+# WSO2 LLC. licenses this file to you under the Apache License,
+# Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""
+Lazy, import-triggered instrumentation initialization.
+
+When AMP_LAZY_INIT is enabled, sitecustomize.py installs a lightweight
+sys.meta_path hook instead of initializing Traceloop at interpreter start.
+Instrumentation is initialized right after the first supported library
+finishes importing, so processes that never touch an LLM or HTTP client
+never import the Traceloop SDK.
+"""
+
+import logging
+import sys
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from . import constants as env_vars
+from .initialization import _get_list_env_var, initialize_instrumentation
+
+logger = logging.getLogger(__name__)
+
+# Top-level modules that trigger initialization, keyed by Traceloop instrument name
+INSTRUMENT_MODULES: Dict[str, Tuple[str, ...]] = {
+    "agno": ("agno",),
+    "alephalpha": ("aleph_alpha_client",),
+    "anthropic": ("anthropic",),
+    "bedrock": ("boto3",),
+    "chroma": ("chromadb",),
+    "cohere": ("cohere",),
+    "crewai": ("crewai",),
+    "google_generativeai": ("google.generativeai", "google.genai"),
+    "groq": ("groq",),
+    "haystack": ("haystack",),
+    "lancedb": ("lancedb",),
+    "langchain": ("langchain", "langchain_core", "langgraph"),
+    "litellm": ("litellm",),
+    "llama_index": ("llama_index",),
+    "marqo": ("marqo",),
+    "mcp": ("mcp",),
+    "milvus": ("pymilvus",),
+    "mistral": ("mistralai",),
+    "ollama": ("ollama",),
+    "openai": ("openai",),
+    "openai_agents": ("agents",),
+    "pinecone": ("pinecone",),
+    "pymysql": ("pymysql",),
+    "qdrant": ("qdrant_client",),
+    "redis": ("redis",),
+    "replicate": ("replicate",),
+    "requests": ("requests",),
+    "sagemaker": ("boto3",),
+    "together": ("together",),
+    "transformers": ("transformers",),
+    "urllib3": ("urllib3",),
+    "vertexai": ("vertexai",),
+    "voyageai": ("voyageai",),
+    "watsonx": ("ibm_watsonx_ai", "ibm_watson_machine_learning"),
+    "weaviate": ("weaviate",),
+    "writer": ("writerai",),
+}
+
+
+def enabled_instrument_names() -> List[str]:
+    """
+    Return the instrument names selected by AMP_INSTRUMENTS and AMP_DISABLE_INSTRUMENTS.
+    """
+    allowed = _get_list_env_var(env_vars.AMP_INSTRUMENTS, lowercase=True)
+    blocked = set(
+        _get_list_env_var(env_vars.AMP_DISABLE_INSTRUMENTS, lowercase=True) or ()
+    )
+    names = list(INSTRUMENT_MODULES) if allowed is None else allowed
+    return [name for name in names if name not in blocked]
+
+
+def trigger_modules(instruments: Optional[Iterable[str]] = None) -> frozenset:
+    """
+    Return the module names whose import should trigger initialization.
+
+    Args:
+        instruments: Traceloop instrument names to watch. Defaults to the
+            instruments enabled through the environment.
+    """
+    names = enabled_instrument_names() if instruments is None else instruments
+    return frozenset(
+        module for name in names for module in INSTRUMENT_MODULES.get(name, ())
+    )
+
+
+class _TriggerLoader:
+    """
+    Loader wrapper that runs the trigger callback once the wrapped module has executed.
+
+    Attribute access is delegated to the original loader, and the module's
+    __loader__ is restored before execution so that resource readers and
+    introspection keep seeing the real loader.
+    """
+
+    def __init__(self, loader, finder: "LazyInitFinder") -> None:
+        self._loader = loader
+        self._finder = finder
+
+    def __getattr__(self, name: str):
+        return getattr(self._loader, name)
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module) -> None:
+        module.__loader__ = self._loader
+        if getattr(module, "__spec__", None) is not None:
+            module.__spec__.loader = self._loader
+
+        self._finder._enter()
+        try:
+            self._loader.exec_module(module)
+        finally:
+            self._finder._exit(module.__name__)
+
+
+class LazyInitFinder:
+    """
+    Meta path finder that defers instrumentation until a watched module is imported.
+
+    The finder never loads modules itself. For watched names it asks the
+    remaining finders for the real spec and wraps its loader, so the callback
+    runs after the outermost watched import completes (never while a watched
+    package is only partially initialized).
+    """
+
+    def __init__(self, modules: Iterable[str], callback: Callable[[str], None]) -> None:
+        self._modules = frozenset(modules)
+        self._callback = callback
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._triggered = False
+
+    def find_spec(self, fullname, path=None, target=None):
+        if fullname not in self._modules or self._triggered:
+            return None
+        if getattr(self._local, "searching", False):
+            return None
+
+        self._local.searching = True
+        try:
+            spec = None
+            for finder in list(sys.meta_path):
+                if finder is self:
+                    continue
+                find_spec = getattr(finder, "find_spec", None)
+                if find_spec is None:
+                    continue
+                spec = find_spec(fullname, path, target)
+                if spec is not None:
+                    break
+        finally:
+            self._local.searching = False
+
+        if spec is None or spec.loader is None:
+            return None
+        if not hasattr(spec.loader, "exec_module"):
+            return None
+
+        spec.loader = _TriggerLoader(spec.loader, self)
+        return spec
+
+    def _enter(self) -> None:
+        self._local.depth = getattr(self._local, "depth", 0) + 1
+
+    def _exit(self, module_name: str) -> None:
+        self._local.depth -= 1
+        if self._local.depth == 0 and module_name in sys.modules:
+            self.fire(module_name)
+
+    def fire(self, module_name: str) -> None:
+        """Uninstall the hook and run the callback exactly once."""
+        with self._lock:
+            if self._triggered:
+                return
+            self._triggered = True
+            uninstall(self)
+        self._callback(module_name)
+
+
+def uninstall(finder: LazyInitFinder) -> None:
+    """Remove the finder from sys.meta_path if it is still installed."""
+    try:
+        sys.meta_path.remove(finder)
+    except ValueError:
+        pass
+
+
+def _initialize_on_import(module_name: str) -> None:
+    """Initialize instrumentation without letting failures break the user's import."""
+    logger.debug(f"Initializing instrumentation on first import of '{module_name}'.")
+    try:
+        initialize_instrumentation()
+    except Exception as e:
+        print(
+            f"ERROR: Failed to initialize WSO2 AMP instrumentation: {e}",
+            file=sys.stderr,
+        )
+
+
+def install_lazy_initialization(
+    modules: Optional[Iterable[str]] = None,
+    callback: Callable[[str], None] = _initialize_on_import,
+) -> LazyInitFinder:
+    """
+    Install the import hook that initializes instrumentation on demand.
+
+    If a watched module has already been imported, the callback runs immediately.
+
+    Args:
+        modules: Module names that trigger initialization. Defaults to the
+            libraries of all enabled instruments.
+        callback: Function called with the triggering module name.
+
+    Returns:
+        The installed finder.
+    """
+    finder = LazyInitFinder(trigger_modules() if modules is None else modules, callback)
+
+    already_imported = sorted(name for name in finder._modules if name in sys.modules)
+    if already_imported:
+        finder.fire(already_imported[0])
+        return finder
+
+    sys.meta_path.insert(0, finder)
+    logger.debug(
+        f"Lazy instrumentation enabled, watching {len(finder._modules)} modules."
+    )
+    return finder
@@ -0,0 +1,647 @@
+# Copyright (c) 2025, WSO2 LLC. (https://www.wso2.com).
+#
+# WSO2 LLC. licenses this file to you under the Apache License,
+# Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""
+Span export pipeline assembly.
+
+This module builds the exporter and span processor chain handed to
+Traceloop.init() from environment variables. Every pipeline ends in a
+MonitoredBatchSpanProcessor so that export back-pressure is visible through
+amp_instrumentation.stats().
+"""
+
+import logging
+import os
+import sys
+from functools import partial
+from typing import TYPE_CHECKING, Any, Callable, Dict, Optional
+from urllib.parse import urlparse
+
+from opentelemetry.sdk.metrics.export import MetricExporter
+from opentelemetry.sdk.trace import SpanProcessor
+from opentelemetry.sdk.trace.export import SpanExporter
+
+from amp_instrumentation import _stats
+
+from . import constants as env_vars
+from .initialization import (
+    ConfigurationError,
+    _get_bool_env_var,
+    _get_float_env_var,
+    _get_int_env_var,
+    _get_list_env_var,
+)
+
+if TYPE_CHECKING:
+    from amp_instrumentation.sampling import BackPressureThrottle
+
+logger = logging.getLogger(__name__)
+
+HTTP_PROTOBUF = "http/protobuf"
+GRPC = "grpc"
+GZIP = "gzip"
+NO_COMPRESSION = "none"
+DELTA = "delta"
+CUMULATIVE = "cumulative"
+
+_PROTOCOL_ALIASES = {HTTP_PROTOBUF: HTTP_PROTOBUF, "http": HTTP_PROTOBUF, GRPC: GRPC}
+
+# Ping idle gRPC connections so that load balancers and NAT do not drop them.
+# grpc takes integer option values, although the exporter annotates them as str.
+_GRPC_KEEPALIVE_OPTIONS: Any = (
+    ("grpc.keepalive_time_ms", 30000),
+    ("grpc.keepalive_timeout_ms", 10000),
+    ("grpc.http2.max_pings_without_data", 0),
+)
+
+
+def _traces_url(otel_endpoint: str) -> str:
+    """Return the OTLP/HTTP traces URL for an http(s) endpoint."""
+    base_url = otel_endpoint.rstrip("/")
+    if not base_url.endswith("/v1/traces"):
+        base_url = f"{base_url}/v1/traces"
+    return base_url
+
+
+def resolve_export_protocol(otel_endpoint: str) -> str:
+    """
+    Return the OTLP protocol to use: "http/protobuf" or "grpc".
+
+    AMP_EXPORT_PROTOCOL takes precedence, then OTEL_EXPORTER_OTLP_PROTOCOL.
+    Without either, the protocol is inferred from the endpoint scheme like
+    Traceloop does: http(s) URLs use OTLP/HTTP, anything else OTLP/gRPC.
+
+    Raises:
+        ConfigurationError: If the protocol is unsupported or does not fit the endpoint.
+    """
+    scheme = urlparse(otel_endpoint).scheme.lower()
+    var_name = env_vars.AMP_EXPORT_PROTOCOL
+    value = os.getenv(var_name, "").strip().lower()
+    if not value:
+        var_name = env_vars.OTEL_EXPORTER_OTLP_PROTOCOL
+        value = os.getenv(var_name, "").strip().lower()
+    if not value:
+        return HTTP_PROTOBUF if scheme in ("http", "https") else GRPC
+
+    protocol = _PROTOCOL_ALIASES.get(value)
+    if protocol is None:
+        raise ConfigurationError(
+            f"'{var_name}' must be one of {', '.join(sorted(_PROTOCOL_ALIASES))}, "
+            f"got '{value}'."
+        )
+    if protocol == HTTP_PROTOBUF and scheme not in ("http", "https"):
+        raise ConfigurationError(
+            f"'{var_name}={value}' requires an http(s) '{env_vars.AMP_OTEL_ENDPOINT}'."
+        )
+    return protocol
+
+
+def resolve_export_compression() -> str:
+    """
+    Return the export compression: "gzip" (default) or "none".
+
+    AMP_EXPORT_COMPRESSION takes precedence over OTEL_EXPORTER_OTLP_COMPRESSION.
+
+    Raises:
+        ConfigurationError: If the compression is unsupported.
+    """
+    var_name = env_vars.AMP_EXPORT_COMPRESSION
+    value = os.getenv(var_name, "").strip().lower()
+    if not value:
+        var_name = env_vars.OTEL_EXPORTER_OTLP_COMPRESSION
+        value = os.getenv(var_name, "").strip().lower()
+    if not value:
+        return GZIP
+    if value not in (GZIP, NO_COMPRESSION):
+        raise ConfigurationError(
+            f"'{var_name}' must be one of {GZIP}, {NO_COMPRESSION}, got '{value}'."
+        )
+    return value
+
+
+def build_span_exporter(
+    otel_endpoint: str,
+    headers: Dict[str, str],
+    timeout_ms: Optional[float] = None,
+    protocol: Optional[str] = None,
+    compression: str = GZIP,
+) -> SpanExporter:
+    """
+    Create the OTLP span exporter for the endpoint.
+
+    OTLP/HTTP appends the /v1/traces path to the endpoint. OTLP/gRPC connects
+    to the endpoint's host and port, using TLS for https and grpcs URLs. Both
+    exporters keep one connection open across exports.
+
+    Args:
+        otel_endpoint: Collector endpoint.
+        headers: Headers sent with every export.
+        timeout_ms: Export request timeout; the exporter default when None.
+        protocol: "http/protobuf" or "grpc"; inferred from the endpoint when None.
+        compression: "gzip" (default) or "none".
+    """
+    timeout = timeout_ms / 1000 if timeout_ms is not None else None
+    parsed = urlparse(otel_endpoint)
+    scheme = parsed.scheme.lower()
+    if protocol is None:
+        protocol = HTTP_PROTOBUF if scheme in ("http", "https") else GRPC
+
+    if protocol == HTTP_PROTOBUF:
+        from opentelemetry.exporter.otlp.proto.http import Compression
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import (
+            OTLPSpanExporter,
+        )
+
+        return OTLPSpanExporter(
+            endpoint=_traces_url(otel_endpoint),
+            headers=headers,
+            timeout=timeout,
+            compression=Compression(compression),
+        )
+
+    import grpc
+    from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import (
+        OTLPSpanExporter as GRPCSpanExporter,
+    )
+
+    has_scheme = scheme in ("grpc", "grpcs", "http", "https")
+    return GRPCSpanExporter(
+        endpoint=parsed.netloc if has_scheme else otel_endpoint,
+        headers=headers,
+        insecure=scheme not in ("grpcs", "https"),
+        timeout=timeout,
+        compression=grpc.Compression.Gzip
+        if compression == GZIP
+        else grpc.Compression.NoCompression,
+        channel_options=_GRPC_KEEPALIVE_OPTIONS,
+    )
+
+
+def _metrics_url(otel_endpoint: str) -> str:
+    """Return the OTLP/HTTP metrics URL for an http(s) endpoint."""
+    base_url = otel_endpoint.rstrip("/")
+    if base_url.endswith("/v1/traces"):
+        base_url = base_url[: -len("/v1/traces")]
+    if not base_url.endswith("/v1/metrics"):
+        base_url = f"{base_url}/v1/metrics"
+    return base_url
+
+
+def build_metric_exporter(
+    otel_endpoint: str,
+    headers: Dict[str, str],
+    protocol: str,
+    compression: str = GZIP,
+    temporality: str = DELTA,
+) -> MetricExporter:
+    """
+    Create the OTLP metric exporter for the endpoint.
+
+    Counters and histograms use the given temporality; up-down counters and
+    gauges are always cumulative.
+
+    Args:
+        otel_endpoint: Collector endpoint; OTLP/HTTP uses its /v1/metrics path.
+        headers: Headers sent with every export.
+        protocol: "http/protobuf" or "grpc".
+        compression: "gzip" (default) or "none".
+        temporality: "delta" or "cumulative".
+    """
+    from opentelemetry.sdk.metrics import (
+        Counter,
+        Histogram,
+        ObservableCounter,
+        ObservableGauge,
+        ObservableUpDownCounter,
+        UpDownCounter,
+    )
+    from opentelemetry.sdk.metrics.export import AggregationTemporality
+
+    monotonic = (
+        AggregationTemporality.DELTA
+        if temporality == DELTA
+        else AggregationTemporality.CUMULATIVE
+    )
+    preferred_temporality: Dict[type, AggregationTemporality] = {
+        Counter: monotonic,
+        Histogram: monotonic,
+        ObservableCounter: monotonic,
+        UpDownCounter: AggregationTemporality.CUMULATIVE,
+        ObservableUpDownCounter: AggregationTemporality.CUMULATIVE,
+        ObservableGauge: AggregationTemporality.CUMULATIVE,
+    }
+
+    if protocol == HTTP_PROTOBUF:
+        from opentelemetry.exporter.otlp.proto.http import Compression
+        from opentelemetry.exporter.otlp.proto.http.metric_exporter import (
+            OTLPMetricExporter,
+        )
+
+        return OTLPMetricExporter(
+            endpoint=_metrics_url(otel_endpoint),
+            headers=headers,
+            compression=Compression(compression),
+            preferred_temporality=preferred_temporality,
+        )
+
+    import grpc
+    from opentelemetry.exporter.otlp.proto.grpc.metric_exporter import (
+        OTLPMetricExporter as GRPCMetricExporter,
+    )
+
+    parsed = urlparse(otel_endpoint)
+    scheme = parsed.scheme.lower()
+    has_scheme = scheme in ("grpc", "grpcs", "http", "https")
+    return GRPCMetricExporter(
+        endpoint=parsed.netloc if has_scheme else otel_endpoint,
+        headers=headers,
+        insecure=scheme not in ("grpcs", "https"),
+        compression=grpc.Compression.Gzip
+        if compression == GZIP
+        else grpc.Compression.NoCompression,
+        preferred_temporality=preferred_temporality,
+    )
+
+
+def resolve_metrics_temporality() -> str:
+    """
+    Return the temporality of exported counters and histograms.
+
+    Raises:
+        ConfigurationError: If AMP_METRICS_TEMPORALITY is not "delta" or "cumulative".
+    """
+    value = os.getenv(env_vars.AMP_METRICS_TEMPORALITY, "").strip().lower() or DELTA
+    if value not in (DELTA, CUMULATIVE):
+        raise ConfigurationError(
+            f"'{env_vars.AMP_METRICS_TEMPORALITY}' must be one of {DELTA}, "
+            f"{CUMULATIVE}, got '{value}'."
+        )
+    return value
+
+
+def build_metrics_processor(
+    next_processor: SpanProcessor,
+    otel_endpoint: str,
+    headers: Dict[str, str],
+    protocol: str,
+    compression: str,
+) -> SpanProcessor:
+    """
+    Wrap the span processor chain in an LLM metrics aggregator.
+
+    Raises:
+        ConfigurationError: If a metrics setting is invalid.
+    """
+    from opentelemetry.sdk.metrics import MeterProvider
+    from opentelemetry.sdk.metrics.export import PeriodicExportingMetricReader
+    from opentelemetry.sdk.resources import SERVICE_NAME, Resource
+
+    from amp_instrumentation.metrics import LLMMetricsSpanProcessor
+
+    interval_ms = _get_float_env_var(
+        env_vars.AMP_METRICS_INTERVAL_MS, 60000, minimum=1000
+    )
+    exporter = build_metric_exporter(
+        otel_endpoint, headers, protocol, compression, resolve_metrics_temporality()
+    )
+    reader = PeriodicExportingMetricReader(exporter, export_interval_millis=interval_ms)
+    # Same service name as the Traceloop tracer provider
+    meter_provider = MeterProvider(
+        metric_readers=[reader],
+        resource=Resource.create({SERVICE_NAME: sys.argv[0]}),
+        # Shut down with the span pipeline, within the shutdown deadline
+        shutdown_on_exit=False,
+    )
+    logger.debug(f"LLM metrics enabled, exported every {interval_ms:g} ms.")
+    return LLMMetricsSpanProcessor(next_processor, meter_provider)
+
+
+def build_spooling_exporter(
+    otel_endpoint: str,
+    headers: Dict[str, str],
+    spool_dir: str,
+    timeout_ms: Optional[float] = None,
+    compression: str = GZIP,
+) -> SpanExporter:
+    """
+    Create an OTLP/HTTP exporter that spools undeliverable batches under spool_dir.
+
+    Raises:
+        ConfigurationError: If the endpoint is not an http(s) URL.
+    """
+    from amp_instrumentation.spool import SpoolingSpanExporter
+
+    if urlparse(otel_endpoint).scheme.lower() not in ("http", "https"):
+        raise ConfigurationError(
+            f"'{env_vars.AMP_SPOOL_DIR}' requires an http(s) '{env_vars.AMP_OTEL_ENDPOINT}'."
+        )
+    max_bytes = _get_int_env_var(
+        env_vars.AMP_SPOOL_MAX_BYTES, 256 * 1024 * 1024, minimum=1024
+    )
+    segment_bytes = _get_int_env_var(
+        env_vars.AMP_SPOOL_SEGMENT_BYTES, 8 * 1024 * 1024, minimum=1024
+    )
+    exporter = SpoolingSpanExporter(
+        _traces_url(otel_endpoint),
+        headers=headers,
+        spool_dir=spool_dir,
+        max_bytes=max_bytes,
+        segment_bytes=segment_bytes,
+        timeout=timeout_ms / 1000 if timeout_ms is not None else 10.0,
+        compression=compression,
+    )
+    _stats.register("spool", exporter.stats)
+    logger.debug(f"Spooling undeliverable spans to {spool_dir}.")
+    return exporter
+
+
+def build_span_processor(
+    otel_endpoint: str,
+    headers: Dict[str, str],
+    back_pressure: Optional["BackPressureThrottle"] = None,
+) -> SpanProcessor:
+    """
+    Build the span processor chain from environment variables.
+
+    Batch settings fall back to the standard OTEL_BSP_* variables and then to
+    the OpenTelemetry defaults.
+
+    Args:
+        otel_endpoint: Collector endpoint.
+        headers: Headers sent with every export.
+        back_pressure: Adaptive sampling throttle to feed with the export
+            queue fill level and circuit state.
+
+    Returns:
+        The outermost span processor of the chain.
+
+    Raises:
+        ConfigurationError: If a pipeline setting is invalid.
+    """
+    from amp_instrumentation.circuit_breaker import CircuitBreaker
+    from amp_instrumentation.export import MonitoredBatchSpanProcessor
+
+    max_queue_size = _get_int_env_var(
+        env_vars.AMP_EXPORT_MAX_QUEUE,
+        _get_int_env_var(env_vars.OTEL_BSP_MAX_QUEUE_SIZE, 2048, minimum=1),
+        minimum=1,
+    )
+    max_export_batch_size = _get_int_env_var(
+        env_vars.AMP_EXPORT_BATCH_SIZE,
+        _get_int_env_var(env_vars.OTEL_BSP_MAX_EXPORT_BATCH_SIZE, 512, minimum=1),
+        minimum=1,
+    )
+    if max_export_batch_size > max_queue_size:
+        raise ConfigurationError(
+            f"'{env_vars.AMP_EXPORT_BATCH_SIZE}' ({max_export_batch_size}) must not "
+            f"exceed '{env_vars.AMP_EXPORT_MAX_QUEUE}' ({max_queue_size})."
+        )
+    schedule_delay_ms = _get_float_env_var(
+        env_vars.AMP_EXPORT_INTERVAL_MS,
+        _get_float_env_var(env_vars.OTEL_BSP_SCHEDULE_DELAY, 5000, minimum=1),
+        minimum=1,
+    )
+    export_timeout_ms = _get_float_env_var(
+        env_vars.AMP_EXPORT_TIMEOUT_MS,
+        _get_float_env_var(env_vars.OTEL_BSP_EXPORT_TIMEOUT, 30000, minimum=1),
+        minimum=1,
+    )
+
+    # Only override the exporter's own request timeout when explicitly configured
+    exporter_timeout_ms = (
+        export_timeout_ms if os.getenv(env_vars.AMP_EXPORT_TIMEOUT_MS) else None
+    )
+    protocol = resolve_export_protocol(otel_endpoint)
+    compression = resolve_export_compression()
+    spool_dir = os.getenv(env_vars.AMP_SPOOL_DIR)
+    exporter_factory: Optional[Callable[[], SpanExporter]] = None
+    circuit_breaker: Optional[CircuitBreaker] = None
+    circuit_failures = _get_int_env_var(
+        env_vars.AMP_EXPORT_CIRCUIT_FAILURES, 3, minimum=0
+    )
+    if spool_dir:
+        if protocol != HTTP_PROTOBUF:
+            raise ConfigurationError(
+                f"'{env_vars.AMP_SPOOL_DIR}' is only supported with the "
+                f"{HTTP_PROTOBUF} protocol."
+            )
+        # The spooling exporter re-initializes itself in forked workers
+        exporter = build_spooling_exporter(
+            otel_endpoint, headers, spool_dir, exporter_timeout_ms, compression
+        )
+    else:
+        # Forked workers get a fresh exporter instead of the parent's connection
+        exporter_factory = partial(
+            build_span_exporter,
+            otel_endpoint,
+            headers,
+            exporter_timeout_ms,
+            protocol,
+            compression,
+        )
+        exporter = exporter_factory()
+        # The spooling exporter has its own replay backoff and must keep
+        # receiving batches to spool them
+        if circuit_failures:
+            circuit_breaker = CircuitBreaker(
+                failure_threshold=circuit_failures,
+                backoff_ms=_get_float_env_var(
+                    env_vars.AMP_EXPORT_CIRCUIT_BACKOFF_MS, 1000, minimum=1
+                ),
+                max_backoff_ms=_get_float_env_var(
+                    env_vars.AMP_EXPORT_CIRCUIT_MAX_BACKOFF_MS, 60000, minimum=1
+                ),
+            )
+    export_processor = MonitoredBatchSpanProcessor(
+        exporter,
+        max_queue_size=max_queue_size,
+        schedule_delay_millis=schedule_delay_ms,
+        max_export_batch_size=max_export_batch_size,
+        export_timeout_millis=export_timeout_ms,
+        exporter_factory=exporter_factory,
+        circuit_breaker=circuit_breaker,
+    )
+    _stats.register("export", export_processor.stats)
+    if circuit_breaker is not None:
+        _stats.register("circuit_breaker", circuit_breaker.stats)
+    if back_pressure is not None:
+        back_pressure.bind(export_processor.pressure)
+        _stats.register("adaptive_sampling", back_pressure.stats)
+
+    processor: SpanProcessor = export_processor
+
+    if _get_bool_env_var(env_vars.AMP_TAIL_SAMPLING):
+        from amp_instrumentation.tail_sampling import TailSamplingSpanProcessor
+
+        tail_sampler = TailSamplingSpanProcessor(
+            processor,
+            sample_ratio=_get_float_env_var(
+                env_vars.AMP_TAIL_SAMPLE_RATIO, 0.1, minimum=0.0, maximum=1.0
+            ),
+            latency_threshold_ms=_get_float_env_var(
+                env_vars.AMP_TAIL_LATENCY_THRESHOLD_MS, 0, minimum=0
+            ),
+            token_threshold=_get_int_env_var(
+                env_vars.AMP_TAIL_TOKEN_THRESHOLD, 0, minimum=0
+            ),
+            decision_wait_ms=_get_float_env_var(
+                env_vars.AMP_TAIL_DECISION_WAIT_MS, 30000, minimum=1
+            ),
+            max_buffered_spans=_get_int_env_var(
+                env_vars.AMP_TAIL_MAX_BUFFERED_SPANS, 10000, minimum=1
+            ),
+        )
+        _stats.register("tail_sampling", tail_sampler.stats)
+        logger.debug("Tail sampling enabled.")
+        processor = tail_sampler
+
+    max_attribute_bytes = _get_int_env_var(
+        env_vars.AMP_TRACE_MAX_ATTR_BYTES, 0, minimum=0
+    )
+    max_event_bytes = _get_int_env_var(env_vars.AMP_TRACE_MAX_EVENT_BYTES, 0, minimum=0)
+    max_span_bytes = _get_int_env_var(env_vars.AMP_TRACE_MAX_SPAN_BYTES, 0, minimum=0)
+    if max_attribute_bytes or max_event_bytes or max_span_bytes:
+        from amp_instrumentation.truncation import TruncatingSpanProcessor
+
+        # Outside tail sampling, so oversized values are cut before spans are
+        # buffered, and inside the span profiler, memory tracker and loop
+        # monitor, so the attributes they add on end count toward the limits
+        truncator = TruncatingSpanProcessor(
+            processor,
+            max_attribute_bytes=max_attribute_bytes,
+            max_event_bytes=max_event_bytes,
+            max_span_bytes=max_span_bytes,
+        )
+        _stats.register("truncation", truncator.stats)
+        processor = truncator
+
+    if _get_bool_env_var(env_vars.AMP_SPAN_PROFILING):
+        from amp_instrumentation.span_profiler import SpanProfilingProcessor
+
+        span_profiler = SpanProfilingProcessor(
+            processor,
+            sample_hz=_get_float_env_var(
+                env_vars.AMP_SPAN_PROFILING_HZ, 50, minimum=1, maximum=1000
+            ),
+        )
+        _stats.register("span_profiler", span_profiler.stats)
+        logger.debug("Span profiling enabled.")
+        processor = span_profiler
+
+    if _get_bool_env_var(env_vars.AMP_TRACE_MEMORY):
+        from amp_instrumentation import memory
+
+        source = os.getenv(env_vars.AMP_TRACE_MEMORY_SOURCE, "").strip().lower()
+        source = source or memory.TRACEMALLOC
+        if source not in memory.SOURCES:
+            raise ConfigurationError(
+                f"'{env_vars.AMP_TRACE_MEMORY_SOURCE}' must be one of "
+                f"{', '.join(memory.SOURCES)}, got '{source}'."
+            )
+        if source == memory.RSS and not memory.rss_supported():
+            raise ConfigurationError(
+                f"'{env_vars.AMP_TRACE_MEMORY_SOURCE}={memory.RSS}' requires /proc "
+                "(Linux)."
+            )
+        span_kinds = _get_list_env_var(
+            env_vars.AMP_TRACE_MEMORY_SPAN_KINDS, lowercase=True
+        )
+        if span_kinds is None:
+            span_kinds = list(memory.DEFAULT_SPAN_KINDS)
+        memory_tracker = memory.MemoryTrackingSpanProcessor(
+            processor,
+            source=source,
+            span_kinds=None if "all" in span_kinds else span_kinds,
+            sample_ratio=_get_float_env_var(
+                env_vars.AMP_TRACE_MEMORY_SAMPLE_RATIO, 0.1, minimum=0.0, maximum=1.0
+            ),
+        )
+        _stats.register("memory", memory_tracker.stats)
+        logger.debug(f"Memory tracking enabled ({source}).")
+        processor = memory_tracker
+
+    if _get_bool_env_var(env_vars.AMP_LOOP_MONITOR):
+        from amp_instrumentation.loop_monitor import EventLoopMonitorSpanProcessor
+
+        loop_monitor = EventLoopMonitorSpanProcessor(
+            processor,
+            interval_ms=_get_float_env_var(
+                env_vars.AMP_LOOP_MONITOR_INTERVAL_MS, 50, minimum=1
+            ),
+            block_threshold_ms=_get_float_env_var(
+                env_vars.AMP_LOOP_BLOCK_THRESHOLD_MS, 100, minimum=1
+            ),
+        )
+        _stats.register("event_loop", loop_monitor.stats)
+        logger.debug("Event loop monitoring enabled.")
+        processor = loop_monitor
+
+    if _get_bool_env_var(env_vars.AMP_STREAM_AGGREGATION, default=True):
+        from amp_instrumentation.streaming import StreamAggregationSpanProcessor
+
+        # Outside truncation, so the chunk events are gone before sizes are capped
+        stream_aggregator = StreamAggregationSpanProcessor(processor)
+        _stats.register("streaming", stream_aggregator.stats)
+        processor = stream_aggregator
+
+    if _get_bool_env_var(env_vars.AMP_REDACT_PII):
+        from amp_instrumentation import redaction
+
+        pii_types = _get_list_env_var(env_vars.AMP_REDACT_PII_TYPES, lowercase=True)
+        unknown = sorted(set(pii_types or ()) - set(redaction.KINDS))
+        if unknown:
+            raise ConfigurationError(
+                f"'{env_vars.AMP_REDACT_PII_TYPES}' must only contain "
+                f"{', '.join(redaction.KINDS)}, got '{', '.join(unknown)}'."
+            )
+        # Outside truncation, so values are not cut in the middle of an address
+        redactor = redaction.RedactingSpanProcessor(
+            processor, redaction.PIIRedactor(pii_types or redaction.KINDS)
+        )
+        _stats.register("redaction", redactor.stats)
+        logger.debug("PII redaction enabled.")
+        processor = redactor
+
+    collapse_patterns = _get_list_env_var(env_vars.AMP_COLLAPSE_SPANS) or []
+    collapse_depth = _get_int_env_var(env_vars.AMP_COLLAPSE_DEPTH, 0, minimum=0)
+    if collapse_patterns or collapse_depth:
+        from amp_instrumentation import collapse
+
+        mode = os.getenv(env_vars.AMP_COLLAPSE_MODE, "").strip().lower()
+        mode = mode or collapse.EVENTS
+        if mode not in collapse.MODES:
+            raise ConfigurationError(
+                f"'{env_vars.AMP_COLLAPSE_MODE}' must be one of "
+                f"{', '.join(collapse.MODES)}, got '{mode}'."
+            )
+        # Outside truncation, so the events folded into a span are capped too
+        collapser = collapse.CollapsingSpanProcessor(
+            processor,
+            patterns=collapse_patterns,
+            max_depth=collapse_depth,
+            mode=mode,
+        )
+        _stats.register("collapse", collapser.stats)
+        logger.debug("Span collapsing enabled.")
+        processor = collapser
+
+    if _get_bool_env_var(env_vars.AMP_METRICS):
+        # Outermost, so spans are counted before any sampling drops them
+        processor = build_metrics_processor(
+            processor, otel_endpoint, headers, protocol, compression
+        )
+
+    return processor
@@ -17,15 +17,30 @@
 """
 This module is automatically loaded by Python at startup when PYTHONPATH includes
 the _bootstrap directory. It initializes WSO2 AMP instrumentation before any user code runs.
+
+When AMP_LAZY_INIT is enabled, only a lightweight import hook is installed here and
+instrumentation is initialized on the first import of a supported library.
 """
 
 import logging
+import os
 import sys
+from amp_instrumentation._bootstrap import constants as env_vars
 from amp_instrumentation._bootstrap.initialization import (
+    _get_bool_env_var,
     configure_logging,
     initialize_instrumentation,
 )
 
+# Start profiling first so that it covers instrumentation startup
+if os.getenv(env_vars.AMP_PROFILE):
+    try:
+        from amp_instrumentation.profiling import start_profiling
+
+        start_profiling()
+    except Exception as e:
+        print(f"ERROR: Failed to start WSO2 AMP profiling: {e}", file=sys.stderr)
+
 # Initialize automatically when this module is loaded
 try:
     # Configure logging for the entire package
@@ -34,8 +49,14 @@ try:
     # Get logger for this module - use explicit name since __name__ is just "sitecustomize"
     logger = logging.getLogger("amp_instrumentation._bootstrap.sitecustomize")
 
-    initialize_instrumentation()
-    logger.info("WSO2 AMP instrumentation initialized successfully")
+    if _get_bool_env_var(env_vars.AMP_LAZY_INIT):
+        from amp_instrumentation._bootstrap.lazy import install_lazy_initialization
+
+        install_lazy_initialization()
+        logger.info("WSO2 AMP instrumentation will initialize on first library import")
+    else:
+        initialize_instrumentation()
+        logger.info("WSO2 AMP instrumentation initialized successfully")
 except Exception as e:
     # Print error directly to stderr to ensure visibility
     print(f"ERROR: Failed to initialize WSO2 AMP instrumentation: {e}", file=sys.stderr)
@@ -0,0 +1,56 @@
+# Copyright (c) 2025, WSO2 LLC. (https://www.wso2.com).
+#
+# WSO2 LLC. licenses this file to you under the Apache License,
+# Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""
+Fork handling for pipeline components.
+
+Pre-fork servers (gunicorn --preload, uvicorn --workers) initialize
+instrumentation in the parent and then fork workers. A child inherits the
+parent's memory but none of its threads, and any lock held by another thread
+at fork time stays locked forever. Components holding threads, locks or
+connections register an after-fork hook here to rebuild them in the child.
+"""
+
+import logging
+import os
+import weakref
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+
+def register_after_fork(reinit: Callable[[], None]) -> None:
+    """
+    Call a bound method in the child process after every fork.
+
+    Only a weak reference to the method's owner is kept, so registering does
+    not keep a shut-down component alive.
+    """
+    if not hasattr(os, "register_at_fork"):  # pragma: no cover - Windows
+        return
+
+    weak_reinit = weakref.WeakMethod(reinit)  # type: ignore[arg-type]
+
+    def _after_in_child() -> None:
+        method = weak_reinit()
+        if method is None:
+            return
+        try:
+            method()
+        except Exception:
+            logger.exception("Failed to re-initialize instrumentation after fork.")
+
+    os.register_at_fork(after_in_child=_after_in_child)
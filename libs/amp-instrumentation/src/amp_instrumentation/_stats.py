@@ -0,0 +1,69 @@
+# Copyright (c) 2025, WSO2 LLC. (https://www.wso2.com).
+#
+# WSO2 LLC. licenses this file to you under the Apache License,
+# Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""
+Runtime statistics for the instrumentation pipeline.
+
+Pipeline components register a provider callable under a name; stats()
+returns a snapshot of every registered component. Providers must be cheap
+and must not block on export.
+"""
+
+import os
+import threading
+from typing import Any, Callable, Dict
+
+_providers: Dict[str, Callable[[], Dict[str, Any]]] = {}
+_providers_lock = threading.Lock()
+
+
+def _reset_lock_after_fork() -> None:
+    global _providers_lock
+    _providers_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_lock_after_fork)
+
+
+def register(name: str, provider: Callable[[], Dict[str, Any]]) -> None:
+    """Register (or replace) the stats provider for a pipeline component."""
+    with _providers_lock:
+        _providers[name] = provider
+
+
+def unregister(name: str) -> None:
+    """Remove the stats provider for a pipeline component, if registered."""
+    with _providers_lock:
+        _providers.pop(name, None)
+
+
+def stats() -> Dict[str, Dict[str, Any]]:
+    """
+    Return a snapshot of the instrumentation pipeline statistics.
+
+    Returns:
+        A dictionary keyed by component name (e.g. "tail_sampling"), each
+        holding that component's counters and gauges.
+
+    Example:
+        >>> import amp_instrumentation
+        >>> amp_instrumentation.stats()["tail_sampling"]["buffered_spans"]
+        42
+    """
+    with _providers_lock:
+        providers = list(_providers.items())
+    return {name: provider() for name, provider in providers}
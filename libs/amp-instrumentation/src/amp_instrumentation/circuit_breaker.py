@@ -0,0 +1,138 @@
+# Copyright (c) 2025, WSO2 LLC. (https://www.wso2.com).
+#
+# WSO2 LLC. licenses this file to you under the Apache License,
+# Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""
+Circuit breaker for span export.
+
+When the collector is down or overloaded, every export call waits for the
+exporter's timeout and retries, and the batch worker keeps serializing spans
+that will never be delivered. After a number of consecutive failed exports
+the breaker opens and batches are rejected without calling the exporter.
+Once a backoff period has passed, a single batch is let through as a probe
+(half-open): success closes the breaker, failure opens it again with twice
+the backoff.
+"""
+
+import logging
+import random
+import threading
+import time
+from typing import Any, Dict
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker with exponential backoff.
+
+    Backoff periods are jittered between half and all of the nominal value so
+    that a fleet of workers does not probe a recovering collector in lockstep.
+
+    Args:
+        failure_threshold: Consecutive failures that open the breaker.
+        backoff_ms: Backoff after the breaker first opens.
+        max_backoff_ms: Upper bound for the doubled backoff.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = 3,
+        backoff_ms: float = 1000,
+        max_backoff_ms: float = 60000,
+    ) -> None:
+        self._failure_threshold = failure_threshold
+        self._base_backoff = backoff_ms / 1000
+        self._max_backoff = max_backoff_ms / 1000
+        self.reset()
+
+    def reset(self) -> None:
+        """Close the breaker and clear its counters, e.g. in a forked child."""
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._consecutive_failures = 0
+        self._backoff = self._base_backoff
+        self._retry_at = 0.0
+        self._counters = {
+            "times_opened": 0,
+            "batches_rejected": 0,
+            "spans_rejected": 0,
+        }
+
+    @property
+    def is_open(self) -> bool:
+        """Whether batches are currently being rejected or probed."""
+        return self._state != CLOSED
+
+    def allow(self, span_count: int) -> bool:
+        """Return whether a batch may be exported; counts it if rejected."""
+        with self._lock:
+            if self._state != OPEN:
+                return True
+            if time.monotonic() < self._retry_at:
+                self._counters["batches_rejected"] += 1
+                self._counters["spans_rejected"] += span_count
+                return False
+            self._state = HALF_OPEN
+            return True
+
+    def record(self, success: bool) -> None:
+        """Record the outcome of an allowed export."""
+        with self._lock:
+            if success:
+                if self._state != CLOSED:
+                    logger.info("Span export recovered; circuit closed.")
+                self._state = CLOSED
+                self._consecutive_failures = 0
+                self._backoff = self._base_backoff
+                return
+
+            self._consecutive_failures += 1
+            if self._state == HALF_OPEN:
+                self._backoff = min(self._backoff * 2, self._max_backoff)
+                self._open_locked()
+            elif (
+                self._state == CLOSED
+                and self._consecutive_failures >= self._failure_threshold
+            ):
+                self._open_locked()
+
+    def _open_locked(self) -> None:
+        delay = self._backoff * random.uniform(0.5, 1.0)
+        self._state = OPEN
+        self._retry_at = time.monotonic() + delay
+        self._counters["times_opened"] += 1
+        logger.warning(
+            f"Span export failed {self._consecutive_failures} times in a row; "
+            f"rejecting batches for {delay:.1f}s."
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the breaker state, failure streak and rejection counters."""
+        with self._lock:
+            result: Dict[str, Any] = dict(self._counters)
+            result["state"] = self._state
+            result["consecutive_failures"] = self._consecutive_failures
+            result["retry_in_ms"] = (
+                max(0.0, (self._retry_at - time.monotonic()) * 1000)
+                if self._state == OPEN
+                else 0.0
+            )
+        return result
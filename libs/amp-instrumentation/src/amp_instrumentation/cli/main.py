@@ -19,13 +19,34 @@ WSO2 Agent Management Platform - CLI wrapper for automatic instrumentation.
 
 This CLI tool wraps Python commands to automatically inject tracing instrumentation
 using sitecustomize.py and PYTHONPATH manipulation.
+
+By default the wrapper process is replaced by the command (exec), so no idle
+parent stays around and signals reach the application directly. Where exec is
+not available, or with AMP_LAUNCH_MODE=subprocess, the command runs as a child
+process and SIGTERM, SIGINT and SIGHUP are forwarded to it.
+
+Options go before the command, optionally ended by "--":
+
+    amp-instrument --profile[=cpu|import|alloc] -- python my_script.py
 """
 
 import subprocess
+import signal
 import sys
 import os
 from pathlib import Path
-from typing import List, Dict, NoReturn
+from typing import Any, List, Dict, NoReturn, Optional, Tuple
+
+from amp_instrumentation._bootstrap import constants as env_vars
+
+LAUNCH_AUTO = "auto"
+LAUNCH_EXEC = "exec"
+LAUNCH_SUBPROCESS = "subprocess"
+
+PROFILE_MODES = ("cpu", "import", "alloc")
+
+# Signals relayed to the child in subprocess mode, where the platform has them
+FORWARDED_SIGNALS = ("SIGTERM", "SIGINT", "SIGHUP")
 
 
 def check_sitecustomize_conflicts() -> None:
@@ -45,17 +66,130 @@ def check_sitecustomize_conflicts() -> None:
         )
 
 
+def resolve_launch_mode() -> str:
+    """
+    Return the launch mode from AMP_LAUNCH_MODE.
+
+    "auto" (the default) uses exec on POSIX systems. On Windows, exec starts
+    a new process and exits the wrapper early, so subprocess mode is used.
+    Invalid values print an error and exit.
+    """
+    mode = os.getenv(env_vars.AMP_LAUNCH_MODE, LAUNCH_AUTO).strip().lower()
+    if mode == LAUNCH_AUTO:
+        return LAUNCH_SUBPROCESS if os.name == "nt" else LAUNCH_EXEC
+    if mode not in (LAUNCH_EXEC, LAUNCH_SUBPROCESS):
+        print(
+            f"Error: '{env_vars.AMP_LAUNCH_MODE}' must be one of "
+            f"{LAUNCH_AUTO}, {LAUNCH_EXEC}, {LAUNCH_SUBPROCESS}; got '{mode}'.",
+            file=sys.stderr,
+        )
+        sys.exit(1)
+    return mode
+
+
+def exec_command(args: List[str], env: Dict[str, str]) -> NoReturn:
+    """
+    Replace the current process with the command.
+
+    The command keeps this process's PID, so signals sent to the wrapper
+    reach the application, and its exit status is the wrapper's.
+
+    Raises:
+        SystemExit: Only if the command could not be started (127 if it was
+            not found, 126 if it is not executable, 1 otherwise)
+    """
+    # Buffered output would be lost when the process image is replaced
+    sys.stdout.flush()
+    sys.stderr.flush()
+    try:
+        os.execvpe(args[0], args, env)
+    except FileNotFoundError:
+        print(f"Error: Command not found: {args[0]}", file=sys.stderr)
+        sys.exit(127)
+    except PermissionError:
+        print(f"Error: Permission denied: {args[0]}", file=sys.stderr)
+        sys.exit(126)
+    except Exception as e:
+        print(f"Error running command: {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+def _is_terminal_foreground() -> bool:
+    """Whether this process group is in the foreground of a terminal."""
+    try:
+        return os.tcgetpgrp(sys.stdin.fileno()) == os.getpgrp()
+    except (AttributeError, OSError, ValueError):
+        return False
+
+
+def run_subprocess(args: List[str], env: Dict[str, str]) -> NoReturn:
+    """
+    Run the command as a child process, forwarding termination signals.
+
+    SIGTERM and SIGHUP are always forwarded. SIGINT is not forwarded while
+    this process is in the foreground of a terminal, since Ctrl+C already
+    delivers it to the child. If the child dies from a signal, the wrapper
+    terminates with the same signal, or exits with 128 plus the signal
+    number if that signal cannot be raised (SIGKILL, SIGSTOP).
+
+    Raises:
+        SystemExit: With the return code of the child process
+    """
+    process: Optional["subprocess.Popen[bytes]"] = None
+    # Signals received before the child has started, delivered once it has
+    pending: List[int] = []
+
+    def forward(signum: int, frame: Any) -> None:
+        if signum == signal.SIGINT and _is_terminal_foreground():
+            return
+        if process is None:
+            pending.append(signum)
+            return
+        try:
+            process.send_signal(signum)
+        except ProcessLookupError:
+            pass
+
+    # Installed first, so a signal arriving during startup cannot orphan the child
+    for name in FORWARDED_SIGNALS:
+        if hasattr(signal, name):
+            signal.signal(getattr(signal, name), forward)
+
+    try:
+        process = subprocess.Popen(args, env=env)
+    except Exception as e:
+        print(f"Error running command: {e}", file=sys.stderr)
+        sys.exit(1)
+    for signum in pending:
+        forward(signum, None)
+
+    returncode = process.wait()
+    if returncode < 0 and os.name != "nt":
+        # Die from the same signal so the caller sees the child's status
+        try:
+            signal.signal(-returncode, signal.SIG_DFL)
+            os.kill(os.getpid(), -returncode)
+        except OSError:
+            # SIGKILL and SIGSTOP cannot be reset; exit as a shell reports them
+            sys.exit(128 - returncode)
+    sys.exit(returncode)
+
+
 def run_with_sitecustomize(args: List[str]) -> NoReturn:
     """
     This function modifies the PYTHONPATH environment variable to prepend the
     _bootstrap directory, which contains sitecustomize.py for automatic
     instrumentation initialization.
 
+    The command replaces this process or runs as a child process, depending
+    on AMP_LAUNCH_MODE (see resolve_launch_mode).
+
     Args:
-        args: Command line arguments to pass to the subprocess
+        args: Command line arguments of the command to run
 
     Raises:
-        SystemExit: Always exits with the return code of the subprocess
+        SystemExit: With the return code of the command in subprocess mode,
+            or if the command could not be started
 
     Example:
         >>> run_with_sitecustomize(["python", "my_script.py"])
@@ -94,14 +228,50 @@ def run_with_sitecustomize(args: List[str]) -> NoReturn:
         env["PYTHONPATH"] = str(bootstrap_dir)
 
     # Run the command with modified environment
-    try:
-        result = subprocess.run(args, env=env)
-        sys.exit(result.returncode)
-    except KeyboardInterrupt:
-        sys.exit(130)  # Standard exit code for script terminated by Ctrl+C
-    except Exception as e:
-        print(f"Error running command: {e}", file=sys.stderr)
-        sys.exit(1)
+    if resolve_launch_mode() == LAUNCH_EXEC:
+        exec_command(args, env)
+    run_subprocess(args, env)
+
+
+def parse_options(args: List[str]) -> Tuple[Dict[str, str], List[str]]:
+    """
+    Split leading amp-instrument options from the command.
+
+    Options are read until the first argument that is not an option, or
+    until "--". Each option maps to an environment variable for the command.
+
+    Returns:
+        The environment settings for the options and the command arguments.
+
+    Raises:
+        SystemExit: If an option is unknown or has an invalid value
+    """
+    settings: Dict[str, str] = {}
+    index = 0
+    while index < len(args) and args[index].startswith("--"):
+        option = args[index]
+        index += 1
+        if option == "--":
+            break
+        name, _, value = option.partition("=")
+        if name == "--profile":
+            mode = value or "cpu"
+            if mode not in PROFILE_MODES:
+                print(
+                    f"Error: Unknown profile mode '{mode}'. "
+                    f"Supported: {', '.join(PROFILE_MODES)}.",
+                    file=sys.stderr,
+                )
+                sys.exit(1)
+            settings[env_vars.AMP_PROFILE] = mode
+        else:
+            print(
+                f"Error: Unknown option '{option}'. "
+                "Usage: amp-instrument [--profile[=cpu|import|alloc]] [--] <command> [args...]",
+                file=sys.stderr,
+            )
+            sys.exit(1)
+    return settings, args[index:]
 
 
 def cli() -> None:
@@ -115,8 +285,11 @@ def cli() -> None:
         amp-instrument python my_script.py
         amp-instrument uvicorn app:main --reload
         amp-instrument poetry run python script.py
+        amp-instrument --profile=import -- python script.py
     """
-    args = sys.argv[1:]
+    settings, args = parse_options(sys.argv[1:])
+    # Inherited by the command through the copied environment
+    os.environ.update(settings)
     run_with_sitecustomize(args)
 
 
@@ -0,0 +1,254 @@
+# Copyright (c) 2025, WSO2 LLC. (https://www.wso2.com).
+#
+# WSO2 LLC. licenses this file to you under the Apache License,
+# Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""
+Collapsing of low-value child spans into their parent.
+
+A single agent turn produces a span for every graph node, LangChain runnable
+layer, tool and HTTP call, and many of the inner runnable wrappers add
+nothing on their own. The CollapsingSpanProcessor folds such spans, chosen by
+name or depth, into span events or summary attributes on the nearest span
+that is exported. Collapsed spans never reach the rest of the pipeline, so
+they cost neither processing nor export.
+"""
+
+import fnmatch
+import re
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from opentelemetry.context import Context
+from opentelemetry.sdk.trace import ReadableSpan, Span, SpanProcessor
+from opentelemetry.trace import StatusCode
+
+from ._attributes import add_span_attributes, add_span_event, span_kind
+from ._fork import register_after_fork
+
+# Collapse modes
+EVENTS = "events"
+ATTRIBUTES = "attributes"
+MODES = (EVENTS, ATTRIBUTES)
+
+# Attributes written to spans that collapsed spans were folded into
+COLLAPSED_SPANS_ATTRIBUTE = "amp.collapsed.spans"
+COLLAPSED_NAMES_ATTRIBUTE = "amp.collapsed.names"
+COLLAPSED_COUNTS_ATTRIBUTE = "amp.collapsed.counts"
+COLLAPSED_DURATION_ATTRIBUTE = "amp.collapsed.duration_ms"
+COLLAPSED_ERRORS_ATTRIBUTE = "amp.collapsed.errors"
+# Attributes added to the event of a collapsed span, next to its own
+EVENT_DURATION_ATTRIBUTE = "amp.collapsed.duration_ms"
+EVENT_ERROR_ATTRIBUTE = "amp.collapsed.error"
+
+# Unfinished spans tracked at once; spans started beyond this are not collapsed
+_MAX_ACTIVE_SPANS = 10000
+
+
+class _Node:
+    """An unfinished span and what was folded into it."""
+
+    __slots__ = (
+        "span",
+        "depth",
+        "collapsed",
+        "target",
+        "ended",
+        "count",
+        "events",
+        "summary",
+    )
+
+    def __init__(
+        self, span: Span, depth: int, target: Optional["_Node"] = None
+    ) -> None:
+        self.span = span
+        self.depth = depth
+        self.collapsed = target is not None
+        # Exported span that this span is folded into (itself if exported)
+        self.target: "_Node" = target if target is not None else self
+        self.ended = False
+        self.count = 0
+        self.events: List[Tuple[str, Dict[str, Any], int]] = []
+        # Span name -> [count, total duration in ns, errors]
+        self.summary: Dict[str, List[int]] = {}
+
+
+class CollapsingSpanProcessor(SpanProcessor):
+    """
+    Span processor that folds designated child spans into their parent.
+
+    A span is collapsed if its name matches one of the patterns (shell-style,
+    e.g. "Runnable*") or, with max_depth, if it is more than max_depth levels
+    below its local root. Root spans and model calls are never collapsed. In
+    "events" mode, each collapsed span becomes an event named after it on
+    the nearest exported ancestor, at its start time, with its attributes,
+    its duration in amp.collapsed.duration_ms and, if it failed, its status
+    description in amp.collapsed.error. In "attributes" mode, collapsed spans
+    are summarized per name in amp.collapsed.names, amp.collapsed.counts and
+    amp.collapsed.duration_ms instead. Either way the ancestor gets
+    amp.collapsed.spans, and descendants of collapsed spans that are kept are
+    re-parented to it. A collapsed span that ends after its ancestor is
+    dropped and counted in spans_late.
+
+    Args:
+        next_processor: Processor that receives the spans that are kept.
+        patterns: Span name patterns to collapse.
+        max_depth: Collapse spans nested deeper than this below the local
+            root; 0 collapses by name only.
+        mode: "events" or "attributes".
+    """
+
+    def __init__(
+        self,
+        next_processor: SpanProcessor,
+        patterns: Iterable[str] = (),
+        max_depth: int = 0,
+        mode: str = EVENTS,
+    ) -> None:
+        if mode not in MODES:
+            raise ValueError(f"Unknown collapse mode '{mode}'.")
+        self._next = next_processor
+        self._patterns = tuple(patterns)
+        self._matcher = (
+            re.compile("|".join(fnmatch.translate(p) for p in self._patterns))
+            if self._patterns
+            else None
+        )
+        self._max_depth = max_depth
+        self._mode = mode
+
+        self._reset_state()
+        register_after_fork(self._reset_state)
+
+    def _reset_state(self) -> None:
+        self._lock = threading.Lock()
+        self._nodes: Dict[int, _Node] = {}
+        self._counters = {
+            "spans_collapsed": 0,
+            "spans_reparented": 0,
+            "spans_late": 0,
+            "spans_skipped": 0,
+        }
+
+    def _should_collapse(self, span: Span, depth: int) -> bool:
+        if span_kind(span) == "llm":
+            return False
+        if self._max_depth and depth > self._max_depth:
+            return True
+        return self._matcher is not None and self._matcher.match(span.name) is not None
+
+    def on_start(self, span: Span, parent_context: Optional[Context] = None) -> None:
+        context = span.context
+        if context is None or not context.trace_flags.sampled:
+            self._next.on_start(span, parent_context=parent_context)
+            return
+
+        parent = span.parent
+        with self._lock:
+            if len(self._nodes) >= _MAX_ACTIVE_SPANS:
+                self._counters["spans_skipped"] += 1
+                node = None
+            else:
+                parent_node = (
+                    self._nodes.get(parent.span_id)
+                    if parent is not None and not parent.is_remote
+                    else None
+                )
+                if parent_node is None:
+                    node = _Node(span, 0)
+                elif self._should_collapse(span, parent_node.depth + 1):
+                    node = _Node(span, parent_node.depth + 1, parent_node.target)
+                else:
+                    node = _Node(span, parent_node.depth + 1)
+                    if parent_node.collapsed:
+                        span._parent = parent_node.target.span.context
+                        self._counters["spans_reparented"] += 1
+                self._nodes[context.span_id] = node
+
+        if node is None or not node.collapsed:
+            self._next.on_start(span, parent_context=parent_context)
+
+    def on_end(self, span: ReadableSpan) -> None:
+        node = None
+        if span.context is not None:
+            with self._lock:
+                node = self._nodes.pop(span.context.span_id, None)
+                if node is not None and not node.collapsed:
+                    node.ended = True
+
+        if node is None:
+            self._next.on_end(span)
+        elif node.collapsed:
+            self._fold(span, node.target)
+        else:
+            if node.count:
+                self._attach(span, node)
+            self._next.on_end(span)
+
+    def _fold(self, span: ReadableSpan, target: _Node) -> None:
+        duration = (span.end_time or 0) - (span.start_time or 0)
+        failed = span.status.status_code is StatusCode.ERROR
+        if self._mode == EVENTS:
+            attributes = dict(span.attributes or {})
+            attributes[EVENT_DURATION_ATTRIBUTE] = duration / 1e6
+            if failed:
+                attributes[EVENT_ERROR_ATTRIBUTE] = span.status.description or ""
+            event = (span.name, attributes, span.start_time or 0)
+
+        with self._lock:
+            if not target.ended:
+                target.count += 1
+                if self._mode == EVENTS:
+                    target.events.append(event)
+                else:
+                    summary = target.summary.setdefault(span.name, [0, 0, 0])
+                    summary[0] += 1
+                    summary[1] += duration
+                    summary[2] += failed
+                self._counters["spans_collapsed"] += 1
+                return
+            # The ancestor has already been exported. The rest of the pipeline
+            # never saw the span start, so it is dropped rather than forwarded.
+            self._counters["spans_late"] += 1
+
+    def _attach(self, span: ReadableSpan, node: _Node) -> None:
+        with self._lock:
+            count, events, summary = node.count, node.events, node.summary
+
+        values: Dict[str, Any] = {COLLAPSED_SPANS_ATTRIBUTE: count}
+        if self._mode == EVENTS:
+            for name, attributes, timestamp in sorted(events, key=lambda e: e[2]):
+                add_span_event(node.span, name, attributes, timestamp)
+        else:
+            values[COLLAPSED_NAMES_ATTRIBUTE] = tuple(summary)
+            values[COLLAPSED_COUNTS_ATTRIBUTE] = tuple(s[0] for s in summary.values())
+            values[COLLAPSED_DURATION_ATTRIBUTE] = tuple(
+                s[1] / 1e6 for s in summary.values()
+            )
+            values[COLLAPSED_ERRORS_ATTRIBUTE] = sum(s[2] for s in summary.values())
+        add_span_attributes(span, values)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return collapsing counters and the number of spans being tracked."""
+        with self._lock:
+            result: Dict[str, Any] = dict(self._counters)
+            result["active_spans"] = len(self._nodes)
+        return result
+
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
+        return self._next.force_flush(timeout_millis)
+
+    def shutdown(self) -> None:
+        self._next.shutdown()
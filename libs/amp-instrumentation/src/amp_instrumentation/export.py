@@ -0,0 +1,265 @@
+# Copyright (c) 2025, WSO2 LLC. (https://www.wso2.com).
+#
+# WSO2 LLC. licenses this file to you under the Apache License,
+# Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""
+Batch span export with back-pressure statistics.
+
+MonitoredBatchSpanProcessor is the OpenTelemetry BatchSpanProcessor with
+counters for queue depth, dropped spans and export latency, so the export
+pipeline can be sized for the application's throughput. An optional circuit
+breaker stops calling a failing exporter, and the queue fill level can drive
+adaptive head sampling (see sampling.BackPressureThrottle).
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Optional, Sequence, Tuple
+
+from opentelemetry.sdk.trace import ReadableSpan
+from opentelemetry.sdk.trace.export import (
+    BatchSpanProcessor,
+    SpanExporter,
+    SpanExportResult,
+)
+
+from ._fork import register_after_fork
+from .circuit_breaker import CircuitBreaker
+
+logger = logging.getLogger(__name__)
+
+# Number of recent export calls used for latency percentiles
+_LATENCY_WINDOW = 256
+# Log a warning on the first dropped span and then every N drops
+_DROP_LOG_INTERVAL = 1000
+
+
+class _ExportCounters:
+    """Thread-safe counters shared by the batch processor and its exporter."""
+
+    def __init__(self, max_queue_size: int) -> None:
+        self.max_queue_size = max_queue_size
+        self.reset()
+
+    def reset(self) -> None:
+        self.lock = threading.Lock()
+        self.spans_enqueued = 0
+        self.spans_dropped = 0
+        self.spans_submitted = 0
+        self.spans_exported = 0
+        self.spans_failed = 0
+        self.batches_exported = 0
+        self.batches_failed = 0
+        self.latencies_ms: Deque[float] = deque(maxlen=_LATENCY_WINDOW)
+        self.max_latency_ms = 0.0
+
+    @property
+    def queue_depth(self) -> int:
+        return self.spans_enqueued - self.spans_dropped - self.spans_submitted
+
+
+class MonitoredSpanExporter(SpanExporter):
+    """
+    Span exporter wrapper that records batch sizes, outcomes and latency.
+
+    Batches rejected by the circuit breaker count as failed without calling
+    the exporter.
+    """
+
+    def __init__(
+        self,
+        exporter: SpanExporter,
+        counters: _ExportCounters,
+        circuit_breaker: Optional[CircuitBreaker] = None,
+    ) -> None:
+        self._exporter = exporter
+        self._counters = counters
+        self._circuit_breaker = circuit_breaker
+
+    @property
+    def exporter(self) -> SpanExporter:
+        return self._exporter
+
+    @exporter.setter
+    def exporter(self, exporter: SpanExporter) -> None:
+        self._exporter = exporter
+
+    def export(self, spans: Sequence[ReadableSpan]) -> SpanExportResult:
+        counters = self._counters
+        with counters.lock:
+            counters.spans_submitted += len(spans)
+
+        breaker = self._circuit_breaker
+        if breaker is not None and not breaker.allow(len(spans)):
+            with counters.lock:
+                counters.spans_failed += len(spans)
+                counters.batches_failed += 1
+            return SpanExportResult.FAILURE
+
+        started = time.perf_counter()
+        try:
+            result = self._exporter.export(spans)
+        except Exception:
+            result = SpanExportResult.FAILURE
+            logger.exception("Span export raised an exception.")
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        if breaker is not None:
+            breaker.record(result is SpanExportResult.SUCCESS)
+
+        with counters.lock:
+            counters.latencies_ms.append(elapsed_ms)
+            counters.max_latency_ms = max(counters.max_latency_ms, elapsed_ms)
+            if result is SpanExportResult.SUCCESS:
+                counters.spans_exported += len(spans)
+                counters.batches_exported += 1
+            else:
+                counters.spans_failed += len(spans)
+                counters.batches_failed += 1
+        return result
+
+    def shutdown(self) -> None:
+        self._exporter.shutdown()
+
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
+        return self._exporter.force_flush(timeout_millis)
+
+
+class MonitoredBatchSpanProcessor(BatchSpanProcessor):
+    """
+    BatchSpanProcessor that reports queue depth, drops and export latency.
+
+    The queue is bounded by max_queue_size; when it is full the oldest queued
+    span is discarded to make room, which is counted in spans_dropped. Spans
+    ending after shutdown() are discarded and counted in spans_dropped too.
+
+    Args:
+        span_exporter: Exporter that receives batches.
+        max_queue_size: Maximum number of spans waiting for export.
+        schedule_delay_millis: Delay between two consecutive exports.
+        max_export_batch_size: Maximum number of spans per export call.
+        export_timeout_millis: Time allowed for flushing a batch on force_flush.
+        exporter_factory: Creates a replacement exporter in a forked child, so
+            that workers do not share connections inherited from the parent.
+            Without it, the exporter is expected to handle fork itself.
+        circuit_breaker: Stops calling the exporter after consecutive failures.
+    """
+
+    def __init__(
+        self,
+        span_exporter: SpanExporter,
+        max_queue_size: int = 2048,
+        schedule_delay_millis: Optional[float] = None,
+        max_export_batch_size: Optional[int] = None,
+        export_timeout_millis: Optional[float] = None,
+        exporter_factory: Optional[Callable[[], SpanExporter]] = None,
+        circuit_breaker: Optional[CircuitBreaker] = None,
+    ) -> None:
+        self._exporter_factory = exporter_factory
+        self._shutdown = False
+        self._counters = _ExportCounters(max_queue_size)
+        self._circuit_breaker = circuit_breaker
+        self._monitored_exporter = MonitoredSpanExporter(
+            span_exporter, self._counters, circuit_breaker
+        )
+        super().__init__(
+            self._monitored_exporter,
+            max_queue_size=max_queue_size,
+            schedule_delay_millis=schedule_delay_millis,
+            max_export_batch_size=max_export_batch_size,
+            export_timeout_millis=export_timeout_millis,
+        )
+        register_after_fork(self._at_fork_reinit)
+
+    def _at_fork_reinit(self) -> None:
+        # BatchSpanProcessor restarts its worker and clears its queue in the
+        # child; the counters must start over to match the empty queue.
+        self._counters.reset()
+        if self._circuit_breaker is not None:
+            self._circuit_breaker.reset()
+        if self._exporter_factory is not None:
+            self._monitored_exporter.exporter = self._exporter_factory()
+
+    def on_end(self, span: ReadableSpan) -> None:
+        if not (span.context and span.context.trace_flags.sampled):
+            return
+
+        counters = self._counters
+        if self._shutdown:
+            # BatchSpanProcessor discards spans after shutdown without a trace
+            with counters.lock:
+                counters.spans_enqueued += 1
+                counters.spans_dropped += 1
+            return
+
+        dropped = None
+        with counters.lock:
+            if counters.queue_depth >= counters.max_queue_size:
+                counters.spans_dropped += 1
+                dropped = counters.spans_dropped
+            counters.spans_enqueued += 1
+
+        if dropped is not None and dropped % _DROP_LOG_INTERVAL == 1:
+            logger.warning(
+                f"Span export queue is full ({counters.max_queue_size}); "
+                f"{dropped} spans dropped so far. Consider raising AMP_EXPORT_MAX_QUEUE."
+            )
+
+        super().on_end(span)
+
+    def shutdown(self) -> None:
+        self._shutdown = True
+        super().shutdown()
+
+    def pressure(self) -> Tuple[float, bool]:
+        """Return the queue fill level (0.0-1.0) and whether the circuit is open."""
+        counters = self._counters
+        fill = max(counters.queue_depth, 0) / counters.max_queue_size
+        breaker = self._circuit_breaker
+        return fill, breaker is not None and breaker.is_open
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Return queue depth, drop counts and export latency.
+
+        Latency percentiles cover the most recent export calls.
+        """
+        counters = self._counters
+        with counters.lock:
+            last_latency = counters.latencies_ms[-1] if counters.latencies_ms else None
+            latencies = sorted(counters.latencies_ms)
+            result: Dict[str, Any] = {
+                "queue_depth": max(counters.queue_depth, 0),
+                "max_queue_size": counters.max_queue_size,
+                "spans_enqueued": counters.spans_enqueued,
+                "spans_dropped": counters.spans_dropped,
+                "spans_exported": counters.spans_exported,
+                "spans_failed": counters.spans_failed,
+                "batches_exported": counters.batches_exported,
+                "batches_failed": counters.batches_failed,
+                "export_latency_max_ms": counters.max_latency_ms,
+            }
+
+        result["export_latency_last_ms"] = last_latency
+        if latencies:
+            result["export_latency_p50_ms"] = latencies[len(latencies) // 2]
+            result["export_latency_p99_ms"] = latencies[
+                min(len(latencies) - 1, int(len(latencies) * 0.99))
+            ]
+        else:
+            result["export_latency_p50_ms"] = None
+            result["export_latency_p99_ms"] = None
+        return result
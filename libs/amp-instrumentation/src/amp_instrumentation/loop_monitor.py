@@ -0,0 +1,384 @@
+# Copyright (c) 2025, WSO2 LLC. (https://www.wso2.com).
+#
+# WSO2 LLC. licenses this file to you under the Apache License,
+# Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""
+asyncio event-loop lag and thread-pool saturation monitoring.
+
+A blocking call inside an async endpoint stalls every request served by the
+same event loop, and sync endpoints queue up once Starlette's thread pool is
+exhausted. Neither shows up in the spans of the request that caused it. The
+monitor runs a heartbeat task on each event loop it sees and reports:
+
+- lag: how late the heartbeat wakes up compared to its schedule;
+- blocked episodes: lag above the threshold, exported as an
+  "event_loop.blocked" span carrying the stack the loop was stuck in;
+- thread pools: queue depth and busy threads of the loop's default executor
+  and of anyio's worker thread limiter (used by Starlette and FastAPI);
+- spans that were open while the loop was blocked, flagged with the blocked
+  time they overlap.
+"""
+
+import asyncio
+import contextvars
+import logging
+import os
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from opentelemetry import trace
+from opentelemetry.context import Context
+from opentelemetry.sdk.trace import ReadableSpan, Span, SpanProcessor
+
+from ._attributes import add_span_attributes
+from ._fork import register_after_fork
+
+logger = logging.getLogger(__name__)
+
+BLOCKED_SPAN_NAME = "event_loop.blocked"
+# Blocked time on event_loop.blocked spans and overlapping spans
+BLOCKED_MS_ATTRIBUTE = "amp.event_loop.blocked_ms"
+# Collapsed stack of the event loop thread, outermost frame first
+BLOCKED_STACK_ATTRIBUTE = "amp.event_loop.blocked_stack"
+
+_MAX_STACK_DEPTH = 32
+# Blocked episodes kept to flag spans that end after the episode
+_MAX_EPISODES = 256
+
+_active: Optional["EventLoopMonitorSpanProcessor"] = None
+
+
+def _collapsed_stack(frame: Any) -> str:
+    labels: List[str] = []
+    while frame is not None and len(labels) < _MAX_STACK_DEPTH:
+        code = frame.f_code
+        labels.append(
+            f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})"
+        )
+        frame = frame.f_back
+    return ";".join(reversed(labels))
+
+
+class _LoopState:
+    """Heartbeat and thread pool readings of one monitored event loop."""
+
+    __slots__ = (
+        "loop",
+        "thread_id",
+        "task",
+        "due",
+        "due_ns",
+        "stack",
+        "executor",
+        "threadpool",
+    )
+
+    def __init__(self, loop: asyncio.AbstractEventLoop) -> None:
+        self.loop = loop
+        self.thread_id: Optional[int] = None
+        self.task: Optional["asyncio.Task[None]"] = None
+        # Next heartbeat, on the monotonic and the wall clock
+        self.due = float("inf")
+        self.due_ns = 0
+        # Stack captured by the watchdog during the current block
+        self.stack: Optional[str] = None
+        # (queued, active, max_workers) of the default executor
+        self.executor = (0, 0, 0)
+        # (borrowed, total, waiting) of the anyio thread limiter
+        self.threadpool = (0, 0, 0)
+
+
+class EventLoopMonitorSpanProcessor(SpanProcessor):
+    """
+    Span processor that monitors the event loops spans are started on.
+
+    The first span started inside a running event loop attaches the monitor
+    to that loop; monitor_event_loop() attaches it explicitly, e.g. from an
+    application's startup hook when all spans start in worker threads. A
+    watchdog thread samples the loop thread's stack once a heartbeat is
+    overdue by block_threshold_ms, and the heartbeat emits the
+    event_loop.blocked span when the loop comes back. Spans ending while the
+    loop is or was blocked get amp.event_loop.blocked_ms, including the span
+    whose code is blocking the loop.
+
+    Args:
+        next_processor: Processor that receives the spans.
+        interval_ms: Heartbeat interval.
+        block_threshold_ms: Lag at which the loop counts as blocked.
+        tracer_provider: Provider for event_loop.blocked spans; the global
+            provider when None.
+    """
+
+    def __init__(
+        self,
+        next_processor: SpanProcessor,
+        interval_ms: float = 50,
+        block_threshold_ms: float = 100,
+        tracer_provider: Optional[trace.TracerProvider] = None,
+    ) -> None:
+        global _active
+
+        self._next = next_processor
+        self._tracer_provider = tracer_provider
+        self._interval = interval_ms / 1000
+        self._threshold = block_threshold_ms / 1000
+        self._threshold_ns = int(block_threshold_ms * 1e6)
+
+        self._reset_state()
+        self._start_watchdog()
+        register_after_fork(self._at_fork_reinit)
+        _active = self
+
+    def _reset_state(self) -> None:
+        self._lock = threading.Lock()
+        self._loops: Dict[asyncio.AbstractEventLoop, _LoopState] = {}
+        # (start_ns, end_ns) of recent blocked episodes, in order of ending
+        self._episodes: Deque[Tuple[int, int]] = deque(maxlen=_MAX_EPISODES)
+        self._lag_sum = 0.0
+        self._counters: Dict[str, Any] = {
+            "lag_samples": 0,
+            "last_lag_ms": 0.0,
+            "max_lag_ms": 0.0,
+            "blocked_episodes": 0,
+            "blocked_ms_total": 0.0,
+            "spans_flagged": 0,
+        }
+
+    def _start_watchdog(self) -> None:
+        self._shutdown = threading.Event()
+        self._watchdog = threading.Thread(
+            target=self._watch, name="amp-loop-watchdog", daemon=True
+        )
+        self._watchdog.start()
+
+    def _at_fork_reinit(self) -> None:
+        # The parent's event loops do not run in the child
+        if self._shutdown.is_set():
+            return
+        self._reset_state()
+        self._start_watchdog()
+
+    def monitor(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Start monitoring loop; may be called from any thread."""
+        with self._lock:
+            if loop in self._loops or self._shutdown.is_set():
+                return
+            state = self._loops[loop] = _LoopState(loop)
+        # An empty context keeps the heartbeat out of the caller's trace
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            loop.call_soon(self._start_heartbeat, state, context=contextvars.Context())
+        else:
+            loop.call_soon_threadsafe(
+                self._start_heartbeat, state, context=contextvars.Context()
+            )
+
+    def _start_heartbeat(self, state: _LoopState) -> None:
+        state.thread_id = threading.get_ident()
+        state.task = state.loop.create_task(self._heartbeat(state))
+
+    async def _heartbeat(self, state: _LoopState) -> None:
+        try:
+            while not self._shutdown.is_set():
+                state.due = time.monotonic() + self._interval
+                state.due_ns = time.time_ns() + int(self._interval * 1e9)
+                await asyncio.sleep(self._interval)
+                lag = max(0.0, time.monotonic() - state.due)
+                state.due = float("inf")
+                self._record_lag(state, lag)
+                self._read_thread_pools(state)
+        finally:
+            with self._lock:
+                self._loops.pop(state.loop, None)
+
+    def _record_lag(self, state: _LoopState, lag: float) -> None:
+        lag_ms = lag * 1000
+        with self._lock:
+            counters = self._counters
+            counters["lag_samples"] += 1
+            counters["last_lag_ms"] = lag_ms
+            counters["max_lag_ms"] = max(counters["max_lag_ms"], lag_ms)
+            self._lag_sum += lag_ms
+            if lag < self._threshold:
+                return
+            end_ns = time.time_ns()
+            start_ns = end_ns - int(lag * 1e9)
+            self._episodes.append((start_ns, end_ns))
+            counters["blocked_episodes"] += 1
+            counters["blocked_ms_total"] += lag_ms
+            stack, state.stack = state.stack, None
+
+        tracer = trace.get_tracer(__name__, tracer_provider=self._tracer_provider)
+        span = tracer.start_span(
+            BLOCKED_SPAN_NAME,
+            start_time=start_ns,
+            attributes={
+                BLOCKED_MS_ATTRIBUTE: lag_ms,
+                BLOCKED_STACK_ATTRIBUTE: stack or "",
+            },
+        )
+        span.end(end_time=end_ns)
+
+    def _read_thread_pools(self, state: _LoopState) -> None:
+        executor = getattr(state.loop, "_default_executor", None)
+        if isinstance(executor, ThreadPoolExecutor):
+            threads = len(executor._threads)
+            idle = executor._idle_semaphore._value  # type: ignore[attr-defined]
+            state.executor = (
+                executor._work_queue.qsize(),
+                max(0, threads - idle),
+                executor._max_workers,
+            )
+        # Starlette runs sync endpoints through anyio's worker threads
+        to_thread = sys.modules.get("anyio.to_thread")
+        if to_thread is not None:
+            try:
+                limiter = to_thread.current_default_thread_limiter()
+                state.threadpool = (
+                    int(limiter.borrowed_tokens),
+                    int(limiter.total_tokens),
+                    limiter.statistics().tasks_waiting,
+                )
+            except Exception:
+                logger.debug("Could not read the anyio thread limiter.", exc_info=True)
+
+    def _watch(self) -> None:
+        while not self._shutdown.wait(self._threshold / 2):
+            now = time.monotonic()
+            with self._lock:
+                overdue = [
+                    state
+                    for state in self._loops.values()
+                    if state.stack is None and now - state.due > self._threshold
+                ]
+            if not overdue:
+                continue
+            frames = sys._current_frames()
+            for state in overdue:
+                frame = frames.get(state.thread_id or -1)
+                if frame is not None:
+                    state.stack = _collapsed_stack(frame)
+            del frames
+
+    def on_start(self, span: Span, parent_context: Optional[Context] = None) -> None:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        if loop is not None and loop not in self._loops:
+            self.monitor(loop)
+        self._next.on_start(span, parent_context=parent_context)
+
+    def on_end(self, span: ReadableSpan) -> None:
+        start_ns, end_ns = span.start_time, span.end_time
+        attributes = span.attributes or {}
+        if (
+            span.context is not None
+            and span.context.trace_flags.sampled
+            and start_ns
+            and end_ns
+            and BLOCKED_MS_ATTRIBUTE not in attributes
+        ):
+            blocked_ns = self._blocked_ns(start_ns, end_ns)
+            # Episode bounds are only accurate to one heartbeat interval
+            if blocked_ns >= self._interval * 1e9:
+                add_span_attributes(span, {BLOCKED_MS_ATTRIBUTE: blocked_ns / 1e6})
+                with self._lock:
+                    self._counters["spans_flagged"] += 1
+        self._next.on_end(span)
+
+    def _blocked_ns(self, start_ns: int, end_ns: int) -> int:
+        """Return how much of [start_ns, end_ns] a monitored loop was blocked."""
+        blocked = 0
+        now = time.monotonic()
+        with self._lock:
+            for episode_start, episode_end in reversed(self._episodes):
+                if episode_end <= start_ns:
+                    break
+                blocked += max(
+                    0, min(end_ns, episode_end) - max(start_ns, episode_start)
+                )
+            # A block still in progress, e.g. caused by the span ending now
+            for state in self._loops.values():
+                if now - state.due > self._threshold and state.loop.is_running():
+                    blocked += max(0, end_ns - max(start_ns, state.due_ns))
+        return blocked
+
+    def stats(self) -> Dict[str, Any]:
+        """Return lag and blocking counters and current thread pool usage."""
+        with self._lock:
+            result: Dict[str, Any] = dict(self._counters)
+            samples = result["lag_samples"]
+            result["mean_lag_ms"] = self._lag_sum / samples if samples else 0.0
+            result["loops_monitored"] = len(self._loops)
+            states = list(self._loops.values())
+        for index, key in enumerate(
+            ("executor_queued", "executor_active", "executor_max_workers")
+        ):
+            result[key] = sum(state.executor[index] for state in states)
+        for index, key in enumerate(
+            ("threadpool_busy", "threadpool_size", "threadpool_waiting")
+        ):
+            result[key] = sum(state.threadpool[index] for state in states)
+        result["block_threshold_ms"] = self._threshold * 1000
+        return result
+
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
+        return self._next.force_flush(timeout_millis)
+
+    def shutdown(self) -> None:
+        global _active
+
+        if self._shutdown.is_set():
+            return
+        self._shutdown.set()
+        if _active is self:
+            _active = None
+        self._watchdog.join(timeout=1)
+        with self._lock:
+            states = list(self._loops.values())
+        for state in states:
+            if state.task is not None and not state.loop.is_closed():
+                try:
+                    state.loop.call_soon_threadsafe(state.task.cancel)
+                except RuntimeError:
+                    pass
+        self._next.shutdown()
+
+
+def monitor_event_loop(loop: Optional[asyncio.AbstractEventLoop] = None) -> bool:
+    """
+    Monitor an event loop, by default the running one.
+
+    Loops are picked up automatically when a span starts inside them; call
+    this from an async startup hook when spans only start in worker threads.
+
+    Returns:
+        True if the monitor is enabled (AMP_LOOP_MONITOR) and the loop is monitored.
+    """
+    monitor = _active
+    if monitor is None:
+        return False
+    if loop is None:
+        loop = asyncio.get_running_loop()
+    monitor.monitor(loop)
+    return True
@@ -0,0 +1,242 @@
+# Copyright (c) 2025, WSO2 LLC. (https://www.wso2.com).
+#
+# WSO2 LLC. licenses this file to you under the Apache License,
+# Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""
+Per-span memory tracking.
+
+Records how much memory a process gained while a span was open, so that an
+out-of-memory kill can be traced back to the request, graph node, tool or
+LLM call that was running when memory grew. Two sources are supported:
+
+- tracemalloc: Python allocations still live at span end, and the highest
+  traced memory while the span was open. tracemalloc only runs while a
+  tracked span is open, so its cost follows the sampled share of traffic.
+- rss: resident set size of the process at span start and end, read from
+  /proc. Nearly free, but includes native memory and has no peak.
+
+Memory is process-wide: concurrent spans each see the other's allocations.
+"""
+
+import os
+import threading
+import tracemalloc
+from typing import Any, Collection, Dict, Optional
+
+from opentelemetry.context import Context
+from opentelemetry.sdk.trace import ReadableSpan, Span, SpanProcessor
+
+from ._attributes import add_span_attributes, span_kind
+from ._fork import register_after_fork
+
+TRACEMALLOC = "tracemalloc"
+RSS = "rss"
+SOURCES = (TRACEMALLOC, RSS)
+
+# Span kinds tracked by default: Traceloop kinds plus "llm" for model calls
+DEFAULT_SPAN_KINDS = ("workflow", "task", "agent", "tool", "llm")
+
+# Span attributes written for tracked spans
+ALLOCATED_BYTES_ATTRIBUTE = "amp.memory.allocated_bytes"
+PEAK_BYTES_ATTRIBUTE = "amp.memory.peak_bytes"
+RSS_BYTES_ATTRIBUTE = "amp.memory.rss_bytes"
+RSS_DELTA_BYTES_ATTRIBUTE = "amp.memory.rss_delta_bytes"
+
+_STATM_PATH = "/proc/self/statm"
+_TRACE_ID_LIMIT = (1 << 64) - 1
+# Open spans tracked at once; spans started beyond this are not measured
+_MAX_OPEN_SPANS = 10000
+
+
+def rss_supported() -> bool:
+    """Return whether the resident set size can be read on this platform."""
+    return os.access(_STATM_PATH, os.R_OK)
+
+
+class _Mark:
+    """Memory reading taken when a span started."""
+
+    __slots__ = ("start", "peak")
+
+    def __init__(self, start: int) -> None:
+        self.start = start
+        self.peak = start
+
+
+class MemoryTrackingSpanProcessor(SpanProcessor):
+    """
+    Span processor that records memory growth on selected spans.
+
+    Spans of a sampled fraction of traces are measured from start to end;
+    the span kind is only known once instrumentors have set their attributes,
+    so it is checked when the span ends. Matching spans get
+    amp.memory.allocated_bytes and amp.memory.peak_bytes (tracemalloc, both
+    relative to the traced memory at span start) or amp.memory.rss_bytes and
+    amp.memory.rss_delta_bytes (rss).
+
+    tracemalloc keeps a single process-wide peak. Whenever a span starts, the
+    peak so far is folded into every open span before it is reset, so nested
+    and concurrent spans still report their own peaks. If tracemalloc was
+    already running (e.g. amp-instrument --profile=alloc), it is left running
+    and only its peak is reset.
+
+    Args:
+        next_processor: Processor that receives the spans.
+        source: "tracemalloc" or "rss".
+        span_kinds: Span kinds to annotate; None annotates every span.
+        sample_ratio: Fraction of traces whose spans are measured.
+    """
+
+    def __init__(
+        self,
+        next_processor: SpanProcessor,
+        source: str = TRACEMALLOC,
+        span_kinds: Optional[Collection[str]] = DEFAULT_SPAN_KINDS,
+        sample_ratio: float = 1.0,
+    ) -> None:
+        if source not in SOURCES:
+            raise ValueError(f"Unsupported memory source '{source}'.")
+        self._next = next_processor
+        self._source = source
+        self._span_kinds = frozenset(span_kinds) if span_kinds is not None else None
+        self._sample_ratio = sample_ratio
+        self._sample_bound = round(sample_ratio * (_TRACE_ID_LIMIT + 1))
+        self._statm_fd: Optional[int] = None
+
+        self._reset_state()
+        register_after_fork(self._at_fork_reinit)
+
+    def _reset_state(self) -> None:
+        self._lock = threading.Lock()
+        self._open: Dict[int, _Mark] = {}
+        self._owns_tracemalloc = False
+        self._closed = False
+        self._counters = {
+            "spans_measured": 0,
+            "spans_skipped": 0,
+        }
+        if self._source == RSS:
+            self._open_statm()
+
+    def _open_statm(self) -> None:
+        # /proc/self is resolved when the file is opened, so forked children
+        # need their own descriptor
+        if self._statm_fd is not None:
+            os.close(self._statm_fd)
+        self._statm_fd = os.open(_STATM_PATH, os.O_RDONLY)
+
+    def _at_fork_reinit(self) -> None:
+        if self._closed:
+            return
+        owned = self._owns_tracemalloc
+        self._reset_state()
+        # Parent spans never end in the child; its traces are stale too
+        if owned and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    def _read_rss(self) -> int:
+        assert self._statm_fd is not None
+        fields = os.pread(self._statm_fd, 128, 0).split()
+        return int(fields[1]) * os.sysconf("SC_PAGE_SIZE")
+
+    def on_start(self, span: Span, parent_context: Optional[Context] = None) -> None:
+        context = span.context
+        if (
+            context is not None
+            and context.trace_flags.sampled
+            and context.trace_id & _TRACE_ID_LIMIT < self._sample_bound
+        ):
+            with self._lock:
+                if self._closed:
+                    pass
+                elif len(self._open) >= _MAX_OPEN_SPANS:
+                    self._counters["spans_skipped"] += 1
+                elif self._source == TRACEMALLOC:
+                    self._open[context.span_id] = _Mark(self._start_traced())
+                else:
+                    self._open[context.span_id] = _Mark(self._read_rss())
+        self._next.on_start(span, parent_context=parent_context)
+
+    def _start_traced(self) -> int:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._owns_tracemalloc = True
+        current, peak = tracemalloc.get_traced_memory()
+        for mark in self._open.values():
+            if peak > mark.peak:
+                mark.peak = peak
+        tracemalloc.reset_peak()
+        return current
+
+    def on_end(self, span: ReadableSpan) -> None:
+        mark = None
+        current = 0
+        if span.context is not None:
+            with self._lock:
+                mark = self._open.pop(span.context.span_id, None)
+                if mark is not None:
+                    if self._source == TRACEMALLOC:
+                        current, peak = tracemalloc.get_traced_memory()
+                        mark.peak = max(mark.peak, peak)
+                        if not self._open and self._owns_tracemalloc:
+                            tracemalloc.stop()
+                            self._owns_tracemalloc = False
+                    else:
+                        current = self._read_rss()
+
+        if mark is not None and (
+            self._span_kinds is None or span_kind(span) in self._span_kinds
+        ):
+            if self._source == TRACEMALLOC:
+                values = {
+                    ALLOCATED_BYTES_ATTRIBUTE: current - mark.start,
+                    PEAK_BYTES_ATTRIBUTE: mark.peak - mark.start,
+                }
+            else:
+                values = {
+                    RSS_BYTES_ATTRIBUTE: current,
+                    RSS_DELTA_BYTES_ATTRIBUTE: current - mark.start,
+                }
+            add_span_attributes(span, values)
+            with self._lock:
+                self._counters["spans_measured"] += 1
+        self._next.on_end(span)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return counters, the number of open measured spans and the settings."""
+        with self._lock:
+            result: Dict[str, Any] = dict(self._counters)
+            result["open_spans"] = len(self._open)
+            result["tracemalloc_started"] = self._owns_tracemalloc
+        result["source"] = self._source
+        result["sample_ratio"] = self._sample_ratio
+        return result
+
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
+        return self._next.force_flush(timeout_millis)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._open.clear()
+            if self._owns_tracemalloc:
+                tracemalloc.stop()
+                self._owns_tracemalloc = False
+            if self._statm_fd is not None:
+                os.close(self._statm_fd)
+                self._statm_fd = None
+        self._next.shutdown()
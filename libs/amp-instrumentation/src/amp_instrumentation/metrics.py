@@ -0,0 +1,287 @@
+# Copyright (c) 2025, WSO2 LLC. (https://www.wso2.com).
+#
+# WSO2 LLC. licenses this file to you under the Apache License,
+# Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""
+In-process LLM and tool metrics.
+
+Token usage, latency and error counts are aggregated from spans as they end,
+before head or tail sampling drops them, and exported periodically as OTLP
+metrics. Dashboards stay accurate when only a small fraction of traces is
+exported, and one export per interval replaces post-processing every span.
+
+Metric names and attributes follow the OpenTelemetry GenAI semantic
+conventions where one exists:
+
+- gen_ai.client.token.usage: histogram of tokens per LLM call, by
+  gen_ai.system, gen_ai.request.model and gen_ai.token.type (input/output).
+- gen_ai.client.operation.duration: histogram of LLM call latency in seconds,
+  by gen_ai.system, gen_ai.request.model and error.type.
+- amp.tool.duration: histogram of tool latency in seconds, by gen_ai.tool.name
+  and error.type.
+- amp.errors: counter of failed LLM calls and tools, by amp.span.kind,
+  gen_ai.request.model or gen_ai.tool.name, and error.type.
+
+Numeric values of amp_instrumentation.stats() are exported as gauges named
+amp.<component>.<stat>, e.g. amp.export.spans_dropped. Gauges for components
+registered after the processor is built are added once a collection has
+seen them, from the next ending span or flush on.
+"""
+
+import logging
+import threading
+from functools import partial
+from typing import Any, Dict, Iterable, Optional, Set, Tuple
+
+from opentelemetry.context import Context
+from opentelemetry.metrics import CallbackOptions, Meter, Observation
+from opentelemetry.sdk.metrics import MeterProvider
+from opentelemetry.sdk.trace import ReadableSpan, Span, SpanProcessor
+from opentelemetry.trace import StatusCode
+
+from . import _stats
+from ._attributes import span_kind
+
+logger = logging.getLogger(__name__)
+
+TOKEN_USAGE_METRIC = "gen_ai.client.token.usage"
+OPERATION_DURATION_METRIC = "gen_ai.client.operation.duration"
+TOOL_DURATION_METRIC = "amp.tool.duration"
+ERRORS_METRIC = "amp.errors"
+
+# Bucket boundaries recommended by the GenAI semantic conventions
+_TOKEN_BUCKETS = (1, 4, 16, 64, 256, 1024, 4096, 16384, 65536, 262144, 1048576)
+_DURATION_BUCKETS = (
+    0.01,
+    0.02,
+    0.04,
+    0.08,
+    0.16,
+    0.32,
+    0.64,
+    1.28,
+    2.56,
+    5.12,
+    10.24,
+    20.48,
+    40.96,
+    81.92,
+)
+
+# Token attributes checked in order; instrumentors use either naming
+_INPUT_TOKEN_ATTRIBUTES = ("gen_ai.usage.input_tokens", "gen_ai.usage.prompt_tokens")
+_OUTPUT_TOKEN_ATTRIBUTES = (
+    "gen_ai.usage.output_tokens",
+    "gen_ai.usage.completion_tokens",
+)
+_ENTITY_NAME_ATTRIBUTE = "traceloop.entity.name"
+_OTHER_ERROR = "_OTHER"
+
+
+def _first_number(attributes: Any, keys: Iterable[str]) -> Optional[int]:
+    for key in keys:
+        value = attributes.get(key)
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return int(value)
+    return None
+
+
+def _error_type(span: ReadableSpan) -> Optional[str]:
+    if span.status.status_code is not StatusCode.ERROR:
+        return None
+    error_type = (span.attributes or {}).get("error.type")
+    if isinstance(error_type, str):
+        return error_type
+    for event in span.events:
+        if event.name == "exception":
+            exception_type = (event.attributes or {}).get("exception.type")
+            if isinstance(exception_type, str):
+                return exception_type
+    return _OTHER_ERROR
+
+
+class LLMMetricsSpanProcessor(SpanProcessor):
+    """
+    Span processor that records LLM and tool metrics from ending spans.
+
+    It must run before any sampling processor, and head sampling must record
+    sampled-out spans without exporting them (see sampling.build_sampler), so
+    that every LLM call and tool is counted. Spans are forwarded unchanged.
+
+    Args:
+        next_processor: Processor that receives the spans.
+        meter_provider: Provider exporting the metrics; shut down with the
+            processor so the last interval is exported at exit.
+    """
+
+    def __init__(
+        self, next_processor: SpanProcessor, meter_provider: MeterProvider
+    ) -> None:
+        self._next = next_processor
+        self._meter_provider = meter_provider
+        self._closed = False
+        meter = meter_provider.get_meter("amp_instrumentation")
+        self._token_usage = meter.create_histogram(
+            TOKEN_USAGE_METRIC,
+            unit="{token}",
+            description="Number of input and output tokens used per LLM call.",
+            explicit_bucket_boundaries_advisory=_TOKEN_BUCKETS,
+        )
+        self._operation_duration = meter.create_histogram(
+            OPERATION_DURATION_METRIC,
+            unit="s",
+            description="Duration of LLM calls.",
+            explicit_bucket_boundaries_advisory=_DURATION_BUCKETS,
+        )
+        self._tool_duration = meter.create_histogram(
+            TOOL_DURATION_METRIC,
+            unit="s",
+            description="Duration of tool calls.",
+            explicit_bucket_boundaries_advisory=_DURATION_BUCKETS,
+        )
+        self._errors = meter.create_counter(
+            ERRORS_METRIC,
+            unit="{error}",
+            description="Number of failed LLM and tool calls.",
+        )
+        self._stats_gauges = _StatsGauges(meter)
+
+    def on_start(self, span: Span, parent_context: Optional[Context] = None) -> None:
+        self._next.on_start(span, parent_context=parent_context)
+
+    def on_end(self, span: ReadableSpan) -> None:
+        if self._stats_gauges.pending and not self._closed:
+            self._stats_gauges.create_pending()
+        try:
+            self._record(span)
+        except Exception:
+            logger.debug("Failed to record span metrics.", exc_info=True)
+        self._next.on_end(span)
+
+    def _record(self, span: ReadableSpan) -> None:
+        kind = span_kind(span)
+        if kind not in ("llm", "tool"):
+            return
+        attributes = span.attributes or {}
+        duration = (
+            (span.end_time - span.start_time) / 1e9
+            if span.start_time and span.end_time
+            else None
+        )
+        error_type = _error_type(span)
+
+        if kind == "llm":
+            labels: Dict[str, Any] = {
+                "gen_ai.system": attributes.get("gen_ai.system") or "unknown",
+                "gen_ai.request.model": attributes.get("gen_ai.request.model")
+                or attributes.get("gen_ai.response.model")
+                or "unknown",
+            }
+            for token_type, keys in (
+                ("input", _INPUT_TOKEN_ATTRIBUTES),
+                ("output", _OUTPUT_TOKEN_ATTRIBUTES),
+            ):
+                tokens = _first_number(attributes, keys)
+                if tokens is not None:
+                    self._token_usage.record(
+                        tokens, {**labels, "gen_ai.token.type": token_type}
+                    )
+            duration_histogram = self._operation_duration
+        else:
+            labels = {
+                "gen_ai.tool.name": attributes.get(_ENTITY_NAME_ATTRIBUTE) or span.name
+            }
+            duration_histogram = self._tool_duration
+
+        if error_type is not None:
+            labels["error.type"] = error_type
+            self._errors.add(1, {**labels, "amp.span.kind": kind})
+        if duration is not None:
+            duration_histogram.record(duration, labels)
+
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
+        if not self._closed:
+            self._stats_gauges.create_pending()
+        flushed = self._next.force_flush(timeout_millis)
+        return self._meter_provider.force_flush(timeout_millis) and flushed
+
+    def shutdown(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            self._meter_provider.shutdown()
+        except Exception:
+            logger.debug("Failed to shut down the meter provider.", exc_info=True)
+        self._next.shutdown()
+
+
+class _StatsGauges:
+    """
+    Observable gauges for the numeric values of amp_instrumentation.stats().
+
+    A collection calls every gauge once, so the first callback of a cycle
+    takes one stats() snapshot that the others read. Components and values
+    that appear later are found in the snapshots; their gauges are created
+    by create_pending(), outside the collection, whose lock the SDK holds
+    while it runs the callbacks.
+    """
+
+    def __init__(self, meter: Meter) -> None:
+        self._meter = meter
+        self._lock = threading.Lock()
+        self._snapshot: Dict[str, Dict[str, Any]] = {}
+        # Gauges that have read the current snapshot
+        self._observed: Set[Tuple[str, str]] = set()
+        self._created: Set[Tuple[str, str]] = set()
+        self.pending: Set[Tuple[str, str]] = set()
+        with self._lock:
+            self._refresh_locked()
+        self.create_pending()
+
+    def _refresh_locked(self) -> None:
+        self._snapshot = _stats.stats()
+        self._observed.clear()
+        for component, values in self._snapshot.items():
+            for key, value in values.items():
+                if (
+                    isinstance(value, (int, float))
+                    and not isinstance(value, bool)
+                    and (component, key) not in self._created
+                ):
+                    self.pending.add((component, key))
+
+    def create_pending(self) -> None:
+        """Create the gauges for stats found since the last call."""
+        with self._lock:
+            pending, self.pending = self.pending, set()
+            self._created.update(pending)
+        for component, key in sorted(pending):
+            self._meter.create_observable_gauge(
+                f"amp.{component}.{key}",
+                callbacks=[partial(self._observe, component, key)],
+            )
+
+    def _observe(
+        self, component: str, key: str, options: CallbackOptions
+    ) -> Iterable[Observation]:
+        with self._lock:
+            # A gauge observed twice means a new collection has started
+            if not self._observed or (component, key) in self._observed:
+                self._refresh_locked()
+            self._observed.add((component, key))
+            value = self._snapshot.get(component, {}).get(key)
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            yield Observation(value)
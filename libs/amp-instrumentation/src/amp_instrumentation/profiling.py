@@ -0,0 +1,491 @@
+# Copyright (c) 2025, WSO2 LLC. (https://www.wso2.com).
+#
+# WSO2 LLC. licenses this file to you under the Apache License,
+# Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""
+Whole-process profiling for `amp-instrument --profile`.
+
+With AMP_PROFILE set, sitecustomize.py starts a ProfilingSession before
+instrumentation is initialized and the report is written when the process
+exits. Three modes are supported:
+
+- cpu: cProfile of the main thread, written as pstats
+- import: time spent executing each imported module, in `-X importtime` format
+- alloc: tracemalloc allocations still live at exit, by line
+
+Every mode also writes collapsed stacks (one "frame;frame;frame weight" line
+per stack, as read by flamegraph.pl, speedscope and inferno) and a JSON
+summary listing the trace ids of the root spans that ended while profiling,
+so the report can be matched to the requests it covers.
+"""
+
+import atexit
+import cProfile
+import json
+import logging
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+
+from opentelemetry.context import Context
+from opentelemetry.sdk.trace import ReadableSpan, Span, SpanProcessor
+
+from ._bootstrap import constants as env_vars
+
+logger = logging.getLogger(__name__)
+
+PROFILE_CPU = "cpu"
+PROFILE_IMPORT = "import"
+PROFILE_ALLOC = "alloc"
+PROFILE_MODES = (PROFILE_CPU, PROFILE_IMPORT, PROFILE_ALLOC)
+
+DEFAULT_PROFILE_DIR = "amp-profile"
+
+# Root spans kept for the summary; later ones are only counted
+_MAX_TRACES = 10000
+# Frames recorded per allocation traceback; tracemalloc's overhead grows with it
+_ALLOC_FRAMES = 16
+# Lines in the text allocation report
+_ALLOC_TOP_LINES = 50
+# Call graph paths below this share of the total time are not expanded
+_MIN_PATH_FRACTION = 1e-4
+_MAX_STACK_DEPTH = 128
+
+
+class TraceRecorder(SpanProcessor):
+    """Span processor that remembers the trace id and duration of root spans."""
+
+    def __init__(self, max_traces: int = _MAX_TRACES) -> None:
+        self._max_traces = max_traces
+        self._lock = threading.Lock()
+        self._traces: List[Dict[str, Any]] = []
+        self.traces_dropped = 0
+
+    def on_start(self, span: Span, parent_context: Optional[Context] = None) -> None:
+        pass
+
+    def on_end(self, span: ReadableSpan) -> None:
+        if span.parent is not None and not span.parent.is_remote:
+            return
+        if span.context is None:
+            return
+        duration_ms = None
+        if span.start_time is not None and span.end_time is not None:
+            duration_ms = (span.end_time - span.start_time) / 1e6
+        with self._lock:
+            if len(self._traces) >= self._max_traces:
+                self.traces_dropped += 1
+                return
+            self._traces.append(
+                {
+                    "trace_id": format(span.context.trace_id, "032x"),
+                    "name": span.name,
+                    "duration_ms": duration_ms,
+                }
+            )
+
+    @property
+    def traces(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return list(self._traces)
+
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
+        return True
+
+
+class _TimedLoader:
+    """
+    Loader wrapper that times module execution.
+
+    As with the lazy initialization hook, attribute access is delegated to
+    the original loader and the module's __loader__ is restored before it
+    executes.
+    """
+
+    def __init__(self, loader: Any, timer: "ImportTimer") -> None:
+        self._loader = loader
+        self._timer = timer
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._loader, name)
+
+    def create_module(self, spec: Any) -> Any:
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module: Any) -> None:
+        module.__loader__ = self._loader
+        if getattr(module, "__spec__", None) is not None:
+            module.__spec__.loader = self._loader
+
+        self._timer._enter(module.__name__)
+        try:
+            self._loader.exec_module(module)
+        finally:
+            self._timer._exit()
+
+
+class ImportTimer:
+    """
+    Meta path finder that records self and cumulative execution time per import.
+
+    Nested imports are attributed to the module that triggered them, in the
+    same way as `python -X importtime`. Time spent finding modules is not
+    included.
+    """
+
+    def __init__(self) -> None:
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        # (depth, import stack, self us, cumulative us) in completion order
+        self.records: List[Tuple[int, Tuple[str, ...], int, int]] = []
+
+    def find_spec(self, fullname: str, path: Any = None, target: Any = None) -> Any:
+        if getattr(self._local, "searching", False):
+            return None
+
+        self._local.searching = True
+        try:
+            spec = None
+            for finder in list(sys.meta_path):
+                if finder is self:
+                    continue
+                find_spec = getattr(finder, "find_spec", None)
+                if find_spec is None:
+                    continue
+                spec = find_spec(fullname, path, target)
+                if spec is not None:
+                    break
+        finally:
+            self._local.searching = False
+
+        if spec is None or spec.loader is None:
+            return None
+        if not hasattr(spec.loader, "exec_module"):
+            return None
+
+        spec.loader = _TimedLoader(spec.loader, self)
+        return spec
+
+    def _stack(self) -> List[List[Any]]:
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _enter(self, name: str) -> None:
+        # [name, started, time spent in nested imports]
+        self._stack().append([name, time.perf_counter_ns(), 0])
+
+    def _exit(self) -> None:
+        stack = self._stack()
+        name, started, nested = stack.pop()
+        cumulative = time.perf_counter_ns() - started
+        if stack:
+            stack[-1][2] += cumulative
+        names = tuple(frame[0] for frame in stack) + (name,)
+        with self._lock:
+            self.records.append(
+                (len(stack), names, (cumulative - nested) // 1000, cumulative // 1000)
+            )
+
+    def install(self) -> None:
+        sys.meta_path.insert(0, self)
+
+    def uninstall(self) -> None:
+        try:
+            sys.meta_path.remove(self)
+        except ValueError:
+            pass
+
+
+def _function_label(function: Tuple[str, int, str]) -> str:
+    filename, line, name = function
+    if filename == "~":
+        # Built-in functions, e.g. "<built-in method time.sleep>"
+        return name
+    return f"{name} ({os.path.basename(filename)}:{line})"
+
+
+def collapse_pstats(stats: pstats.Stats) -> Dict[str, int]:
+    """
+    Convert cProfile statistics to collapsed stacks weighted in microseconds.
+
+    cProfile records caller/callee pairs rather than full stacks, so stacks
+    are rebuilt from the call graph: each function's own time is spread over
+    the paths leading to it in proportion to the time each caller spent in
+    it. Recursive calls are folded into the first occurrence.
+    """
+    raw: Dict[Any, Any] = stats.stats  # type: ignore[attr-defined]
+    callees: Dict[Any, List[Tuple[Any, float]]] = defaultdict(list)
+    for function, (_, _, _, _, callers) in raw.items():
+        for caller, (_, _, _, edge_cumulative) in callers.items():
+            callees[caller].append((function, edge_cumulative))
+
+    roots = [function for function, entry in raw.items() if not entry[4]]
+    total = sum(raw[function][3] for function in roots) or 1.0
+    weights: Dict[str, float] = defaultdict(float)
+
+    def walk(function: Any, path: List[str], seen: frozenset, share: float) -> None:
+        # share: fraction of this function's time that is reached through path
+        _, _, own, _, _ = raw[function]
+        path = path + [_function_label(function)]
+        weights[";".join(path)] += own * share
+        if len(path) >= _MAX_STACK_DEPTH:
+            return
+        seen = seen | {function}
+        for callee, edge_cumulative in callees.get(function, ()):
+            callee_cumulative = raw[callee][3]
+            if callee in seen or not callee_cumulative:
+                continue
+            reached = edge_cumulative * share
+            if reached < total * _MIN_PATH_FRACTION:
+                continue
+            walk(callee, path, seen, reached / callee_cumulative)
+
+    for root in roots:
+        walk(root, [], frozenset(), 1.0)
+
+    return {
+        stack: int(seconds * 1e6) for stack, seconds in weights.items() if seconds > 0
+    }
+
+
+def collapse_tracemalloc(
+    statistics: List[tracemalloc.Statistic],
+) -> Dict[str, int]:
+    """Convert tracemalloc statistics grouped by traceback to collapsed stacks in bytes."""
+    stacks: Dict[str, int] = defaultdict(int)
+    for statistic in statistics:
+        # Tracebacks are ordered from the oldest to the most recent frame
+        frames = [
+            f"{os.path.basename(frame.filename)}:{frame.lineno}"
+            for frame in statistic.traceback
+        ]
+        stacks[";".join(frames)] += statistic.size
+    return dict(stacks)
+
+
+def write_collapsed(path: str, stacks: Dict[str, int]) -> None:
+    """Write collapsed stacks, heaviest first, skipping zero weights."""
+    with open(path, "w", encoding="utf-8") as file:
+        for stack, weight in sorted(stacks.items(), key=lambda item: -item[1]):
+            if weight > 0:
+                file.write(f"{stack} {weight}\n")
+
+
+class ProfilingSession:
+    """
+    One profiling run of the current process.
+
+    Args:
+        mode: One of PROFILE_MODES.
+        output_dir: Directory for the report files; created on demand.
+    """
+
+    def __init__(self, mode: str, output_dir: str = DEFAULT_PROFILE_DIR) -> None:
+        if mode not in PROFILE_MODES:
+            raise ValueError(
+                f"Unknown profile mode '{mode}'. Supported: {', '.join(PROFILE_MODES)}."
+            )
+        self.mode = mode
+        self.output_dir = output_dir
+        self.trace_recorder = TraceRecorder()
+        self._profiler: Optional[cProfile.Profile] = None
+        self._import_timer: Optional[ImportTimer] = None
+        self._started_at = 0.0
+        self._started = 0.0
+        self._stopped = False
+
+    def start(self) -> None:
+        self._started_at = time.time()
+        self._started = time.perf_counter()
+        if self.mode == PROFILE_CPU:
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        elif self.mode == PROFILE_IMPORT:
+            self._import_timer = ImportTimer()
+            self._import_timer.install()
+        else:
+            tracemalloc.start(_ALLOC_FRAMES)
+
+    def stop(self) -> List[str]:
+        """
+        Stop profiling and write the report.
+
+        Returns:
+            Paths of the files written; empty if the session was already stopped.
+        """
+        if self._stopped:
+            return []
+        self._stopped = True
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        prefix = os.path.join(self.output_dir, f"amp-{self.mode}-{os.getpid()}")
+        summary: Dict[str, Any] = {}
+        if self.mode == PROFILE_CPU:
+            files = self._write_cpu(prefix)
+        elif self.mode == PROFILE_IMPORT:
+            files = self._write_import(prefix)
+        else:
+            files, summary = self._write_alloc(prefix)
+
+        summary_path = f"{prefix}.json"
+        summary.update(
+            {
+                "mode": self.mode,
+                "pid": os.getpid(),
+                "argv": sys.argv,
+                "started_at": self._started_at,
+                "duration_s": time.perf_counter() - self._started,
+                "files": [os.path.basename(path) for path in files],
+                "traces": self.trace_recorder.traces,
+                "traces_dropped": self.trace_recorder.traces_dropped,
+            }
+        )
+        with open(summary_path, "w", encoding="utf-8") as file:
+            json.dump(summary, file, indent=2)
+        return files + [summary_path]
+
+    def _write_cpu(self, prefix: str) -> List[str]:
+        assert self._profiler is not None
+        self._profiler.disable()
+        pstats_path = f"{prefix}.pstats"
+        self._profiler.dump_stats(pstats_path)
+
+        collapsed_path = f"{prefix}.collapsed"
+        write_collapsed(collapsed_path, collapse_pstats(pstats.Stats(self._profiler)))
+        return [pstats_path, collapsed_path]
+
+    def _write_import(self, prefix: str) -> List[str]:
+        assert self._import_timer is not None
+        self._import_timer.uninstall()
+        records = list(self._import_timer.records)
+
+        text_path = f"{prefix}.txt"
+        with open(text_path, "w", encoding="utf-8") as file:
+            file.write("import time: self [us] | cumulative | imported package\n")
+            for depth, names, own, cumulative in records:
+                file.write(
+                    f"import time: {own:>9} | {cumulative:>10} | "
+                    f"{'  ' * depth}{names[-1]}\n"
+                )
+
+        collapsed_path = f"{prefix}.collapsed"
+        stacks: Dict[str, int] = defaultdict(int)
+        for _, names, own, _ in records:
+            stacks[";".join(names)] += own
+        write_collapsed(collapsed_path, stacks)
+        return [text_path, collapsed_path]
+
+    def _write_alloc(self, prefix: str) -> Tuple[List[str], Dict[str, Any]]:
+        snapshot = tracemalloc.take_snapshot().filter_traces(
+            [tracemalloc.Filter(False, tracemalloc.__file__)]
+        )
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        statistics = snapshot.statistics("traceback")
+
+        # Group by allocating line here rather than with a second, equally
+        # expensive statistics("lineno") pass
+        lines: Dict[Tuple[str, int], List[int]] = defaultdict(lambda: [0, 0])
+        for statistic in statistics:
+            frame = statistic.traceback[-1]
+            line = lines[(frame.filename, frame.lineno)]
+            line[0] += statistic.size
+            line[1] += statistic.count
+
+        text_path = f"{prefix}.txt"
+        with open(text_path, "w", encoding="utf-8") as file:
+            file.write(
+                f"Live at exit: {current} bytes, peak traced: {peak} bytes\n"
+                f"Top {_ALLOC_TOP_LINES} lines by live size:\n"
+            )
+            top = sorted(lines.items(), key=lambda item: -item[1][0])
+            for (filename, lineno), (size, count) in top[:_ALLOC_TOP_LINES]:
+                file.write(f"{filename}:{lineno}: size={size} B, count={count}\n")
+
+        collapsed_path = f"{prefix}.collapsed"
+        write_collapsed(collapsed_path, collapse_tracemalloc(statistics))
+        return [text_path, collapsed_path], {
+            "traced_bytes": current,
+            "peak_traced_bytes": peak,
+        }
+
+
+_session: Optional[ProfilingSession] = None
+
+
+def active_session() -> Optional[ProfilingSession]:
+    """Return the running profiling session, if any."""
+    return _session
+
+
+def _stop_and_report() -> None:
+    if _session is None:
+        return
+    try:
+        files = _session.stop()
+    except Exception as e:
+        print(f"ERROR: Failed to write WSO2 AMP profile: {e}", file=sys.stderr)
+        return
+    if files:
+        print(
+            f"WSO2 AMP {_session.mode} profile written to: {', '.join(files)}",
+            file=sys.stderr,
+        )
+
+
+def start_profiling(
+    mode: Optional[str] = None, output_dir: Optional[str] = None
+) -> ProfilingSession:
+    """
+    Start profiling the process and write the report at exit.
+
+    Args:
+        mode: Profile mode; defaults to AMP_PROFILE.
+        output_dir: Report directory; defaults to AMP_PROFILE_DIR or "amp-profile".
+
+    Returns:
+        The running session.
+
+    Raises:
+        ValueError: If the mode is not supported.
+    """
+    global _session
+
+    if _session is not None:
+        return _session
+    mode = (mode or os.getenv(env_vars.AMP_PROFILE) or PROFILE_CPU).strip().lower()
+    output_dir = (
+        output_dir or os.getenv(env_vars.AMP_PROFILE_DIR) or DEFAULT_PROFILE_DIR
+    )
+
+    session = ProfilingSession(mode, output_dir)
+    session.start()
+    _session = session
+    atexit.register(_stop_and_report)
+    logger.debug(f"Profiling started in {mode} mode, writing to {output_dir}.")
+    return session
+
+
+def attach_trace_recorder(provider: Any) -> None:
+    """Record root span trace ids from provider in the active session, if any."""
+    if _session is not None and hasattr(provider, "add_span_processor"):
+        provider.add_span_processor(_session.trace_recorder)
@@ -0,0 +1,210 @@
+# Copyright (c) 2025, WSO2 LLC. (https://www.wso2.com).
+#
+# WSO2 LLC. licenses this file to you under the Apache License,
+# Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""
+Trace context propagation into Starlette and FastAPI services.
+
+Outbound HTTP calls made with requests carry a W3C traceparent header, set by
+the requests instrumentor. The ServerSpanMiddleware continues that trace on
+the receiving side: it extracts the caller's context from the request
+headers and runs the request under a SERVER span that is the child of the
+caller's CLIENT span. An agent calling a tool API over HTTP then produces a
+single trace, in which the client span minus the server span is the time
+spent on the network and in the server before the application ran.
+
+instrument_starlette() adds the middleware to every Starlette and FastAPI
+application, including ones imported after it is called. It wraps the whole
+middleware stack, so it applies the decision of any TracingToggleMiddleware
+in the stack before it starts a span.
+"""
+
+import logging
+import sys
+from typing import Any, Awaitable, Callable, Iterable, List, Optional, Tuple
+
+from opentelemetry import trace
+from opentelemetry.context import _SUPPRESS_INSTRUMENTATION_KEY, get_value
+from opentelemetry.propagate import extract
+from opentelemetry.propagators.textmap import Getter
+from opentelemetry.trace import SpanKind, Status, StatusCode
+
+from .toggle import TracingToggleMiddleware
+
+logger = logging.getLogger(__name__)
+
+# Span attributes written on server spans
+METHOD_ATTRIBUTE = "http.request.method"
+PATH_ATTRIBUTE = "url.path"
+SCHEME_ATTRIBUTE = "url.scheme"
+ROUTE_ATTRIBUTE = "http.route"
+STATUS_CODE_ATTRIBUTE = "http.response.status_code"
+
+# Modules defining the application classes whose middleware stack is wrapped
+_APPLICATION_MODULES = {
+    "starlette.applications": "Starlette",
+    "fastapi.applications": "FastAPI",
+}
+# Set on the ASGI scope by the outermost middleware, so mounted apps add no span
+_SCOPE_MARKER = "amp.server_span"
+# Set on the ASGI scope by FastAPI's native telemetry
+_FASTAPI_TELEMETRY = "fastapi.telemetry"
+# Middleware layers searched for tracing toggles below the server span
+_MAX_MIDDLEWARE_DEPTH = 64
+
+_ASGIApp = Callable[[Any, Any, Any], Awaitable[None]]
+_Headers = Iterable[Tuple[bytes, bytes]]
+
+
+class _ASGIHeaderGetter(Getter[_Headers]):
+    """Reads propagation headers from an ASGI scope's header list."""
+
+    def get(self, carrier: _Headers, key: str) -> Optional[List[str]]:
+        name = key.lower().encode("latin-1")
+        values = [
+            value.decode("latin-1") for header, value in carrier if header == name
+        ]
+        return values or None
+
+    def keys(self, carrier: _Headers) -> List[str]:
+        return [key.decode("latin-1") for key, _ in carrier]
+
+
+_GETTER = _ASGIHeaderGetter()
+_instrumented = False
+
+
+def _find_toggles(app: Any) -> Tuple[TracingToggleMiddleware, ...]:
+    """Return the tracing toggles in a middleware stack, outermost first."""
+    toggles = []
+    for _ in range(_MAX_MIDDLEWARE_DEPTH):
+        if isinstance(app, TracingToggleMiddleware):
+            toggles.append(app)
+        # Starlette middleware keeps the application it wraps in .app
+        app = getattr(app, "app", None)
+        if app is None:
+            break
+    return tuple(toggles)
+
+
+class ServerSpanMiddleware:
+    """
+    ASGI middleware that runs each HTTP request under a SERVER span.
+
+    The span continues the trace of the caller when the request carries
+    trace context headers (W3C traceparent by default, see OTEL_PROPAGATORS),
+    and starts a new trace otherwise. It is named "<method> <route>" once
+    the route is known, and "<method> <path>" until then and for requests
+    that match no route. Requests in a context where tracing is suppressed
+    (see amp_instrumentation.tracing), requests that a TracingToggleMiddleware
+    further down the stack suppresses, and requests that FastAPI's built-in
+    telemetry already traces, are passed through without a span.
+
+    Args:
+        app: The ASGI application.
+        tracer_provider: Provider of the tracer; defaults to the global one.
+    """
+
+    def __init__(self, app: _ASGIApp, tracer_provider: Optional[Any] = None) -> None:
+        self.app = app
+        self._tracer = trace.get_tracer(__name__, tracer_provider=tracer_provider)
+        # Toggles run after this middleware, so their decision is made here too
+        self._toggles = _find_toggles(app)
+
+    async def __call__(self, scope: Any, receive: Any, send: Any) -> None:
+        if (
+            scope["type"] != "http"
+            or _SCOPE_MARKER in scope
+            or get_value(_SUPPRESS_INSTRUMENTATION_KEY)
+            or not all(toggle.traced(scope) for toggle in self._toggles)
+            # Recent FastAPI versions create their own server span
+            or getattr(scope.get(_FASTAPI_TELEMETRY), "span", None) is not None
+        ):
+            await self.app(scope, receive, send)
+            return
+        scope[_SCOPE_MARKER] = True
+
+        method = scope.get("method", "GET")
+        path = scope.get("path", "")
+        with self._tracer.start_as_current_span(
+            f"{method} {path}",
+            context=extract(scope.get("headers") or (), getter=_GETTER),
+            kind=SpanKind.SERVER,
+            attributes={
+                METHOD_ATTRIBUTE: method,
+                PATH_ATTRIBUTE: path,
+                SCHEME_ATTRIBUTE: scope.get("scheme", "http"),
+            },
+        ) as span:
+
+            async def send_with_status(message: Any) -> None:
+                if message["type"] == "http.response.start":
+                    status = message["status"]
+                    span.set_attribute(STATUS_CODE_ATTRIBUTE, status)
+                    if status >= 500:
+                        span.set_status(Status(StatusCode.ERROR))
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_status)
+            finally:
+                route = getattr(scope.get("route"), "path", None)
+                if route:
+                    span.update_name(f"{method} {route}")
+                    span.set_attribute(ROUTE_ATTRIBUTE, route)
+
+
+def _wrap_application_class(module_name: str) -> None:
+    """Wrap the middleware stack built by the application class of a module."""
+    app_class = getattr(sys.modules[module_name], _APPLICATION_MODULES[module_name])
+    build = app_class.__dict__.get("build_middleware_stack")
+    if build is None or getattr(build, "_amp_wrapped", False):
+        return
+
+    def build_middleware_stack(self: Any) -> _ASGIApp:
+        stack = build(self)
+        # Applications instrumented by opentelemetry-instrumentation-fastapi
+        # or -starlette already create server spans
+        if getattr(self, "_is_instrumented_by_opentelemetry", False):
+            return stack
+        return ServerSpanMiddleware(stack)
+
+    build_middleware_stack._amp_wrapped = True  # type: ignore[attr-defined]
+    app_class.build_middleware_stack = build_middleware_stack
+    logger.debug(f"Server spans enabled for {module_name}.")
+
+
+def instrument_starlette() -> None:
+    """
+    Add the ServerSpanMiddleware to Starlette and FastAPI applications.
+
+    Applications build their middleware stack on their first request, so
+    every application that has not served a request yet is covered, even if
+    it was created before this call. Modules that are not imported yet are
+    wrapped on import.
+    """
+    global _instrumented
+    if _instrumented:
+        return
+    _instrumented = True
+
+    from ._bootstrap.lazy import LazyInitFinder
+
+    for module_name in _APPLICATION_MODULES:
+        finder = LazyInitFinder([module_name], _wrap_application_class)
+        if module_name in sys.modules:
+            finder.fire(module_name)
+        else:
+            sys.meta_path.insert(0, finder)
@@ -0,0 +1,302 @@
+# Copyright (c) 2025, WSO2 LLC. (https://www.wso2.com).
+#
+# WSO2 LLC. licenses this file to you under the Apache License,
+# Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""
+Redaction of personal data from span content.
+
+With AMP_TRACE_CONTENT on, prompts, completions and tool payloads (e.g. the
+guest details of a hotel booking) are attached to spans verbatim. The
+PIIRedactor replaces email addresses, phone numbers and payment card numbers
+in string values with a placeholder such as "[REDACTED:email]". All patterns
+are compiled into one regular expression, so each value is scanned once, and
+results for repeated values such as system prompts are cached.
+"""
+
+import re
+import threading
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Mapping, Optional, Tuple
+
+from opentelemetry.context import Context
+from opentelemetry.sdk.trace import ReadableSpan, Span, SpanProcessor
+
+from ._attributes import rebuild_attributes
+
+EMAIL = "email"
+PHONE = "phone"
+CARD = "card"
+KINDS = (EMAIL, PHONE, CARD)
+
+REDACTION_MARKER = "[REDACTED:{}]"
+
+# All patterns start with "@", "+", "(" or a digit. The combined regex
+# consumes that character in one leading character class, which lets the
+# regex engine skip from one candidate character to the next, and picks the
+# pattern by what the character was. Numbers that start inside a word or
+# another number, and phone candidates with fewer than 9 digits (dates,
+# prices), are rejected by look-arounds without leaving the regex engine.
+# Emails are matched from the "@" and extended backwards over the local part.
+_NUMBER_START = r"(?<![A-Za-z0-9_.+(-].)"
+_EMAIL_DOMAIN = r"[A-Za-z0-9-]+(?:\.[A-Za-z0-9-]+)*\.[A-Za-z]{2,}"
+_CARD_DIGITS = r"(?:[ -]?[0-9]){12,18}(?![\w-])"
+_PHONE_DIGITS = r"(?=(?:[ .-]?[0-9]){8})[0-9]{1,3}(?:[ .-]?[0-9]{2,4}){1,4}(?![\w-])"
+_PHONE_INTL = (
+    r"[0-9]{1,3}[ .-]?(?:\([0-9]{1,4}\)[ .-]?)?[0-9]{2,4}"
+    r"(?:[ .-]?[0-9]{2,4}){1,4}(?![\w-])"
+)
+_PHONE_AREA = r"[0-9]{1,4}\)[ .-]?[0-9]{2,4}(?:[ .-]?[0-9]{2,4}){1,4}(?![\w-])"
+_GROUP_KINDS = {
+    "email": EMAIL,
+    "card": CARD,
+    "phone": PHONE,
+    "phone_intl": PHONE,
+    "phone_area": PHONE,
+}
+_EMAIL_LOCAL_CHARS = frozenset(
+    "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789._%+-"
+)
+_NON_DIGITS = re.compile(r"[^0-9]")
+
+# Values up to this length are cached; longer ones are rarely repeated verbatim
+_MAX_CACHED_LENGTH = 32768
+
+
+def _compile(kinds: Tuple[str, ...]) -> "re.Pattern[str]":
+    """Combine the patterns of the given kinds into one regex."""
+    first_chars = []
+    branches = []
+    # Cards are tried before phones, which would otherwise claim grouped digits
+    numbers = []
+    if CARD in kinds:
+        numbers.append(f"(?P<card>{_CARD_DIGITS})")
+    if PHONE in kinds:
+        numbers.append(f"(?P<phone>{_PHONE_DIGITS})")
+    if numbers:
+        # Digits are by far the most common candidates, so they are tried first
+        first_chars.append("0-9")
+        branches.append(f"(?<=[0-9]){_NUMBER_START}(?:{'|'.join(numbers)})")
+    if EMAIL in kinds:
+        first_chars.append("@")
+        branches.append(f"(?<=@)(?P<email>{_EMAIL_DOMAIN})")
+    if PHONE in kinds:
+        first_chars.append(r"+\(")
+        branches.append(f"(?<=\\+)(?P<phone_intl>{_PHONE_INTL})")
+        branches.append(f"(?<=\\()(?P<phone_area>{_PHONE_AREA})")
+    return re.compile(f"[{''.join(first_chars)}](?:{'|'.join(branches)})")
+
+
+def _luhn_valid(digits: str) -> bool:
+    total = 0
+    for index, char in enumerate(reversed(digits)):
+        digit = ord(char) - 48
+        if index % 2:
+            digit *= 2
+            if digit > 9:
+                digit -= 9
+        total += digit
+    return total % 10 == 0
+
+
+def _is_ipv4(text: str) -> bool:
+    parts = text.split(".")
+    return (
+        len(parts) == 4
+        and all(1 <= len(part) <= 3 and part.isdigit() for part in parts)
+        and all(int(part) <= 255 for part in parts)
+    )
+
+
+def _is_phone(text: str, digits: str) -> bool:
+    if not 9 <= len(digits) <= 15:
+        return False
+    if text[0] == "+":
+        return True
+    if len(digits) == len(text):
+        # Bare digit runs are indistinguishable from ids and timestamps,
+        # except for local numbers, which start with a single trunk "0"
+        return len(digits) <= 11 and digits[0] == "0" and digits[1] != "0"
+    return not _is_ipv4(text)
+
+
+def _email_start(value: str, at: int, floor: int) -> Optional[int]:
+    """Return where the local part before the "@" at index at begins, if any."""
+    start = at
+    while start > floor and value[start - 1] in _EMAIL_LOCAL_CHARS:
+        start -= 1
+    return start if start < at else None
+
+
+def _accept_number(kind: str, text: str) -> bool:
+    digits = _NON_DIGITS.sub("", text)
+    if kind == CARD:
+        return _luhn_valid(digits)
+    return _is_phone(text, digits)
+
+
+class PIIRedactor:
+    """
+    Replaces personal data in strings with "[REDACTED:<kind>]" placeholders.
+
+    Card numbers (13-19 digits, optionally grouped by spaces or dashes) must
+    pass the Luhn check. Phone numbers need 9-15 digits and either a leading
+    "+" or separators (spaces, dots, dashes or parentheses), so that order
+    ids, timestamps and dates are left alone. Bare local numbers of 9-11
+    digits with a single leading "0", e.g. "0771234567", are phone numbers
+    too. Dotted IPv4 addresses are not.
+
+    Args:
+        kinds: Kinds of data to redact, out of "email", "phone" and "card".
+        cache_size: Number of distinct values whose results are cached.
+    """
+
+    def __init__(self, kinds: Iterable[str] = KINDS, cache_size: int = 256) -> None:
+        requested = set(kinds)
+        unknown = requested - set(KINDS)
+        if unknown:
+            raise ValueError(f"Unknown PII kinds: {', '.join(sorted(unknown))}.")
+        self._kinds = tuple(kind for kind in KINDS if kind in requested)
+        self._pattern = _compile(self._kinds)
+        self._cached = lru_cache(maxsize=cache_size)(self._redact)
+
+    @property
+    def kinds(self) -> Tuple[str, ...]:
+        return self._kinds
+
+    def redact(self, value: str) -> str:
+        """Return the value with personal data replaced."""
+        if len(value) <= _MAX_CACHED_LENGTH:
+            return self._cached(value)
+        return self._redact(value)
+
+    def cache_info(self) -> Any:
+        return self._cached.cache_info()
+
+    def _redact(self, value: str) -> str:
+        pieces = []
+        last = 0
+        for match in self._pattern.finditer(value):
+            kind = _GROUP_KINDS[match.lastgroup]  # type: ignore[index]
+            start, end = match.span()
+            if kind == EMAIL:
+                email_start = _email_start(value, start, last)
+                if email_start is None:
+                    continue
+                start = email_start
+            elif not _accept_number(kind, match.group()):
+                continue
+            pieces.append(value[last:start])
+            pieces.append(REDACTION_MARKER.format(kind))
+            last = end
+        if not pieces:
+            return value
+        pieces.append(value[last:])
+        return "".join(pieces)
+
+
+class RedactingSpanProcessor(SpanProcessor):
+    """
+    Span processor that redacts personal data from span and event attributes.
+
+    String values, and strings inside sequence values, are redacted when a
+    sampled span ends, before it is buffered or exported.
+
+    Args:
+        next_processor: Processor that receives the redacted spans.
+        redactor: Redactor applied to every string value.
+    """
+
+    def __init__(self, next_processor: SpanProcessor, redactor: PIIRedactor) -> None:
+        self._next = next_processor
+        self._redactor = redactor
+        self._lock = threading.Lock()
+        self._counters = {"spans_redacted": 0, "values_redacted": 0}
+
+    def on_start(self, span: Span, parent_context: Optional[Context] = None) -> None:
+        self._next.on_start(span, parent_context=parent_context)
+
+    def on_end(self, span: ReadableSpan) -> None:
+        if span.context is not None and span.context.trace_flags.sampled:
+            self._redact_span(span)
+        self._next.on_end(span)
+
+    def _redact_span(self, span: ReadableSpan) -> None:
+        values = 0
+        attributes = span._attributes
+        if attributes:
+            redacted, count = self._redact_mapping(attributes)
+            if redacted is not None:
+                span._attributes = rebuild_attributes(attributes, redacted)
+                values += count
+
+        for event in span._events or ():
+            event_attributes = event._attributes
+            if not event_attributes:
+                continue
+            redacted, count = self._redact_mapping(event_attributes)
+            if redacted is not None:
+                event._attributes = rebuild_attributes(event_attributes, redacted)
+                values += count
+
+        if values:
+            with self._lock:
+                self._counters["spans_redacted"] += 1
+                self._counters["values_redacted"] += values
+
+    def _redact_mapping(
+        self, attributes: Mapping[str, Any]
+    ) -> Tuple[Optional[Dict[str, Any]], int]:
+        """
+        Redact the string values of an attribute mapping.
+
+        Returns:
+            The redacted attributes, or None if nothing changed, together
+            with the number of values changed.
+        """
+        redact = self._redactor.redact
+        redacted: Optional[Dict[str, Any]] = None
+        count = 0
+        for key, value in attributes.items():
+            if isinstance(value, str):
+                new_value: Any = redact(value)
+                changed = new_value is not value and new_value != value
+            elif (
+                isinstance(value, (tuple, list)) and value and isinstance(value[0], str)
+            ):
+                new_value = tuple(redact(item) for item in value)
+                changed = new_value != tuple(value)
+            else:
+                continue
+            if changed:
+                if redacted is None:
+                    redacted = dict(attributes)
+                redacted[key] = new_value
+                count += 1
+        return redacted, count
+
+    def stats(self) -> Dict[str, Any]:
+        """Return redaction counters and cache effectiveness."""
+        with self._lock:
+            result: Dict[str, Any] = dict(self._counters)
+        cache = self._redactor.cache_info()
+        result["cache_hits"] = cache.hits
+        result["cache_misses"] = cache.misses
+        return result
+
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
+        return self._next.force_flush(timeout_millis)
+
+    def shutdown(self) -> None:
+        self._next.shutdown()
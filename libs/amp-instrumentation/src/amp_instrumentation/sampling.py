@@ -0,0 +1,253 @@
+# Copyright (c) 2025, WSO2 LLC. (https://www.wso2.com).
+#
+# WSO2 LLC. licenses this file to you under the Apache License,
+# Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""
+Head sampling for instrumented applications.
+
+Sampling decisions are made when the root span starts. Spans of traces that
+are sampled out are non-recording, so instrumentors skip setting attributes
+on them and nothing is serialized or exported. When in-process metrics are
+enabled, sampled-out spans are recorded but not exported instead, so that
+metrics still count every LLM call. With adaptive sampling, the ratio is
+lowered while the export pipeline cannot keep up (BackPressureThrottle).
+"""
+
+import fnmatch
+import logging
+import re
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Optional, Sequence, Tuple
+
+from opentelemetry.context import Context
+from opentelemetry.sdk.trace.sampling import (
+    Decision,
+    ParentBased,
+    Sampler,
+    SamplingResult,
+    TraceIdRatioBased,
+)
+from opentelemetry.trace import Link, SpanKind, get_current_span
+from opentelemetry.util.types import Attributes
+
+from ._fork import register_after_fork
+
+logger = logging.getLogger(__name__)
+
+_TRACE_ID_LIMIT = (1 << 64) - 1
+
+
+class BackPressureThrottle:
+    """
+    Factor applied to the head sampling ratio while export is backed up.
+
+    At most once per adjust interval, the factor is halved if the export
+    queue is filled to the high-water mark or the export circuit is open,
+    and doubled back towards 1.0 once the queue has drained to the low-water
+    mark. Whole traces are dropped at the root, which is cheaper for the
+    application than creating spans only to drop them from a full queue.
+
+    Args:
+        high_water: Queue fill level (0.0-1.0) at which sampling is lowered.
+        low_water: Queue fill level at which sampling is restored.
+        min_factor: Lowest factor applied to the sample ratio.
+        adjust_interval: Seconds between two adjustments.
+    """
+
+    def __init__(
+        self,
+        high_water: float = 0.75,
+        low_water: float = 0.25,
+        min_factor: float = 1 / 64,
+        adjust_interval: float = 1.0,
+    ) -> None:
+        self._high_water = high_water
+        self._low_water = low_water
+        self._min_factor = min_factor
+        self._adjust_interval = adjust_interval
+        self._reading: Optional[Callable[[], Tuple[float, bool]]] = None
+        self._reset_state()
+        register_after_fork(self._reset_state)
+
+    def _reset_state(self) -> None:
+        self._lock = threading.Lock()
+        self._factor = 1.0
+        self._next_adjust = 0.0
+        self._counters = {"times_lowered": 0, "times_raised": 0}
+
+    def bind(self, reading: Callable[[], Tuple[float, bool]]) -> None:
+        """Set the source of the queue fill level and circuit state."""
+        self._reading = reading
+
+    def factor(self) -> float:
+        """Return the current factor, adjusting it if the interval has passed."""
+        now = time.monotonic()
+        if now < self._next_adjust or self._reading is None:
+            return self._factor
+        with self._lock:
+            if now < self._next_adjust:
+                return self._factor
+            self._next_adjust = now + self._adjust_interval
+            fill, circuit_open = self._reading()
+            if (circuit_open or fill >= self._high_water) and (
+                self._factor > self._min_factor
+            ):
+                self._factor = max(self._factor / 2, self._min_factor)
+                self._counters["times_lowered"] += 1
+                logger.info(
+                    f"Export backed up (queue {fill:.0%}, circuit "
+                    f"{'open' if circuit_open else 'closed'}); sampling factor "
+                    f"lowered to {self._factor:g}."
+                )
+            elif not circuit_open and fill <= self._low_water and self._factor < 1.0:
+                self._factor = min(self._factor * 2, 1.0)
+                self._counters["times_raised"] += 1
+            return self._factor
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the current sampling factor and adjustment counters."""
+        with self._lock:
+            result: Dict[str, Any] = dict(self._counters)
+        result["sampling_factor"] = self._factor
+        return result
+
+
+class RuleBasedSampler(Sampler):
+    """
+    Root sampler that always keeps spans matching a name rule and samples the rest by ratio.
+
+    Rules are shell-style patterns (e.g. "POST /chat", "*/chat") matched against
+    the span name. Wrap it in ParentBased (see build_sampler) so that child
+    spans follow the decision taken for their root. A throttle lowers the
+    ratio for traces not matching a rule.
+    """
+
+    def __init__(
+        self,
+        ratio: float,
+        always_sample: Iterable[str] = (),
+        record_unsampled: bool = False,
+        throttle: Optional[BackPressureThrottle] = None,
+    ) -> None:
+        self._ratio_sampler = TraceIdRatioBased(ratio)
+        self._record_unsampled = record_unsampled
+        self._throttle = throttle
+        self._patterns = tuple(always_sample)
+        self._matcher = (
+            re.compile("|".join(fnmatch.translate(p) for p in self._patterns))
+            if self._patterns
+            else None
+        )
+
+    @property
+    def ratio(self) -> float:
+        return self._ratio_sampler.rate
+
+    def should_sample(
+        self,
+        parent_context: Optional[Context],
+        trace_id: int,
+        name: str,
+        kind: Optional[SpanKind] = None,
+        attributes: Attributes = None,
+        links: Optional[Sequence[Link]] = None,
+        trace_state=None,
+    ) -> SamplingResult:
+        if self._matcher is not None and self._matcher.match(name):
+            parent_span_context = get_current_span(parent_context).get_span_context()
+            return SamplingResult(
+                Decision.RECORD_AND_SAMPLE,
+                attributes,
+                parent_span_context.trace_state if parent_span_context else None,
+            )
+        factor = self._throttle.factor() if self._throttle is not None else 1.0
+        if factor < 1.0:
+            bound = round(self.ratio * factor * (_TRACE_ID_LIMIT + 1))
+            sampled = trace_id & _TRACE_ID_LIMIT < bound
+            parent_span_context = get_current_span(parent_context).get_span_context()
+            result = SamplingResult(
+                Decision.RECORD_AND_SAMPLE if sampled else Decision.DROP,
+                attributes if sampled else None,
+                parent_span_context.trace_state if parent_span_context else None,
+            )
+        else:
+            result = self._ratio_sampler.should_sample(
+                parent_context, trace_id, name, kind, attributes, links, trace_state
+            )
+        if self._record_unsampled and result.decision is Decision.DROP:
+            return SamplingResult(Decision.RECORD_ONLY, attributes, result.trace_state)
+        return result
+
+    def get_description(self) -> str:
+        return (
+            f"RuleBasedSampler{{ratio={self.ratio}, "
+            f"always_sample=[{', '.join(self._patterns)}]"
+            f"{', adaptive' if self._throttle is not None else ''}}}"
+        )
+
+
+class RecordOnlySampler(Sampler):
+    """Sampler that records spans without exporting them."""
+
+    def should_sample(
+        self,
+        parent_context: Optional[Context],
+        trace_id: int,
+        name: str,
+        kind: Optional[SpanKind] = None,
+        attributes: Attributes = None,
+        links: Optional[Sequence[Link]] = None,
+        trace_state=None,
+    ) -> SamplingResult:
+        parent_span_context = get_current_span(parent_context).get_span_context()
+        return SamplingResult(
+            Decision.RECORD_ONLY,
+            attributes,
+            parent_span_context.trace_state if parent_span_context else None,
+        )
+
+    def get_description(self) -> str:
+        return "RecordOnlySampler"
+
+
+def build_sampler(
+    ratio: float,
+    always_sample: Iterable[str] = (),
+    record_unsampled: bool = False,
+    throttle: Optional[BackPressureThrottle] = None,
+) -> Sampler:
+    """
+    Build a parent-based head sampler.
+
+    Args:
+        ratio: Fraction of root traces to keep, between 0.0 and 1.0.
+        always_sample: Span name patterns whose root traces are always kept.
+        record_unsampled: Record spans of sampled-out traces without exporting
+            them, for in-process metrics. Instrumentors then set attributes on
+            every span, which costs part of the CPU saved by sampling.
+        throttle: Lowers the ratio while the export pipeline is backed up.
+
+    Returns:
+        A ParentBased sampler whose root decision is made by RuleBasedSampler.
+    """
+    root = RuleBasedSampler(ratio, always_sample, record_unsampled, throttle)
+    if not record_unsampled:
+        return ParentBased(root)
+    return ParentBased(
+        root,
+        remote_parent_not_sampled=RecordOnlySampler(),
+        local_parent_not_sampled=RecordOnlySampler(),
+    )
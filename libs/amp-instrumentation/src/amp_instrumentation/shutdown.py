@@ -0,0 +1,182 @@
+# Copyright (c) 2025, WSO2 LLC. (https://www.wso2.com).
+#
+# WSO2 LLC. licenses this file to you under the Apache License,
+# Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""
+Bounded flush of pending spans when the process exits.
+
+Spans still queued when a process ends are lost unless the pipeline is shut
+down first, and an unreachable collector can make that shutdown block for the
+full export timeout and retries. install_shutdown_hook() runs the pipeline
+shutdown at interpreter exit and on SIGTERM in a background thread, waits for
+it at most the configured timeout and then abandons whatever is left.
+"""
+
+import atexit
+import logging
+import os
+import signal
+import sys
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from opentelemetry.sdk.trace import SpanProcessor
+
+from . import _stats
+
+logger = logging.getLogger(__name__)
+
+# Extra time the caller waits for the report once the flush deadline passed
+_REPORT_GRACE_SECONDS = 0.5
+
+_lock = threading.Lock()
+_processor: Optional[SpanProcessor] = None
+_timeout_ms = 5000
+_hooks_installed = False
+_report: Optional[Dict[str, Any]] = None
+
+
+def install_shutdown_hook(processor: SpanProcessor, timeout_ms: int) -> None:
+    """
+    Shut down processor with a deadline at exit and on SIGTERM.
+
+    The atexit hook is registered once per process; later calls replace the
+    processor and timeout. The SIGTERM handler is only installed from the main
+    thread and only while SIGTERM has its default disposition, so handlers
+    set by the application or its server take precedence. After flushing, the
+    other atexit handlers (e.g. the AMP_PROFILE report) are run, since dying
+    from the signal skips them, and the signal is raised again with its
+    default behavior.
+
+    Args:
+        processor: Outermost span processor of the export pipeline.
+        timeout_ms: Time allowed for the flush; 0 abandons pending spans.
+    """
+    global _processor, _timeout_ms, _hooks_installed, _report
+
+    with _lock:
+        _processor = processor
+        _timeout_ms = timeout_ms
+        _report = None
+        if _hooks_installed:
+            return
+        _hooks_installed = True
+
+    # atexit runs handlers in reverse order, so this runs before the
+    # TracerProvider and Traceloop exit handlers, which then find the
+    # pipeline already shut down and return immediately.
+    atexit.register(shutdown_pipeline)
+
+    try:
+        if signal.getsignal(signal.SIGTERM) is signal.SIG_DFL:
+            signal.signal(signal.SIGTERM, _on_sigterm)
+    except ValueError:
+        logger.debug("Not on the main thread; SIGTERM flush not installed.")
+
+
+def _on_sigterm(signum: int, frame: Any) -> None:
+    shutdown_pipeline()
+    # The process dies from the signal below, which skips atexit handlers
+    run_exitfuncs = getattr(atexit, "_run_exitfuncs", None)
+    if run_exitfuncs is not None:
+        run_exitfuncs()
+    sys.stdout.flush()
+    sys.stderr.flush()
+    signal.signal(signum, signal.SIG_DFL)
+    os.kill(os.getpid(), signum)
+
+
+def shutdown_pipeline() -> Optional[Dict[str, Any]]:
+    """
+    Shut down the installed pipeline, waiting at most the configured timeout.
+
+    Only the first call shuts the pipeline down; later calls return the same
+    report.
+
+    Returns:
+        spans_flushed (exported during shutdown), spans_dropped (failed or
+        still pending at the deadline), timed_out and elapsed_ms; None if no
+        pipeline is installed or the report could not be collected in time.
+    """
+    global _processor, _report
+
+    with _lock:
+        processor, _processor = _processor, None
+        timeout_ms = _timeout_ms
+    if processor is None:
+        return _report
+
+    # Counters are read in the background thread too: a signal handler may
+    # interrupt the main thread while it holds one of their locks.
+    result: Dict[str, Any] = {}
+    reporter = threading.Thread(
+        target=_shutdown_and_report,
+        args=(processor, timeout_ms, result),
+        name="amp-shutdown",
+        daemon=True,
+    )
+    reporter.start()
+    reporter.join(timeout_ms / 1000 + _REPORT_GRACE_SECONDS)
+
+    if not result:
+        logger.warning("Span pipeline shutdown did not report in time.")
+        return None
+
+    _report = result
+    if result["spans_dropped"]:
+        print(
+            f"WARNING: WSO2 AMP instrumentation dropped {result['spans_dropped']} "
+            f"spans at shutdown ({result['spans_flushed']} flushed within "
+            f"{timeout_ms} ms).",
+            file=sys.stderr,
+        )
+    logger.info(f"Span pipeline shut down: {result}")
+    return result
+
+
+def _shutdown_and_report(
+    processor: SpanProcessor, timeout_ms: int, result: Dict[str, Any]
+) -> None:
+    started = time.perf_counter()
+    exported_before, lost_before, _ = _span_counts()
+
+    worker = threading.Thread(
+        target=processor.shutdown, name="amp-shutdown-flush", daemon=True
+    )
+    worker.start()
+    worker.join(timeout_ms / 1000)
+
+    exported_after, lost_after, pending_after = _span_counts()
+    result.update(
+        {
+            "spans_flushed": exported_after - exported_before,
+            "spans_dropped": lost_after - lost_before + pending_after,
+            "timed_out": worker.is_alive(),
+            "elapsed_ms": (time.perf_counter() - started) * 1000,
+        }
+    )
+
+
+def _span_counts() -> Tuple[int, int, int]:
+    """Return spans exported, spans lost and spans still pending so far."""
+    snapshot = _stats.stats()
+    export = snapshot.get("export", {})
+    exported = export.get("spans_exported", 0)
+    lost = export.get("spans_failed", 0) + export.get("spans_dropped", 0)
+    # Queued or in an unfinished export call
+    pending = export.get("spans_enqueued", 0) - exported - lost
+    pending += snapshot.get("tail_sampling", {}).get("buffered_spans", 0)
+    return exported, lost, pending
@@ -0,0 +1,261 @@
+# Copyright (c) 2025, WSO2 LLC. (https://www.wso2.com).
+#
+# WSO2 LLC. licenses this file to you under the Apache License,
+# Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""
+Continuous stack sampling attributed to spans.
+
+A background thread samples the Python stack of every thread that has an
+unfinished span, at a fixed rate. Samples are counted against the most
+recently started unfinished span of that thread, and when the span ends its
+hottest stacks and functions are attached to it as attributes. A slow span
+then shows where Python spent its time, e.g. in a tool's filtering code,
+without a separate profiling run.
+"""
+
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+from opentelemetry.context import Context
+from opentelemetry.sdk.trace import ReadableSpan, Span, SpanProcessor
+
+from ._attributes import add_span_attributes
+from ._fork import register_after_fork
+
+logger = logging.getLogger(__name__)
+
+# Span attributes written for profiled spans
+SAMPLES_ATTRIBUTE = "amp.profile.samples"
+SAMPLE_HZ_ATTRIBUTE = "amp.profile.sample_hz"
+STACKS_ATTRIBUTE = "amp.profile.stacks"
+HOT_FUNCTIONS_ATTRIBUTE = "amp.profile.hot_functions"
+
+_MAX_STACK_DEPTH = 64
+# Unfinished spans tracked at once; spans started beyond this are not profiled
+_MAX_ACTIVE_SPANS = 10000
+
+# (code object, line number) pairs from the outermost to the innermost frame
+_Stack = Tuple[Tuple[Any, int], ...]
+
+
+def _frame_label(code: Any, lineno: int) -> str:
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{lineno})"
+
+
+def _capture_stack(frame: Any) -> _Stack:
+    stack: List[Tuple[Any, int]] = []
+    while frame is not None and len(stack) < _MAX_STACK_DEPTH:
+        stack.append((frame.f_code, frame.f_lineno))
+        frame = frame.f_back
+    stack.reverse()
+    return tuple(stack)
+
+
+class _SpanProfile:
+    """Samples collected for one unfinished span."""
+
+    __slots__ = ("thread_id", "samples", "stacks")
+
+    def __init__(self, thread_id: int) -> None:
+        self.thread_id = thread_id
+        self.samples = 0
+        self.stacks: "Counter[_Stack]" = Counter()
+
+
+class SpanProfilingProcessor(SpanProcessor):
+    """
+    Span processor that attaches sampled stacks to the spans they ran under.
+
+    Spans record the thread that started them. Every 1/sample_hz seconds the
+    sampler reads the current frame of each such thread and counts it for
+    that thread's innermost unfinished span. On asyncio, where many tasks
+    share one thread, samples go to the most recently started span on the
+    thread. Spans that received at least one sample get amp.profile.samples,
+    amp.profile.sample_hz, amp.profile.stacks (the top_stacks heaviest stacks
+    in collapsed "frame;frame;frame count" form, outermost frame first) and
+    amp.profile.hot_functions (the top_stacks functions most often on top of
+    the stack, with counts).
+
+    Args:
+        next_processor: Processor that receives the spans.
+        sample_hz: Stack samples per second.
+        top_stacks: Number of stacks and hot functions attached per span.
+    """
+
+    def __init__(
+        self,
+        next_processor: SpanProcessor,
+        sample_hz: float = 50,
+        top_stacks: int = 10,
+    ) -> None:
+        self._next = next_processor
+        self._sample_hz = sample_hz
+        self._interval = 1 / sample_hz
+        self._top_stacks = top_stacks
+
+        self._reset_state()
+        self._start_worker()
+        register_after_fork(self._at_fork_reinit)
+
+    def _reset_state(self) -> None:
+        self._lock = threading.Lock()
+        self._profiles: Dict[int, _SpanProfile] = {}
+        self._threads: Dict[int, List[_SpanProfile]] = {}
+        self._counters = {
+            "samples_taken": 0,
+            "stacks_recorded": 0,
+            "spans_profiled": 0,
+            "spans_skipped": 0,
+            "overruns": 0,
+        }
+
+    def _start_worker(self) -> None:
+        self._shutdown = threading.Event()
+        self._worker = threading.Thread(
+            target=self._sample_loop, name="amp-span-profiler", daemon=True
+        )
+        self._worker.start()
+
+    def _at_fork_reinit(self) -> None:
+        # The sampler thread does not survive fork; parent spans end in the parent
+        if self._shutdown.is_set():
+            return
+        self._reset_state()
+        self._start_worker()
+
+    def on_start(self, span: Span, parent_context: Optional[Context] = None) -> None:
+        context = span.context
+        if context is not None and context.trace_flags.sampled:
+            thread_id = threading.get_ident()
+            with self._lock:
+                if len(self._profiles) < _MAX_ACTIVE_SPANS:
+                    profile = _SpanProfile(thread_id)
+                    self._profiles[context.span_id] = profile
+                    self._threads.setdefault(thread_id, []).append(profile)
+                else:
+                    self._counters["spans_skipped"] += 1
+        self._next.on_start(span, parent_context=parent_context)
+
+    def on_end(self, span: ReadableSpan) -> None:
+        profile = None
+        if span.context is not None:
+            with self._lock:
+                profile = self._profiles.pop(span.context.span_id, None)
+                if profile is not None:
+                    self._untrack(profile)
+                    if profile.samples:
+                        self._counters["spans_profiled"] += 1
+
+        if profile is not None and profile.samples:
+            self._attach(span, profile)
+        self._next.on_end(span)
+
+    def _untrack(self, profile: _SpanProfile) -> None:
+        # Spans may end out of order or on another thread
+        stack = self._threads.get(profile.thread_id)
+        if not stack:
+            return
+        for index in range(len(stack) - 1, -1, -1):
+            if stack[index] is profile:
+                del stack[index]
+                break
+        if not stack:
+            del self._threads[profile.thread_id]
+
+    def _attach(self, span: ReadableSpan, profile: _SpanProfile) -> None:
+        stacks = profile.stacks.most_common(self._top_stacks)
+        leaves: "Counter[Tuple[Any, int]]" = Counter()
+        for stack, count in profile.stacks.items():
+            leaves[stack[-1]] += count
+
+        add_span_attributes(
+            span,
+            {
+                SAMPLES_ATTRIBUTE: profile.samples,
+                SAMPLE_HZ_ATTRIBUTE: self._sample_hz,
+                STACKS_ATTRIBUTE: tuple(
+                    ";".join(_frame_label(code, line) for code, line in stack)
+                    + f" {count}"
+                    for stack, count in stacks
+                ),
+                HOT_FUNCTIONS_ATTRIBUTE: tuple(
+                    f"{_frame_label(code, line)} {count}"
+                    for (code, line), count in leaves.most_common(self._top_stacks)
+                ),
+            },
+        )
+
+    def _sample_loop(self) -> None:
+        next_tick = time.monotonic() + self._interval
+        while not self._shutdown.wait(max(0.0, next_tick - time.monotonic())):
+            try:
+                self._sample()
+            except Exception:
+                logger.exception("Stack sampling failed.")
+            next_tick += self._interval
+            now = time.monotonic()
+            if now > next_tick:
+                # Skip the missed ticks instead of sampling in a burst
+                with self._lock:
+                    self._counters["overruns"] += 1
+                next_tick = now + self._interval
+
+    def _sample(self) -> None:
+        with self._lock:
+            targets = {
+                thread_id: stack[-1]
+                for thread_id, stack in self._threads.items()
+                if stack
+            }
+        if not targets:
+            return
+
+        frames = sys._current_frames()
+        captured = []
+        for thread_id, profile in targets.items():
+            frame = frames.get(thread_id)
+            if frame is not None:
+                captured.append((profile, _capture_stack(frame)))
+        del frames
+
+        with self._lock:
+            self._counters["samples_taken"] += 1
+            for profile, stack in captured:
+                profile.samples += 1
+                profile.stacks[stack] += 1
+                self._counters["stacks_recorded"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Return sampling counters and the number of spans being profiled."""
+        with self._lock:
+            result: Dict[str, Any] = dict(self._counters)
+            result["active_spans"] = len(self._profiles)
+        result["sample_hz"] = self._sample_hz
+        return result
+
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
+        return self._next.force_flush(timeout_millis)
+
+    def shutdown(self) -> None:
+        if self._shutdown.is_set():
+            return
+        self._shutdown.set()
+        self._worker.join(timeout=1)
+        self._next.shutdown()
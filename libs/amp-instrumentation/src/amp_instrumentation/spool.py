@@ -0,0 +1,462 @@
+# Copyright (c) 2025, WSO2 LLC. (https://www.wso2.com).
+#
+# WSO2 LLC. licenses this file to you under the Apache License,
+# Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""
+Disk-spooled OTLP/HTTP span export for collector outages.
+
+Batches that cannot be delivered are serialized once and appended to
+size-capped segment files on local disk instead of being held in memory or
+retried inline. A background thread replays segments oldest-first, reading
+them back through mmap, once the collector accepts requests again. Total
+disk usage is capped; when the cap is reached the oldest segments are evicted.
+
+Delivery is at-least-once: a process that exits while replaying a segment
+resends that segment from the start on the next run.
+"""
+
+import gzip
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+import uuid
+from contextlib import closing
+from io import BufferedWriter
+from itertools import islice
+from typing import Any, Dict, List, Optional, Sequence
+
+import requests
+from opentelemetry.exporter.otlp.proto.common.trace_encoder import encode_spans
+from opentelemetry.sdk.trace import ReadableSpan
+from opentelemetry.sdk.trace.export import SpanExporter, SpanExportResult
+
+from ._fork import register_after_fork
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None  # type: ignore[assignment]
+
+logger = logging.getLogger(__name__)
+
+# Record header: payload length and number of spans, both unsigned 32-bit big-endian
+_RECORD_HEADER = struct.Struct(">II")
+_SEGMENT_SUFFIX = ".seg"
+_LOCK_FILE = ".lock"
+# HTTP statuses worth retrying later; other 4xx responses are dropped
+_RETRYABLE_STATUSES = frozenset({408, 429})
+# Level 6 compresses text-heavy LLM spans nearly as well as 9 at a fraction of the CPU
+_GZIP_LEVEL = 6
+_GZIP_MAGIC = b"\x1f\x8b"
+_GZIP_HEADERS = {"Content-Encoding": "gzip"}
+
+
+class _Segment:
+    """Bookkeeping for one segment file."""
+
+    __slots__ = ("path", "size", "spans", "sent_records", "sent_spans")
+
+    def __init__(self, path: str, size: int = 0, spans: int = 0) -> None:
+        self.path = path
+        self.size = size
+        self.spans = spans
+        # Progress of a replay interrupted by a failed send
+        self.sent_records = 0
+        self.sent_spans = 0
+
+
+def _read_records(path: str):
+    """Yield (span_count, payload) records from a segment file using mmap."""
+    with open(path, "rb") as segment_file:
+        if os.fstat(segment_file.fileno()).st_size == 0:
+            return
+        with mmap.mmap(segment_file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            offset = 0
+            end = len(data)
+            while offset + _RECORD_HEADER.size <= end:
+                length, spans = _RECORD_HEADER.unpack_from(data, offset)
+                start = offset + _RECORD_HEADER.size
+                if start + length > end:
+                    # Truncated tail from an interrupted write
+                    return
+                yield spans, bytes(data[start : start + length])
+                offset = start + length
+
+
+class SpoolingSpanExporter(SpanExporter):
+    """
+    OTLP/HTTP span exporter that spools undeliverable batches to disk.
+
+    While a backlog exists, new batches are appended to the spool rather than
+    sent, so ordering is preserved and a recovering collector is not hit by a
+    retry storm. export() only fails when a batch can be neither sent nor
+    spooled.
+
+    Args:
+        endpoint: Full OTLP/HTTP traces URL (ending in /v1/traces).
+        headers: Headers sent with every request.
+        spool_dir: Directory holding segment files. Each process spools into
+            its own locked subdirectory and adopts those left by dead processes.
+        max_bytes: Maximum total size of spooled segments.
+        segment_bytes: Size at which the active segment is closed.
+        timeout: Request timeout in seconds.
+        replay_interval: Initial delay between replay attempts in seconds;
+            doubled after each failure up to max_replay_interval.
+        max_replay_interval: Upper bound for the replay backoff in seconds.
+        session: Optional requests session, reused across requests for keep-alive.
+        compression: "gzip" to compress batches before sending and spooling, or "none".
+    """
+
+    def __init__(
+        self,
+        endpoint: str,
+        headers: Optional[Dict[str, str]] = None,
+        spool_dir: str = "/tmp/amp-spool",
+        max_bytes: int = 256 * 1024 * 1024,
+        segment_bytes: int = 8 * 1024 * 1024,
+        timeout: float = 10.0,
+        replay_interval: float = 1.0,
+        max_replay_interval: float = 60.0,
+        session: Optional[requests.Session] = None,
+        compression: str = "none",
+    ) -> None:
+        self._endpoint = endpoint
+        self._gzip = compression == "gzip"
+        self._timeout = timeout
+        self._max_bytes = max_bytes
+        self._segment_bytes = min(segment_bytes, max_bytes)
+        self._replay_interval = replay_interval
+        self._max_replay_interval = max_replay_interval
+
+        self._spool_dir = spool_dir
+        self._session = session or requests.Session()
+        self._session.headers.update(headers or {})
+        self._session.headers["Content-Type"] = "application/x-protobuf"
+
+        self._start()
+        register_after_fork(self._at_fork_reinit)
+
+    def _start(self) -> None:
+        self._lock = threading.Lock()
+        self._segments: List[_Segment] = []
+        self._active: Optional[_Segment] = None
+        self._active_file: Optional[BufferedWriter] = None
+        self._counters = {
+            "spans_sent": 0,
+            "spans_spooled": 0,
+            "spans_replayed": 0,
+            "spans_evicted": 0,
+            "spans_rejected": 0,
+            "send_failures": 0,
+        }
+
+        self._dir = self._claim_directory(self._spool_dir)
+        self._adopt_segments(self._spool_dir)
+
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._replayer = threading.Thread(
+            target=self._replay_loop, name="amp-spool-replay", daemon=True
+        )
+        self._replayer.start()
+
+    def _at_fork_reinit(self) -> None:
+        """Give a forked child its own spool directory, connection and replay thread."""
+        if self._stopped.is_set():
+            return
+        # The parent keeps its segments; drop the child's copies of its file
+        # handles (closing them does not release the parent's lock)
+        if self._active_file is not None:
+            self._active_file.close()
+        self._lock_handle.close()
+
+        headers = dict(self._session.headers)
+        self._session = requests.Session()
+        self._session.headers.update(headers)
+        self._start()
+
+    # Directory management
+
+    def _claim_directory(self, spool_dir: str) -> str:
+        """Create and lock this process's spool subdirectory."""
+        # Containers sharing a spool volume often all run as PID 1, so the
+        # PID alone does not make the name unique
+        directory = os.path.join(
+            spool_dir, f"proc-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        )
+        os.makedirs(directory, exist_ok=True)
+        self._lock_handle = open(os.path.join(directory, _LOCK_FILE), "w")
+        if fcntl is not None:
+            fcntl.flock(self._lock_handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return directory
+
+    def _adopt_segments(self, spool_dir: str) -> None:
+        """Pick up segments from this directory and from unlocked (dead) siblings."""
+        found = {
+            os.path.join(self._dir, name)
+            for name in os.listdir(self._dir)
+            if name.endswith(_SEGMENT_SUFFIX)
+        }
+        for name in os.listdir(spool_dir):
+            directory = os.path.join(spool_dir, name)
+            if directory != self._dir and os.path.isdir(directory):
+                found.update(self._adopt_directory(directory))
+
+        # Segment names start with a timestamp, so sorting gives oldest first
+        for path in sorted(found, key=os.path.basename):
+            spans = sum(count for count, _ in _read_records(path))
+            self._segments.append(_Segment(path, os.path.getsize(path), spans))
+        if self._segments:
+            logger.info(
+                f"Found {len(self._segments)} spooled segments to replay "
+                f"({self._backlog_spans()} spans)."
+            )
+
+    def _adopt_directory(self, directory: str) -> List[str]:
+        """Move the segments of a dead process's directory into ours."""
+        if fcntl is None:
+            return []
+        try:
+            handle = open(os.path.join(directory, _LOCK_FILE), "a")
+        except OSError:
+            return []
+        adopted: List[str] = []
+        with handle:
+            try:
+                # Held while moving, so concurrent starters cannot adopt it too
+                fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                return []
+            for segment_name in os.listdir(directory):
+                if not segment_name.endswith(_SEGMENT_SUFFIX):
+                    continue
+                target = os.path.join(self._dir, segment_name)
+                try:
+                    os.replace(os.path.join(directory, segment_name), target)
+                except FileNotFoundError:
+                    continue
+                adopted.append(target)
+            try:
+                os.remove(os.path.join(directory, _LOCK_FILE))
+                os.rmdir(directory)
+            except OSError:
+                pass
+        return adopted
+
+    # Sending
+
+    def _send(self, payload: bytes) -> Optional[bool]:
+        """
+        Post a serialized batch.
+
+        Returns:
+            True if delivered, False if it should be retried later, None if
+            the collector rejected it permanently.
+        """
+        try:
+            # Spooled records keep their encoding even if the setting changed
+            response = self._session.post(
+                self._endpoint,
+                data=payload,
+                timeout=self._timeout,
+                headers=_GZIP_HEADERS if payload[:2] == _GZIP_MAGIC else None,
+            )
+        except requests.RequestException as e:
+            logger.debug(f"Span export request failed: {e}")
+            return False
+        if response.ok:
+            return True
+        if response.status_code in _RETRYABLE_STATUSES or response.status_code >= 500:
+            return False
+        logger.warning(
+            f"Collector rejected span batch with status {response.status_code}; dropping it."
+        )
+        return None
+
+    def export(self, spans: Sequence[ReadableSpan]) -> SpanExportResult:
+        if not spans:
+            return SpanExportResult.SUCCESS
+        payload = encode_spans(spans).SerializeToString()
+        if self._gzip:
+            payload = gzip.compress(payload, compresslevel=_GZIP_LEVEL)
+
+        with self._lock:
+            has_backlog = bool(self._segments)
+
+        if not has_backlog:
+            sent = self._send(payload)
+            with self._lock:
+                if sent:
+                    self._counters["spans_sent"] += len(spans)
+                    return SpanExportResult.SUCCESS
+                if sent is None:
+                    self._counters["spans_rejected"] += len(spans)
+                    return SpanExportResult.FAILURE
+                self._counters["send_failures"] += 1
+
+        try:
+            self._append(payload, len(spans))
+        except OSError:
+            logger.exception("Failed to spool span batch to disk.")
+            return SpanExportResult.FAILURE
+        return SpanExportResult.SUCCESS
+
+    # Spool writing
+
+    def _append(self, payload: bytes, span_count: int) -> None:
+        record_size = _RECORD_HEADER.size + len(payload)
+        with self._lock:
+            if (
+                self._active is not None
+                and self._active.size + record_size > self._segment_bytes
+            ):
+                self._close_active_locked()
+            self._evict_locked(record_size)
+
+            if self._active is None:
+                name = f"{time.time_ns():020d}-{os.getpid()}{_SEGMENT_SUFFIX}"
+                self._active = _Segment(os.path.join(self._dir, name))
+                self._active_file = open(self._active.path, "ab")
+                self._segments.append(self._active)
+
+            assert self._active_file is not None
+            self._active_file.write(_RECORD_HEADER.pack(len(payload), span_count))
+            self._active_file.write(payload)
+            self._active_file.flush()
+            self._active.size += record_size
+            self._active.spans += span_count
+            self._counters["spans_spooled"] += span_count
+
+    def _close_active_locked(self) -> None:
+        if self._active_file is not None:
+            self._active_file.close()
+        self._active = None
+        self._active_file = None
+
+    def _evict_locked(self, incoming: int) -> None:
+        """Delete the oldest segments until the incoming record fits the disk cap."""
+        while self._segments and self._spooled_bytes() + incoming > self._max_bytes:
+            oldest = self._segments[0]
+            if oldest is self._active:
+                self._close_active_locked()
+            self._segments.pop(0)
+            evicted = oldest.spans - oldest.sent_spans
+            self._counters["spans_evicted"] += evicted
+            logger.warning(
+                f"Spool is full; evicting oldest segment with {evicted} spans."
+            )
+            try:
+                os.remove(oldest.path)
+            except OSError:
+                pass
+
+    def _spooled_bytes(self) -> int:
+        return sum(segment.size for segment in self._segments)
+
+    def _backlog_spans(self) -> int:
+        return sum(segment.spans - segment.sent_spans for segment in self._segments)
+
+    # Replay
+
+    def _replay_loop(self) -> None:
+        delay = self._replay_interval
+        while not self._stopped.is_set():
+            self._wakeup.wait(delay)
+            self._wakeup.clear()
+            if self._stopped.is_set():
+                return
+            try:
+                if self.replay():
+                    delay = self._replay_interval
+                else:
+                    delay = min(delay * 2, self._max_replay_interval)
+            except Exception:
+                logger.exception("Spool replay failed.")
+                delay = min(delay * 2, self._max_replay_interval)
+
+    def replay(self) -> bool:
+        """
+        Replay spooled segments oldest-first until the backlog is empty or a send fails.
+
+        Returns:
+            True if the backlog was drained, False if the collector is still unavailable.
+        """
+        while True:
+            with self._lock:
+                if not self._segments:
+                    return True
+                segment = self._segments[0]
+                if segment is self._active:
+                    # Close the segment being written so it can be read back whole
+                    self._close_active_locked()
+
+            # Records are read one at a time, so a segment is never copied whole
+            records = _read_records(segment.path)
+            try:
+                with closing(records):
+                    for span_count, payload in islice(
+                        records, segment.sent_records, None
+                    ):
+                        result = self._send(payload)
+                        if result is False:
+                            with self._lock:
+                                self._counters["send_failures"] += 1
+                            return False
+                        with self._lock:
+                            key = (
+                                "spans_rejected" if result is None else "spans_replayed"
+                            )
+                            self._counters[key] += span_count
+                            segment.sent_records += 1
+                            segment.sent_spans += span_count
+            except FileNotFoundError:
+                # Evicted while we were waiting for the lock
+                continue
+
+            with self._lock:
+                if self._segments and self._segments[0] is segment:
+                    self._segments.pop(0)
+            try:
+                os.remove(segment.path)
+            except OSError:
+                pass
+
+    def stats(self) -> Dict[str, Any]:
+        """Return spool occupancy and delivery counters."""
+        with self._lock:
+            result: Dict[str, Any] = dict(self._counters)
+            result["spooled_segments"] = len(self._segments)
+            result["spooled_bytes"] = self._spooled_bytes()
+            result["backlog_spans"] = self._backlog_spans()
+        result["max_bytes"] = self._max_bytes
+        return result
+
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
+        with self._lock:
+            if self._active_file is not None:
+                self._active_file.flush()
+        return True
+
+    def shutdown(self) -> None:
+        self._stopped.set()
+        self._wakeup.set()
+        with self._lock:
+            self._close_active_locked()
+        self._session.close()
+        # Unspooled segments stay on disk for the next process to replay
+        self._lock_handle.close()
@@ -0,0 +1,206 @@
+# Copyright (c) 2025, WSO2 LLC. (https://www.wso2.com).
+#
+# WSO2 LLC. licenses this file to you under the Apache License,
+# Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""
+Aggregation of streamed LLM responses.
+
+Instrumentors record a span event for every chunk of a streamed completion,
+so a long answer adds hundreds of events to its span, each allocated on the
+streaming path and serialized on export. The completion text itself is
+already accumulated into a single attribute by the instrumentor. The
+StreamAggregationSpanProcessor replaces the chunk events with running
+time-to-first-token and inter-token latency statistics, updated in constant
+time and memory per chunk.
+"""
+
+import math
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from opentelemetry.context import Context
+from opentelemetry.sdk.trace import ReadableSpan, Span, SpanProcessor
+from opentelemetry.trace import SpanKind
+from opentelemetry.util.types import Attributes
+
+from ._attributes import add_span_attributes
+from ._fork import register_after_fork
+
+# Per-chunk event names of the Traceloop instrumentors (OpenAI, Cohere)
+CHUNK_EVENTS = frozenset(
+    ("gen_ai.content.completion.chunk", "llm.content.completion.chunk")
+)
+
+# Span attributes written for streamed responses
+CHUNKS_ATTRIBUTE = "amp.stream.chunks"
+TIME_TO_FIRST_TOKEN_ATTRIBUTE = "amp.stream.time_to_first_token_ms"
+INTER_TOKEN_MEAN_ATTRIBUTE = "amp.stream.inter_token_ms.mean"
+INTER_TOKEN_STDDEV_ATTRIBUTE = "amp.stream.inter_token_ms.stddev"
+INTER_TOKEN_MIN_ATTRIBUTE = "amp.stream.inter_token_ms.min"
+INTER_TOKEN_MAX_ATTRIBUTE = "amp.stream.inter_token_ms.max"
+
+# Unfinished spans tracked at once; spans started beyond this keep their events
+_MAX_ACTIVE_SPANS = 10000
+
+
+class _StreamStats:
+    """
+    Running chunk statistics of one span.
+
+    Installed as the span's add_event, so chunk events are counted instead of
+    recorded. A stream is consumed by one task at a time, so no lock is taken.
+    """
+
+    __slots__ = (
+        "span",
+        "add_span_event",
+        "chunks",
+        "first_ns",
+        "last_ns",
+        "gap_mean",
+        "gap_m2",
+        "gap_min",
+        "gap_max",
+    )
+
+    def __init__(self, span: Span) -> None:
+        self.span = span
+        self.add_span_event = span.add_event
+        self.chunks = 0
+        self.first_ns = 0
+        self.last_ns = 0
+        self.gap_mean = 0.0
+        self.gap_m2 = 0.0
+        self.gap_min = 0
+        self.gap_max = 0
+
+    def add_event(
+        self,
+        name: str,
+        attributes: Attributes = None,
+        timestamp: Optional[int] = None,
+    ) -> None:
+        if name not in CHUNK_EVENTS:
+            self.add_span_event(name, attributes, timestamp)
+            return
+        now = timestamp if timestamp is not None else time.time_ns()
+        self.chunks += 1
+        if self.chunks == 1:
+            self.first_ns = now
+        else:
+            # Welford's online mean and variance of the gaps between chunks
+            gap = now - self.last_ns
+            gaps = self.chunks - 1
+            delta = gap - self.gap_mean
+            self.gap_mean += delta / gaps
+            self.gap_m2 += delta * (gap - self.gap_mean)
+            if gaps == 1 or gap < self.gap_min:
+                self.gap_min = gap
+            if gap > self.gap_max:
+                self.gap_max = gap
+        self.last_ns = now
+
+    def detach(self) -> None:
+        # Restore the span's own add_event and break the reference cycle
+        self.span.__dict__.pop("add_event", None)
+
+    def attributes(self, start_time: int) -> Dict[str, Any]:
+        values: Dict[str, Any] = {
+            CHUNKS_ATTRIBUTE: self.chunks,
+            TIME_TO_FIRST_TOKEN_ATTRIBUTE: (self.first_ns - start_time) / 1e6,
+        }
+        gaps = self.chunks - 1
+        if gaps:
+            values[INTER_TOKEN_MEAN_ATTRIBUTE] = self.gap_mean / 1e6
+            values[INTER_TOKEN_STDDEV_ATTRIBUTE] = math.sqrt(self.gap_m2 / gaps) / 1e6
+            values[INTER_TOKEN_MIN_ATTRIBUTE] = self.gap_min / 1e6
+            values[INTER_TOKEN_MAX_ATTRIBUTE] = self.gap_max / 1e6
+        return values
+
+
+class StreamAggregationSpanProcessor(SpanProcessor):
+    """
+    Span processor that folds per-chunk stream events into summary attributes.
+
+    Sampled client spans (LLM calls are started as such) get an add_event
+    that counts chunk events instead of recording them. When a span that
+    streamed ends, it gets amp.stream.chunks, amp.stream.time_to_first_token_ms
+    (from span start to the first chunk) and, with more than one chunk,
+    the mean, standard deviation, minimum and maximum time between chunks in
+    amp.stream.inter_token_ms.*. Each chunk counts as one token. Other events
+    are recorded as usual.
+
+    Args:
+        next_processor: Processor that receives the spans.
+    """
+
+    def __init__(self, next_processor: SpanProcessor) -> None:
+        self._next = next_processor
+        self._reset_state()
+        register_after_fork(self._reset_state)
+
+    def _reset_state(self) -> None:
+        self._lock = threading.Lock()
+        self._streams: Dict[int, _StreamStats] = {}
+        self._counters = {
+            "streams_aggregated": 0,
+            "chunks_aggregated": 0,
+            "spans_skipped": 0,
+        }
+
+    def on_start(self, span: Span, parent_context: Optional[Context] = None) -> None:
+        context = span.context
+        if (
+            span.kind is SpanKind.CLIENT
+            and context is not None
+            and context.trace_flags.sampled
+        ):
+            stats = _StreamStats(span)
+            with self._lock:
+                if len(self._streams) < _MAX_ACTIVE_SPANS:
+                    self._streams[context.span_id] = stats
+                    span.add_event = stats.add_event  # type: ignore[method-assign]
+                else:
+                    self._counters["spans_skipped"] += 1
+        self._next.on_start(span, parent_context=parent_context)
+
+    def on_end(self, span: ReadableSpan) -> None:
+        stats = None
+        if span.context is not None and span.kind is SpanKind.CLIENT:
+            with self._lock:
+                stats = self._streams.pop(span.context.span_id, None)
+                if stats is not None and stats.chunks:
+                    self._counters["streams_aggregated"] += 1
+                    self._counters["chunks_aggregated"] += stats.chunks
+
+        if stats is not None:
+            stats.detach()
+            if stats.chunks:
+                add_span_attributes(span, stats.attributes(span.start_time or 0))
+        self._next.on_end(span)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return aggregation counters and the number of client spans tracked."""
+        with self._lock:
+            result: Dict[str, Any] = dict(self._counters)
+            result["active_spans"] = len(self._streams)
+        return result
+
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
+        return self._next.force_flush(timeout_millis)
+
+    def shutdown(self) -> None:
+        self._next.shutdown()
@@ -0,0 +1,297 @@
+# Copyright (c) 2025, WSO2 LLC. (https://www.wso2.com).
+#
+# WSO2 LLC. licenses this file to you under the Apache License,
+# Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""
+In-process tail-based sampling.
+
+Finished spans are buffered per trace until the local root span ends (or the
+decision timeout expires). The whole trace is then kept if it errored, was
+slower than the latency threshold or used more tokens than the token
+threshold; remaining traces are kept at a fixed ratio.
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from opentelemetry.context import Context
+from opentelemetry.sdk.trace import ReadableSpan, Span, SpanProcessor
+from opentelemetry.trace import StatusCode
+
+from ._fork import register_after_fork
+
+logger = logging.getLogger(__name__)
+
+_TRACE_ID_LIMIT = (1 << 64) - 1
+
+# Attributes carrying total token usage, checked in order
+_TOTAL_TOKEN_ATTRIBUTES = ("llm.usage.total_tokens", "gen_ai.usage.total_tokens")
+# Attributes carrying input/output token usage, summed when no total is present
+_PARTIAL_TOKEN_ATTRIBUTES = (
+    "gen_ai.usage.input_tokens",
+    "gen_ai.usage.output_tokens",
+    "gen_ai.usage.prompt_tokens",
+    "gen_ai.usage.completion_tokens",
+)
+
+
+def span_token_count(span: ReadableSpan) -> int:
+    """Return the token usage recorded on a span, or 0 if none is recorded."""
+    attributes = span.attributes or {}
+    for key in _TOTAL_TOKEN_ATTRIBUTES:
+        value = attributes.get(key)
+        if isinstance(value, (int, float)):
+            return int(value)
+    return int(
+        sum(
+            value
+            for key in _PARTIAL_TOKEN_ATTRIBUTES
+            if isinstance(value := attributes.get(key), (int, float))
+        )
+    )
+
+
+class _TraceBuffer:
+    """Spans and running aggregates for a single undecided trace."""
+
+    __slots__ = ("spans", "created", "start_time", "end_time", "error", "tokens")
+
+    def __init__(self) -> None:
+        self.spans: List[ReadableSpan] = []
+        self.created = time.monotonic()
+        self.start_time: Optional[int] = None
+        self.end_time: Optional[int] = None
+        self.error = False
+        self.tokens = 0
+
+    def add(self, span: ReadableSpan) -> None:
+        self.spans.append(span)
+        if span.start_time is not None and (
+            self.start_time is None or span.start_time < self.start_time
+        ):
+            self.start_time = span.start_time
+        if span.end_time is not None and (
+            self.end_time is None or span.end_time > self.end_time
+        ):
+            self.end_time = span.end_time
+        if span.status is not None and span.status.status_code is StatusCode.ERROR:
+            self.error = True
+        self.tokens += span_token_count(span)
+
+    @property
+    def duration_ms(self) -> float:
+        if self.start_time is None or self.end_time is None:
+            return 0.0
+        return (self.end_time - self.start_time) / 1e6
+
+
+class TailSamplingSpanProcessor(SpanProcessor):
+    """
+    Span processor that makes the sampling decision once a trace has finished.
+
+    Kept traces are forwarded span by span to the wrapped processor (normally
+    the batch export processor). Memory is bounded by max_buffered_spans: when
+    the budget is exceeded, the oldest undecided trace is decided early with
+    whatever spans it has. Spans that arrive after their trace was decided
+    follow the recorded decision.
+
+    Args:
+        next_processor: Processor that receives the spans of kept traces.
+        sample_ratio: Fraction of uninteresting traces to keep.
+        latency_threshold_ms: Keep traces at least this long; 0 disables the rule.
+        token_threshold: Keep traces using at least this many tokens; 0 disables the rule.
+        decision_wait_ms: Decide traces whose root has not ended after this long.
+        max_buffered_spans: Maximum number of spans held across all undecided traces.
+    """
+
+    def __init__(
+        self,
+        next_processor: SpanProcessor,
+        sample_ratio: float = 0.1,
+        latency_threshold_ms: float = 0,
+        token_threshold: int = 0,
+        decision_wait_ms: float = 30000,
+        max_buffered_spans: int = 10000,
+    ) -> None:
+        self._next = next_processor
+        self._sample_ratio = sample_ratio
+        self._sample_bound = round(sample_ratio * (_TRACE_ID_LIMIT + 1))
+        self._latency_threshold_ms = latency_threshold_ms
+        self._token_threshold = token_threshold
+        self._decision_wait_s = decision_wait_ms / 1000
+        self._max_buffered_spans = max_buffered_spans
+
+        self._max_decided = max(1000, max_buffered_spans)
+        self._reset_state()
+        self._start_worker()
+        register_after_fork(self._at_fork_reinit)
+
+    def _reset_state(self) -> None:
+        self._lock = threading.Lock()
+        self._traces: "OrderedDict[int, _TraceBuffer]" = OrderedDict()
+        self._decided: "OrderedDict[int, bool]" = OrderedDict()
+        self._buffered_spans = 0
+        self._counters = {
+            "traces_kept": 0,
+            "traces_dropped": 0,
+            "spans_kept": 0,
+            "spans_dropped": 0,
+            "traces_evicted": 0,
+            "traces_expired": 0,
+            "kept_error": 0,
+            "kept_latency": 0,
+            "kept_tokens": 0,
+            "kept_ratio": 0,
+        }
+
+    def _start_worker(self) -> None:
+        self._shutdown = threading.Event()
+        self._worker = threading.Thread(
+            target=self._expire_loop, name="amp-tail-sampling", daemon=True
+        )
+        self._worker.start()
+
+    def _at_fork_reinit(self) -> None:
+        # Traces buffered at fork time belong to the parent, which decides them
+        if self._shutdown.is_set():
+            return
+        self._reset_state()
+        self._start_worker()
+
+    def on_start(self, span: Span, parent_context: Optional[Context] = None) -> None:
+        self._next.on_start(span, parent_context=parent_context)
+
+    def on_end(self, span: ReadableSpan) -> None:
+        # Recorded-only spans of head-sampled-out traces are never exported
+        if self._shutdown.is_set() or not span.context.trace_flags.sampled:
+            return
+
+        trace_id = span.context.trace_id
+        forward: List[ReadableSpan] = []
+
+        with self._lock:
+            decision = self._decided.get(trace_id)
+            if decision is not None:
+                # Late span of an already decided trace
+                if decision:
+                    self._counters["spans_kept"] += 1
+                    forward.append(span)
+                else:
+                    self._counters["spans_dropped"] += 1
+            else:
+                buffer = self._traces.get(trace_id)
+                if buffer is None:
+                    buffer = self._traces[trace_id] = _TraceBuffer()
+                buffer.add(span)
+                self._buffered_spans += 1
+
+                if span.parent is None or span.parent.is_remote:
+                    forward.extend(self._decide_locked(trace_id))
+
+                while self._buffered_spans > self._max_buffered_spans and self._traces:
+                    oldest = next(iter(self._traces))
+                    self._counters["traces_evicted"] += 1
+                    forward.extend(self._decide_locked(oldest))
+
+        for kept in forward:
+            self._next.on_end(kept)
+
+    def _keep_reason(self, trace_id: int, buffer: _TraceBuffer) -> Optional[str]:
+        if buffer.error:
+            return "error"
+        if (
+            self._latency_threshold_ms > 0
+            and buffer.duration_ms >= self._latency_threshold_ms
+        ):
+            return "latency"
+        if self._token_threshold > 0 and buffer.tokens >= self._token_threshold:
+            return "tokens"
+        if trace_id & _TRACE_ID_LIMIT < self._sample_bound:
+            return "ratio"
+        return None
+
+    def _decide_locked(self, trace_id: int) -> List[ReadableSpan]:
+        """Decide a buffered trace. Must be called with the lock held."""
+        buffer = self._traces.pop(trace_id)
+        self._buffered_spans -= len(buffer.spans)
+
+        reason = self._keep_reason(trace_id, buffer)
+        self._decided[trace_id] = reason is not None
+        if len(self._decided) > self._max_decided:
+            self._decided.popitem(last=False)
+
+        if reason is None:
+            self._counters["traces_dropped"] += 1
+            self._counters["spans_dropped"] += len(buffer.spans)
+            return []
+
+        self._counters["traces_kept"] += 1
+        self._counters["spans_kept"] += len(buffer.spans)
+        self._counters[f"kept_{reason}"] += 1
+        return buffer.spans
+
+    def _decide_expired(self, force: bool = False) -> None:
+        deadline = time.monotonic() - self._decision_wait_s
+        forward: List[ReadableSpan] = []
+        with self._lock:
+            # Traces are ordered by creation, so stop at the first young one
+            while self._traces:
+                trace_id, buffer = next(iter(self._traces.items()))
+                if not force and buffer.created > deadline:
+                    break
+                if not force:
+                    self._counters["traces_expired"] += 1
+                forward.extend(self._decide_locked(trace_id))
+        for kept in forward:
+            self._next.on_end(kept)
+
+    def _expire_loop(self) -> None:
+        interval = min(max(self._decision_wait_s / 4, 0.05), 1.0)
+        while not self._shutdown.wait(interval):
+            try:
+                self._decide_expired()
+            except Exception:
+                logger.exception("Tail sampling decision sweep failed.")
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Return buffer occupancy and decision counters.
+
+        buffered_spans / buffered_traces show current occupancy against
+        max_buffered_spans; traces_evicted counts traces decided early because
+        the budget was exceeded, and spans_dropped counts spans discarded by
+        sampling decisions.
+        """
+        with self._lock:
+            result: Dict[str, Any] = dict(self._counters)
+            result["buffered_spans"] = self._buffered_spans
+            result["buffered_traces"] = len(self._traces)
+        result["max_buffered_spans"] = self._max_buffered_spans
+        result["sample_ratio"] = self._sample_ratio
+        return result
+
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
+        self._decide_expired(force=True)
+        return self._next.force_flush(timeout_millis)
+
+    def shutdown(self) -> None:
+        if self._shutdown.is_set():
+            return
+        self._decide_expired(force=True)
+        self._shutdown.set()
+        self._next.shutdown()
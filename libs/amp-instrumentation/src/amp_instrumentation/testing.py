@@ -0,0 +1,300 @@
+# Copyright (c) 2025, WSO2 LLC. (https://www.wso2.com).
+#
+# WSO2 LLC. licenses this file to you under the Apache License,
+# Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""
+Test utilities for instrumented applications.
+
+OTLPReceiver is a local OTLP/HTTP collector stand-in. Point AMP_OTEL_ENDPOINT
+at its endpoint to test or benchmark the export pipeline without an outside
+service:
+
+    with OTLPReceiver() as receiver:
+        os.environ["AMP_OTEL_ENDPOINT"] = receiver.endpoint
+        ...
+        receiver.wait_for_spans(100)
+        print(receiver.stats())
+
+latency_breakdown() pairs the client and server spans of HTTP calls between
+traced services to show how much of each call was spent in the server.
+"""
+
+import gzip
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterable, List, Optional
+
+from opentelemetry.proto.collector.trace.v1.trace_service_pb2 import (
+    ExportTraceServiceRequest,
+)
+from opentelemetry.proto.trace.v1.trace_pb2 import Span
+
+__all__ = [
+    "HopLatency",
+    "OTLPReceiver",
+    "ReceivedBatch",
+    "latency_breakdown",
+    "span_attributes",
+]
+
+_TRACES_PATH = "/v1/traces"
+
+
+@dataclass
+class ReceivedBatch:
+    """One export request accepted by the receiver."""
+
+    span_count: int
+    wire_bytes: int
+    decoded_bytes: int
+    content_encoding: Optional[str]
+    received_at: float
+    latency_ms: float
+    headers: Dict[str, str]
+
+
+@dataclass
+class HopLatency:
+    """
+    Latency of one HTTP call from a traced client to a traced server.
+
+    network_ms is the client span minus the server span: connection setup,
+    transfer, and server time outside the server span. request_ms and
+    response_ms split it into the two directions; unlike network_ms, they
+    are only accurate if both hosts' clocks agree.
+    """
+
+    trace_id: str
+    client_span: str
+    server_span: str
+    client_ms: float
+    server_ms: float
+    network_ms: float
+    request_ms: float
+    response_ms: float
+
+
+def latency_breakdown(spans: Iterable[Span]) -> List[HopLatency]:
+    """
+    Pair CLIENT spans with the SERVER spans that continue their trace.
+
+    Returns:
+        One HopLatency per server span whose parent is a received client
+        span, ordered by the client span's start time.
+    """
+    spans = list(spans)
+    clients = {
+        (span.trace_id, span.span_id): span
+        for span in spans
+        if span.kind == Span.SpanKind.SPAN_KIND_CLIENT
+    }
+    pairs = [
+        (clients[(span.trace_id, span.parent_span_id)], span)
+        for span in spans
+        if span.kind == Span.SpanKind.SPAN_KIND_SERVER
+        and (span.trace_id, span.parent_span_id) in clients
+    ]
+    pairs.sort(key=lambda pair: pair[0].start_time_unix_nano)
+
+    hops = []
+    for client, server in pairs:
+        client_ms = (client.end_time_unix_nano - client.start_time_unix_nano) / 1e6
+        server_ms = (server.end_time_unix_nano - server.start_time_unix_nano) / 1e6
+        hops.append(
+            HopLatency(
+                trace_id=server.trace_id.hex(),
+                client_span=client.name,
+                server_span=server.name,
+                client_ms=client_ms,
+                server_ms=server_ms,
+                network_ms=client_ms - server_ms,
+                request_ms=(server.start_time_unix_nano - client.start_time_unix_nano)
+                / 1e6,
+                response_ms=(client.end_time_unix_nano - server.end_time_unix_nano)
+                / 1e6,
+            )
+        )
+    return hops
+
+
+def span_attributes(span: Span) -> Dict[str, Any]:
+    """Return the attributes of a received protobuf span as a plain dict."""
+    result: Dict[str, Any] = {}
+    for attribute in span.attributes:
+        value = attribute.value
+        kind = value.WhichOneof("value")
+        if kind == "array_value":
+            result[attribute.key] = tuple(
+                getattr(item, item.WhichOneof("value"))
+                for item in value.array_value.values
+            )
+        elif kind is not None:
+            result[attribute.key] = getattr(value, kind)
+    return result
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: "_Server"
+
+    def do_POST(self) -> None:
+        started = time.perf_counter()
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        receiver = self.server.receiver
+
+        if receiver.response_delay:
+            time.sleep(receiver.response_delay)
+        status = receiver.status_code
+        if self.path != _TRACES_PATH:
+            status = 404
+        elif status == 200:
+            encoding = self.headers.get("Content-Encoding")
+            if encoding == "gzip":
+                decoded = gzip.decompress(body)
+            elif encoding == "deflate":
+                decoded = zlib.decompress(body)
+            else:
+                decoded = body
+            request = ExportTraceServiceRequest.FromString(decoded)
+            receiver._record(
+                request,
+                ReceivedBatch(
+                    span_count=0,
+                    wire_bytes=len(body),
+                    decoded_bytes=len(decoded),
+                    content_encoding=encoding,
+                    received_at=time.time(),
+                    latency_ms=(time.perf_counter() - started) * 1000,
+                    headers=dict(self.headers.items()),
+                ),
+            )
+
+        self.send_response(status)
+        self.send_header("Content-Type", "application/x-protobuf")
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, receiver: "OTLPReceiver", port: int) -> None:
+        self.receiver = receiver
+        super().__init__(("127.0.0.1", port), _Handler)
+
+
+class OTLPReceiver:
+    """
+    In-process OTLP/HTTP trace receiver that records what it is sent.
+
+    Accepts uncompressed, gzip and deflate protobuf requests on /v1/traces and
+    keeps the decoded spans, per-batch sizes and per-batch handling latency.
+    Set status_code or response_delay to simulate a failing or slow collector.
+
+    Args:
+        port: Port to listen on; 0 picks a free port.
+    """
+
+    def __init__(self, port: int = 0) -> None:
+        self.status_code = 200
+        self.response_delay = 0.0
+        self._lock = threading.Condition()
+        self._spans: List[Span] = []
+        self._batches: List[ReceivedBatch] = []
+        self._server = _Server(self, port)
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def endpoint(self) -> str:
+        """Base URL to use as AMP_OTEL_ENDPOINT."""
+        return f"http://127.0.0.1:{self._server.server_address[1]}"
+
+    def start(self) -> "OTLPReceiver":
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="amp-otlp-receiver", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "OTLPReceiver":
+        return self.start()
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.stop()
+
+    def _record(self, request: ExportTraceServiceRequest, batch: ReceivedBatch) -> None:
+        spans = [
+            span
+            for resource_spans in request.resource_spans
+            for scope_spans in resource_spans.scope_spans
+            for span in scope_spans.spans
+        ]
+        batch.span_count = len(spans)
+        with self._lock:
+            self._spans.extend(spans)
+            self._batches.append(batch)
+            self._lock.notify_all()
+
+    @property
+    def spans(self) -> List[Span]:
+        """Received spans, in arrival order."""
+        with self._lock:
+            return list(self._spans)
+
+    @property
+    def batches(self) -> List[ReceivedBatch]:
+        """Accepted export requests, in arrival order."""
+        with self._lock:
+            return list(self._batches)
+
+    def wait_for_spans(self, count: int, timeout: float = 10.0) -> bool:
+        """Block until at least count spans were received; False on timeout."""
+        with self._lock:
+            return self._lock.wait_for(lambda: len(self._spans) >= count, timeout)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._spans.clear()
+            self._batches.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return span, batch and byte totals and batch handling latency percentiles."""
+        with self._lock:
+            batches = list(self._batches)
+        latencies = sorted(batch.latency_ms for batch in batches)
+        return {
+            "spans": sum(batch.span_count for batch in batches),
+            "batches": len(batches),
+            "wire_bytes": sum(batch.wire_bytes for batch in batches),
+            "decoded_bytes": sum(batch.decoded_bytes for batch in batches),
+            "batch_latency_p50_ms": _percentile(latencies, 0.50),
+            "batch_latency_p99_ms": _percentile(latencies, 0.99),
+        }
+
+
+def _percentile(ordered: List[float], fraction: float) -> Optional[float]:
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
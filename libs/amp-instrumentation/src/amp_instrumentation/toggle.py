@@ -0,0 +1,163 @@
+# Copyright (c) 2025, WSO2 LLC. (https://www.wso2.com).
+#
+# WSO2 LLC. licenses this file to you under the Apache License,
+# Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""
+Per-request tracing toggle.
+
+Tracing is switched on and off through OpenTelemetry's "suppress
+instrumentation" context value, which every instrumentor checks before it
+creates a span. Code running in a suppressed context therefore skips span
+creation in the instrumentation wrappers entirely: no span, attribute or
+processor work, only one context lookup per wrapped call.
+
+The TracingToggleMiddleware makes the decision per ASGI request, so that in
+production only flagged requests or sessions are traced, and the allowlist
+can change without restarting the application.
+"""
+
+from contextlib import contextmanager
+from typing import Any, Awaitable, Callable, FrozenSet, Iterable, Iterator, Optional
+from urllib.parse import parse_qsl
+
+from opentelemetry.context import (
+    _SUPPRESS_INSTRUMENTATION_KEY,
+    attach,
+    detach,
+    get_value,
+    set_value,
+)
+
+from ._bootstrap import constants as env_vars
+from ._bootstrap.initialization import _get_bool_env_var, _get_list_env_var
+
+# Request header that forces tracing on ("1", "true") or off ("0", "false")
+TRACE_HEADER = "x-amp-trace"
+# Request header and query parameter matched against the session allowlist
+SESSION_HEADER = "x-session-id"
+SESSION_QUERY_PARAM = "session_id"
+
+_ENABLED_VALUES = frozenset((b"1", b"true", b"yes", b"on"))
+_DISABLED_VALUES = frozenset((b"0", b"false", b"no", b"off"))
+
+_ASGIApp = Callable[[Any, Any, Any], Awaitable[None]]
+
+
+@contextmanager
+def tracing(enabled: bool = True) -> Iterator[None]:
+    """
+    Enable or suppress tracing for the code run inside the block.
+
+    The setting follows the OpenTelemetry context, so it applies to asyncio
+    tasks and thread pool calls started from the block as well. An enabled
+    block inside a suppressed one traces again.
+    """
+    token = attach(set_value(_SUPPRESS_INSTRUMENTATION_KEY, not enabled))
+    try:
+        yield
+    finally:
+        detach(token)
+
+
+def is_tracing_enabled() -> bool:
+    """Return False if tracing is suppressed in the current context."""
+    return not get_value(_SUPPRESS_INSTRUMENTATION_KEY)
+
+
+class TracingToggleMiddleware:
+    """
+    ASGI middleware that enables or suppresses tracing per request.
+
+    A request is traced if its x-amp-trace header is "1" or "true", or if its
+    session id (x-session-id header or session_id query parameter) is on the
+    allowlist. A header of "0" or "false" suppresses tracing. Other requests
+    are traced unless flagged_only is set. Either wrap the application with
+    the middleware or add it with app.add_middleware(). The server spans
+    added by instrument_starlette() follow its decision in both cases, so a
+    suppressed request gets no span at all.
+
+    Args:
+        app: The ASGI application.
+        flagged_only: Trace only flagged requests. Defaults to AMP_TRACE_FLAGGED_ONLY.
+        session_ids: Session ids to trace. Defaults to AMP_TRACE_SESSION_IDS.
+        header: Name of the header that switches tracing on or off.
+        session_header: Name of the header carrying the session id.
+        session_query_param: Name of the query parameter carrying the session id.
+    """
+
+    def __init__(
+        self,
+        app: _ASGIApp,
+        flagged_only: Optional[bool] = None,
+        session_ids: Optional[Iterable[str]] = None,
+        header: str = TRACE_HEADER,
+        session_header: str = SESSION_HEADER,
+        session_query_param: str = SESSION_QUERY_PARAM,
+    ) -> None:
+        self.app = app
+        if flagged_only is None:
+            flagged_only = _get_bool_env_var(env_vars.AMP_TRACE_FLAGGED_ONLY)
+        if session_ids is None:
+            session_ids = _get_list_env_var(env_vars.AMP_TRACE_SESSION_IDS) or ()
+        self._flagged_only = flagged_only
+        self._header = header.lower().encode("latin-1")
+        self._session_header = session_header.lower().encode("latin-1")
+        self._session_query_param = session_query_param
+        self.set_session_ids(session_ids)
+
+    @property
+    def session_ids(self) -> FrozenSet[str]:
+        return self._session_ids
+
+    def set_session_ids(self, session_ids: Iterable[str]) -> None:
+        """Replace the allowlist of session ids; takes effect for the next request."""
+        # Swapped as a whole, so requests in flight never see a partial update
+        self._session_ids = frozenset(session_ids)
+
+    async def __call__(self, scope: Any, receive: Any, send: Any) -> None:
+        if scope["type"] not in ("http", "websocket") or self.traced(scope):
+            await self.app(scope, receive, send)
+            return
+        token = attach(set_value(_SUPPRESS_INSTRUMENTATION_KEY, True))
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            detach(token)
+
+    def traced(self, scope: Any) -> bool:
+        """Return whether the request of an ASGI HTTP or WebSocket scope is traced."""
+        session_ids = self._session_ids
+        session_id = None
+        for name, value in scope.get("headers") or ():
+            if name == self._header:
+                value = value.strip().lower()
+                if value in _ENABLED_VALUES:
+                    return True
+                if value in _DISABLED_VALUES:
+                    return False
+            elif name == self._session_header and session_ids:
+                session_id = value.decode("latin-1")
+        if session_ids:
+            if session_id is None and scope.get("query_string"):
+                session_id = self._query_session_id(scope["query_string"])
+            if session_id in session_ids:
+                return True
+        return not self._flagged_only
+
+    def _query_session_id(self, query_string: bytes) -> Optional[str]:
+        for name, value in parse_qsl(query_string.decode("latin-1")):
+            if name == self._session_query_param:
+                return value
+        return None
@@ -0,0 +1,222 @@
+# Copyright (c) 2025, WSO2 LLC. (https://www.wso2.com).
+#
+# WSO2 LLC. licenses this file to you under the Apache License,
+# Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""
+Size capping for span attributes and events.
+
+With content tracing on, prompts, completions and tool payloads are attached
+to spans verbatim and a single span can reach hundreds of kilobytes. The
+TruncatingSpanProcessor shortens oversized string values when a span ends,
+before it is queued for export, and marks each cut with the original size
+of the value.
+"""
+
+import threading
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+from opentelemetry.context import Context
+from opentelemetry.sdk.trace import ReadableSpan, Span, SpanProcessor
+
+from ._attributes import rebuild_attributes
+
+# Gives the original size, since the bytes removed depend on the marker length
+TRUNCATION_MARKER = "...[truncated from {} bytes]"
+
+
+def _utf8_size(value: str) -> int:
+    # isascii() is O(1) on CPython, which avoids encoding most values
+    return len(value) if value.isascii() else len(value.encode("utf-8"))
+
+
+def truncate_utf8(value: str, max_bytes: int) -> Tuple[str, int]:
+    """
+    Shorten a string to at most max_bytes of UTF-8, marker included.
+
+    The marker gives the original size of the value. The cut never splits a
+    multi-byte character. If max_bytes is too small for the marker, the
+    value is cut without one.
+
+    Returns:
+        The (possibly shortened) value and the number of bytes removed from
+        the original, not counting the marker added.
+    """
+    size = _utf8_size(value)
+    if size <= max_bytes:
+        return value, 0
+
+    marker = TRUNCATION_MARKER.format(size)
+    keep = max_bytes - len(marker)
+    if keep < 0:
+        marker, keep = "", max_bytes
+    if value.isascii():
+        head = value[:keep]
+    else:
+        head = value.encode("utf-8")[:keep].decode("utf-8", errors="ignore")
+    return head + marker, size - _utf8_size(head)
+
+
+class _Budget:
+    """Remaining byte allowance; None means unlimited."""
+
+    __slots__ = ("remaining",)
+
+    def __init__(self, remaining: Optional[int]) -> None:
+        self.remaining = remaining
+
+
+class TruncatingSpanProcessor(SpanProcessor):
+    """
+    Span processor that caps string attribute sizes before forwarding spans.
+
+    Limits are in UTF-8 bytes and 0 disables a limit. String values and
+    string sequence items are capped individually by max_attribute_bytes;
+    each event's string values share max_event_bytes; and all string values
+    of a span, attributes first and then events, share max_span_bytes.
+    Non-string values are never changed.
+
+    Args:
+        next_processor: Processor that receives the capped spans.
+        max_attribute_bytes: Maximum size of a single span attribute value.
+        max_event_bytes: Maximum total size of the values of one event.
+        max_span_bytes: Maximum total size of all values on a span.
+    """
+
+    def __init__(
+        self,
+        next_processor: SpanProcessor,
+        max_attribute_bytes: int = 0,
+        max_event_bytes: int = 0,
+        max_span_bytes: int = 0,
+    ) -> None:
+        self._next = next_processor
+        self._max_attribute_bytes = max_attribute_bytes or None
+        self._max_event_bytes = max_event_bytes or None
+        self._max_span_bytes = max_span_bytes or None
+
+        self._lock = threading.Lock()
+        self._counters = {
+            "spans_truncated": 0,
+            "values_truncated": 0,
+            "bytes_removed": 0,
+        }
+
+    def on_start(self, span: Span, parent_context: Optional[Context] = None) -> None:
+        self._next.on_start(span, parent_context=parent_context)
+
+    def on_end(self, span: ReadableSpan) -> None:
+        if span.context is not None and span.context.trace_flags.sampled:
+            self._truncate(span)
+        self._next.on_end(span)
+
+    def _truncate(self, span: ReadableSpan) -> None:
+        span_budget = _Budget(self._max_span_bytes)
+        values, removed = 0, 0
+
+        attributes = span._attributes
+        if attributes:
+            capped, count, size = self._cap_mapping(
+                attributes, self._max_attribute_bytes, span_budget
+            )
+            if capped is not None:
+                span._attributes = rebuild_attributes(attributes, capped)
+                values += count
+                removed += size
+
+        for event in span._events or ():
+            event_attributes = event._attributes
+            if not event_attributes:
+                continue
+            capped, count, size = self._cap_mapping(
+                event_attributes,
+                self._max_attribute_bytes,
+                span_budget,
+                _Budget(self._max_event_bytes),
+            )
+            if capped is not None:
+                event._attributes = rebuild_attributes(event_attributes, capped)
+                values += count
+                removed += size
+
+        if values:
+            with self._lock:
+                self._counters["spans_truncated"] += 1
+                self._counters["values_truncated"] += values
+                self._counters["bytes_removed"] += removed
+
+    @staticmethod
+    def _cap_mapping(
+        attributes: Mapping[str, Any],
+        value_limit: Optional[int],
+        *budgets: _Budget,
+    ) -> Tuple[Optional[Dict[str, Any]], int, int]:
+        """
+        Cap the string values of an attribute mapping against the budgets.
+
+        Returns:
+            The capped attributes, or None if nothing was cut, together with
+            the number of values cut and the bytes removed.
+        """
+        capped: Optional[Dict[str, Any]] = None
+        values, removed = 0, 0
+
+        def cap(value: str) -> str:
+            nonlocal values, removed
+            limits = [b.remaining for b in budgets if b.remaining is not None]
+            if value_limit is not None:
+                limits.append(value_limit)
+            if limits:
+                value, cut = truncate_utf8(value, min(limits))
+                if cut:
+                    values += 1
+                    removed += cut
+            size = _utf8_size(value)
+            for budget in budgets:
+                if budget.remaining is not None:
+                    budget.remaining = max(budget.remaining - size, 0)
+            return value
+
+        for key, value in attributes.items():
+            if isinstance(value, str):
+                new_value: Any = cap(value)
+            elif isinstance(value, (tuple, list)) and any(
+                isinstance(item, str) for item in value
+            ):
+                new_value = tuple(
+                    cap(item) if isinstance(item, str) else item for item in value
+                )
+            else:
+                continue
+            if new_value != value and capped is None:
+                capped = dict(attributes)
+            if capped is not None:
+                capped[key] = new_value
+
+        return capped, values, removed
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the number of spans and values truncated and the bytes removed."""
+        with self._lock:
+            result: Dict[str, Any] = dict(self._counters)
+        result["max_attribute_bytes"] = self._max_attribute_bytes or 0
+        result["max_event_bytes"] = self._max_event_bytes or 0
+        result["max_span_bytes"] = self._max_span_bytes or 0
+        return result
+
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
+        return self._next.force_flush(timeout_millis)
+
+    def shutdown(self) -> None:
+        self._next.shutdown()
@@ -18,6 +18,7 @@
 
 import os
 import pytest
+from enum import Enum
 from typing import Generator, Dict
 
 
@@ -32,10 +33,7 @@ def clean_environment() -> Generator[None, None, None]:
     original_env = os.environ.copy()
 
     # Remove AMP-related environment variables
-    amp_vars = [
-        "AMP_OTEL_ENDPOINT",
-        "AMP_AGENT_API_KEY",
-    ]
+    amp_vars = [var for var in os.environ if var.startswith("AMP_")]
 
     for var in amp_vars:
         os.environ.pop(var, None)
@@ -78,6 +76,20 @@ def configure_environment(clean_environment, set_env_vars) -> Dict[str, str]:
     return set_env_vars
 
 
+@pytest.fixture
+def otlp_receiver():
+    """
+    Fixture providing a running local OTLP/HTTP receiver.
+
+    Yields:
+        An OTLPReceiver; use its endpoint as AMP_OTEL_ENDPOINT
+    """
+    from amp_instrumentation.testing import OTLPReceiver
+
+    with OTLPReceiver() as receiver:
+        yield receiver
+
+
 @pytest.fixture
 def mock_traceloop(monkeypatch):
     """
@@ -102,15 +114,29 @@ def mock_traceloop(monkeypatch):
             cls.initialized = False
             cls.init_kwargs = {}
 
+    class MockInstruments(Enum):
+        ANTHROPIC = "anthropic"
+        LANGCHAIN = "langchain"
+        OPENAI = "openai"
+        REQUESTS = "requests"
+
     # Reset state before each test
     MockTraceloop.reset()
 
+    # Keep the test process free of exit and SIGTERM hooks
+    from amp_instrumentation import shutdown
+
+    monkeypatch.setattr(shutdown, "_hooks_installed", True)
+    monkeypatch.setattr(shutdown, "_processor", None)
+    monkeypatch.setattr(shutdown, "_timeout_ms", shutdown._timeout_ms)
+
     # Mock the import
     import sys
     from unittest.mock import MagicMock
 
     mock_module = MagicMock()
     mock_module.Traceloop = MockTraceloop
+    mock_module.Instruments = MockInstruments
     sys.modules["traceloop.sdk"] = mock_module
 
     yield MockTraceloop
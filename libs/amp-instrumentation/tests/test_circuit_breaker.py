@@ -0,0 +1,124 @@
+# Copyright (c) 2025, WSO2 LLC. (https://www.wso2.com).
+#
+# WSO2 LLC. licenses this file to you under the Apache License,
+# Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""Tests for the export circuit breaker."""
+
+import time
+
+import pytest
+from opentelemetry.sdk.trace import ReadableSpan
+from opentelemetry.sdk.trace.export import SpanExporter, SpanExportResult
+
+from amp_instrumentation import circuit_breaker
+from amp_instrumentation.circuit_breaker import CircuitBreaker
+from amp_instrumentation.export import MonitoredSpanExporter, _ExportCounters
+
+_BATCH = [ReadableSpan(name="work"), ReadableSpan(name="work")]
+
+
+class SwitchableExporter(SpanExporter):
+    """Exporter that fails until told otherwise and counts its calls."""
+
+    def __init__(self):
+        self.succeed = False
+        self.calls = 0
+
+    def export(self, spans):
+        self.calls += 1
+        return SpanExportResult.SUCCESS if self.succeed else SpanExportResult.FAILURE
+
+    def shutdown(self):
+        pass
+
+
+@pytest.fixture(autouse=True)
+def no_jitter(monkeypatch):
+    monkeypatch.setattr(circuit_breaker.random, "uniform", lambda low, high: high)
+
+
+def _exporter(**options):
+    exporter = SwitchableExporter()
+    breaker = CircuitBreaker(**options)
+    counters = _ExportCounters(max_queue_size=100)
+    return (
+        exporter,
+        breaker,
+        counters,
+        MonitoredSpanExporter(exporter, counters, breaker),
+    )
+
+
+class TestCircuitBreaker:
+    """Tests for CircuitBreaker in the export path."""
+
+    def test_opens_after_consecutive_failures(self):
+        """Test that batches are rejected without an export call once open."""
+        exporter, breaker, counters, monitored = _exporter(
+            failure_threshold=3, backoff_ms=60000
+        )
+
+        results = [monitored.export(_BATCH) for _ in range(5)]
+
+        assert results == [SpanExportResult.FAILURE] * 5
+        assert exporter.calls == 3
+        stats = breaker.stats()
+        assert stats["state"] == circuit_breaker.OPEN
+        assert stats["batches_rejected"] == 2
+        assert stats["spans_rejected"] == 4
+        assert 59000 < stats["retry_in_ms"] <= 60000
+        # Rejected spans are accounted as failed export
+        assert counters.spans_failed == 10
+
+    def test_success_resets_failure_streak(self):
+        """Test that failures separated by a success do not open the breaker."""
+        exporter, breaker, _, monitored = _exporter(failure_threshold=2)
+
+        monitored.export(_BATCH)
+        exporter.succeed = True
+        monitored.export(_BATCH)
+        exporter.succeed = False
+        monitored.export(_BATCH)
+
+        assert breaker.stats()["state"] == circuit_breaker.CLOSED
+
+    def test_probe_closes_breaker_on_recovery(self):
+        """Test that a successful probe after the backoff closes the breaker."""
+        exporter, breaker, _, monitored = _exporter(failure_threshold=1, backoff_ms=20)
+        monitored.export(_BATCH)
+        assert breaker.is_open
+
+        exporter.succeed = True
+        assert monitored.export(_BATCH) is SpanExportResult.FAILURE
+        time.sleep(0.03)
+        assert monitored.export(_BATCH) is SpanExportResult.SUCCESS
+
+        assert exporter.calls == 2
+        assert breaker.stats()["state"] == circuit_breaker.CLOSED
+
+    def test_failed_probe_doubles_backoff(self):
+        """Test that a failed probe reopens the breaker with twice the backoff."""
+        exporter, breaker, _, monitored = _exporter(
+            failure_threshold=1, backoff_ms=20, max_backoff_ms=30
+        )
+        monitored.export(_BATCH)
+        time.sleep(0.03)
+        monitored.export(_BATCH)
+
+        assert exporter.calls == 2
+        stats = breaker.stats()
+        assert stats["times_opened"] == 2
+        # Doubled to 40 ms, capped at 30 ms
+        assert 20 < stats["retry_in_ms"] <= 30
@@ -17,10 +17,12 @@
 """Tests for CLI functionality."""
 
 import os
+import signal
+import subprocess
 import sys
 import pytest
 from pathlib import Path
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch
 from io import StringIO
 from amp_instrumentation.cli import main
 
@@ -37,37 +39,37 @@ class TestRunWithSitecustomize:
 
         assert exc_info.value.code == 1
 
-    @patch("subprocess.run")
-    def test_successful_execution(self, mock_run, tmp_path):
+    @patch("subprocess.Popen")
+    def test_successful_execution(self, mock_popen, tmp_path, monkeypatch):
         """Test successful command execution with proper environment setup."""
+        monkeypatch.setenv("AMP_LAUNCH_MODE", "subprocess")
         # Create mock bootstrap directory
         bootstrap_dir = tmp_path / "_bootstrap"
         bootstrap_dir.mkdir()
 
         # Mock the package directory structure
         with patch.object(Path, "parent", tmp_path):
-            # Mock subprocess.run to return success
-            mock_result = MagicMock()
-            mock_result.returncode = 0
-            mock_run.return_value = mock_result
+            # Mock subprocess.Popen to return a child that exits successfully
+            mock_popen.return_value.wait.return_value = 0
 
             # Patch check_sitecustomize_conflicts to avoid stderr output
             with patch("amp_instrumentation.cli.main.check_sitecustomize_conflicts"):
-                with pytest.raises(SystemExit) as exc_info:
-                    # Simulate the __file__ being in cli/main.py
-                    with patch.object(
-                        main, "__file__", str(tmp_path / "cli" / "main.py")
-                    ):
-                        main.run_with_sitecustomize(["python", "test.py"])
+                with patch("signal.signal"):
+                    with pytest.raises(SystemExit) as exc_info:
+                        # Simulate the __file__ being in cli/main.py
+                        with patch.object(
+                            main, "__file__", str(tmp_path / "cli" / "main.py")
+                        ):
+                            main.run_with_sitecustomize(["python", "test.py"])
 
         # Should exit with return code from subprocess
         assert exc_info.value.code == 0
 
-        # Verify subprocess.run was called with modified PYTHONPATH
-        mock_run.assert_called_once()
-        call_args = mock_run.call_args
+        # Verify subprocess.Popen was called with modified PYTHONPATH
+        mock_popen.assert_called_once()
+        call_args = mock_popen.call_args
 
-        # Check that env was passed to subprocess.run
+        # Check that env was passed to subprocess.Popen
         assert "env" in call_args.kwargs
         env = call_args.kwargs["env"]
 
@@ -80,6 +82,43 @@ class TestRunWithSitecustomize:
         expected_command = ["python", "test.py"]
         assert call_args.args[0] == expected_command
 
+    @pytest.mark.skipif(os.name == "nt", reason="exec is not the default on Windows")
+    @patch("os.execvpe", side_effect=SystemExit(0))
+    def test_exec_is_default(self, mock_execvpe, tmp_path, monkeypatch):
+        """Test that the command replaces the wrapper process by default."""
+        monkeypatch.delenv("AMP_LAUNCH_MODE", raising=False)
+        (tmp_path / "_bootstrap").mkdir()
+
+        with patch("amp_instrumentation.cli.main.check_sitecustomize_conflicts"):
+            with patch.object(main, "__file__", str(tmp_path / "cli" / "main.py")):
+                with pytest.raises(SystemExit):
+                    main.run_with_sitecustomize(["python", "test.py"])
+
+        file, args, env = mock_execvpe.call_args.args
+        assert file == "python"
+        assert args == ["python", "test.py"]
+        assert env["PYTHONPATH"].startswith(str(tmp_path / "_bootstrap"))
+
+    def test_exec_command_not_found(self):
+        """Test that a missing command exits with 127 like a shell."""
+        with patch("sys.stderr", StringIO()) as mock_stderr:
+            with pytest.raises(SystemExit) as exc_info:
+                main.exec_command(["amp-no-such-command"], dict(os.environ))
+
+        assert exc_info.value.code == 127
+        assert "Command not found" in mock_stderr.getvalue()
+
+    def test_invalid_launch_mode(self, monkeypatch):
+        """Test that an unknown AMP_LAUNCH_MODE exits with an error."""
+        monkeypatch.setenv("AMP_LAUNCH_MODE", "fork")
+
+        with patch("sys.stderr", StringIO()) as mock_stderr:
+            with pytest.raises(SystemExit) as exc_info:
+                main.resolve_launch_mode()
+
+        assert exc_info.value.code == 1
+        assert "AMP_LAUNCH_MODE" in mock_stderr.getvalue()
+
     def test_bootstrap_directory_not_found(self, tmp_path):
         """
         Test that CLI exits with error when bootstrap directory doesn't exist.
@@ -105,6 +144,80 @@ class TestRunWithSitecustomize:
         assert "pip install --force-reinstall" in stderr_output
 
 
+@pytest.mark.skipif(os.name == "nt", reason="POSIX signals and exec required")
+class TestLaunchModes:
+    """End-to-end tests of the launched process and signal delivery."""
+
+    # Reports its PID, then waits for a signal
+    CHILD = (
+        "import os, signal, sys, time\n"
+        "if sys.argv[1] == 'handle':\n"
+        "    signal.signal(signal.SIGTERM, lambda *a: sys.exit(7))\n"
+        "if sys.argv[1] == 'kill':\n"
+        "    os.kill(os.getpid(), signal.SIGKILL)\n"
+        "print(os.getpid(), flush=True)\n"
+        "time.sleep(30)\n"
+    )
+
+    def _launch(self, mode, behavior):
+        env = dict(os.environ, AMP_LAUNCH_MODE=mode)
+        # Keep the child's automatic initialization quiet
+        env.pop("AMP_OTEL_ENDPOINT", None)
+        return subprocess.Popen(
+            [
+                sys.executable,
+                "-m",
+                "amp_instrumentation.cli.main",
+                sys.executable,
+                "-c",
+                self.CHILD,
+                behavior,
+            ],
+            env=env,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+        )
+
+    def test_exec_mode_keeps_wrapper_pid(self):
+        """Test that the command runs in the wrapper's process."""
+        wrapper = self._launch("exec", "handle")
+        try:
+            assert int(wrapper.stdout.readline()) == wrapper.pid
+            wrapper.send_signal(signal.SIGTERM)
+            assert wrapper.wait(timeout=10) == 7
+        finally:
+            wrapper.kill()
+
+    def test_subprocess_mode_forwards_sigterm(self):
+        """Test that SIGTERM reaches the child and its exit code is returned."""
+        wrapper = self._launch("subprocess", "handle")
+        try:
+            assert int(wrapper.stdout.readline()) != wrapper.pid
+            wrapper.send_signal(signal.SIGTERM)
+            assert wrapper.wait(timeout=10) == 7
+        finally:
+            wrapper.kill()
+
+    def test_subprocess_mode_mirrors_signal_death(self):
+        """Test that the wrapper dies from the signal that killed the child."""
+        wrapper = self._launch("subprocess", "default")
+        try:
+            wrapper.stdout.readline()
+            wrapper.send_signal(signal.SIGTERM)
+            assert wrapper.wait(timeout=10) == -signal.SIGTERM
+        finally:
+            wrapper.kill()
+
+    def test_subprocess_mode_child_killed(self):
+        """Test that a child killed by SIGKILL gives the shell's exit code of 137."""
+        wrapper = self._launch("subprocess", "kill")
+        try:
+            assert wrapper.wait(timeout=10) == 128 + signal.SIGKILL
+        finally:
+            wrapper.kill()
+
+
 class TestCheckSitecustomizeConflicts:
     """Test the check_sitecustomize_conflicts function."""
 
@@ -171,3 +284,42 @@ class TestCLI:
             main.cli()
 
         mock_run.assert_called_once_with(["python", "script.py", "--arg"])
+
+    @patch("amp_instrumentation.cli.main.run_with_sitecustomize")
+    def test_cli_profile_option(self, mock_run, monkeypatch):
+        """Test that --profile is passed to the command through AMP_PROFILE."""
+        monkeypatch.delenv("AMP_PROFILE", raising=False)
+        with patch.object(
+            sys,
+            "argv",
+            ["amp-instrument", "--profile=import", "--", "python", "app.py"],
+        ):
+            main.cli()
+
+        mock_run.assert_called_once_with(["python", "app.py"])
+        assert os.environ["AMP_PROFILE"] == "import"
+
+
+class TestParseOptions:
+    """Test the parse_options function."""
+
+    @pytest.mark.parametrize(
+        "args, settings, command",
+        [
+            (["python", "app.py", "--profile"], {}, ["python", "app.py", "--profile"]),
+            (["--profile", "python"], {"AMP_PROFILE": "cpu"}, ["python"]),
+            (["--profile=alloc", "--", "--odd"], {"AMP_PROFILE": "alloc"}, ["--odd"]),
+        ],
+    )
+    def test_options_before_command(self, args, settings, command):
+        """Test that only options before the command or "--" are consumed."""
+        assert main.parse_options(args) == (settings, command)
+
+    @pytest.mark.parametrize("args", [["--profile=gpu", "python"], ["--verbose"]])
+    def test_invalid_options_exit(self, args):
+        """Test that unknown options and profile modes exit with an error."""
+        with patch("sys.stderr", StringIO()):
+            with pytest.raises(SystemExit) as exc_info:
+                main.parse_options(args)
+
+        assert exc_info.value.code == 1
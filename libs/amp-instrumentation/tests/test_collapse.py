@@ -0,0 +1,157 @@
+# Copyright (c) 2025, WSO2 LLC. (https://www.wso2.com).
+#
+# WSO2 LLC. licenses this file to you under the Apache License,
+# Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""Tests for collapsing child spans into their parent."""
+
+import pytest
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import (
+    InMemorySpanExporter,
+)
+from opentelemetry.trace import set_span_in_context
+
+from amp_instrumentation.collapse import (
+    ATTRIBUTES,
+    COLLAPSED_COUNTS_ATTRIBUTE,
+    COLLAPSED_DURATION_ATTRIBUTE,
+    COLLAPSED_ERRORS_ATTRIBUTE,
+    COLLAPSED_NAMES_ATTRIBUTE,
+    COLLAPSED_SPANS_ATTRIBUTE,
+    EVENT_DURATION_ATTRIBUTE,
+    EVENT_ERROR_ATTRIBUTE,
+    CollapsingSpanProcessor,
+)
+
+
+def _pipeline(**options):
+    exporter = InMemorySpanExporter()
+    processor = CollapsingSpanProcessor(SimpleSpanProcessor(exporter), **options)
+    provider = TracerProvider()
+    provider.add_span_processor(processor)
+    return provider.get_tracer("test"), exporter, processor
+
+
+def _spans(exporter):
+    return {span.name: span for span in exporter.get_finished_spans()}
+
+
+class TestCollapsingSpanProcessor:
+    """Tests for CollapsingSpanProcessor."""
+
+    def test_matching_spans_become_events(self):
+        """Test that spans matching a pattern are folded into events on the parent."""
+        tracer, exporter, processor = _pipeline(patterns=["Runnable*"])
+
+        with tracer.start_as_current_span("chat"):
+            with tracer.start_as_current_span("RunnableSequence") as sequence:
+                sequence.set_attribute("langchain.step", 1)
+                with tracer.start_as_current_span("RunnableLambda"):
+                    pass
+
+        spans = _spans(exporter)
+        assert set(spans) == {"chat"}
+        chat = spans["chat"]
+        assert [event.name for event in chat.events] == [
+            "RunnableSequence",
+            "RunnableLambda",
+        ]
+        sequence_event = chat.events[0]
+        assert sequence_event.attributes["langchain.step"] == 1
+        assert sequence_event.attributes[EVENT_DURATION_ATTRIBUTE] >= 0
+        assert chat.attributes[COLLAPSED_SPANS_ATTRIBUTE] == 2
+        assert processor.stats()["spans_collapsed"] == 2
+        assert processor.stats()["active_spans"] == 0
+
+    def test_kept_descendants_are_reparented(self):
+        """Test that a kept span under a collapsed one is attached to the exported ancestor."""
+        tracer, exporter, processor = _pipeline(patterns=["Runnable*"])
+
+        with tracer.start_as_current_span("chat") as chat:
+            with tracer.start_as_current_span("RunnableSequence"):
+                with tracer.start_as_current_span("search_hotels"):
+                    pass
+
+        spans = _spans(exporter)
+        assert set(spans) == {"chat", "search_hotels"}
+        assert spans["search_hotels"].parent.span_id == chat.get_span_context().span_id
+        assert processor.stats()["spans_reparented"] == 1
+
+    def test_deep_spans_are_summarized_as_attributes(self):
+        """Test that spans below max_depth are summarized per name on their ancestor."""
+        tracer, exporter, _ = _pipeline(max_depth=1, mode=ATTRIBUTES)
+
+        with tracer.start_as_current_span("chat"):
+            with tracer.start_as_current_span("agent"):
+                for _ in range(3):
+                    with tracer.start_as_current_span("http"):
+                        with tracer.start_as_current_span("dns"):
+                            pass
+                with pytest.raises(RuntimeError):
+                    with tracer.start_as_current_span("parse"):
+                        raise RuntimeError("bad payload")
+
+        spans = _spans(exporter)
+        assert set(spans) == {"chat", "agent"}
+        agent = spans["agent"].attributes
+        assert agent[COLLAPSED_SPANS_ATTRIBUTE] == 7
+        assert agent[COLLAPSED_NAMES_ATTRIBUTE] == ("dns", "http", "parse")
+        assert agent[COLLAPSED_COUNTS_ATTRIBUTE] == (3, 3, 1)
+        assert len(agent[COLLAPSED_DURATION_ATTRIBUTE]) == 3
+        assert agent[COLLAPSED_ERRORS_ATTRIBUTE] == 1
+        assert not spans["agent"].events
+
+    def test_failed_span_event_keeps_error(self):
+        """Test that the event of a failed collapsed span carries its error."""
+        tracer, exporter, _ = _pipeline(patterns=["parse"])
+
+        with tracer.start_as_current_span("chat"):
+            with pytest.raises(ValueError):
+                with tracer.start_as_current_span("parse"):
+                    raise ValueError("bad payload")
+
+        (event,) = [e for e in _spans(exporter)["chat"].events if e.name == "parse"]
+        assert "bad payload" in event.attributes[EVENT_ERROR_ATTRIBUTE]
+
+    def test_roots_and_model_calls_are_kept(self):
+        """Test that root spans and LLM spans are never collapsed."""
+        tracer, exporter, _ = _pipeline(patterns=["*"])
+
+        with tracer.start_as_current_span("chat"):
+            with tracer.start_as_current_span(
+                "openai.chat", attributes={"gen_ai.system": "openai"}
+            ):
+                pass
+            with tracer.start_as_current_span("tool"):
+                pass
+
+        spans = _spans(exporter)
+        assert set(spans) == {"chat", "openai.chat"}
+        assert [event.name for event in spans["chat"].events] == ["tool"]
+
+    def test_span_ending_after_its_ancestor_is_dropped(self):
+        """Test that a collapsed span outliving its ancestor is counted, not exported."""
+        tracer, exporter, processor = _pipeline(patterns=["background"])
+
+        chat = tracer.start_span("chat")
+        background = tracer.start_span("background", set_span_in_context(chat))
+        chat.end()
+        background.end()
+
+        spans = _spans(exporter)
+        assert set(spans) == {"chat"}
+        assert COLLAPSED_SPANS_ATTRIBUTE not in spans["chat"].attributes
+        assert processor.stats()["spans_late"] == 1
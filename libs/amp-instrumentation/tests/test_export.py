@@ -0,0 +1,174 @@
+# Copyright (c) 2025, WSO2 LLC. (https://www.wso2.com).
+#
+# WSO2 LLC. licenses this file to you under the Apache License,
+# Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""Tests for the monitored batch export processor."""
+
+import threading
+import time
+
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SpanExporter, SpanExportResult
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import (
+    InMemorySpanExporter,
+)
+
+from amp_instrumentation.circuit_breaker import CircuitBreaker
+from amp_instrumentation.export import MonitoredBatchSpanProcessor
+
+
+class BlockingExporter(SpanExporter):
+    """Exporter that blocks until released, to simulate a stalled collector."""
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.exported = 0
+
+    def export(self, spans):
+        self.release.wait(5)
+        self.exported += len(spans)
+        return SpanExportResult.SUCCESS
+
+    def shutdown(self):
+        self.release.set()
+
+
+class FailingExporter(SpanExporter):
+    """Exporter whose every export fails."""
+
+    def export(self, spans):
+        return SpanExportResult.FAILURE
+
+    def shutdown(self):
+        pass
+
+
+def _tracer(processor):
+    provider = TracerProvider()
+    provider.add_span_processor(processor)
+    return provider.get_tracer("test")
+
+
+class TestMonitoredBatchSpanProcessor:
+    """Test export statistics reported by the batch processor."""
+
+    def test_counts_exported_spans_and_latency(self):
+        """Test that successful exports update counters and latency."""
+        exporter = InMemorySpanExporter()
+        processor = MonitoredBatchSpanProcessor(
+            exporter, max_queue_size=100, max_export_batch_size=10
+        )
+        tracer = _tracer(processor)
+
+        for _ in range(25):
+            with tracer.start_as_current_span("work"):
+                pass
+        assert processor.force_flush()
+
+        stats = processor.stats()
+        assert stats["spans_enqueued"] == 25
+        assert stats["spans_exported"] == 25
+        assert stats["spans_dropped"] == 0
+        assert stats["queue_depth"] == 0
+        assert stats["batches_exported"] >= 3
+        assert stats["export_latency_p99_ms"] is not None
+        assert len(exporter.get_finished_spans()) == 25
+        processor.shutdown()
+
+    def test_counts_drops_when_queue_is_full(self):
+        """Test that spans discarded by a full queue are counted."""
+        exporter = BlockingExporter()
+        processor = MonitoredBatchSpanProcessor(
+            exporter,
+            max_queue_size=10,
+            max_export_batch_size=10,
+            schedule_delay_millis=10,
+        )
+        tracer = _tracer(processor)
+
+        # The first batch stalls in the exporter, the rest overflows the queue
+        for _ in range(10):
+            with tracer.start_as_current_span("work"):
+                pass
+        deadline = time.monotonic() + 5
+        while processor.stats()["queue_depth"] > 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        for _ in range(15):
+            with tracer.start_as_current_span("work"):
+                pass
+
+        stats = processor.stats()
+        assert stats["queue_depth"] == 10
+        assert stats["spans_dropped"] == 5
+
+        exporter.release.set()
+        processor.shutdown()
+        assert exporter.exported == 20
+
+    def test_counts_spans_after_shutdown_as_dropped(self):
+        """Test that spans ending after shutdown do not stay in the queue depth."""
+        processor = MonitoredBatchSpanProcessor(
+            InMemorySpanExporter(), max_queue_size=10, max_export_batch_size=10
+        )
+        tracer = _tracer(processor)
+        processor.shutdown()
+
+        for _ in range(3):
+            with tracer.start_as_current_span("work"):
+                pass
+
+        stats = processor.stats()
+        assert stats["queue_depth"] == 0
+        assert stats["spans_dropped"] == 3
+
+    def test_counts_failed_exports(self):
+        """Test that failed exports are reported separately from successes."""
+        processor = MonitoredBatchSpanProcessor(
+            FailingExporter(), max_queue_size=10, max_export_batch_size=10
+        )
+        tracer = _tracer(processor)
+
+        with tracer.start_as_current_span("work"):
+            pass
+        processor.force_flush()
+
+        stats = processor.stats()
+        assert stats["spans_failed"] == 1
+        assert stats["batches_failed"] == 1
+        assert stats["spans_exported"] == 0
+        processor.shutdown()
+
+    def test_pressure_reports_fill_and_circuit(self):
+        """Test that pressure() reports the queue fill level and circuit state."""
+        exporter = BlockingExporter()
+        breaker = CircuitBreaker(failure_threshold=1)
+        processor = MonitoredBatchSpanProcessor(
+            exporter,
+            max_queue_size=10,
+            max_export_batch_size=10,
+            schedule_delay_millis=60000,
+            circuit_breaker=breaker,
+        )
+        tracer = _tracer(processor)
+
+        for _ in range(5):
+            with tracer.start_as_current_span("work"):
+                pass
+
+        assert processor.pressure() == (0.5, False)
+        breaker.record(False)
+        assert processor.pressure() == (0.5, True)
+        exporter.release.set()
+        processor.shutdown()
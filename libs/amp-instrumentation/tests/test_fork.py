@@ -0,0 +1,103 @@
+# Copyright (c) 2025, WSO2 LLC. (https://www.wso2.com).
+#
+# WSO2 LLC. licenses this file to you under the Apache License,
+# Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""Tests for re-initializing the export pipeline in forked workers."""
+
+import os
+import sys
+import traceback
+
+import pytest
+from opentelemetry.sdk.trace import TracerProvider
+
+import amp_instrumentation
+from amp_instrumentation import _stats
+from amp_instrumentation._bootstrap import constants as env_vars
+from amp_instrumentation._bootstrap.pipeline import build_span_processor
+from amp_instrumentation.testing import span_attributes
+
+pytestmark = pytest.mark.skipif(
+    not hasattr(os, "fork"), reason="os.fork is not available"
+)
+
+WORKERS = 4
+
+
+def _run_worker(tracer, processor):
+    """Body of a forked worker; returns the process exit code."""
+    try:
+        with tracer.start_as_current_span("worker") as span:
+            span.set_attribute("worker.pid", os.getpid())
+        assert processor.force_flush(10000)
+        export_stats = amp_instrumentation.stats()["export"]
+        # Counters start over in the child and only reflect its own span
+        assert export_stats["spans_exported"] == 1, export_stats
+        assert export_stats["queue_depth"] == 0, export_stats
+        return 0
+    except BaseException:
+        traceback.print_exc()
+        return 1
+
+
+@pytest.mark.parametrize(
+    "pipeline_env",
+    [
+        {},
+        {env_vars.AMP_TAIL_SAMPLING: "1", env_vars.AMP_TAIL_SAMPLE_RATIO: "1.0"},
+        {env_vars.AMP_SPOOL_DIR: "{tmp_path}"},
+    ],
+    ids=["batch", "tail-sampling", "spool"],
+)
+def test_every_forked_worker_exports(
+    clean_environment, otlp_receiver, tmp_path, pipeline_env
+):
+    """Test that workers forked after initialization each export their own spans."""
+    for name, value in pipeline_env.items():
+        os.environ[name] = value.format(tmp_path=tmp_path)
+    os.environ[env_vars.AMP_EXPORT_INTERVAL_MS] = "50"
+
+    processor = build_span_processor(otlp_receiver.endpoint, {"x-amp-api-key": "key"})
+    provider = TracerProvider()
+    provider.add_span_processor(processor)
+    tracer = provider.get_tracer("test")
+    try:
+        # Export from the parent first so that it holds a live connection
+        with tracer.start_as_current_span("parent") as span:
+            span.set_attribute("worker.pid", os.getpid())
+        assert processor.force_flush(10000)
+
+        sys.stdout.flush()
+        sys.stderr.flush()
+        children = []
+        for _ in range(WORKERS):
+            pid = os.fork()
+            if pid == 0:
+                os._exit(_run_worker(tracer, processor))
+            children.append(pid)
+
+        for pid in children:
+            _, status = os.waitpid(pid, 0)
+            assert os.waitstatus_to_exitcode(status) == 0
+
+        received = sorted(
+            span_attributes(span)["worker.pid"] for span in otlp_receiver.spans
+        )
+        assert received == sorted([os.getpid(), *children])
+        assert amp_instrumentation.stats()["export"]["spans_exported"] == 1
+    finally:
+        processor.shutdown()
+        for name in ("export", "tail_sampling", "spool"):
+            _stats.unregister(name)
@@ -18,10 +18,21 @@
 
 import os
 import pytest
+import amp_instrumentation
+from amp_instrumentation import _stats
 from amp_instrumentation._bootstrap import initialization
 from amp_instrumentation._bootstrap import constants as env_vars
 
 
+def _inner_processor(mock_traceloop):
+    """Return the span processor chain below the default stream aggregator."""
+    from amp_instrumentation.streaming import StreamAggregationSpanProcessor
+
+    processor = mock_traceloop.init_kwargs["processor"]
+    assert isinstance(processor, StreamAggregationSpanProcessor)
+    return processor._next
+
+
 class TestGetRequiredEnvVar:
     """Test the _get_required_env_var helper function."""
 
@@ -66,3 +77,667 @@ class TestInitializeInstrumentation:
         assert mock_traceloop.initialized is True
         assert mock_traceloop.init_kwargs["api_endpoint"] == "https://otel.example.com"
         assert mock_traceloop.init_kwargs["headers"]["x-amp-api-key"] == "test-key"
+
+    def test_instruments_default_to_all(self, clean_environment, mock_traceloop):
+        """Test that no allowlist or denylist is passed when the env vars are unset."""
+        os.environ[env_vars.AMP_OTEL_ENDPOINT] = "https://otel.example.com"
+        os.environ[env_vars.AMP_AGENT_API_KEY] = "test-key"
+        initialization._initialized = False
+
+        initialization.initialize_instrumentation()
+
+        assert mock_traceloop.init_kwargs["instruments"] is None
+        assert mock_traceloop.init_kwargs["block_instruments"] is None
+
+    def test_instrument_allowlist_and_denylist(self, clean_environment, mock_traceloop):
+        """Test that AMP_INSTRUMENTS and AMP_DISABLE_INSTRUMENTS map to Traceloop sets."""
+        os.environ[env_vars.AMP_OTEL_ENDPOINT] = "https://otel.example.com"
+        os.environ[env_vars.AMP_AGENT_API_KEY] = "test-key"
+        os.environ[env_vars.AMP_INSTRUMENTS] = "OpenAI, langchain,requests"
+        os.environ[env_vars.AMP_DISABLE_INSTRUMENTS] = "requests"
+        initialization._initialized = False
+
+        initialization.initialize_instrumentation()
+
+        instruments = {i.value for i in mock_traceloop.init_kwargs["instruments"]}
+        blocked = {i.value for i in mock_traceloop.init_kwargs["block_instruments"]}
+        assert instruments == {"openai", "langchain", "requests"}
+        assert blocked == {"requests"}
+
+    def test_unknown_instrument_raises_error(self, clean_environment, mock_traceloop):
+        """Test that an unsupported instrument name is reported as a configuration error."""
+        os.environ[env_vars.AMP_OTEL_ENDPOINT] = "https://otel.example.com"
+        os.environ[env_vars.AMP_AGENT_API_KEY] = "test-key"
+        os.environ[env_vars.AMP_INSTRUMENTS] = "openai,not-a-library"
+        initialization._initialized = False
+
+        with pytest.raises(initialization.ConfigurationError) as exc_info:
+            initialization.initialize_instrumentation()
+
+        assert "not-a-library" in str(exc_info.value)
+        assert mock_traceloop.initialized is False
+
+    def test_sampler_not_set_by_default(self, clean_environment, mock_traceloop):
+        """Test that every trace is kept when no sample ratio is configured."""
+        os.environ[env_vars.AMP_OTEL_ENDPOINT] = "https://otel.example.com"
+        os.environ[env_vars.AMP_AGENT_API_KEY] = "test-key"
+        initialization._initialized = False
+
+        initialization.initialize_instrumentation()
+
+        assert mock_traceloop.init_kwargs["sampler"] is None
+
+    def test_sample_ratio_configures_sampler(self, clean_environment, mock_traceloop):
+        """Test that AMP_TRACE_SAMPLE_RATIO installs a parent-based rule sampler."""
+        os.environ[env_vars.AMP_OTEL_ENDPOINT] = "https://otel.example.com"
+        os.environ[env_vars.AMP_AGENT_API_KEY] = "test-key"
+        os.environ[env_vars.AMP_TRACE_SAMPLE_RATIO] = "0.25"
+        os.environ[env_vars.AMP_TRACE_SAMPLE_ALWAYS] = "POST /chat"
+        initialization._initialized = False
+
+        initialization.initialize_instrumentation()
+
+        description = mock_traceloop.init_kwargs["sampler"].get_description()
+        assert description.startswith("ParentBased")
+        assert "ratio=0.25" in description
+        assert "POST /chat" in description
+
+    def test_metrics_wrap_pipeline_and_record_unsampled(
+        self, clean_environment, mock_traceloop
+    ):
+        """Test that AMP_METRICS wraps the pipeline and records sampled-out spans."""
+        from opentelemetry.sdk.trace.sampling import Decision
+
+        from amp_instrumentation.metrics import LLMMetricsSpanProcessor
+
+        os.environ[env_vars.AMP_OTEL_ENDPOINT] = "https://otel.example.com"
+        os.environ[env_vars.AMP_AGENT_API_KEY] = "test-key"
+        os.environ[env_vars.AMP_TRACE_SAMPLE_RATIO] = "0"
+        os.environ[env_vars.AMP_METRICS] = "true"
+        initialization._initialized = False
+
+        initialization.initialize_instrumentation()
+
+        processor = mock_traceloop.init_kwargs["processor"]
+        try:
+            assert isinstance(processor, LLMMetricsSpanProcessor)
+            sampler = mock_traceloop.init_kwargs["sampler"]
+            result = sampler.should_sample(None, 1, "POST /chat")
+            assert result.decision is Decision.RECORD_ONLY
+            # Traceloop's own instrumentor metrics stay off
+            assert os.environ[env_vars.TRACELOOP_METRICS_ENABLED] == "false"
+        finally:
+            processor.shutdown()
+            _stats.unregister("export")
+
+    def test_invalid_metrics_temporality_raises_error(
+        self, clean_environment, mock_traceloop
+    ):
+        """Test that an unknown metrics temporality is rejected."""
+        os.environ[env_vars.AMP_OTEL_ENDPOINT] = "https://otel.example.com"
+        os.environ[env_vars.AMP_AGENT_API_KEY] = "test-key"
+        os.environ[env_vars.AMP_METRICS] = "true"
+        os.environ[env_vars.AMP_METRICS_TEMPORALITY] = "monotonic"
+        initialization._initialized = False
+
+        with pytest.raises(initialization.ConfigurationError) as exc_info:
+            initialization.initialize_instrumentation()
+
+        assert env_vars.AMP_METRICS_TEMPORALITY in str(exc_info.value)
+        _stats.unregister("export")
+
+    @pytest.mark.parametrize("ratio", ["1.5", "-0.1", "half"])
+    def test_invalid_sample_ratio_raises_error(
+        self, clean_environment, mock_traceloop, ratio
+    ):
+        """Test that out-of-range or non-numeric ratios are rejected."""
+        os.environ[env_vars.AMP_OTEL_ENDPOINT] = "https://otel.example.com"
+        os.environ[env_vars.AMP_AGENT_API_KEY] = "test-key"
+        os.environ[env_vars.AMP_TRACE_SAMPLE_RATIO] = ratio
+        initialization._initialized = False
+
+        with pytest.raises(initialization.ConfigurationError) as exc_info:
+            initialization.initialize_instrumentation()
+
+        assert env_vars.AMP_TRACE_SAMPLE_RATIO in str(exc_info.value)
+
+    def test_default_pipeline_is_monitored(self, clean_environment, mock_traceloop):
+        """Test that spans are exported through the monitored batch processor."""
+        from amp_instrumentation.export import MonitoredBatchSpanProcessor
+
+        os.environ[env_vars.AMP_OTEL_ENDPOINT] = "https://otel.example.com"
+        os.environ[env_vars.AMP_AGENT_API_KEY] = "test-key"
+        initialization._initialized = False
+
+        initialization.initialize_instrumentation()
+
+        processor = _inner_processor(mock_traceloop)
+        try:
+            assert isinstance(processor, MonitoredBatchSpanProcessor)
+            assert amp_instrumentation.stats()["export"]["max_queue_size"] == 2048
+            assert amp_instrumentation.stats()["circuit_breaker"]["state"] == "closed"
+            assert "adaptive_sampling" not in amp_instrumentation.stats()
+        finally:
+            processor.shutdown()
+            _stats.unregister("circuit_breaker")
+            _stats.unregister("export")
+
+    def test_export_tuning_env_vars(self, clean_environment, mock_traceloop):
+        """Test that AMP_EXPORT_* settings reach the batch processor."""
+        os.environ[env_vars.AMP_OTEL_ENDPOINT] = "https://otel.example.com"
+        os.environ[env_vars.AMP_AGENT_API_KEY] = "test-key"
+        os.environ[env_vars.AMP_EXPORT_MAX_QUEUE] = "8192"
+        os.environ[env_vars.AMP_EXPORT_BATCH_SIZE] = "1024"
+        os.environ[env_vars.AMP_EXPORT_INTERVAL_MS] = "250"
+        os.environ[env_vars.AMP_EXPORT_TIMEOUT_MS] = "2000"
+        initialization._initialized = False
+
+        initialization.initialize_instrumentation()
+
+        processor = _inner_processor(mock_traceloop)
+        try:
+            batch = processor._batch_processor
+            assert batch._max_queue_size == 8192
+            assert batch._max_export_batch_size == 1024
+            assert batch._schedule_delay == 0.25
+            assert batch._export_timeout_millis == 2000
+        finally:
+            processor.shutdown()
+            _stats.unregister("export")
+
+    def test_batch_larger_than_queue_raises_error(
+        self, clean_environment, mock_traceloop
+    ):
+        """Test that an export batch larger than the queue is rejected."""
+        os.environ[env_vars.AMP_OTEL_ENDPOINT] = "https://otel.example.com"
+        os.environ[env_vars.AMP_AGENT_API_KEY] = "test-key"
+        os.environ[env_vars.AMP_EXPORT_MAX_QUEUE] = "100"
+        os.environ[env_vars.AMP_EXPORT_BATCH_SIZE] = "200"
+        initialization._initialized = False
+
+        with pytest.raises(initialization.ConfigurationError):
+            initialization.initialize_instrumentation()
+
+    def test_adaptive_sampling_binds_to_export_queue(
+        self, clean_environment, mock_traceloop
+    ):
+        """Test that AMP_EXPORT_ADAPTIVE_SAMPLING throttles the head sampler."""
+        os.environ[env_vars.AMP_OTEL_ENDPOINT] = "https://otel.example.com"
+        os.environ[env_vars.AMP_AGENT_API_KEY] = "test-key"
+        os.environ[env_vars.AMP_EXPORT_ADAPTIVE_SAMPLING] = "1"
+        os.environ[env_vars.AMP_EXPORT_CIRCUIT_FAILURES] = "5"
+        initialization._initialized = False
+
+        initialization.initialize_instrumentation()
+
+        processor = _inner_processor(mock_traceloop)
+        try:
+            description = mock_traceloop.init_kwargs["sampler"].get_description()
+            assert "ratio=1.0" in description
+            assert "adaptive" in description
+            stats = amp_instrumentation.stats()
+            assert stats["adaptive_sampling"]["sampling_factor"] == 1.0
+            assert processor._circuit_breaker._failure_threshold == 5
+        finally:
+            processor.shutdown()
+            _stats.unregister("adaptive_sampling")
+            _stats.unregister("circuit_breaker")
+            _stats.unregister("export")
+
+    def test_inverted_water_marks_raise_error(self, clean_environment, mock_traceloop):
+        """Test that a low-water mark above the high-water mark is rejected."""
+        os.environ[env_vars.AMP_OTEL_ENDPOINT] = "https://otel.example.com"
+        os.environ[env_vars.AMP_AGENT_API_KEY] = "test-key"
+        os.environ[env_vars.AMP_EXPORT_ADAPTIVE_SAMPLING] = "1"
+        os.environ[env_vars.AMP_EXPORT_HIGH_WATER] = "0.5"
+        os.environ[env_vars.AMP_EXPORT_LOW_WATER] = "0.6"
+        initialization._initialized = False
+
+        with pytest.raises(initialization.ConfigurationError) as exc_info:
+            initialization.initialize_instrumentation()
+
+        assert env_vars.AMP_EXPORT_LOW_WATER in str(exc_info.value)
+
+    def test_tail_sampling_installs_processor(self, clean_environment, mock_traceloop):
+        """Test that AMP_TAIL_SAMPLING wires a tail sampler and exposes its stats."""
+        from amp_instrumentation.tail_sampling import TailSamplingSpanProcessor
+
+        os.environ[env_vars.AMP_OTEL_ENDPOINT] = "https://otel.example.com"
+        os.environ[env_vars.AMP_AGENT_API_KEY] = "test-key"
+        os.environ[env_vars.AMP_TAIL_SAMPLING] = "1"
+        os.environ[env_vars.AMP_TAIL_MAX_BUFFERED_SPANS] = "500"
+        initialization._initialized = False
+
+        initialization.initialize_instrumentation()
+
+        processor = _inner_processor(mock_traceloop)
+        try:
+            assert isinstance(processor, TailSamplingSpanProcessor)
+            tail_stats = amp_instrumentation.stats()["tail_sampling"]
+            assert tail_stats["max_buffered_spans"] == 500
+            assert tail_stats["buffered_spans"] == 0
+        finally:
+            processor.shutdown()
+            _stats.unregister("tail_sampling")
+            _stats.unregister("export")
+
+    def test_spool_dir_installs_spooling_exporter(
+        self, clean_environment, mock_traceloop, tmp_path
+    ):
+        """Test that AMP_SPOOL_DIR exports through the disk-spooling exporter."""
+        from amp_instrumentation.spool import SpoolingSpanExporter
+
+        os.environ[env_vars.AMP_OTEL_ENDPOINT] = "https://otel.example.com"
+        os.environ[env_vars.AMP_AGENT_API_KEY] = "test-key"
+        os.environ[env_vars.AMP_SPOOL_DIR] = str(tmp_path)
+        initialization._initialized = False
+
+        initialization.initialize_instrumentation()
+
+        processor = _inner_processor(mock_traceloop)
+        try:
+            exporter = processor._monitored_exporter.exporter
+            assert isinstance(exporter, SpoolingSpanExporter)
+            assert exporter._endpoint == "https://otel.example.com/v1/traces"
+            assert amp_instrumentation.stats()["spool"]["spooled_segments"] == 0
+        finally:
+            processor.shutdown()
+            _stats.unregister("spool")
+            _stats.unregister("export")
+
+    def test_spool_dir_requires_http_endpoint(
+        self, clean_environment, mock_traceloop, tmp_path
+    ):
+        """Test that spooling is rejected for gRPC endpoints."""
+        os.environ[env_vars.AMP_OTEL_ENDPOINT] = "grpc://otel.example.com:4317"
+        os.environ[env_vars.AMP_AGENT_API_KEY] = "test-key"
+        os.environ[env_vars.AMP_SPOOL_DIR] = str(tmp_path)
+        initialization._initialized = False
+
+        with pytest.raises(initialization.ConfigurationError) as exc_info:
+            initialization.initialize_instrumentation()
+
+        assert env_vars.AMP_SPOOL_DIR in str(exc_info.value)
+
+    def test_size_limits_install_truncating_processor(
+        self, clean_environment, mock_traceloop
+    ):
+        """Test that AMP_TRACE_MAX_* settings wrap the pipeline in a truncator."""
+        from amp_instrumentation.truncation import TruncatingSpanProcessor
+
+        os.environ[env_vars.AMP_OTEL_ENDPOINT] = "https://otel.example.com"
+        os.environ[env_vars.AMP_AGENT_API_KEY] = "test-key"
+        os.environ[env_vars.AMP_TRACE_MAX_ATTR_BYTES] = "4096"
+        os.environ[env_vars.AMP_TRACE_MAX_SPAN_BYTES] = "65536"
+        initialization._initialized = False
+
+        initialization.initialize_instrumentation()
+
+        processor = _inner_processor(mock_traceloop)
+        try:
+            assert isinstance(processor, TruncatingSpanProcessor)
+            truncation_stats = amp_instrumentation.stats()["truncation"]
+            assert truncation_stats["max_attribute_bytes"] == 4096
+            assert truncation_stats["max_event_bytes"] == 0
+            assert truncation_stats["max_span_bytes"] == 65536
+        finally:
+            processor.shutdown()
+            _stats.unregister("truncation")
+            _stats.unregister("export")
+
+    def test_span_profiling_installs_processor(self, clean_environment, mock_traceloop):
+        """Test that AMP_SPAN_PROFILING wraps the pipeline in a span profiler."""
+        from amp_instrumentation.span_profiler import SpanProfilingProcessor
+
+        os.environ[env_vars.AMP_OTEL_ENDPOINT] = "https://otel.example.com"
+        os.environ[env_vars.AMP_AGENT_API_KEY] = "test-key"
+        os.environ[env_vars.AMP_SPAN_PROFILING] = "true"
+        os.environ[env_vars.AMP_SPAN_PROFILING_HZ] = "200"
+        initialization._initialized = False
+
+        initialization.initialize_instrumentation()
+
+        processor = _inner_processor(mock_traceloop)
+        try:
+            assert isinstance(processor, SpanProfilingProcessor)
+            assert amp_instrumentation.stats()["span_profiler"]["sample_hz"] == 200
+        finally:
+            processor.shutdown()
+            _stats.unregister("span_profiler")
+            _stats.unregister("export")
+
+    def test_size_limits_cap_profiler_stacks(
+        self, clean_environment, mock_traceloop, otlp_receiver
+    ):
+        """Test that stacks attached by the span profiler are truncated too."""
+        import time
+
+        from amp_instrumentation.span_profiler import STACKS_ATTRIBUTE
+        from opentelemetry.sdk.trace import TracerProvider
+
+        os.environ[env_vars.AMP_OTEL_ENDPOINT] = otlp_receiver.endpoint
+        os.environ[env_vars.AMP_AGENT_API_KEY] = "test-key"
+        os.environ[env_vars.AMP_SPAN_PROFILING] = "true"
+        os.environ[env_vars.AMP_SPAN_PROFILING_HZ] = "500"
+        os.environ[env_vars.AMP_TRACE_MAX_ATTR_BYTES] = "48"
+        initialization._initialized = False
+
+        initialization.initialize_instrumentation()
+
+        processor = mock_traceloop.init_kwargs["processor"]
+        provider = TracerProvider()
+        provider.add_span_processor(processor)
+        try:
+            with provider.get_tracer("test").start_as_current_span("search"):
+                deadline = time.perf_counter() + 0.2
+                while time.perf_counter() < deadline:
+                    sum(i * i for i in range(1000))
+            assert processor.force_flush(5000)
+        finally:
+            processor.shutdown()
+            for name in ("span_profiler", "truncation", "export"):
+                _stats.unregister(name)
+
+        (span,) = otlp_receiver.spans
+        (stacks,) = [
+            attribute.value.array_value.values
+            for attribute in span.attributes
+            if attribute.key == STACKS_ATTRIBUTE
+        ]
+        assert stacks
+        for stack in stacks:
+            assert len(stack.string_value.encode("utf-8")) <= 48
+            assert "[truncated from" in stack.string_value
+
+    def test_trace_memory_installs_processor(self, clean_environment, mock_traceloop):
+        """Test that AMP_TRACE_MEMORY wraps the pipeline in a memory tracker."""
+        from amp_instrumentation.memory import MemoryTrackingSpanProcessor
+
+        os.environ[env_vars.AMP_OTEL_ENDPOINT] = "https://otel.example.com"
+        os.environ[env_vars.AMP_AGENT_API_KEY] = "test-key"
+        os.environ[env_vars.AMP_TRACE_MEMORY] = "1"
+        os.environ[env_vars.AMP_TRACE_MEMORY_SAMPLE_RATIO] = "0.5"
+        os.environ[env_vars.AMP_TRACE_MEMORY_SPAN_KINDS] = "tool,llm"
+        initialization._initialized = False
+
+        initialization.initialize_instrumentation()
+
+        processor = _inner_processor(mock_traceloop)
+        try:
+            assert isinstance(processor, MemoryTrackingSpanProcessor)
+            assert processor._span_kinds == {"tool", "llm"}
+            memory_stats = amp_instrumentation.stats()["memory"]
+            assert memory_stats["source"] == "tracemalloc"
+            assert memory_stats["sample_ratio"] == 0.5
+        finally:
+            processor.shutdown()
+            _stats.unregister("memory")
+            _stats.unregister("export")
+
+    def test_invalid_trace_memory_source_raises_error(
+        self, clean_environment, mock_traceloop
+    ):
+        """Test that an unknown memory source is rejected."""
+        os.environ[env_vars.AMP_OTEL_ENDPOINT] = "https://otel.example.com"
+        os.environ[env_vars.AMP_AGENT_API_KEY] = "test-key"
+        os.environ[env_vars.AMP_TRACE_MEMORY] = "1"
+        os.environ[env_vars.AMP_TRACE_MEMORY_SOURCE] = "heap"
+        initialization._initialized = False
+
+        with pytest.raises(initialization.ConfigurationError) as exc_info:
+            initialization.initialize_instrumentation()
+
+        assert env_vars.AMP_TRACE_MEMORY_SOURCE in str(exc_info.value)
+        _stats.unregister("export")
+
+    def test_loop_monitor_installs_processor(self, clean_environment, mock_traceloop):
+        """Test that AMP_LOOP_MONITOR wraps the pipeline in an event loop monitor."""
+        from amp_instrumentation.loop_monitor import EventLoopMonitorSpanProcessor
+
+        os.environ[env_vars.AMP_OTEL_ENDPOINT] = "https://otel.example.com"
+        os.environ[env_vars.AMP_AGENT_API_KEY] = "test-key"
+        os.environ[env_vars.AMP_LOOP_MONITOR] = "1"
+        os.environ[env_vars.AMP_LOOP_BLOCK_THRESHOLD_MS] = "250"
+        initialization._initialized = False
+
+        initialization.initialize_instrumentation()
+
+        processor = _inner_processor(mock_traceloop)
+        try:
+            assert isinstance(processor, EventLoopMonitorSpanProcessor)
+            loop_stats = amp_instrumentation.stats()["event_loop"]
+            assert loop_stats["block_threshold_ms"] == 250
+            assert loop_stats["loops_monitored"] == 0
+        finally:
+            processor.shutdown()
+            _stats.unregister("event_loop")
+            _stats.unregister("export")
+
+    def test_stream_aggregation_can_be_disabled(
+        self, clean_environment, mock_traceloop
+    ):
+        """Test that AMP_STREAM_AGGREGATION=0 leaves chunk events as recorded."""
+        from amp_instrumentation.export import MonitoredBatchSpanProcessor
+
+        os.environ[env_vars.AMP_OTEL_ENDPOINT] = "https://otel.example.com"
+        os.environ[env_vars.AMP_AGENT_API_KEY] = "test-key"
+        os.environ[env_vars.AMP_STREAM_AGGREGATION] = "0"
+        _stats.unregister("streaming")
+        initialization._initialized = False
+
+        initialization.initialize_instrumentation()
+
+        processor = mock_traceloop.init_kwargs["processor"]
+        try:
+            assert isinstance(processor, MonitoredBatchSpanProcessor)
+            assert "streaming" not in amp_instrumentation.stats()
+        finally:
+            processor.shutdown()
+            _stats.unregister("circuit_breaker")
+            _stats.unregister("export")
+
+    def test_trace_propagation_can_be_disabled(self, clean_environment, mock_traceloop):
+        """Test that AMP_TRACE_PROPAGATION=0 stops injecting trace context headers."""
+        from opentelemetry import propagate
+
+        os.environ[env_vars.AMP_OTEL_ENDPOINT] = "https://otel.example.com"
+        os.environ[env_vars.AMP_AGENT_API_KEY] = "test-key"
+        os.environ[env_vars.AMP_TRACE_PROPAGATION] = "0"
+        initialization._initialized = False
+        previous = propagate.get_global_textmap()
+
+        initialization.initialize_instrumentation()
+
+        processor = mock_traceloop.init_kwargs["processor"]
+        try:
+            assert "traceparent" in previous.fields
+            assert not propagate.get_global_textmap().fields
+        finally:
+            propagate.set_global_textmap(previous)
+            processor.shutdown()
+            _stats.unregister("streaming")
+            _stats.unregister("circuit_breaker")
+            _stats.unregister("export")
+
+    def test_redact_pii_installs_processor(self, clean_environment, mock_traceloop):
+        """Test that AMP_REDACT_PII wraps the pipeline in a redacting processor."""
+        from amp_instrumentation.redaction import RedactingSpanProcessor
+
+        os.environ[env_vars.AMP_OTEL_ENDPOINT] = "https://otel.example.com"
+        os.environ[env_vars.AMP_AGENT_API_KEY] = "test-key"
+        os.environ[env_vars.AMP_REDACT_PII] = "1"
+        os.environ[env_vars.AMP_REDACT_PII_TYPES] = "Email,card"
+        initialization._initialized = False
+
+        initialization.initialize_instrumentation()
+
+        processor = mock_traceloop.init_kwargs["processor"]
+        try:
+            assert isinstance(processor, RedactingSpanProcessor)
+            assert processor._redactor.kinds == ("email", "card")
+            assert amp_instrumentation.stats()["redaction"]["spans_redacted"] == 0
+        finally:
+            processor.shutdown()
+            _stats.unregister("redaction")
+            _stats.unregister("circuit_breaker")
+            _stats.unregister("export")
+
+    def test_invalid_pii_types_raise_error(self, clean_environment, mock_traceloop):
+        """Test that unknown PII types are rejected."""
+        os.environ[env_vars.AMP_OTEL_ENDPOINT] = "https://otel.example.com"
+        os.environ[env_vars.AMP_AGENT_API_KEY] = "test-key"
+        os.environ[env_vars.AMP_REDACT_PII] = "1"
+        os.environ[env_vars.AMP_REDACT_PII_TYPES] = "email,ssn"
+        initialization._initialized = False
+
+        with pytest.raises(initialization.ConfigurationError) as exc_info:
+            initialization.initialize_instrumentation()
+
+        assert env_vars.AMP_REDACT_PII_TYPES in str(exc_info.value)
+        _stats.unregister("circuit_breaker")
+        _stats.unregister("export")
+
+    def test_collapse_spans_installs_processor(self, clean_environment, mock_traceloop):
+        """Test that AMP_COLLAPSE_SPANS wraps the pipeline in a collapsing processor."""
+        from amp_instrumentation.collapse import ATTRIBUTES, CollapsingSpanProcessor
+
+        os.environ[env_vars.AMP_OTEL_ENDPOINT] = "https://otel.example.com"
+        os.environ[env_vars.AMP_AGENT_API_KEY] = "test-key"
+        os.environ[env_vars.AMP_COLLAPSE_SPANS] = "Runnable*, ChannelWrite*"
+        os.environ[env_vars.AMP_COLLAPSE_DEPTH] = "4"
+        os.environ[env_vars.AMP_COLLAPSE_MODE] = "Attributes"
+        initialization._initialized = False
+
+        initialization.initialize_instrumentation()
+
+        processor = mock_traceloop.init_kwargs["processor"]
+        try:
+            assert isinstance(processor, CollapsingSpanProcessor)
+            assert processor._patterns == ("Runnable*", "ChannelWrite*")
+            assert processor._max_depth == 4
+            assert processor._mode == ATTRIBUTES
+            assert amp_instrumentation.stats()["collapse"]["spans_collapsed"] == 0
+        finally:
+            processor.shutdown()
+            _stats.unregister("collapse")
+            _stats.unregister("circuit_breaker")
+            _stats.unregister("export")
+
+    def test_invalid_collapse_mode_raises_error(
+        self, clean_environment, mock_traceloop
+    ):
+        """Test that an unknown collapse mode is rejected."""
+        os.environ[env_vars.AMP_OTEL_ENDPOINT] = "https://otel.example.com"
+        os.environ[env_vars.AMP_AGENT_API_KEY] = "test-key"
+        os.environ[env_vars.AMP_COLLAPSE_DEPTH] = "3"
+        os.environ[env_vars.AMP_COLLAPSE_MODE] = "drop"
+        initialization._initialized = False
+
+        with pytest.raises(initialization.ConfigurationError) as exc_info:
+            initialization.initialize_instrumentation()
+
+        assert env_vars.AMP_COLLAPSE_MODE in str(exc_info.value)
+        _stats.unregister("circuit_breaker")
+        _stats.unregister("export")
+
+    def test_http_export_uses_gzip_by_default(self, clean_environment, mock_traceloop):
+        """Test that http(s) endpoints get a gzip-compressed OTLP/HTTP exporter."""
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import (
+            OTLPSpanExporter,
+        )
+
+        os.environ[env_vars.AMP_OTEL_ENDPOINT] = "https://otel.example.com"
+        os.environ[env_vars.AMP_AGENT_API_KEY] = "test-key"
+        initialization._initialized = False
+
+        initialization.initialize_instrumentation()
+
+        processor = _inner_processor(mock_traceloop)
+        try:
+            exporter = processor._monitored_exporter.exporter
+            assert isinstance(exporter, OTLPSpanExporter)
+            assert exporter._compression.value == "gzip"
+        finally:
+            processor.shutdown()
+            _stats.unregister("export")
+
+    def test_grpc_protocol_and_no_compression(self, clean_environment, mock_traceloop):
+        """Test that AMP_EXPORT_PROTOCOL=grpc switches an https endpoint to secure gRPC."""
+        import grpc
+        from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import (
+            OTLPSpanExporter,
+        )
+
+        os.environ[env_vars.AMP_OTEL_ENDPOINT] = "https://otel.example.com:4317"
+        os.environ[env_vars.AMP_AGENT_API_KEY] = "test-key"
+        os.environ[env_vars.AMP_EXPORT_PROTOCOL] = "grpc"
+        os.environ[env_vars.AMP_EXPORT_COMPRESSION] = "none"
+        initialization._initialized = False
+
+        initialization.initialize_instrumentation()
+
+        processor = _inner_processor(mock_traceloop)
+        try:
+            exporter = processor._monitored_exporter.exporter
+            assert isinstance(exporter, OTLPSpanExporter)
+            assert exporter._endpoint == "otel.example.com:4317"
+            assert exporter._insecure is False
+            assert exporter._compression is grpc.Compression.NoCompression
+        finally:
+            processor.shutdown()
+            _stats.unregister("export")
+
+    @pytest.mark.parametrize(
+        "endpoint, setting, value",
+        [
+            ("https://otel.example.com", env_vars.AMP_EXPORT_PROTOCOL, "thrift"),
+            ("grpc://otel.example.com:4317", env_vars.AMP_EXPORT_PROTOCOL, "http"),
+            ("https://otel.example.com", env_vars.AMP_EXPORT_COMPRESSION, "brotli"),
+        ],
+    )
+    def test_invalid_export_protocol_settings_raise_error(
+        self, clean_environment, mock_traceloop, endpoint, setting, value
+    ):
+        """Test that unsupported or mismatched protocol settings are rejected."""
+        os.environ[env_vars.AMP_OTEL_ENDPOINT] = endpoint
+        os.environ[env_vars.AMP_AGENT_API_KEY] = "test-key"
+        os.environ[setting] = value
+        initialization._initialized = False
+
+        with pytest.raises(initialization.ConfigurationError) as exc_info:
+            initialization.initialize_instrumentation()
+
+        assert setting in str(exc_info.value)
+
+    def test_shutdown_hook_uses_timeout(self, clean_environment, mock_traceloop):
+        """Test that the pipeline is registered for a bounded flush at exit."""
+        from amp_instrumentation import shutdown
+
+        os.environ[env_vars.AMP_OTEL_ENDPOINT] = "https://otel.example.com"
+        os.environ[env_vars.AMP_AGENT_API_KEY] = "test-key"
+        os.environ[env_vars.AMP_SHUTDOWN_TIMEOUT_MS] = "1500"
+        initialization._initialized = False
+
+        initialization.initialize_instrumentation()
+
+        processor = mock_traceloop.init_kwargs["processor"]
+        try:
+            assert shutdown._processor is processor
+            assert shutdown._timeout_ms == 1500
+        finally:
+            processor.shutdown()
+            _stats.unregister("export")
+
+    def test_negative_shutdown_timeout_raises_error(
+        self, clean_environment, mock_traceloop
+    ):
+        """Test that a negative AMP_SHUTDOWN_TIMEOUT_MS is rejected."""
+        os.environ[env_vars.AMP_OTEL_ENDPOINT] = "https://otel.example.com"
+        os.environ[env_vars.AMP_AGENT_API_KEY] = "test-key"
+        os.environ[env_vars.AMP_SHUTDOWN_TIMEOUT_MS] = "-1"
+        initialization._initialized = False
+
+        with pytest.raises(initialization.ConfigurationError) as exc_info:
+            initialization.initialize_instrumentation()
+
+        assert env_vars.AMP_SHUTDOWN_TIMEOUT_MS in str(exc_info.value)
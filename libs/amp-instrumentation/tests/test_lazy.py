@@ -0,0 +1,153 @@
+# Copyright (c) 2025, WSO2 LLC. (https://www.wso2.com).
+#
+# WSO2 LLC. licenses this file to you under the Apache License,
+# Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""Tests for lazy, import-triggered initialization."""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+from amp_instrumentation._bootstrap import lazy
+
+
+def _write_module(directory: Path, name: str, body: str = "") -> None:
+    (directory / f"{name}.py").write_text(body)
+
+
+class TestLazyInitFinder:
+    """Test the meta path hook used for lazy initialization."""
+
+    def test_callback_fires_after_watched_import(self, tmp_path, monkeypatch):
+        """Test that the callback runs once the watched module has executed."""
+        _write_module(tmp_path, "amp_lazy_watched", "VALUE = 42\n")
+        monkeypatch.syspath_prepend(str(tmp_path))
+
+        seen = []
+
+        def callback(name):
+            # The module must be fully initialized when the callback runs
+            seen.append((name, sys.modules[name].VALUE))
+
+        finder = lazy.install_lazy_initialization(["amp_lazy_watched"], callback)
+        try:
+            import amp_lazy_watched  # noqa: F401
+
+            assert seen == [("amp_lazy_watched", 42)]
+            assert finder not in sys.meta_path
+            assert amp_lazy_watched.__loader__.__class__ is not lazy._TriggerLoader
+        finally:
+            lazy.uninstall(finder)
+            sys.modules.pop("amp_lazy_watched", None)
+
+    def test_unwatched_import_does_not_fire(self, tmp_path, monkeypatch):
+        """Test that importing an unrelated module leaves the hook installed."""
+        _write_module(tmp_path, "amp_lazy_unrelated")
+        monkeypatch.syspath_prepend(str(tmp_path))
+
+        seen = []
+        finder = lazy.install_lazy_initialization(["amp_lazy_never"], seen.append)
+        try:
+            import amp_lazy_unrelated  # noqa: F401
+
+            assert seen == []
+            assert finder in sys.meta_path
+        finally:
+            lazy.uninstall(finder)
+            sys.modules.pop("amp_lazy_unrelated", None)
+
+    def test_nested_watched_imports_fire_once_after_outermost(
+        self, tmp_path, monkeypatch
+    ):
+        """Test that nested watched imports defer the callback to the outer import."""
+        _write_module(tmp_path, "amp_lazy_inner", "VALUE = 1\n")
+        _write_module(
+            tmp_path, "amp_lazy_outer", "import amp_lazy_inner\nDONE = True\n"
+        )
+        monkeypatch.syspath_prepend(str(tmp_path))
+
+        seen = []
+
+        def callback(name):
+            seen.append((name, getattr(sys.modules["amp_lazy_outer"], "DONE", False)))
+
+        finder = lazy.install_lazy_initialization(
+            ["amp_lazy_outer", "amp_lazy_inner"], callback
+        )
+        try:
+            import amp_lazy_outer  # noqa: F401
+
+            assert seen == [("amp_lazy_outer", True)]
+        finally:
+            lazy.uninstall(finder)
+            sys.modules.pop("amp_lazy_outer", None)
+            sys.modules.pop("amp_lazy_inner", None)
+
+    def test_already_imported_module_fires_immediately(self):
+        """Test that a watched module imported before installation fires at once."""
+        seen = []
+        finder = lazy.install_lazy_initialization(["os"], seen.append)
+
+        assert seen == ["os"]
+        assert finder not in sys.meta_path
+
+
+def test_trigger_modules_filters_by_instrument():
+    """Test that trigger modules can be restricted to selected instruments."""
+    modules = lazy.trigger_modules(["openai", "langchain"])
+    assert modules == {"openai", "langchain", "langchain_core", "langgraph"}
+
+
+def test_trigger_modules_follow_instrument_env_vars(clean_environment):
+    """Test that the default trigger set honours the allowlist and denylist."""
+    os.environ["AMP_INSTRUMENTS"] = "openai,requests"
+    os.environ["AMP_DISABLE_INSTRUMENTS"] = "requests"
+
+    assert lazy.trigger_modules() == {"openai"}
+
+
+def test_sitecustomize_lazy_mode_defers_traceloop_import():
+    """
+    Test that lazy mode skips the Traceloop import until a supported library is imported.
+    """
+    bootstrap_dir = (
+        Path(__file__).parent.parent / "src" / "amp_instrumentation" / "_bootstrap"
+    )
+
+    script = """
+import sys
+import sitecustomize
+from amp_instrumentation._bootstrap import initialization
+assert initialization._initialized is False, "Should not initialize at startup"
+assert "traceloop.sdk" not in sys.modules, "Traceloop should not be imported yet"
+import requests
+assert initialization._initialized is True, "Should initialize on first import"
+print("LAZY_SUCCESS")
+"""
+
+    env = {
+        "PYTHONPATH": str(bootstrap_dir),
+        "AMP_OTEL_ENDPOINT": "https://otel.example.com",
+        "AMP_AGENT_API_KEY": "test-key",
+        "AMP_LAZY_INIT": "1",
+    }
+
+    result = subprocess.run(
+        [sys.executable, "-c", script], env=env, capture_output=True, text=True
+    )
+
+    assert result.returncode == 0, f"Expected success but got: {result.stderr}"
+    assert "LAZY_SUCCESS" in result.stdout
@@ -0,0 +1,143 @@
+# Copyright (c) 2025, WSO2 LLC. (https://www.wso2.com).
+#
+# WSO2 LLC. licenses this file to you under the Apache License,
+# Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""Tests for event loop lag and thread pool monitoring."""
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import (
+    InMemorySpanExporter,
+)
+
+import amp_instrumentation
+from amp_instrumentation.loop_monitor import (
+    BLOCKED_MS_ATTRIBUTE,
+    BLOCKED_SPAN_NAME,
+    BLOCKED_STACK_ATTRIBUTE,
+    EventLoopMonitorSpanProcessor,
+)
+
+
+@pytest.fixture
+def pipeline():
+    exporter = InMemorySpanExporter()
+    provider = TracerProvider()
+    processor = EventLoopMonitorSpanProcessor(
+        SimpleSpanProcessor(exporter),
+        interval_ms=20,
+        block_threshold_ms=100,
+        tracer_provider=provider,
+    )
+    provider.add_span_processor(processor)
+    yield provider.get_tracer("test"), exporter, processor
+    processor.shutdown()
+
+
+def _spans(exporter):
+    return {span.name: span.attributes for span in exporter.get_finished_spans()}
+
+
+def _run_agent(seconds):
+    # Sync work called from an async endpoint, blocking the loop
+    time.sleep(seconds)
+
+
+class TestEventLoopMonitor:
+    """Tests for EventLoopMonitorSpanProcessor."""
+
+    def test_blocking_call_is_reported(self, pipeline):
+        """Test that a blocked loop yields a blocked span and flags the request."""
+        tracer, exporter, processor = pipeline
+
+        async def chat():
+            with tracer.start_as_current_span("POST /chat"):
+                await asyncio.sleep(0.1)
+                _run_agent(0.3)
+            with tracer.start_as_current_span("GET /health"):
+                await asyncio.sleep(0.1)
+
+        asyncio.run(chat())
+
+        spans = _spans(exporter)
+        blocked = spans[BLOCKED_SPAN_NAME]
+        assert blocked[BLOCKED_MS_ATTRIBUTE] >= 250
+        assert "_run_agent (test_loop_monitor.py:" in blocked[BLOCKED_STACK_ATTRIBUTE]
+        assert "chat (test_loop_monitor.py:" in blocked[BLOCKED_STACK_ATTRIBUTE]
+        assert spans["POST /chat"][BLOCKED_MS_ATTRIBUTE] >= 200
+        assert BLOCKED_MS_ATTRIBUTE not in spans["GET /health"]
+
+        stats = processor.stats()
+        assert stats["blocked_episodes"] == 1
+        assert stats["max_lag_ms"] >= 250
+        assert stats["mean_lag_ms"] < stats["max_lag_ms"]
+        assert stats["spans_flagged"] == 1
+        # The heartbeat ends with the loop
+        assert stats["loops_monitored"] == 0
+
+    def test_default_executor_saturation(self, pipeline):
+        """Test that busy and queued default executor work is reported."""
+        _, _, processor = pipeline
+
+        async def main():
+            loop = asyncio.get_running_loop()
+            loop.set_default_executor(ThreadPoolExecutor(max_workers=2))
+            assert amp_instrumentation.monitor_event_loop()
+            jobs = [loop.run_in_executor(None, time.sleep, 0.3) for _ in range(5)]
+            await asyncio.sleep(0.15)
+            stats = processor.stats()
+            await asyncio.gather(*jobs)
+            return stats
+
+        stats = asyncio.run(main())
+
+        assert stats["executor_active"] == 2
+        assert stats["executor_queued"] == 3
+        assert stats["executor_max_workers"] == 2
+        assert stats["blocked_episodes"] == 0
+
+    def test_anyio_thread_limiter(self, pipeline):
+        """Test that anyio worker threads in use and waiting are reported."""
+        to_thread = pytest.importorskip("anyio.to_thread")
+
+        _, _, processor = pipeline
+
+        async def main():
+            to_thread.current_default_thread_limiter().total_tokens = 2
+            amp_instrumentation.monitor_event_loop()
+            jobs = [
+                asyncio.ensure_future(to_thread.run_sync(time.sleep, 0.3))
+                for _ in range(3)
+            ]
+            await asyncio.sleep(0.15)
+            stats = processor.stats()
+            await asyncio.gather(*jobs)
+            return stats
+
+        stats = asyncio.run(main())
+
+        assert stats["threadpool_busy"] == 2
+        assert stats["threadpool_size"] == 2
+        assert stats["threadpool_waiting"] == 1
+
+
+def test_monitor_event_loop_without_monitor():
+    """Test that monitor_event_loop is a no-op when monitoring is disabled."""
+    assert amp_instrumentation.monitor_event_loop(asyncio.new_event_loop()) is False
@@ -0,0 +1,130 @@
+# Copyright (c) 2025, WSO2 LLC. (https://www.wso2.com).
+#
+# WSO2 LLC. licenses this file to you under the Apache License,
+# Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""Tests for per-span memory tracking."""
+
+import tracemalloc
+
+import pytest
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import (
+    InMemorySpanExporter,
+)
+
+from amp_instrumentation import memory
+from amp_instrumentation.memory import (
+    ALLOCATED_BYTES_ATTRIBUTE,
+    PEAK_BYTES_ATTRIBUTE,
+    RSS_DELTA_BYTES_ATTRIBUTE,
+    MemoryTrackingSpanProcessor,
+)
+
+MB = 1024 * 1024
+
+
+def _pipeline(**options):
+    exporter = InMemorySpanExporter()
+    processor = MemoryTrackingSpanProcessor(SimpleSpanProcessor(exporter), **options)
+    provider = TracerProvider()
+    provider.add_span_processor(processor)
+    return provider.get_tracer("test"), exporter, processor
+
+
+def _spans(exporter):
+    return {span.name: span.attributes for span in exporter.get_finished_spans()}
+
+
+@pytest.fixture(autouse=True)
+def no_tracemalloc():
+    assert not tracemalloc.is_tracing()
+    yield
+    tracemalloc.stop()
+
+
+class TestTracemallocSource:
+    """Tests for the tracemalloc source."""
+
+    def test_records_retained_and_peak_bytes(self):
+        """Test that kept and temporary allocations show as allocated and peak."""
+        tracer, exporter, processor = _pipeline()
+        with tracer.start_as_current_span("search_hotels") as span:
+            span.set_attribute("traceloop.span.kind", "tool")
+            kept = b"k" * (4 * MB)
+            temporary = b"t" * (8 * MB)
+            del temporary
+
+        attributes = _spans(exporter)["search_hotels"]
+        assert 4 * MB <= attributes[ALLOCATED_BYTES_ATTRIBUTE] < 5 * MB
+        assert attributes[PEAK_BYTES_ATTRIBUTE] >= 12 * MB
+        assert processor.stats()["spans_measured"] == 1
+        # tracemalloc only runs while measured spans are open
+        assert not tracemalloc.is_tracing()
+        del kept
+
+    def test_nested_spans_keep_their_own_peaks(self):
+        """Test that a peak inside a child span is reported on its parent too."""
+        tracer, exporter, _ = _pipeline()
+        with tracer.start_as_current_span("graph_node") as node:
+            node.set_attribute("traceloop.span.kind", "task")
+            with tracer.start_as_current_span("llm") as llm:
+                llm.set_attribute("gen_ai.system", "openai")
+                temporary = b"t" * (8 * MB)
+                del temporary
+            with tracer.start_as_current_span("tool") as tool:
+                tool.set_attribute("traceloop.span.kind", "tool")
+
+        spans = _spans(exporter)
+        assert spans["llm"][PEAK_BYTES_ATTRIBUTE] >= 8 * MB
+        assert spans["graph_node"][PEAK_BYTES_ATTRIBUTE] >= 8 * MB
+        assert spans["tool"][PEAK_BYTES_ATTRIBUTE] < MB
+
+    def test_unselected_kinds_and_traces_are_unchanged(self):
+        """Test that other span kinds and unsampled traces get no attributes."""
+        tracer, exporter, processor = _pipeline(span_kinds=("llm",))
+        with tracer.start_as_current_span("http") as span:
+            span.set_attribute("traceloop.span.kind", "workflow")
+        tracer, unsampled_exporter, _ = _pipeline(sample_ratio=0.0)
+        with tracer.start_as_current_span("tool") as span:
+            span.set_attribute("traceloop.span.kind", "tool")
+
+        assert ALLOCATED_BYTES_ATTRIBUTE not in _spans(exporter)["http"]
+        assert ALLOCATED_BYTES_ATTRIBUTE not in _spans(unsampled_exporter)["tool"]
+        assert processor.stats()["spans_measured"] == 0
+
+    def test_running_tracemalloc_is_left_running(self):
+        """Test that a tracemalloc session started elsewhere is not stopped."""
+        tracemalloc.start()
+        tracer, exporter, processor = _pipeline(span_kinds=None)
+        with tracer.start_as_current_span("job"):
+            pass
+        processor.shutdown()
+
+        assert tracemalloc.is_tracing()
+        assert PEAK_BYTES_ATTRIBUTE in _spans(exporter)["job"]
+
+
+@pytest.mark.skipif(not memory.rss_supported(), reason="requires /proc")
+def test_rss_source_records_resident_growth():
+    """Test that the rss source reports resident memory gained during a span."""
+    tracer, exporter, processor = _pipeline(source=memory.RSS, span_kinds=None)
+    with tracer.start_as_current_span("ingest"):
+        kept = b"k" * (64 * MB)
+    processor.shutdown()
+
+    assert _spans(exporter)["ingest"][RSS_DELTA_BYTES_ATTRIBUTE] >= 48 * MB
+    assert not tracemalloc.is_tracing()
+    del kept
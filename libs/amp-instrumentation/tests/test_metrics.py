@@ -0,0 +1,238 @@
+# Copyright (c) 2025, WSO2 LLC. (https://www.wso2.com).
+#
+# WSO2 LLC. licenses this file to you under the Apache License,
+# Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""Tests for in-process LLM and tool metrics."""
+
+import pytest
+from opentelemetry.sdk.metrics import Counter, Histogram, MeterProvider
+from opentelemetry.sdk.metrics.export import (
+    AggregationTemporality,
+    InMemoryMetricReader,
+)
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import (
+    InMemorySpanExporter,
+)
+from opentelemetry.trace import Status, StatusCode
+
+from amp_instrumentation import _stats
+from amp_instrumentation._bootstrap.pipeline import build_metric_exporter
+from amp_instrumentation.metrics import (
+    ERRORS_METRIC,
+    OPERATION_DURATION_METRIC,
+    TOKEN_USAGE_METRIC,
+    TOOL_DURATION_METRIC,
+    LLMMetricsSpanProcessor,
+)
+from amp_instrumentation.sampling import build_sampler
+
+_DELTA = {
+    Counter: AggregationTemporality.DELTA,
+    Histogram: AggregationTemporality.DELTA,
+}
+
+
+@pytest.fixture
+def pipeline():
+    reader = InMemoryMetricReader(preferred_temporality=_DELTA)
+    exporter = InMemorySpanExporter()
+    processor = LLMMetricsSpanProcessor(
+        SimpleSpanProcessor(exporter),
+        MeterProvider(metric_readers=[reader], shutdown_on_exit=False),
+    )
+    yield processor, reader, exporter
+    processor.shutdown()
+
+
+def _tracer(processor, sampler=None):
+    provider = TracerProvider(sampler=sampler)
+    provider.add_span_processor(processor)
+    return provider.get_tracer("test")
+
+
+def _points(reader):
+    """Return data points by metric name, each as (attributes, point)."""
+    points = {}
+    data = reader.get_metrics_data()
+    for resource_metrics in data.resource_metrics if data else ():
+        for scope_metrics in resource_metrics.scope_metrics:
+            for metric in scope_metrics.metrics:
+                points[metric.name] = [
+                    (dict(point.attributes), point) for point in metric.data.data_points
+                ]
+    return points
+
+
+def _chat(tracer, model="gpt-4o", prompt_tokens=40, completion_tokens=13):
+    with tracer.start_as_current_span("openai.chat") as span:
+        span.set_attribute("gen_ai.system", "openai")
+        span.set_attribute("gen_ai.request.model", model)
+        span.set_attribute("gen_ai.usage.prompt_tokens", prompt_tokens)
+        span.set_attribute("gen_ai.usage.completion_tokens", completion_tokens)
+
+
+class TestLLMMetricsSpanProcessor:
+    """Tests for LLMMetricsSpanProcessor."""
+
+    def test_llm_token_usage_and_duration(self, pipeline):
+        """Test that LLM spans record tokens by type and latency by model."""
+        processor, reader, exporter = pipeline
+        tracer = _tracer(processor)
+        _chat(tracer)
+        _chat(tracer, prompt_tokens=60, completion_tokens=7)
+        _chat(tracer, model="gpt-4o-mini")
+
+        points = _points(reader)
+        tokens = {
+            (labels["gen_ai.request.model"], labels["gen_ai.token.type"]): point
+            for labels, point in points[TOKEN_USAGE_METRIC]
+        }
+        assert tokens["gpt-4o", "input"].sum == 100
+        assert tokens["gpt-4o", "input"].count == 2
+        assert tokens["gpt-4o", "output"].sum == 20
+        assert tokens["gpt-4o-mini", "input"].sum == 40
+        durations = {
+            labels["gen_ai.request.model"]: point
+            for labels, point in points[OPERATION_DURATION_METRIC]
+        }
+        assert durations["gpt-4o"].count == 2
+        assert durations["gpt-4o"].sum > 0
+        assert len(exporter.get_finished_spans()) == 3
+
+    def test_tool_duration_and_errors(self, pipeline):
+        """Test that tool latency and failures are recorded per tool name."""
+        processor, reader, _ = pipeline
+        tracer = _tracer(processor)
+        with tracer.start_as_current_span("search_hotels.tool") as span:
+            span.set_attribute("traceloop.span.kind", "tool")
+            span.set_attribute("traceloop.entity.name", "search_hotels")
+        with pytest.raises(TimeoutError):
+            with tracer.start_as_current_span("book_hotel.tool") as span:
+                span.set_attribute("traceloop.span.kind", "tool")
+                span.set_attribute("traceloop.entity.name", "book_hotel")
+                raise TimeoutError("hotel API timed out")
+        with tracer.start_as_current_span("graph_node") as span:
+            span.set_attribute("traceloop.span.kind", "task")
+            span.set_status(Status(StatusCode.ERROR))
+
+        points = _points(reader)
+        durations = {
+            labels["gen_ai.tool.name"]: labels
+            for labels, _ in points[TOOL_DURATION_METRIC]
+        }
+        assert set(durations) == {"search_hotels", "book_hotel"}
+        assert durations["book_hotel"]["error.type"] == "TimeoutError"
+        ((labels, errors),) = points[ERRORS_METRIC]
+        assert labels == {
+            "gen_ai.tool.name": "book_hotel",
+            "error.type": "TimeoutError",
+            "amp.span.kind": "tool",
+        }
+        assert errors.value == 1
+
+    def test_delta_temporality(self, pipeline):
+        """Test that each collection only holds the calls since the last one."""
+        processor, reader, _ = pipeline
+        tracer = _tracer(processor)
+        _chat(tracer)
+        _points(reader)
+        _chat(tracer, prompt_tokens=5)
+
+        tokens = {
+            labels["gen_ai.token.type"]: point
+            for labels, point in _points(reader)[TOKEN_USAGE_METRIC]
+        }
+        assert tokens["input"].sum == 5
+        assert tokens["input"].count == 1
+
+    def test_sampled_out_spans_are_counted(self, pipeline):
+        """Test that head-sampled-out LLM calls are counted but not exported."""
+        processor, reader, exporter = pipeline
+        tracer = _tracer(processor, build_sampler(0.0, record_unsampled=True))
+        with tracer.start_as_current_span("POST /chat"):
+            _chat(tracer)
+
+        points = _points(reader)
+        assert points[OPERATION_DURATION_METRIC][0][1].count == 1
+        assert exporter.get_finished_spans() == ()
+
+    def test_pipeline_stats_are_gauges(self):
+        """Test that numeric pipeline stats are exported as gauges."""
+        _stats.register("export", lambda: {"spans_dropped": 3, "protocol": "grpc"})
+        reader = InMemoryMetricReader()
+        try:
+            processor = LLMMetricsSpanProcessor(
+                SimpleSpanProcessor(InMemorySpanExporter()),
+                MeterProvider(metric_readers=[reader], shutdown_on_exit=False),
+            )
+            points = _points(reader)
+            processor.shutdown()
+        finally:
+            _stats.unregister("export")
+
+        assert points["amp.export.spans_dropped"][0][1].value == 3
+        assert "amp.export.protocol" not in points
+
+    def test_stats_gauges_share_one_snapshot(self):
+        """Test that one collection reads stats once and finds later components."""
+        calls = []
+
+        def export_stats():
+            calls.append("export")
+            return {"spans_dropped": 3, "spans_exported": 7}
+
+        _stats.register("export", export_stats)
+        reader = InMemoryMetricReader()
+        try:
+            processor = LLMMetricsSpanProcessor(
+                SimpleSpanProcessor(InMemorySpanExporter()),
+                MeterProvider(metric_readers=[reader], shutdown_on_exit=False),
+            )
+            calls.clear()
+            _stats.register("spool", lambda: {"spans_spooled": 5})
+            points = _points(reader)
+            assert calls == ["export"]
+            assert "amp.spool.spans_spooled" not in points
+
+            with _tracer(processor).start_as_current_span("agent"):
+                pass
+            points = _points(reader)
+            processor.shutdown()
+        finally:
+            _stats.unregister("export")
+            _stats.unregister("spool")
+
+        assert points["amp.export.spans_exported"][0][1].value == 7
+        assert points["amp.spool.spans_spooled"][0][1].value == 5
+
+
+@pytest.mark.parametrize(
+    "temporality, expected",
+    [
+        ("delta", AggregationTemporality.DELTA),
+        ("cumulative", AggregationTemporality.CUMULATIVE),
+    ],
+)
+def test_metric_exporter_temporality(temporality, expected):
+    """Test that counters and histograms use the configured temporality."""
+    exporter = build_metric_exporter(
+        "https://otel.example.com", {}, "http/protobuf", temporality=temporality
+    )
+
+    assert exporter._endpoint == "https://otel.example.com/v1/metrics"
+    assert exporter._preferred_temporality[Histogram] == expected
+    assert exporter._preferred_temporality[Counter] == expected
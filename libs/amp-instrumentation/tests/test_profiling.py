@@ -0,0 +1,197 @@
+# Copyright (c) 2025, WSO2 LLC. (https://www.wso2.com).
+#
+# WSO2 LLC. licenses this file to you under the Apache License,
+# Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""Tests for amp-instrument --profile reports."""
+
+import cProfile
+import json
+import os
+import pstats
+import subprocess
+import sys
+
+import pytest
+from opentelemetry.sdk.trace import TracerProvider
+
+from amp_instrumentation.profiling import (
+    ImportTimer,
+    TraceRecorder,
+    collapse_pstats,
+)
+
+
+def _inner():
+    return sum(i * i for i in range(20000))
+
+
+def _outer():
+    for _ in range(20):
+        _inner()
+
+
+class TestCollapsePstats:
+    """Tests for collapse_pstats."""
+
+    def test_stacks_follow_call_paths(self):
+        """Test that callee time is nested under its caller."""
+        profiler = cProfile.Profile()
+        profiler.enable()
+        _outer()
+        profiler.disable()
+
+        stacks = collapse_pstats(pstats.Stats(profiler))
+
+        inner = [stack for stack in stacks if stack.split(";")[-1].startswith("_inner")]
+        assert inner
+        assert all("_outer" in stack.split(";")[-2] for stack in inner)
+        # Own times add up to (almost) the whole profile
+        total = pstats.Stats(profiler).total_tt  # type: ignore[attr-defined]
+        assert sum(stacks.values()) == pytest.approx(total * 1e6, rel=0.05)
+
+
+class TestImportTimer:
+    """Tests for ImportTimer."""
+
+    def test_records_nested_imports(self, tmp_path, monkeypatch):
+        """Test that nested imports are recorded with their import chain."""
+        package = tmp_path / "amp_profiled_pkg"
+        package.mkdir()
+        (package / "__init__.py").write_text("from . import child\n")
+        (package / "child.py").write_text("VALUE = 1\n")
+        monkeypatch.syspath_prepend(str(tmp_path))
+
+        timer = ImportTimer()
+        timer.install()
+        try:
+            import amp_profiled_pkg
+        finally:
+            timer.uninstall()
+            sys.modules.pop("amp_profiled_pkg", None)
+            sys.modules.pop("amp_profiled_pkg.child", None)
+
+        records = {names[-1]: (depth, names) for depth, names, _, _ in timer.records}
+        assert records["amp_profiled_pkg.child"] == (
+            1,
+            ("amp_profiled_pkg", "amp_profiled_pkg.child"),
+        )
+        assert records["amp_profiled_pkg"][0] == 0
+        # The real loader is visible after import
+        assert type(amp_profiled_pkg.__loader__).__name__ == "SourceFileLoader"
+
+
+class TestTraceRecorder:
+    """Tests for TraceRecorder."""
+
+    def test_records_root_spans_only(self):
+        """Test that only root spans are recorded, up to the limit."""
+        recorder = TraceRecorder(max_traces=2)
+        provider = TracerProvider()
+        provider.add_span_processor(recorder)
+        tracer = provider.get_tracer("test")
+
+        roots = []
+        for _ in range(3):
+            with tracer.start_as_current_span("request") as root:
+                with tracer.start_as_current_span("llm"):
+                    pass
+            roots.append(format(root.get_span_context().trace_id, "032x"))
+
+        assert [trace["name"] for trace in recorder.traces] == ["request", "request"]
+        assert [trace["trace_id"] for trace in recorder.traces] == roots[:2]
+        assert recorder.traces_dropped == 1
+
+
+_WORKLOAD = """
+from traceloop.sdk.decorators import workflow
+
+@workflow(name="request")
+def handle():
+    return sum(i * i for i in range(100000))
+
+handle()
+"""
+
+
+def _run_profiled(mode, code, env):
+    return subprocess.run(
+        [
+            sys.executable,
+            "-m",
+            "amp_instrumentation.cli.main",
+            f"--profile={mode}",
+            "--",
+            sys.executable,
+            "-c",
+            code,
+        ],
+        env=env,
+        capture_output=True,
+        text=True,
+        timeout=60,
+    )
+
+
+def _report(directory, mode):
+    (summary,) = [name for name in os.listdir(directory) if name.endswith(".json")]
+    prefix = os.path.join(directory, summary[: -len(".json")])
+    assert summary.startswith(f"amp-{mode}-")
+    with open(f"{prefix}.json") as file:
+        return prefix, json.load(file)
+
+
+@pytest.mark.parametrize(
+    "mode, report_files",
+    [
+        ("cpu", ("pstats", "collapsed")),
+        ("import", ("txt", "collapsed")),
+        ("alloc", ("txt", "collapsed")),
+    ],
+)
+def test_profile_modes_write_reports(clean_environment, tmp_path, mode, report_files):
+    """Test that each mode writes its report files and summary at exit."""
+    env = dict(os.environ, AMP_PROFILE_DIR=str(tmp_path))
+    code = "import email.mime.text; data = [bytes(100) for _ in range(1000)]"
+    result = _run_profiled(mode, code, env)
+    assert result.returncode == 0, result.stderr
+    assert f"WSO2 AMP {mode} profile written to" in result.stderr
+
+    prefix, summary = _report(tmp_path, mode)
+    for extension in report_files:
+        assert os.path.getsize(f"{prefix}.{extension}") > 0
+    assert summary["mode"] == mode
+    assert summary["traces"] == []
+
+
+def test_profile_is_tagged_with_trace_ids(clean_environment, otlp_receiver, tmp_path):
+    """Test that the summary lists the trace ids of the exported requests."""
+    pytest.importorskip("traceloop.sdk")
+    env = dict(
+        os.environ,
+        AMP_OTEL_ENDPOINT=otlp_receiver.endpoint,
+        AMP_AGENT_API_KEY="test-key",
+        AMP_INSTRUMENTS="requests",
+        AMP_PROFILE_DIR=str(tmp_path),
+    )
+    result = _run_profiled("cpu", _WORKLOAD, env)
+    assert result.returncode == 0, result.stderr
+
+    _, summary = _report(tmp_path, "cpu")
+    exported = {
+        format(int.from_bytes(span.trace_id, "big"), "032x")
+        for span in otlp_receiver.spans
+    }
+    assert [trace["name"] for trace in summary["traces"]] == ["request.workflow"]
+    assert summary["traces"][0]["trace_id"] in exported
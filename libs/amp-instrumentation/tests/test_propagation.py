@@ -0,0 +1,332 @@
+# Copyright (c) 2025, WSO2 LLC. (https://www.wso2.com).
+#
+# WSO2 LLC. licenses this file to you under the Apache License,
+# Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""Tests for trace context propagation into Starlette and FastAPI services."""
+
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+from types import SimpleNamespace
+
+import pytest
+from opentelemetry.proto.trace.v1.trace_pb2 import Span as ProtoSpan
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import (
+    InMemorySpanExporter,
+)
+from opentelemetry.trace import SpanKind, StatusCode
+
+import amp_instrumentation
+from amp_instrumentation.propagation import (
+    ROUTE_ATTRIBUTE,
+    STATUS_CODE_ATTRIBUTE,
+    ServerSpanMiddleware,
+    instrument_starlette,
+)
+from amp_instrumentation.testing import latency_breakdown
+
+_TRACE_ID = 0x4BF92F3577B34DA6A3CE929D0E0E4736
+_PARENT_ID = 0x00F067AA0BA902B7
+_TRACEPARENT = f"00-{_TRACE_ID:032x}-{_PARENT_ID:016x}-01"
+
+
+@pytest.fixture
+def pipeline():
+    exporter = InMemorySpanExporter()
+    provider = TracerProvider()
+    provider.add_span_processor(SimpleSpanProcessor(exporter))
+    yield provider, exporter
+    provider.shutdown()
+
+
+def _request(path="/hotels/search", headers=()):
+    return {
+        "type": "http",
+        "method": "GET",
+        "path": path,
+        "scheme": "http",
+        "headers": [(name.encode(), value.encode()) for name, value in headers],
+    }
+
+
+def _serve(middleware, scope):
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(middleware(scope, None, send))
+    return sent
+
+
+def _endpoint(status=200, route=None, error=None):
+    async def app(scope, receive, send):
+        if route is not None:
+            # Starlette's router records the matched route on the scope
+            scope["route"] = SimpleNamespace(path=route)
+        if error is not None:
+            raise error
+        await send({"type": "http.response.start", "status": status, "headers": []})
+        await send({"type": "http.response.body", "body": b"{}"})
+
+    return app
+
+
+class TestServerSpanMiddleware:
+    """Tests for ServerSpanMiddleware."""
+
+    def test_continues_caller_trace(self, pipeline):
+        """Test that the server span is a child of the span in the traceparent header."""
+        provider, exporter = pipeline
+        middleware = ServerSpanMiddleware(
+            _endpoint(route="/hotels/{hotel_id}"), tracer_provider=provider
+        )
+        sent = _serve(
+            middleware,
+            _request("/hotels/h-42", headers=[("traceparent", _TRACEPARENT)]),
+        )
+
+        assert [message["type"] for message in sent] == [
+            "http.response.start",
+            "http.response.body",
+        ]
+        (span,) = exporter.get_finished_spans()
+        assert span.kind is SpanKind.SERVER
+        assert span.context.trace_id == _TRACE_ID
+        assert span.parent.span_id == _PARENT_ID
+        assert span.parent.is_remote
+        assert span.name == "GET /hotels/{hotel_id}"
+        assert span.attributes[ROUTE_ATTRIBUTE] == "/hotels/{hotel_id}"
+        assert span.attributes[STATUS_CODE_ATTRIBUTE] == 200
+
+    def test_starts_trace_without_header(self, pipeline):
+        """Test that requests without trace context start a new trace."""
+        provider, exporter = pipeline
+        _serve(ServerSpanMiddleware(_endpoint(), tracer_provider=provider), _request())
+
+        (span,) = exporter.get_finished_spans()
+        assert span.parent is None
+        assert span.name == "GET /hotels/search"
+
+    def test_server_errors(self, pipeline):
+        """Test that 5xx responses and exceptions mark the span as failed."""
+        provider, exporter = pipeline
+        _serve(
+            ServerSpanMiddleware(_endpoint(status=503), tracer_provider=provider),
+            _request(),
+        )
+        with pytest.raises(RuntimeError):
+            _serve(
+                ServerSpanMiddleware(
+                    _endpoint(error=RuntimeError("db down")), tracer_provider=provider
+                ),
+                _request(),
+            )
+
+        unavailable, failed = exporter.get_finished_spans()
+        assert unavailable.status.status_code is StatusCode.ERROR
+        assert failed.status.status_code is StatusCode.ERROR
+        assert failed.events[0].name == "exception"
+
+    def test_one_span_per_request(self, pipeline):
+        """Test that mounted applications and suppressed requests add no spans."""
+        provider, exporter = pipeline
+        mounted = ServerSpanMiddleware(
+            ServerSpanMiddleware(_endpoint(), tracer_provider=provider),
+            tracer_provider=provider,
+        )
+        _serve(mounted, _request())
+        assert len(exporter.get_finished_spans()) == 1
+
+        with amp_instrumentation.tracing(False):
+            _serve(mounted, _request())
+        # FastAPI's native telemetry records its server span on the scope
+        traced_by_fastapi = _request()
+        traced_by_fastapi["fastapi.telemetry"] = SimpleNamespace(span=object())
+        _serve(mounted, traced_by_fastapi)
+        assert len(exporter.get_finished_spans()) == 1
+
+
+def test_server_span_follows_tracing_toggle(pipeline):
+    """Test that requests suppressed by an added TracingToggleMiddleware get no span."""
+    pytest.importorskip("starlette")
+    pytest.importorskip("httpx")
+    from starlette.applications import Starlette
+    from starlette.responses import JSONResponse
+    from starlette.routing import Route
+    from starlette.testclient import TestClient
+
+    from amp_instrumentation.toggle import TracingToggleMiddleware
+
+    provider, exporter = pipeline
+    app = Starlette(routes=[Route("/", lambda request: JSONResponse({}))])
+    app.add_middleware(TracingToggleMiddleware, flagged_only=True)
+    # The same wrapping instrument_starlette() applies, with a test provider
+    server = ServerSpanMiddleware(
+        app.build_middleware_stack(), tracer_provider=provider
+    )
+
+    with TestClient(server) as client:
+        assert client.get("/").status_code == 200
+        assert exporter.get_finished_spans() == ()
+        client.get("/", headers={"x-amp-trace": "1"})
+
+    (span,) = exporter.get_finished_spans()
+    assert span.name == "GET /"
+
+
+def test_instrument_starlette_wraps_applications():
+    """Test that FastAPI applications get the middleware unless already instrumented."""
+    fastapi = pytest.importorskip("fastapi")
+    instrument_starlette()
+
+    assert isinstance(fastapi.FastAPI().build_middleware_stack(), ServerSpanMiddleware)
+    instrumented = fastapi.FastAPI()
+    instrumented._is_instrumented_by_opentelemetry = True
+    assert not isinstance(instrumented.build_middleware_stack(), ServerSpanMiddleware)
+
+
+def _proto_span(name, kind, span_id, parent_id, start_ms, end_ms):
+    return ProtoSpan(
+        trace_id=_TRACE_ID.to_bytes(16, "big"),
+        span_id=span_id.to_bytes(8, "big"),
+        parent_span_id=parent_id.to_bytes(8, "big") if parent_id else b"",
+        name=name,
+        kind=kind,
+        start_time_unix_nano=start_ms * 1_000_000,
+        end_time_unix_nano=end_ms * 1_000_000,
+    )
+
+
+def test_latency_breakdown():
+    """Test that client and server spans are paired into network and server time."""
+    spans = [
+        _proto_span("GET /hotels/search", ProtoSpan.SPAN_KIND_SERVER, 3, 2, 104, 184),
+        _proto_span("agent", ProtoSpan.SPAN_KIND_INTERNAL, 1, 0, 0, 300),
+        _proto_span("GET", ProtoSpan.SPAN_KIND_CLIENT, 2, 1, 100, 190),
+        # A server span without a traced caller
+        _proto_span("GET /health", ProtoSpan.SPAN_KIND_SERVER, 4, 0, 200, 201),
+    ]
+
+    (hop,) = latency_breakdown(spans)
+    assert hop.trace_id == f"{_TRACE_ID:032x}"
+    assert (hop.client_span, hop.server_span) == ("GET", "GET /hotels/search")
+    assert hop.client_ms == 90
+    assert hop.server_ms == 80
+    assert hop.network_ms == 10
+    assert (hop.request_ms, hop.response_ms) == (4, 6)
+
+
+_SERVER = """
+import sys, time
+import uvicorn
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+def search(request):
+    time.sleep(0.05)
+    return JSONResponse({"city": request.query_params["city"], "hotels": []})
+
+app = Starlette(routes=[Route("/hotels/search", search)])
+uvicorn.run(app, host="127.0.0.1", port=int(sys.argv[1]), log_level="warning")
+"""
+
+_CLIENT = """
+import sys
+import requests
+
+response = requests.get(
+    f"http://127.0.0.1:{sys.argv[1]}/hotels/search", params={"city": "Kandy"}, timeout=10
+)
+response.raise_for_status()
+"""
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_for_port(port, timeout=30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return True
+        except OSError:
+            time.sleep(0.1)
+    return False
+
+
+@pytest.mark.skipif(os.name == "nt", reason="POSIX process handling required")
+def test_agent_to_api_call_is_one_trace(otlp_receiver):
+    """Test that an instrumented client and Starlette server in two processes share a trace."""
+    pytest.importorskip("starlette")
+    pytest.importorskip("uvicorn")
+    pytest.importorskip("opentelemetry.instrumentation.requests")
+
+    env = {
+        key: value for key, value in os.environ.items() if not key.startswith("AMP_")
+    }
+    env.update(
+        AMP_OTEL_ENDPOINT=otlp_receiver.endpoint,
+        AMP_AGENT_API_KEY="test-api-key",
+        AMP_INSTRUMENTS="requests",
+        AMP_EXPORT_INTERVAL_MS="100",
+    )
+    port = _free_port()
+
+    def launch(script):
+        return subprocess.Popen(
+            [
+                sys.executable,
+                "-m",
+                "amp_instrumentation.cli.main",
+                sys.executable,
+                "-c",
+                script,
+                str(port),
+            ],
+            env=env,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            text=True,
+        )
+
+    server = launch(_SERVER)
+    try:
+        assert _wait_for_port(port), "server did not start"
+        client = launch(_CLIENT)
+        _, client_errors = client.communicate(timeout=60)
+        assert client.returncode == 0, client_errors
+        assert otlp_receiver.wait_for_spans(2, timeout=15)
+    finally:
+        server.terminate()
+        server.communicate(timeout=15)
+
+    (hop,) = latency_breakdown(otlp_receiver.spans)
+    assert hop.server_span == "GET /hotels/search"
+    assert hop.server_ms >= 50
+    # The server span ends after the last body chunk is sent, so it can end
+    # slightly after the client span that received it
+    assert hop.client_ms >= hop.server_ms - 5
+    assert hop.network_ms == pytest.approx(hop.request_ms + hop.response_ms)
@@ -0,0 +1,121 @@
+# Copyright (c) 2025, WSO2 LLC. (https://www.wso2.com).
+#
+# WSO2 LLC. licenses this file to you under the Apache License,
+# Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""Tests for PII redaction of span content."""
+
+import json
+
+import pytest
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import (
+    InMemorySpanExporter,
+)
+
+from amp_instrumentation.redaction import PIIRedactor, RedactingSpanProcessor
+
+
+@pytest.fixture(scope="module")
+def redactor():
+    return PIIRedactor()
+
+
+class TestPIIRedactor:
+    """Tests for PIIRedactor."""
+
+    @pytest.mark.parametrize(
+        "text, expected",
+        [
+            ("mail jane.doe+hotels@example.co.uk", "mail [REDACTED:email]"),
+            ('{"email": "guest@hotel.lk"}', '{"email": "[REDACTED:email]"}'),
+            ("call +94 77 123 4567 now", "call [REDACTED:phone] now"),
+            ("+14155552671", "[REDACTED:phone]"),
+            ("(415) 555-2671", "[REDACTED:phone]"),
+            ("077-123-4567 or 415.555.2671", "[REDACTED:phone] or [REDACTED:phone]"),
+            ('{"phone_number": "0771234567"}', '{"phone_number": "[REDACTED:phone]"}'),
+            ("card 4111 1111 1111 1111", "card [REDACTED:card]"),
+            ("5500-0000-0000-0004;", "[REDACTED:card];"),
+        ],
+    )
+    def test_redacts_personal_data(self, redactor, text, expected):
+        """Test that emails, phone numbers and card numbers are replaced."""
+        assert redactor.redact(text) == expected
+
+    @pytest.mark.parametrize(
+        "text",
+        [
+            "check in 2025-03-01, check out 2025-03-03",
+            "booking 1735689600 for order 12345678901",
+            "card 4111 1111 1111 1112 fails the Luhn check",
+            "room 204 at 120.50 USD, v1.415.555.2671, id abc-415-555-2671",
+            "ask @frontdesk or email us@",
+            "client 192.168.100.200 via 10.255.255.254",
+            "order 0012345678 ref 012345678901",
+        ],
+    )
+    def test_leaves_lookalikes_alone(self, redactor, text):
+        """Test that dates, ids, prices, IP addresses and invalid cards are kept."""
+        assert redactor.redact(text) is text
+
+    def test_kinds_can_be_selected(self):
+        """Test that only the selected kinds are redacted."""
+        text = "guest@hotel.lk +94 77 123 4567 4111111111111111"
+        assert PIIRedactor(["card"]).redact(text) == (
+            "guest@hotel.lk +94 77 123 4567 [REDACTED:card]"
+        )
+        with pytest.raises(ValueError):
+            PIIRedactor(["ssn"])
+
+    def test_repeated_values_are_cached(self):
+        """Test that a repeated value is only scanned once."""
+        redactor = PIIRedactor()
+        prompt = "You are a hotel booking assistant. Contact: help@hotel.lk. " * 100
+
+        results = {redactor.redact(prompt) for _ in range(5)}
+
+        assert len(results) == 1
+        assert redactor.cache_info().hits == 4
+
+
+class TestRedactingSpanProcessor:
+    """Tests for RedactingSpanProcessor."""
+
+    def test_redacts_attributes_and_events(self, redactor):
+        """Test that span and event attributes are redacted before export."""
+        exporter = InMemorySpanExporter()
+        processor = RedactingSpanProcessor(SimpleSpanProcessor(exporter), redactor)
+        provider = TracerProvider()
+        provider.add_span_processor(processor)
+        booking = {"name": "Jane", "email": "jane@example.com", "nights": 2}
+
+        with provider.get_tracer("test").start_as_current_span("book_hotel") as span:
+            span.set_attribute("traceloop.entity.input", json.dumps(booking))
+            span.set_attribute("tags", ["vip", "+94 77 123 4567"])
+            span.set_attribute("nights", 2)
+            span.add_event("guest", {"phone_number": "(415) 555-2671"})
+
+        (finished,) = exporter.get_finished_spans()
+        assert json.loads(finished.attributes["traceloop.entity.input"]) == {
+            "name": "Jane",
+            "email": "[REDACTED:email]",
+            "nights": 2,
+        }
+        assert finished.attributes["tags"] == ("vip", "[REDACTED:phone]")
+        assert finished.attributes["nights"] == 2
+        assert finished.events[0].attributes["phone_number"] == "[REDACTED:phone]"
+        stats = processor.stats()
+        assert stats["spans_redacted"] == 1
+        assert stats["values_redacted"] == 3
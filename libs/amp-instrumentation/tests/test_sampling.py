@@ -0,0 +1,121 @@
+# Copyright (c) 2025, WSO2 LLC. (https://www.wso2.com).
+#
+# WSO2 LLC. licenses this file to you under the Apache License,
+# Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""Tests for head sampling."""
+
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import (
+    InMemorySpanExporter,
+)
+
+from amp_instrumentation.sampling import BackPressureThrottle, build_sampler
+
+
+def _tracer(sampler):
+    exporter = InMemorySpanExporter()
+    provider = TracerProvider(sampler=sampler)
+    provider.add_span_processor(SimpleSpanProcessor(exporter))
+    return provider.get_tracer("test"), exporter
+
+
+class TestBuildSampler:
+    """Test the parent-based rule sampler."""
+
+    def test_zero_ratio_drops_and_skips_recording(self):
+        """Test that sampled-out spans are non-recording and never exported."""
+        tracer, exporter = _tracer(build_sampler(0.0))
+
+        with tracer.start_as_current_span("GET /health") as span:
+            assert span.is_recording() is False
+
+        assert exporter.get_finished_spans() == ()
+
+    def test_full_ratio_keeps_all_traces(self):
+        """Test that a ratio of 1.0 keeps every trace."""
+        tracer, exporter = _tracer(build_sampler(1.0))
+
+        for _ in range(10):
+            with tracer.start_as_current_span("work"):
+                pass
+
+        assert len(exporter.get_finished_spans()) == 10
+
+    def test_always_sample_rule_keeps_matching_roots(self):
+        """Test that roots matching a rule are kept along with their children."""
+        tracer, exporter = _tracer(build_sampler(0.0, ["POST /chat", "*/stream"]))
+
+        with tracer.start_as_current_span("POST /chat"):
+            with tracer.start_as_current_span("openai.chat"):
+                pass
+        with tracer.start_as_current_span("GET /v1/stream"):
+            pass
+        with tracer.start_as_current_span("GET /health"):
+            pass
+
+        names = sorted(span.name for span in exporter.get_finished_spans())
+        assert names == ["GET /v1/stream", "POST /chat", "openai.chat"]
+
+    def test_children_follow_dropped_parent(self):
+        """Test that a rule-matching child of a dropped root is not sampled."""
+        tracer, exporter = _tracer(build_sampler(0.0, ["tool.*"]))
+
+        with tracer.start_as_current_span("GET /health"):
+            with tracer.start_as_current_span("tool.search") as child:
+                assert child.is_recording() is False
+
+        assert exporter.get_finished_spans() == ()
+
+
+class TestBackPressureThrottle:
+    """Test adaptive sampling driven by the export queue."""
+
+    def test_factor_follows_queue_fill(self):
+        """Test that the factor halves above high water and recovers below low water."""
+        reading = {"fill": 0.9, "circuit_open": False}
+        throttle = BackPressureThrottle(min_factor=0.25, adjust_interval=0)
+        throttle.bind(lambda: (reading["fill"], reading["circuit_open"]))
+
+        assert [throttle.factor() for _ in range(3)] == [0.5, 0.25, 0.25]
+        reading["fill"] = 0.5
+        assert throttle.factor() == 0.25
+        reading["fill"] = 0.1
+        assert [throttle.factor() for _ in range(3)] == [0.5, 1.0, 1.0]
+        reading["circuit_open"] = True
+        assert throttle.factor() == 0.5
+        assert throttle.stats()["times_lowered"] == 3
+
+    def test_throttled_sampler_drops_roots_but_keeps_rules(self):
+        """Test that a lowered factor drops most traces, except rule matches."""
+        throttle = BackPressureThrottle(min_factor=1 / 64, adjust_interval=0)
+        throttle.bind(lambda: (1.0, False))
+        for _ in range(6):
+            throttle.factor()
+        tracer, exporter = _tracer(
+            build_sampler(1.0, ["POST /chat"], throttle=throttle)
+        )
+
+        for _ in range(200):
+            with tracer.start_as_current_span("GET /hotels"):
+                with tracer.start_as_current_span("search"):
+                    pass
+        with tracer.start_as_current_span("POST /chat"):
+            pass
+
+        names = [span.name for span in exporter.get_finished_spans()]
+        assert names.count("GET /hotels") < 20
+        assert names.count("search") == names.count("GET /hotels")
+        assert names.count("POST /chat") == 1
@@ -0,0 +1,167 @@
+# Copyright (c) 2025, WSO2 LLC. (https://www.wso2.com).
+#
+# WSO2 LLC. licenses this file to you under the Apache License,
+# Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""Tests for the bounded span flush at exit and on SIGTERM."""
+
+import os
+import signal
+import subprocess
+import sys
+import textwrap
+import time
+
+import pytest
+from opentelemetry.sdk.trace import TracerProvider
+
+from amp_instrumentation import _stats, shutdown
+from amp_instrumentation._bootstrap import constants as env_vars
+from amp_instrumentation._bootstrap.pipeline import build_span_processor
+
+# Emits spans that stay queued (long export interval) and then exits
+_SCRIPT = textwrap.dedent(
+    """
+    import os, signal, sys
+    from opentelemetry.sdk.trace import TracerProvider
+    from amp_instrumentation._bootstrap.pipeline import build_span_processor
+    from amp_instrumentation.shutdown import install_shutdown_hook
+
+    {setup}
+    processor = build_span_processor(sys.argv[1], {{}})
+    install_shutdown_hook(processor, 5000)
+    provider = TracerProvider()
+    provider.add_span_processor(processor)
+    tracer = provider.get_tracer("test")
+    for i in range(10):
+        with tracer.start_as_current_span("job"):
+            pass
+    {exit}
+    """
+)
+
+
+@pytest.fixture
+def pipeline(clean_environment, otlp_receiver, monkeypatch):
+    """A pipeline with a long export interval, installed as the shutdown target."""
+    monkeypatch.setattr(shutdown, "_hooks_installed", True)
+    monkeypatch.setattr(shutdown, "_processor", None)
+    monkeypatch.setattr(shutdown, "_timeout_ms", shutdown._timeout_ms)
+    monkeypatch.setattr(shutdown, "_report", None)
+    os.environ[env_vars.AMP_EXPORT_INTERVAL_MS] = "60000"
+
+    processor = build_span_processor(otlp_receiver.endpoint, {})
+    provider = TracerProvider()
+    provider.add_span_processor(processor)
+    yield processor, provider.get_tracer("test")
+    processor.shutdown()
+    _stats.unregister("export")
+
+
+def _emit(tracer, count):
+    for _ in range(count):
+        with tracer.start_as_current_span("job"):
+            pass
+
+
+class TestShutdownPipeline:
+    """Tests for shutdown_pipeline."""
+
+    def test_flushes_pending_spans(self, pipeline, otlp_receiver):
+        """Test that queued spans are exported and reported as flushed."""
+        processor, tracer = pipeline
+        shutdown.install_shutdown_hook(processor, 5000)
+        _emit(tracer, 10)
+
+        report = shutdown.shutdown_pipeline()
+
+        assert report["spans_flushed"] == 10
+        assert report["spans_dropped"] == 0
+        assert report["timed_out"] is False
+        assert len(otlp_receiver.spans) == 10
+        # Later calls only return the report
+        assert shutdown.shutdown_pipeline() is report
+
+    def test_unresponsive_collector_is_abandoned(self, pipeline, otlp_receiver):
+        """Test that shutdown returns at the deadline and reports the dropped spans."""
+        processor, tracer = pipeline
+        otlp_receiver.response_delay = 5
+        shutdown.install_shutdown_hook(processor, 200)
+        _emit(tracer, 10)
+
+        started = time.monotonic()
+        report = shutdown.shutdown_pipeline()
+
+        assert time.monotonic() - started < 2
+        assert report["timed_out"] is True
+        assert report["spans_flushed"] == 0
+        assert report["spans_dropped"] == 10
+
+        # The TracerProvider exit handler must not block afterwards
+        started = time.monotonic()
+        processor.shutdown()
+        assert time.monotonic() - started < 1
+
+
+@pytest.mark.parametrize(
+    "exit_code, exit_statement",
+    [
+        (0, "pass"),
+        (-signal.SIGTERM, "os.kill(os.getpid(), signal.SIGTERM)"),
+    ],
+    ids=["atexit", "sigterm"],
+)
+def test_process_exit_flushes_spans(
+    clean_environment, otlp_receiver, exit_code, exit_statement
+):
+    """Test that tail spans of a short job are exported when the process ends."""
+    env = dict(os.environ, **{env_vars.AMP_EXPORT_INTERVAL_MS: "60000"})
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            _SCRIPT.format(setup="", exit=exit_statement),
+            otlp_receiver.endpoint,
+        ],
+        env=env,
+        capture_output=True,
+        text=True,
+        timeout=30,
+    )
+
+    assert result.returncode == exit_code, result.stderr
+    assert len(otlp_receiver.spans) == 10
+
+
+@pytest.mark.skipif(os.name == "nt", reason="POSIX signals required")
+def test_sigterm_writes_profile_report(clean_environment, otlp_receiver, tmp_path):
+    """Test that the AMP_PROFILE report registered with atexit is written on SIGTERM."""
+    script = _SCRIPT.format(
+        setup="from amp_instrumentation.profiling import start_profiling; "
+        f"start_profiling('cpu', {str(tmp_path)!r})",
+        exit="os.kill(os.getpid(), signal.SIGTERM)",
+    )
+    env = dict(os.environ, **{env_vars.AMP_EXPORT_INTERVAL_MS: "60000"})
+    result = subprocess.run(
+        [sys.executable, "-c", script, otlp_receiver.endpoint],
+        env=env,
+        capture_output=True,
+        text=True,
+        timeout=30,
+    )
+
+    assert result.returncode == -signal.SIGTERM, result.stderr
+    assert "WSO2 AMP cpu profile written to" in result.stderr
+    assert any(name.endswith(".pstats") for name in os.listdir(tmp_path))
+    assert len(otlp_receiver.spans) == 10
@@ -0,0 +1,126 @@
+# Copyright (c) 2025, WSO2 LLC. (https://www.wso2.com).
+#
+# WSO2 LLC. licenses this file to you under the Apache License,
+# Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""Tests for stack samples attached to spans."""
+
+import threading
+import time
+
+import pytest
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import (
+    InMemorySpanExporter,
+)
+
+from amp_instrumentation.span_profiler import (
+    HOT_FUNCTIONS_ATTRIBUTE,
+    SAMPLES_ATTRIBUTE,
+    STACKS_ATTRIBUTE,
+    SpanProfilingProcessor,
+)
+
+
+@pytest.fixture
+def pipeline():
+    exporter = InMemorySpanExporter()
+    processor = SpanProfilingProcessor(SimpleSpanProcessor(exporter), sample_hz=500)
+    provider = TracerProvider()
+    provider.add_span_processor(processor)
+    yield provider.get_tracer("test"), exporter, processor
+    processor.shutdown()
+
+
+def _apply_filters(seconds):
+    deadline = time.perf_counter() + seconds
+    total = 0
+    while time.perf_counter() < deadline:
+        total += sum(i * i for i in range(1000))
+    return total
+
+
+def _spans(exporter):
+    return {span.name: span for span in exporter.get_finished_spans()}
+
+
+class TestSpanProfilingProcessor:
+    """Tests for SpanProfilingProcessor."""
+
+    def test_hot_function_is_attached_to_span(self, pipeline):
+        """Test that CPU time inside a span shows up in its hot functions."""
+        tracer, exporter, processor = pipeline
+        with tracer.start_as_current_span("search_hotels"):
+            _apply_filters(0.3)
+
+        attributes = _spans(exporter)["search_hotels"].attributes
+        assert attributes[SAMPLES_ATTRIBUTE] > 10
+        hot = attributes[HOT_FUNCTIONS_ATTRIBUTE]
+        assert any("_apply_filters" in entry or "<genexpr>" in entry for entry in hot)
+        heaviest = attributes[STACKS_ATTRIBUTE][0]
+        assert "test_hot_function_is_attached_to_span" in heaviest
+        assert int(heaviest.rsplit(" ", 1)[1]) > 0
+        assert processor.stats()["spans_profiled"] == 1
+        assert processor.stats()["active_spans"] == 0
+
+    def test_samples_go_to_innermost_span(self, pipeline):
+        """Test that a child span gets the samples taken while it was open."""
+        tracer, exporter, _ = pipeline
+        with tracer.start_as_current_span("graph_node"):
+            with tracer.start_as_current_span("tool"):
+                _apply_filters(0.2)
+            time.sleep(0.1)
+
+        spans = _spans(exporter)
+        tool_stacks = spans["tool"].attributes[STACKS_ATTRIBUTE]
+        assert any("_apply_filters" in stack for stack in tool_stacks)
+        node_stacks = spans["graph_node"].attributes.get(STACKS_ATTRIBUTE, ())
+        assert not any("_apply_filters" in stack for stack in node_stacks)
+
+    def test_spans_are_attributed_per_thread(self, pipeline):
+        """Test that spans on other threads keep their own samples."""
+        tracer, exporter, _ = pipeline
+
+        def worker():
+            with tracer.start_as_current_span("worker"):
+                _apply_filters(0.2)
+
+        thread = threading.Thread(target=worker)
+        with tracer.start_as_current_span("main"):
+            thread.start()
+            thread.join()
+
+        spans = _spans(exporter)
+        assert any(
+            "_apply_filters" in stack
+            for stack in spans["worker"].attributes[STACKS_ATTRIBUTE]
+        )
+        main_stacks = spans["main"].attributes.get(STACKS_ATTRIBUTE, ())
+        assert not any("_apply_filters" in stack for stack in main_stacks)
+
+    def test_unsampled_spans_are_unchanged(self):
+        """Test that spans that ended before the first sample carry no profile."""
+        exporter = InMemorySpanExporter()
+        processor = SpanProfilingProcessor(SimpleSpanProcessor(exporter), sample_hz=1)
+        provider = TracerProvider()
+        provider.add_span_processor(processor)
+        try:
+            with provider.get_tracer("test").start_as_current_span("quick") as span:
+                span.set_attribute("key", "value")
+        finally:
+            processor.shutdown()
+
+        assert dict(_spans(exporter)["quick"].attributes) == {"key": "value"}
+        assert processor.stats()["active_spans"] == 0
@@ -0,0 +1,229 @@
+# Copyright (c) 2025, WSO2 LLC. (https://www.wso2.com).
+#
+# WSO2 LLC. licenses this file to you under the Apache License,
+# Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""Tests for the disk-spooling span exporter."""
+
+import gzip
+import os
+import time
+
+import pytest
+import requests
+from opentelemetry.exporter.otlp.proto.common.trace_encoder import encode_spans
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor, SpanExportResult
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import (
+    InMemorySpanExporter,
+)
+
+from amp_instrumentation.spool import SpoolingSpanExporter
+
+
+class FakeResponse:
+    def __init__(self, status_code):
+        self.status_code = status_code
+        self.ok = 200 <= status_code < 300
+
+
+class FakeSession(requests.Session):
+    """Session that records posted payloads and answers with a configurable status."""
+
+    def __init__(self):
+        super().__init__()
+        self.status_code = 200
+        self.payloads = []
+        self.request_headers = []
+
+    def post(self, url, data=None, timeout=None, headers=None, **kwargs):
+        if self.status_code is None:
+            raise requests.ConnectionError("collector unavailable")
+        if self.status_code == 200:
+            self.payloads.append(data)
+            self.request_headers.append(headers or {})
+        return FakeResponse(self.status_code)
+
+
+def _finished_spans(count):
+    memory = InMemorySpanExporter()
+    provider = TracerProvider()
+    provider.add_span_processor(SimpleSpanProcessor(memory))
+    tracer = provider.get_tracer("test")
+    for i in range(count):
+        with tracer.start_as_current_span(f"span-{i}") as span:
+            span.set_attribute("payload", "x" * 100)
+    return memory.get_finished_spans()
+
+
+@pytest.fixture
+def make_exporter(tmp_path):
+    exporters = []
+
+    def factory(session, **kwargs):
+        kwargs.setdefault("replay_interval", 3600)
+        exporter = SpoolingSpanExporter(
+            "http://collector/v1/traces",
+            spool_dir=str(tmp_path),
+            session=session,
+            **kwargs,
+        )
+        exporters.append(exporter)
+        return exporter
+
+    yield factory
+    for exporter in exporters:
+        exporter.shutdown()
+
+
+class TestSpoolingSpanExporter:
+    """Tests for SpoolingSpanExporter."""
+
+    def test_sends_directly_when_collector_is_up(self, make_exporter):
+        """Test that batches are posted without touching disk when delivery succeeds."""
+        session = FakeSession()
+        exporter = make_exporter(session)
+
+        assert exporter.export(_finished_spans(3)) is SpanExportResult.SUCCESS
+
+        stats = exporter.stats()
+        assert stats["spans_sent"] == 3
+        assert stats["spans_spooled"] == 0
+        assert len(session.payloads) == 1
+
+    def test_spools_on_failure_and_replays_in_order(self, make_exporter):
+        """Test that failed batches are spooled and replayed oldest-first."""
+        session = FakeSession()
+        session.status_code = None
+        exporter = make_exporter(session)
+
+        first, second = _finished_spans(2), _finished_spans(3)
+        assert exporter.export(first) is SpanExportResult.SUCCESS
+        # With a backlog, new batches are spooled without trying the collector
+        session.status_code = 200
+        assert exporter.export(second) is SpanExportResult.SUCCESS
+        assert session.payloads == []
+
+        stats = exporter.stats()
+        assert stats["spans_spooled"] == 5
+        assert stats["backlog_spans"] == 5
+        assert stats["send_failures"] == 1
+
+        assert exporter.replay() is True
+        stats = exporter.stats()
+        assert stats["spans_replayed"] == 5
+        assert stats["backlog_spans"] == 0
+        assert stats["spooled_segments"] == 0
+        assert len(session.payloads) == 2
+        assert len(session.payloads[0]) < len(session.payloads[1])
+
+    def test_gzip_batches_are_spooled_compressed(self, make_exporter):
+        """Test that gzip batches are compressed once and replayed with their encoding."""
+        session = FakeSession()
+        session.status_code = None
+        exporter = make_exporter(session, compression="gzip")
+        spans = _finished_spans(20)
+
+        exporter.export(spans)
+        session.status_code = 200
+        assert exporter.replay() is True
+
+        payload = session.payloads[0]
+        assert gzip.decompress(payload) == encode_spans(spans).SerializeToString()
+        assert session.request_headers[0] == {"Content-Encoding": "gzip"}
+
+    def test_replay_stops_when_collector_still_down(self, make_exporter):
+        """Test that a failing replay keeps the backlog for the next attempt."""
+        session = FakeSession()
+        session.status_code = 503
+        exporter = make_exporter(session)
+        exporter.export(_finished_spans(2))
+
+        assert exporter.replay() is False
+        assert exporter.stats()["backlog_spans"] == 2
+
+    def test_permanent_rejection_is_not_spooled(self, make_exporter):
+        """Test that a 400 response drops the batch instead of spooling it."""
+        session = FakeSession()
+        session.status_code = 400
+        exporter = make_exporter(session)
+
+        assert exporter.export(_finished_spans(2)) is SpanExportResult.FAILURE
+        stats = exporter.stats()
+        assert stats["spans_rejected"] == 2
+        assert stats["spooled_segments"] == 0
+
+    def test_disk_cap_evicts_oldest_segments(self, make_exporter):
+        """Test that the spool never exceeds max_bytes and counts evicted spans."""
+        session = FakeSession()
+        session.status_code = None
+        exporter = make_exporter(session, max_bytes=4096, segment_bytes=1024)
+
+        for _ in range(20):
+            exporter.export(_finished_spans(2))
+
+        stats = exporter.stats()
+        assert stats["spooled_bytes"] <= 4096
+        assert stats["spans_evicted"] > 0
+        assert stats["spans_evicted"] + stats["backlog_spans"] == 40
+
+    def test_orphaned_spool_is_adopted(self, tmp_path, make_exporter):
+        """Test that segments left by a dead process are replayed by the next one."""
+        down = FakeSession()
+        down.status_code = None
+        orphan = SpoolingSpanExporter(
+            "http://collector/v1/traces",
+            spool_dir=str(tmp_path),
+            session=down,
+            replay_interval=3600,
+        )
+        orphan.export(_finished_spans(4))
+        orphan.shutdown()
+
+        session = FakeSession()
+        exporter = make_exporter(session)
+        assert exporter.stats()["backlog_spans"] == 4
+        assert not os.path.exists(orphan._dir)
+
+        assert exporter.replay() is True
+        assert exporter.stats()["spans_replayed"] == 4
+
+    def test_live_spools_with_the_same_pid_coexist(self, make_exporter):
+        """Test that processes sharing a spool volume and PID keep separate spools."""
+        down = FakeSession()
+        down.status_code = None
+        first = make_exporter(down)
+        first.export(_finished_spans(2))
+        # Another container running as the same PID starts on the same volume
+        second = make_exporter(FakeSession())
+
+        assert second._dir != first._dir
+        assert second.stats()["backlog_spans"] == 0
+        assert first.stats()["backlog_spans"] == 2
+
+    def test_background_replay_after_recovery(self, make_exporter):
+        """Test that the replay thread drains the backlog once the collector recovers."""
+        session = FakeSession()
+        session.status_code = None
+        exporter = make_exporter(
+            session, replay_interval=0.01, max_replay_interval=0.05
+        )
+        exporter.export(_finished_spans(2))
+        session.status_code = 200
+
+        for _ in range(200):
+            if exporter.stats()["backlog_spans"] == 0:
+                break
+            time.sleep(0.01)
+        assert exporter.stats()["spans_replayed"] == 2
@@ -0,0 +1,164 @@
+# Copyright (c) 2025, WSO2 LLC. (https://www.wso2.com).
+#
+# WSO2 LLC. licenses this file to you under the Apache License,
+# Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""Tests for aggregating streamed LLM responses."""
+
+import json
+
+import pytest
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import (
+    InMemorySpanExporter,
+)
+from opentelemetry.trace import SpanKind
+
+from amp_instrumentation.streaming import (
+    CHUNKS_ATTRIBUTE,
+    INTER_TOKEN_MAX_ATTRIBUTE,
+    INTER_TOKEN_MEAN_ATTRIBUTE,
+    INTER_TOKEN_MIN_ATTRIBUTE,
+    INTER_TOKEN_STDDEV_ATTRIBUTE,
+    TIME_TO_FIRST_TOKEN_ATTRIBUTE,
+    StreamAggregationSpanProcessor,
+)
+
+_CHUNK = "gen_ai.content.completion.chunk"
+_MS = 1_000_000
+
+
+@pytest.fixture
+def pipeline():
+    exporter = InMemorySpanExporter()
+    processor = StreamAggregationSpanProcessor(SimpleSpanProcessor(exporter))
+    provider = TracerProvider()
+    provider.add_span_processor(processor)
+    yield provider, exporter, processor
+    provider.shutdown()
+
+
+class TestStreamAggregationSpanProcessor:
+    """Tests for StreamAggregationSpanProcessor."""
+
+    def test_chunk_events_become_latency_statistics(self, pipeline):
+        """Test that chunk events are replaced by first-token and inter-token stats."""
+        provider, exporter, processor = pipeline
+        span = provider.get_tracer("test").start_span(
+            "openai.chat", kind=SpanKind.CLIENT, start_time=1000 * _MS
+        )
+        for offset_ms in (250, 260, 280, 290):
+            span.add_event(name=_CHUNK, timestamp=(1000 + offset_ms) * _MS)
+        span.add_event("retry", {"attempt": 1})
+        span.end()
+
+        (finished,) = exporter.get_finished_spans()
+        assert [event.name for event in finished.events] == ["retry"]
+        attributes = finished.attributes
+        assert attributes[CHUNKS_ATTRIBUTE] == 4
+        assert attributes[TIME_TO_FIRST_TOKEN_ATTRIBUTE] == 250
+        assert attributes[INTER_TOKEN_MEAN_ATTRIBUTE] == pytest.approx(40 / 3)
+        assert attributes[INTER_TOKEN_STDDEV_ATTRIBUTE] == pytest.approx(
+            4.714, abs=1e-3
+        )
+        assert attributes[INTER_TOKEN_MIN_ATTRIBUTE] == 10
+        assert attributes[INTER_TOKEN_MAX_ATTRIBUTE] == 20
+        assert processor.stats()["chunks_aggregated"] == 4
+        assert processor.stats()["active_spans"] == 0
+        # The span's own add_event is restored
+        assert "add_event" not in span.__dict__
+
+    def test_single_chunk_has_no_inter_token_stats(self, pipeline):
+        """Test that a one-chunk stream only reports time to first token."""
+        provider, exporter, _ = pipeline
+        span = provider.get_tracer("test").start_span(
+            "openai.chat", kind=SpanKind.CLIENT, start_time=0
+        )
+        span.add_event(name=_CHUNK, timestamp=5 * _MS)
+        span.end()
+
+        attributes = exporter.get_finished_spans()[0].attributes
+        assert attributes[CHUNKS_ATTRIBUTE] == 1
+        assert attributes[TIME_TO_FIRST_TOKEN_ATTRIBUTE] == 5
+        assert INTER_TOKEN_MEAN_ATTRIBUTE not in attributes
+
+    def test_other_spans_are_unchanged(self, pipeline):
+        """Test that internal spans and client spans that did not stream are untouched."""
+        provider, exporter, _ = pipeline
+        tracer = provider.get_tracer("test")
+        with tracer.start_as_current_span("graph") as graph:
+            graph.add_event(_CHUNK)
+        with tracer.start_as_current_span("http", kind=SpanKind.CLIENT):
+            pass
+
+        spans = {span.name: span for span in exporter.get_finished_spans()}
+        assert [event.name for event in spans["graph"].events] == [_CHUNK]
+        assert CHUNKS_ATTRIBUTE not in spans["http"].attributes
+
+
+def _sse_stream(words):
+    lines = []
+    for word in words:
+        chunk = {
+            "id": "chatcmpl-1",
+            "object": "chat.completion.chunk",
+            "created": 0,
+            "model": "gpt-4o-mini",
+            "choices": [
+                {"index": 0, "delta": {"content": word}, "finish_reason": None}
+            ],
+        }
+        lines.append(f"data: {json.dumps(chunk)}\n\n")
+    lines.append("data: [DONE]\n\n")
+    return "".join(lines).encode()
+
+
+def test_openai_stream_is_aggregated(pipeline):
+    """Test that an instrumented OpenAI stream exports one span without chunk events."""
+    httpx = pytest.importorskip("httpx")
+    openai = pytest.importorskip("openai")
+    instrumentation = pytest.importorskip("opentelemetry.instrumentation.openai")
+    provider, exporter, _ = pipeline
+
+    words = ["Your ", "hotel ", "is ", "booked."]
+    transport = httpx.MockTransport(
+        lambda request: httpx.Response(
+            200,
+            content=_sse_stream(words),
+            headers={"content-type": "text/event-stream"},
+        )
+    )
+    client = openai.OpenAI(
+        api_key="test-key",
+        base_url="http://llm.test/v1",
+        http_client=httpx.Client(transport=transport),
+    )
+    instrumentor = instrumentation.OpenAIInstrumentor()
+    instrumentor.instrument(tracer_provider=provider)
+    try:
+        stream = client.chat.completions.create(
+            model="gpt-4o-mini",
+            messages=[{"role": "user", "content": "Book it"}],
+            stream=True,
+        )
+        text = "".join(chunk.choices[0].delta.content or "" for chunk in stream)
+    finally:
+        instrumentor.uninstrument()
+
+    assert text == "".join(words)
+    (span,) = exporter.get_finished_spans()
+    assert not span.events
+    assert span.attributes[CHUNKS_ATTRIBUTE] == len(words)
+    assert span.attributes[TIME_TO_FIRST_TOKEN_ATTRIBUTE] > 0
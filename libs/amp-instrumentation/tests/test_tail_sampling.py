@@ -0,0 +1,157 @@
+# Copyright (c) 2025, WSO2 LLC. (https://www.wso2.com).
+#
+# WSO2 LLC. licenses this file to you under the Apache License,
+# Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""Tests for the tail-based sampling span processor."""
+
+import time
+
+import pytest
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import (
+    InMemorySpanExporter,
+)
+from opentelemetry.trace import Status, StatusCode
+
+from amp_instrumentation.tail_sampling import TailSamplingSpanProcessor
+
+
+@pytest.fixture
+def pipeline():
+    """
+    Build a tracer whose spans go through a tail sampler into an in-memory exporter.
+
+    Yields a factory taking the TailSamplingSpanProcessor keyword arguments.
+    """
+    created = []
+
+    def factory(**kwargs):
+        exporter = InMemorySpanExporter()
+        processor = TailSamplingSpanProcessor(SimpleSpanProcessor(exporter), **kwargs)
+        provider = TracerProvider()
+        provider.add_span_processor(processor)
+        created.append(provider)
+        return provider.get_tracer("test"), processor, exporter
+
+    yield factory
+
+    for provider in created:
+        provider.shutdown()
+
+
+class TestTailSamplingSpanProcessor:
+    """Test tail sampling decisions and bookkeeping."""
+
+    def test_buffers_until_root_ends(self, pipeline):
+        """Test that spans are held until the local root span finishes."""
+        tracer, processor, exporter = pipeline(sample_ratio=1.0)
+
+        with tracer.start_as_current_span("root"):
+            with tracer.start_as_current_span("child"):
+                pass
+            assert exporter.get_finished_spans() == ()
+            assert processor.stats()["buffered_spans"] == 1
+
+        assert [s.name for s in exporter.get_finished_spans()] == ["child", "root"]
+        assert processor.stats()["buffered_spans"] == 0
+
+    def test_uninteresting_traces_dropped_at_zero_ratio(self, pipeline):
+        """Test that ordinary traces are dropped when the ratio is zero."""
+        tracer, processor, exporter = pipeline(sample_ratio=0.0)
+
+        with tracer.start_as_current_span("root"):
+            with tracer.start_as_current_span("child"):
+                pass
+
+        assert exporter.get_finished_spans() == ()
+        stats = processor.stats()
+        assert stats["traces_dropped"] == 1
+        assert stats["spans_dropped"] == 2
+
+    def test_error_traces_are_kept(self, pipeline):
+        """Test that a failing child span keeps the whole trace."""
+        tracer, processor, exporter = pipeline(sample_ratio=0.0)
+
+        with tracer.start_as_current_span("root"):
+            with tracer.start_as_current_span("tool") as child:
+                child.set_status(Status(StatusCode.ERROR))
+
+        assert len(exporter.get_finished_spans()) == 2
+        assert processor.stats()["kept_error"] == 1
+
+    def test_slow_traces_are_kept(self, pipeline):
+        """Test that traces above the latency threshold are kept."""
+        tracer, processor, exporter = pipeline(
+            sample_ratio=0.0, latency_threshold_ms=20
+        )
+
+        with tracer.start_as_current_span("fast"):
+            pass
+        with tracer.start_as_current_span("slow"):
+            time.sleep(0.03)
+
+        assert [s.name for s in exporter.get_finished_spans()] == ["slow"]
+        assert processor.stats()["kept_latency"] == 1
+
+    def test_token_heavy_traces_are_kept(self, pipeline):
+        """Test that token usage summed across the trace is compared to the threshold."""
+        tracer, processor, exporter = pipeline(sample_ratio=0.0, token_threshold=1000)
+
+        with tracer.start_as_current_span("root"):
+            for _ in range(2):
+                with tracer.start_as_current_span("openai.chat") as llm:
+                    llm.set_attribute("gen_ai.usage.input_tokens", 400)
+                    llm.set_attribute("gen_ai.usage.output_tokens", 200)
+
+        assert len(exporter.get_finished_spans()) == 3
+        assert processor.stats()["kept_tokens"] == 1
+
+    def test_budget_exceeded_decides_oldest_trace(self, pipeline):
+        """Test that the buffer never holds more than the span budget."""
+        tracer, processor, exporter = pipeline(sample_ratio=1.0, max_buffered_spans=3)
+
+        with tracer.start_as_current_span("root"):
+            for _ in range(5):
+                with tracer.start_as_current_span("child"):
+                    pass
+            assert processor.stats()["buffered_spans"] <= 3
+
+        stats = processor.stats()
+        assert stats["traces_evicted"] >= 1
+        # Spans arriving after the early decision follow it
+        assert len(exporter.get_finished_spans()) == 6
+
+    def test_decision_timeout_flushes_unfinished_traces(self, pipeline):
+        """Test that traces whose root never ends are decided after the wait."""
+        tracer, processor, exporter = pipeline(sample_ratio=1.0, decision_wait_ms=50)
+
+        root = tracer.start_span("root")
+        with tracer.start_as_current_span("child", context=_context_with(root)):
+            pass
+
+        deadline = time.monotonic() + 2
+        while not exporter.get_finished_spans() and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        assert [s.name for s in exporter.get_finished_spans()] == ["child"]
+        assert processor.stats()["traces_expired"] == 1
+        root.end()
+
+
+def _context_with(span):
+    from opentelemetry.trace import set_span_in_context
+
+    return set_span_in_context(span)
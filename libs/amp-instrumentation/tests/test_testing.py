@@ -0,0 +1,106 @@
+# Copyright (c) 2025, WSO2 LLC. (https://www.wso2.com).
+#
+# WSO2 LLC. licenses this file to you under the Apache License,
+# Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""Tests for the local OTLP receiver test utility."""
+
+import os
+
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor, SpanExportResult
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import (
+    InMemorySpanExporter,
+)
+
+from amp_instrumentation import _stats
+from amp_instrumentation._bootstrap import constants as env_vars
+from amp_instrumentation._bootstrap import initialization
+from amp_instrumentation._bootstrap.pipeline import build_span_exporter
+from amp_instrumentation.testing import span_attributes
+
+
+def _finished_spans(count):
+    memory = InMemorySpanExporter()
+    provider = TracerProvider()
+    provider.add_span_processor(SimpleSpanProcessor(memory))
+    tracer = provider.get_tracer("test")
+    for i in range(count):
+        with tracer.start_as_current_span(f"span-{i}") as span:
+            span.set_attribute("index", i)
+            span.set_attribute("tags", ("a", "b"))
+    return memory.get_finished_spans()
+
+
+class TestOTLPReceiver:
+    """Tests for OTLPReceiver."""
+
+    def test_records_spans_bytes_and_headers(self, otlp_receiver):
+        """Test that exported spans, sizes and headers are recorded per batch."""
+        exporter = build_span_exporter(
+            otlp_receiver.endpoint, {"x-amp-api-key": "key"}, compression="gzip"
+        )
+        try:
+            assert exporter.export(_finished_spans(5)) is SpanExportResult.SUCCESS
+        finally:
+            exporter.shutdown()
+
+        assert otlp_receiver.wait_for_spans(5, timeout=5)
+        batch = otlp_receiver.batches[0]
+        assert batch.span_count == 5
+        assert batch.content_encoding == "gzip"
+        assert batch.headers["x-amp-api-key"] == "key"
+        assert span_attributes(otlp_receiver.spans[4]) == {
+            "index": 4,
+            "tags": ("a", "b"),
+        }
+
+        stats = otlp_receiver.stats()
+        assert stats["spans"] == 5
+        assert stats["batches"] == 1
+        assert stats["wire_bytes"] == batch.wire_bytes
+        assert stats["batch_latency_p99_ms"] is not None
+
+    def test_simulated_collector_error(self, otlp_receiver):
+        """Test that a configured error status fails exports without recording them."""
+        otlp_receiver.status_code = 400
+        exporter = build_span_exporter(otlp_receiver.endpoint, {})
+        try:
+            assert exporter.export(_finished_spans(1)) is SpanExportResult.FAILURE
+        finally:
+            exporter.shutdown()
+
+        assert otlp_receiver.stats()["spans"] == 0
+
+    def test_initialize_instrumentation_exports_to_receiver(
+        self, clean_environment, mock_traceloop, otlp_receiver
+    ):
+        """Test that the receiver works as AMP_OTEL_ENDPOINT for the full pipeline."""
+        os.environ[env_vars.AMP_OTEL_ENDPOINT] = otlp_receiver.endpoint
+        os.environ[env_vars.AMP_AGENT_API_KEY] = "test-key"
+        initialization._initialized = False
+
+        initialization.initialize_instrumentation()
+
+        processor = mock_traceloop.init_kwargs["processor"]
+        provider = TracerProvider()
+        provider.add_span_processor(processor)
+        try:
+            with provider.get_tracer("test").start_as_current_span("agent"):
+                pass
+            assert processor.force_flush(5000)
+            assert [span.name for span in otlp_receiver.spans] == ["agent"]
+        finally:
+            processor.shutdown()
+            _stats.unregister("export")
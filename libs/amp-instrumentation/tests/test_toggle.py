@@ -0,0 +1,176 @@
+# Copyright (c) 2025, WSO2 LLC. (https://www.wso2.com).
+#
+# WSO2 LLC. licenses this file to you under the Apache License,
+# Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""Tests for the per-request tracing toggle."""
+
+import asyncio
+
+import pytest
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import (
+    InMemorySpanExporter,
+)
+
+import amp_instrumentation
+from amp_instrumentation.toggle import TracingToggleMiddleware, is_tracing_enabled
+
+
+class TestTracing:
+    """Tests for the tracing context manager."""
+
+    def test_suppresses_and_restores(self):
+        """Test that tracing(False) suppresses tracing only inside the block."""
+        assert is_tracing_enabled()
+        with amp_instrumentation.tracing(False):
+            assert not is_tracing_enabled()
+            with amp_instrumentation.tracing():
+                assert is_tracing_enabled()
+            assert not is_tracing_enabled()
+        assert is_tracing_enabled()
+
+    def test_restores_after_error(self):
+        """Test that the previous setting is restored when the block raises."""
+        with pytest.raises(RuntimeError):
+            with amp_instrumentation.tracing(False):
+                raise RuntimeError("tool failed")
+        assert is_tracing_enabled()
+
+    def test_suppressed_llm_call_creates_no_span(self):
+        """Test that an instrumented OpenAI call in a suppressed block is not traced."""
+        httpx = pytest.importorskip("httpx")
+        openai = pytest.importorskip("openai")
+        instrumentation = pytest.importorskip("opentelemetry.instrumentation.openai")
+
+        exporter = InMemorySpanExporter()
+        provider = TracerProvider()
+        provider.add_span_processor(SimpleSpanProcessor(exporter))
+        completion = {
+            "id": "chatcmpl-1",
+            "object": "chat.completion",
+            "created": 0,
+            "model": "gpt-4o-mini",
+            "choices": [
+                {
+                    "index": 0,
+                    "message": {"role": "assistant", "content": "Booked."},
+                    "finish_reason": "stop",
+                }
+            ],
+            "usage": {"prompt_tokens": 5, "completion_tokens": 2, "total_tokens": 7},
+        }
+        client = openai.OpenAI(
+            api_key="test-key",
+            base_url="http://llm.test/v1",
+            http_client=httpx.Client(
+                transport=httpx.MockTransport(
+                    lambda request: httpx.Response(200, json=completion)
+                )
+            ),
+        )
+        instrumentor = instrumentation.OpenAIInstrumentor()
+        instrumentor.instrument(tracer_provider=provider)
+        try:
+            for enabled in (False, True):
+                with amp_instrumentation.tracing(enabled):
+                    client.chat.completions.create(
+                        model="gpt-4o-mini",
+                        messages=[{"role": "user", "content": "Book it"}],
+                    )
+        finally:
+            instrumentor.uninstrument()
+            provider.shutdown()
+
+        assert len(exporter.get_finished_spans()) == 1
+
+
+def _request(headers=(), query_string=b""):
+    return {
+        "type": "http",
+        "headers": [
+            (name.encode("latin-1"), value.encode("latin-1")) for name, value in headers
+        ],
+        "query_string": query_string,
+    }
+
+
+def _traced(middleware_kwargs, scope):
+    """Run a request through the middleware and return whether it was traced."""
+    seen = []
+
+    async def app(scope, receive, send):
+        seen.append(is_tracing_enabled())
+
+    middleware = TracingToggleMiddleware(app, **middleware_kwargs)
+    asyncio.run(middleware(scope, None, None))
+    return seen[0]
+
+
+class TestTracingToggleMiddleware:
+    """Tests for TracingToggleMiddleware."""
+
+    def test_traces_all_requests_by_default(self):
+        """Test that requests are traced unless tracing is limited to flagged ones."""
+        assert _traced({"flagged_only": False}, _request())
+        assert not _traced({"flagged_only": True}, _request())
+
+    def test_header_switches_tracing(self):
+        """Test that the trace header forces tracing on or off."""
+        on = _request([("x-amp-trace", "true")])
+        off = _request([("x-amp-trace", "0")])
+        assert _traced({"flagged_only": True}, on)
+        assert not _traced({"flagged_only": False}, off)
+        # An explicit header wins over the session allowlist
+        allowlisted_off = _request([("x-amp-trace", "0"), ("x-session-id", "s-1")])
+        assert not _traced({"session_ids": ["s-1"]}, allowlisted_off)
+
+    def test_allowlisted_sessions_are_traced(self):
+        """Test that the session id is matched from the header or the query string."""
+        kwargs = {"flagged_only": True, "session_ids": ["s-1"]}
+        assert _traced(kwargs, _request([("x-session-id", "s-1")]))
+        assert _traced(kwargs, _request(query_string=b"user=u&session_id=s-1"))
+        assert not _traced(kwargs, _request([("x-session-id", "s-2")]))
+
+    def test_allowlist_changes_at_runtime(self):
+        """Test that replacing the allowlist applies to the next request."""
+        seen = []
+
+        async def app(scope, receive, send):
+            seen.append(is_tracing_enabled())
+
+        async def run():
+            middleware = TracingToggleMiddleware(app, flagged_only=True)
+            request = _request([("x-session-id", "s-1")])
+            await middleware(request, None, None)
+            middleware.set_session_ids(["s-1"])
+            await middleware(request, None, None)
+            assert middleware.session_ids == frozenset(["s-1"])
+            # The suppression does not leak out of the request
+            assert is_tracing_enabled()
+
+        asyncio.run(run())
+        assert seen == [False, True]
+
+    def test_reads_environment(self, monkeypatch):
+        """Test that the defaults come from AMP_TRACE_FLAGGED_ONLY and AMP_TRACE_SESSION_IDS."""
+        monkeypatch.setenv("AMP_TRACE_FLAGGED_ONLY", "true")
+        monkeypatch.setenv("AMP_TRACE_SESSION_IDS", "s-1, s-2")
+        assert _traced({}, _request([("x-session-id", "s-2")]))
+        assert not _traced({}, _request([("x-session-id", "s-3")]))
+
+    def test_lifespan_passes_through(self):
+        """Test that non-request scopes are never suppressed."""
+        assert _traced({"flagged_only": True}, {"type": "lifespan"})
@@ -0,0 +1,126 @@
+# Copyright (c) 2025, WSO2 LLC. (https://www.wso2.com).
+#
+# WSO2 LLC. licenses this file to you under the Apache License,
+# Version 2.0 (the "License"); you may not use this file except
+# in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""Tests for span attribute size capping."""
+
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import (
+    InMemorySpanExporter,
+)
+
+from amp_instrumentation.truncation import TruncatingSpanProcessor, truncate_utf8
+
+
+def _pipeline(**limits):
+    exporter = InMemorySpanExporter()
+    processor = TruncatingSpanProcessor(SimpleSpanProcessor(exporter), **limits)
+    provider = TracerProvider()
+    provider.add_span_processor(processor)
+    return provider.get_tracer("test"), exporter, processor
+
+
+class TestTruncateUtf8:
+    """Tests for truncate_utf8."""
+
+    def test_short_value_is_unchanged(self):
+        """Test that values within the limit are returned as is."""
+        assert truncate_utf8("hello", 10) == ("hello", 0)
+
+    def test_marker_fits_within_limit(self):
+        """Test that the truncated value including the marker respects the limit."""
+        value, removed = truncate_utf8("x" * 1000, 100)
+
+        assert len(value.encode("utf-8")) <= 100
+        assert value.endswith("...[truncated from 1000 bytes]")
+        assert removed == 1000 - value.index(".")
+
+    def test_does_not_split_multibyte_characters(self):
+        """Test that cutting inside a multi-byte character drops the whole character."""
+        value, _ = truncate_utf8("é" * 100, 40)
+
+        assert len(value.encode("utf-8")) <= 40
+        assert set(value.split("...[")[0]) == {"é"}
+
+    def test_tiny_limit_cuts_without_marker(self):
+        """Test that limits smaller than the marker still cap the value."""
+        assert truncate_utf8("abcdefgh", 3) == ("abc", 5)
+
+
+class TestTruncatingSpanProcessor:
+    """Tests for TruncatingSpanProcessor."""
+
+    def test_caps_each_attribute(self):
+        """Test that every oversized attribute is capped and others are kept."""
+        tracer, exporter, processor = _pipeline(max_attribute_bytes=64)
+        with tracer.start_as_current_span("llm") as span:
+            span.set_attribute("gen_ai.prompt.0.content", "p" * 10_000)
+            span.set_attribute("gen_ai.completion.0.content", "short")
+            span.set_attribute("gen_ai.usage.total_tokens", 1234)
+            span.set_attribute("tool.results", ("r" * 500, "ok"))
+
+        attributes = exporter.get_finished_spans()[0].attributes
+        assert len(attributes["gen_ai.prompt.0.content"]) <= 64
+        assert "[truncated from 10000 bytes]" in attributes["gen_ai.prompt.0.content"]
+        assert attributes["gen_ai.completion.0.content"] == "short"
+        assert attributes["gen_ai.usage.total_tokens"] == 1234
+        assert len(attributes["tool.results"][0]) <= 64
+        assert attributes["tool.results"][1] == "ok"
+
+        stats = processor.stats()
+        assert stats["spans_truncated"] == 1
+        assert stats["values_truncated"] == 2
+
+    def test_event_budget_is_shared_by_event_values(self):
+        """Test that max_event_bytes caps the total of one event's values."""
+        tracer, exporter, _ = _pipeline(max_event_bytes=100)
+        with tracer.start_as_current_span("llm") as span:
+            span.add_event("prompt", {"a": "a" * 80, "b": "b" * 80})
+            span.add_event("completion", {"c": "c" * 50})
+
+        events = exporter.get_finished_spans()[0].events
+        first = events[0].attributes
+        assert first["a"] == "a" * 80
+        assert len(first["b"]) <= 20
+        assert events[1].attributes["c"] == "c" * 50
+
+    def test_span_budget_covers_attributes_then_events(self):
+        """Test that max_span_bytes is shared by attributes and event values."""
+        tracer, exporter, processor = _pipeline(max_span_bytes=200)
+        with tracer.start_as_current_span("agent") as span:
+            span.set_attribute("input", "i" * 150)
+            span.set_attribute("output", "o" * 150)
+            span.add_event("tool", {"payload": "t" * 150})
+
+        finished = exporter.get_finished_spans()[0]
+        assert finished.attributes["input"] == "i" * 150
+        assert len(finished.attributes["output"]) <= 50
+        assert finished.events[0].attributes["payload"] == ""
+        assert processor.stats()["values_truncated"] == 2
+
+    def test_small_spans_are_untouched(self):
+        """Test that spans within every limit are forwarded without changes."""
+        tracer, exporter, processor = _pipeline(
+            max_attribute_bytes=100, max_event_bytes=100, max_span_bytes=1000
+        )
+        with tracer.start_as_current_span("agent") as span:
+            span.set_attribute("input", "hello")
+            span.add_event("tool", {"payload": "world"})
+
+        finished = exporter.get_finished_spans()[0]
+        assert finished.attributes["input"] == "hello"
+        assert finished.events[0].attributes["payload"] == "world"
+        assert processor.stats()["spans_truncated"] == 0
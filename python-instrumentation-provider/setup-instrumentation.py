@@ -11,6 +11,7 @@ Key functions:
 - Copies instrumentation packages from provider-specific directories
 - Handles sitecustomize.py placement for automatic import
 """
+
 import os
 import shutil
 import sys
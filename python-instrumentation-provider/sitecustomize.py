@@ -45,9 +45,39 @@ def validate_resource_attributes(resource_attributes):
         )
 
 
+def parse_instruments(env_var, instruments_enum):
+    """
+    Parse a comma-separated list of Traceloop instrument names.
+
+    Args:
+        env_var: Name of the environment variable holding the list
+        instruments_enum: The Traceloop Instruments enum
+
+    Returns:
+        A set of Instruments members, or None if the variable is unset
+
+    Raises:
+        ValueError: If a name is not a supported instrument
+    """
+    value = os.getenv(env_var)
+    if not value or not value.strip():
+        return None
+
+    instruments = set()
+    for name in value.split(","):
+        name = name.strip().lower()
+        if not name:
+            continue
+        try:
+            instruments.add(instruments_enum(name))
+        except ValueError:
+            raise ValueError(f"Unknown instrument '{name}' in {env_var}") from None
+    return instruments
+
+
 try:
     # Use traceloop-sdk for OpenLLMetry instrumentation
-    from traceloop.sdk import Traceloop
+    from traceloop.sdk import Instruments, Traceloop
 
     # Validate and read required configuration
     otel_endpoint = os.getenv("AMP_OTEL_ENDPOINT")
@@ -70,11 +100,17 @@ try:
     # Intentional for development environment
     os.environ["OTEL_EXPORTER_OTLP_INSECURE"] = "true"
 
+    # Restrict which instrumentors get loaded (default: all)
+    instruments = parse_instruments("AMP_INSTRUMENTS", Instruments)
+    block_instruments = parse_instruments("AMP_DISABLE_INSTRUMENTS", Instruments)
+
     # Initialize Traceloop with environment variables
     Traceloop.init(
         telemetry_enabled=False,
         api_endpoint=otel_endpoint,
         headers={"x-api-key": api_key},
+        instruments=instruments,
+        block_instruments=block_instruments,
     )
     logger.info("Automatic Tracing initialized successfully.")
 except Exception as e:
@@ -14,6 +14,7 @@ from tools.policies import *
 
 load_dotenv(".env")
 
+
 class Assistant:
     def __init__(self, runnable: Runnable):
         self.runnable = runnable
@@ -27,9 +28,9 @@ class Assistant:
             # If the LLM happens to return an empty response, we will re-prompt it
             # for an actual response.
             if not result.tool_calls and (
-                    not result.content
-                    or isinstance(result.content, list)
-                    and not result.content[0].get("text")
+                not result.content
+                or isinstance(result.content, list)
+                and not result.content[0].get("text")
             ):
                 messages = state["messages"] + [("user", "Respond with a real output.")]
                 state = {**state, "messages": messages}
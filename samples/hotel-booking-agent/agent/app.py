@@ -16,6 +16,7 @@ logging.basicConfig(
 
 agent_graph = build_graph()
 
+
 class ChatRequest(BaseModel):
     message: str
     session_id: str
@@ -26,8 +27,10 @@ class ChatRequest(BaseModel):
 class ChatResponse(BaseModel):
     message: str
 
+
 app = FastAPI(title="Hotel Booking Agent")
 
+
 def _wrap_user_message(user_message: str, user_id: str, user_name: str | None) -> str:
     now = datetime.now(timezone.utc).isoformat()
     resolved_user_id = user_id
@@ -18,4 +18,5 @@ class Settings(BaseSettings):
     )
     model_config = SettingsConfigDict(env_file=".env", extra="ignore")
 
+
 settings = Settings()
@@ -45,16 +45,18 @@ def build_graph():
         response = llm.invoke(messages)
         tool_calls = getattr(response, "tool_calls", None) or []
         if tool_calls:
-            tool_names = [call.get("name") for call in tool_calls if isinstance(call, dict)]
+            tool_names = [
+                call.get("name") for call in tool_calls if isinstance(call, dict)
+            ]
             logger.debug("agent_node decided to call tools: %s", tool_names)
         else:
             logger.debug("agent_node returned a final response (no tool calls).")
         return {"messages": [response]}
 
-    graph = StateGraph(AgentState) #add in memory server
+    graph = StateGraph(AgentState)  # add in memory server
     graph.add_node("agent", agent_node)
-    graph.add_node("tools", ToolNode(tools)) 
-    
+    graph.add_node("tools", ToolNode(tools))
+
     # Remove the mapping - tools_condition returns "tools" or END automatically
     graph.add_conditional_edges("agent", tools_condition)
     graph.add_edge("tools", "agent")
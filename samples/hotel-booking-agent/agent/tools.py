@@ -16,7 +16,9 @@ logger = logging.getLogger(__name__)
 
 class RoomConfiguration(BaseModel):
     room_id: str = Field(..., description="Room ID to book.")
-    number_of_rooms: int = Field(..., description="Number of rooms to book for this room_id.")
+    number_of_rooms: int = Field(
+        ..., description="Number of rooms to book for this room_id."
+    )
     price_per_night: float | None = Field(
         None, description="Room price per night to pass to booking."
     )
@@ -27,14 +29,22 @@ class GuestDetails(BaseModel):
     last_name: str = Field(..., description="Primary guest last name.")
     email: str = Field(..., description="Primary guest email address.")
     phone_number: str = Field(..., description="Primary guest phone number.")
-    nationality: Optional[str] = Field(None, description="Primary guest nationality, if available.")
+    nationality: Optional[str] = Field(
+        None, description="Primary guest nationality, if available."
+    )
 
 
 class SpecialRequests(BaseModel):
-    dietary_requirements: Optional[str] = Field(None, description="Dietary requirements, if any.")
-    accessibility_needs: Optional[str] = Field(None, description="Accessibility needs, if any.")
+    dietary_requirements: Optional[str] = Field(
+        None, description="Dietary requirements, if any."
+    )
+    accessibility_needs: Optional[str] = Field(
+        None, description="Accessibility needs, if any."
+    )
     bed_preference: Optional[str] = Field(None, description="Bed preference, if any.")
-    pet_friendly: bool | None = Field(None, description="Whether the booking should be pet friendly.")
+    pet_friendly: bool | None = Field(
+        None, description="Whether the booking should be pet friendly."
+    )
     other_requests: Optional[str] = Field(None, description="Other special requests.")
 
 
@@ -42,12 +52,16 @@ class BookingRequest(BaseModel):
     user_id: Optional[str] = Field(None, description="User ID for the booking.")
     hotel_id: str = Field(..., description="Hotel ID to book.")
     hotel_name: Optional[str] = Field(None, description="Hotel name, if available.")
-    rooms: list[RoomConfiguration] = Field(..., description="Room configuration(s) to book.")
+    rooms: list[RoomConfiguration] = Field(
+        ..., description="Room configuration(s) to book."
+    )
     check_in_date: str = Field(..., description="Check-in date in YYYY-MM-DD format.")
     check_out_date: str = Field(..., description="Check-out date in YYYY-MM-DD format.")
     number_of_guests: int = Field(..., description="Total number of guests.")
     number_of_rooms: int = Field(..., description="Total number of rooms.")
-    primary_guest: GuestDetails = Field(..., description="Primary guest contact details.")
+    primary_guest: GuestDetails = Field(
+        ..., description="Primary guest contact details."
+    )
     special_requests: SpecialRequests | None = Field(
         None, description="Optional special requests."
     )
@@ -58,13 +72,27 @@ class BookingUpdateRequest(BaseModel):
     booking_id: str = Field(..., description="Booking ID to update.")
     hotel_id: Optional[str] = Field(None, description="Hotel ID to update.")
     hotel_name: Optional[str] = Field(None, description="Hotel name to update.")
-    rooms: list[RoomConfiguration] | None = Field(None, description="Updated room list.")
-    check_in_date: Optional[str] = Field(None, description="Updated check-in date in YYYY-MM-DD format.")
-    check_out_date: Optional[str] = Field(None, description="Updated check-out date in YYYY-MM-DD format.")
-    number_of_guests: int | None = Field(None, description="Updated total number of guests.")
-    number_of_rooms: int | None = Field(None, description="Updated total number of rooms.")
-    primary_guest: GuestDetails | None = Field(None, description="Updated primary guest details.")
-    special_requests: SpecialRequests | None = Field(None, description="Updated special requests.")
+    rooms: list[RoomConfiguration] | None = Field(
+        None, description="Updated room list."
+    )
+    check_in_date: Optional[str] = Field(
+        None, description="Updated check-in date in YYYY-MM-DD format."
+    )
+    check_out_date: Optional[str] = Field(
+        None, description="Updated check-out date in YYYY-MM-DD format."
+    )
+    number_of_guests: int | None = Field(
+        None, description="Updated total number of guests."
+    )
+    number_of_rooms: int | None = Field(
+        None, description="Updated total number of rooms."
+    )
+    primary_guest: GuestDetails | None = Field(
+        None, description="Updated primary guest details."
+    )
+    special_requests: SpecialRequests | None = Field(
+        None, description="Updated special requests."
+    )
 
 
 class BookingCancelRequest(BaseModel):
@@ -105,7 +133,9 @@ def _call_hotel_api(
 ) -> dict[str, Any]:
     url = _booking_api_url(path)
     try:
-        response = requests.request(method, url, params=params, json=json_body, timeout=30)
+        response = requests.request(
+            method, url, params=params, json=json_body, timeout=30
+        )
         response.raise_for_status()
     except requests.RequestException:
         logger.exception("Hotel API request failed: %s %s", method, url)
@@ -115,7 +145,10 @@ def _call_hotel_api(
     except ValueError:
         return {"error": "Hotel API returned non-JSON response."}
     if isinstance(payload, dict) and payload.get("error_code"):
-        return {"error": payload.get("message") or "Hotel API error.", "details": payload}
+        return {
+            "error": payload.get("message") or "Hotel API error.",
+            "details": payload,
+        }
     return payload
 
 
@@ -263,7 +296,9 @@ def search_hotels_tool(
 
 
 @tool
-def get_hotel_info_tool(hotel_id: Optional[str] = None, hotel_name: Optional[str] = None) -> dict[str, Any]:
+def get_hotel_info_tool(
+    hotel_id: Optional[str] = None, hotel_name: Optional[str] = None
+) -> dict[str, Any]:
     """
     Get details for one hotel by id or name.
 
@@ -276,7 +311,9 @@ def get_hotel_info_tool(hotel_id: Optional[str] = None, hotel_name: Optional[str
     """
     candidate = hotel_id or hotel_name or ""
     if candidate.lower().startswith("user_"):
-        return {"error": "Invalid hotel_id provided. Ask for a hotel name or destination."}
+        return {
+            "error": "Invalid hotel_id provided. Ask for a hotel name or destination."
+        }
     clean_id = (hotel_id or "").strip()
     if clean_id and " " not in clean_id:
         resolved_id = clean_id
@@ -479,7 +516,9 @@ def edit_booking_tool(
 
 
 @tool(args_schema=BookingCancelRequest)
-def cancel_booking_tool(booking_id: str, user_id: Optional[str] = None) -> dict[str, Any]:
+def cancel_booking_tool(
+    booking_id: str, user_id: Optional[str] = None
+) -> dict[str, Any]:
     """
     Cancel a booking by booking_id.
 
@@ -490,7 +529,9 @@ def cancel_booking_tool(booking_id: str, user_id: Optional[str] = None) -> dict[
     Returns:
         dict[str, Any]: Cancellation status/details.
     """
-    logger.info("cancel_booking_tool called: booking_id=%s user_id=%s", booking_id, user_id)
+    logger.info(
+        "cancel_booking_tool called: booking_id=%s user_id=%s", booking_id, user_id
+    )
     endpoint = f"{settings.hotel_api_base_url.rstrip('/')}/bookings/{booking_id}"
     try:
         params = {"user_id": user_id} if user_id else None
@@ -503,7 +544,9 @@ def cancel_booking_tool(booking_id: str, user_id: Optional[str] = None) -> dict[
 
 
 @tool(args_schema=BookingListRequest)
-def list_bookings_tool(user_id: Optional[str] = None, status: Optional[str] = None) -> dict[str, Any]:
+def list_bookings_tool(
+    user_id: Optional[str] = None, status: Optional[str] = None
+) -> dict[str, Any]:
     """
     List bookings for a user, optionally filtered by status.
 
@@ -543,7 +586,9 @@ def list_bookings_tool(user_id: Optional[str] = None, status: Optional[str] = No
 
 
 @tool
-def get_weather_forecast_tool(location: str, date: Optional[str] = None) -> dict[str, Any]:
+def get_weather_forecast_tool(
+    location: str, date: Optional[str] = None
+) -> dict[str, Any]:
     """
     Get weather for a location (current or specific date).
 
@@ -628,7 +673,11 @@ def resolve_relative_dates_tool(text: str) -> dict[str, Any]:
 
     if "this weekend" in lowered:
         # Upcoming Saturday/Sunday based on current week.
-        saturday = _next_weekday(5, now) if now.weekday() > 5 else now + timedelta(days=(5 - now.weekday()))
+        saturday = (
+            _next_weekday(5, now)
+            if now.weekday() > 5
+            else now + timedelta(days=(5 - now.weekday()))
+        )
         sunday = saturday + timedelta(days=1)
         _add("this_weekend_start", saturday)
         _add("this_weekend_end", sunday)
@@ -640,6 +689,7 @@ def resolve_relative_dates_tool(text: str) -> dict[str, Any]:
 
     return {"utc_today": now.isoformat(), "resolved": resolved}
 
+
 TOOLS = [
     query_hotel_policy_tool,
     search_hotels_tool,
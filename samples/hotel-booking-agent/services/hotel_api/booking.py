@@ -53,7 +53,9 @@ def _save_bookings(bookings: list[dict[str, Any]]) -> None:
     DATA_PATH.write_text(json.dumps(bookings, indent=2))
 
 
-def _update_booking_record(bookings: list[dict[str, Any]], booking_id: str, updates: dict[str, Any]) -> dict[str, Any] | None:
+def _update_booking_record(
+    bookings: list[dict[str, Any]], booking_id: str, updates: dict[str, Any]
+) -> dict[str, Any] | None:
     for booking in bookings:
         if booking.get("booking_id") == booking_id:
             booking.update(updates)
@@ -120,7 +122,8 @@ def get_booking(booking_id: str, user_id: str):
             (
                 item
                 for item in bookings
-                if item.get("booking_id") == booking_id and item.get("user_id") == user_id
+                if item.get("booking_id") == booking_id
+                and item.get("user_id") == user_id
             ),
             None,
         )
@@ -141,7 +144,8 @@ def update_booking(booking_id: str, payload: dict[str, Any]):
             (
                 item
                 for item in bookings
-                if item.get("booking_id") == booking_id and item.get("user_id") == user_id
+                if item.get("booking_id") == booking_id
+                and item.get("user_id") == user_id
             ),
             None,
         )
@@ -153,10 +157,16 @@ def update_booking(booking_id: str, payload: dict[str, Any]):
             "hotel_name": payload.get("hotel_name", booking.get("hotel_name")),
             "rooms": payload.get("rooms", booking.get("rooms")),
             "check_in_date": payload.get("check_in_date", booking.get("check_in_date")),
-            "check_out_date": payload.get("check_out_date", booking.get("check_out_date")),
-            "number_of_guests": payload.get("number_of_guests", booking.get("number_of_guests")),
+            "check_out_date": payload.get(
+                "check_out_date", booking.get("check_out_date")
+            ),
+            "number_of_guests": payload.get(
+                "number_of_guests", booking.get("number_of_guests")
+            ),
             "primary_guest": payload.get("primary_guest", booking.get("primary_guest")),
-            "special_requests": payload.get("special_requests", booking.get("special_requests")),
+            "special_requests": payload.get(
+                "special_requests", booking.get("special_requests")
+            ),
             "updated_at": _get_current_timestamp(),
         }
         updated_fields["pricing"] = []
@@ -180,7 +190,8 @@ def cancel_booking(booking_id: str, user_id: str):
             (
                 item
                 for item in bookings
-                if item.get("booking_id") == booking_id and item.get("user_id") == user_id
+                if item.get("booking_id") == booking_id
+                and item.get("user_id") == user_id
             ),
             None,
         )
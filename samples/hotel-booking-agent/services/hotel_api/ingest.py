@@ -92,7 +92,9 @@ def ensure_policy_index() -> None:
         logger.exception("failed to check Pinecone index; skipping policy ingest")
         return
 
-    policies_dir = Path(settings.policies_dirs) if settings.policies_dirs else DEFAULT_POLICIES_DIR
+    policies_dir = (
+        Path(settings.policies_dirs) if settings.policies_dirs else DEFAULT_POLICIES_DIR
+    )
     try:
         ingestion = PolicyIngestion(settings)
         ingestion.ingest_all_policies(policies_dir=policies_dir)
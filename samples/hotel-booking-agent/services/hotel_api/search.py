@@ -69,7 +69,9 @@ def _rooms_for_hotel(hotel_id: str) -> list[dict[str, Any]]:
     return [room for room in rooms if room.get("hotel_id") == hotel_id]
 
 
-def _sort_hotels_by_price(items: list[dict[str, Any]], ascending: bool) -> list[dict[str, Any]]:
+def _sort_hotels_by_price(
+    items: list[dict[str, Any]], ascending: bool
+) -> list[dict[str, Any]]:
     return sorted(
         items,
         key=lambda hotel: hotel.get("lowest_price", 0),
@@ -85,7 +87,9 @@ def _sort_hotels_by_rating(items: list[dict[str, Any]]) -> list[dict[str, Any]]:
     )
 
 
-def _paginate(items: list[dict[str, Any]], page: int, page_size: int) -> list[dict[str, Any]]:
+def _paginate(
+    items: list[dict[str, Any]], page: int, page_size: int
+) -> list[dict[str, Any]]:
     start = (page - 1) * page_size
     end = start + page_size
     return items[start:end]
@@ -118,7 +122,9 @@ def _apply_filters(
                 if value
             ).lower()
 
-        filtered = [h for h in filtered if any(token in _searchable_text(h) for token in tokens)]
+        filtered = [
+            h for h in filtered if any(token in _searchable_text(h) for token in tokens)
+        ]
 
     if min_price is not None or max_price is not None:
         tmp = []
@@ -198,7 +204,9 @@ def search_hotels(
 
     data = _load_dataset()
     hotels = data.get("hotels") or []
-    filtered = _apply_filters(hotels, destination, min_price, max_price, min_rating, amenities, sort_by)
+    filtered = _apply_filters(
+        hotels, destination, min_price, max_price, min_rating, amenities, sort_by
+    )
     paginated = _paginate(filtered, page, page_size)
 
     return {
@@ -223,7 +231,11 @@ def get_hotel_details(
         hotel = None
         data = _load_dataset()
         match = next(
-            (item for item in data.get("hotels", []) if item.get("hotel_id") == hotel_id),
+            (
+                item
+                for item in data.get("hotels", [])
+                if item.get("hotel_id") == hotel_id
+            ),
             None,
         )
         if match:
@@ -296,7 +308,9 @@ def check_availability(
         (item for item in data.get("hotels", []) if item.get("hotel_id") == hotel_id),
         None,
     )
-    hotel_name = str(match.get("hotel_name") or match.get("name") or "") if match else ""
+    hotel_name = (
+        str(match.get("hotel_name") or match.get("name") or "") if match else ""
+    )
     rooms_out = _rooms_for_guests(_rooms_for_hotel(hotel_id), guests, room_count)
     return {
         "hotel_name": hotel_name,
@@ -395,4 +409,6 @@ def get_hotel_availability_route(
         )
     except HotelSearchError:
         logger.exception("get_hotel_availability failed")
-        return _error_response("Hotel availability unavailable", "HOTEL_AVAILABILITY_FAILED")
+        return _error_response(
+            "Hotel availability unavailable", "HOTEL_AVAILABILITY_FAILED"
+        )